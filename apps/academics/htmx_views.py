@@ -20,6 +20,8 @@ from .models import (
     AcademicProgress
 )
 from core.utils import parse_filters, paginate_queryset
+from utils.utils import get_search_stats
+from utils.async_views import async_htmx_view
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +30,7 @@ logger = logging.getLogger(__name__)
 # ACADEMIC SESSION SEARCH
 # =============================================================================
 
+@async_htmx_view
 def session_search(request):
     """HTMX-compatible academic session search with pagination and stats"""
     
@@ -87,27 +90,21 @@ def session_search(request):
     # Paginate
     sessions_page, paginator = paginate_queryset(request, sessions, per_page=10)
     
-    # Calculate stats from filtered queryset
-    total = sessions.count()
+    # Calculate stats (one aggregate query, total from the paginator)
     current_date = timezone.now().date()
     
-    stats = {
-        'total': total,
-        'current': sessions.filter(is_current=True).count(),
-        'active': sessions.filter(is_active=True).count(),
-        'closed': sessions.filter(is_academically_closed=True).count(),
-        'special': sessions.filter(is_special_session=True).count(),
-        'regular': sessions.filter(is_special_session=False).count(),
-        'upcoming': sessions.filter(start_date__gt=current_date).count(),
-        'ongoing': sessions.filter(
-            start_date__lte=current_date,
-            end_date__gte=current_date,
-            is_active=True
-        ).count(),
-        'completed': sessions.filter(end_date__lt=current_date).count(),
-        'allows_promotion': sessions.filter(allows_promotion=True).count(),
-        'promotion_done': sessions.filter(promotion_done=True).count(),
-    }
+    stats = get_search_stats(sessions, paginator, counts={
+        'current': Q(is_current=True),
+        'active': Q(is_active=True),
+        'closed': Q(is_academically_closed=True),
+        'special': Q(is_special_session=True),
+        'regular': Q(is_special_session=False),
+        'upcoming': Q(start_date__gt=current_date),
+        'ongoing': Q(start_date__lte=current_date, end_date__gte=current_date, is_active=True),
+        'completed': Q(end_date__lt=current_date),
+        'allows_promotion': Q(allows_promotion=True),
+        'promotion_done': Q(promotion_done=True),
+    })
     
     return render(request, 'academics/sessions/_session_results.html', {
         'sessions_page': sessions_page,
@@ -119,6 +116,7 @@ def session_search(request):
 # HOLIDAY SEARCH
 # =============================================================================
 
+@async_htmx_view
 def holiday_search(request):
     """HTMX-compatible holiday search with pagination and stats"""
     
@@ -173,30 +171,22 @@ def holiday_search(request):
     # Paginate
     holidays_page, paginator = paginate_queryset(request, holidays, per_page=20)
     
-    # Calculate stats
-    total = holidays.count()
+    # Calculate stats (one aggregate query, total from the paginator)
     current_date = timezone.now().date()
     
-    stats = {
-        'total': total,
-        'school_closed': holidays.filter(is_school_closed=True).count(),
-        'partial_closure': holidays.filter(is_partial_closure=True).count(),
-        'recurring': holidays.filter(is_recurring=True).count(),
-        'current': holidays.filter(
-            start_date__lte=current_date,
-            end_date__gte=current_date
-        ).count() + holidays.filter(
-            start_date=current_date,
-            end_date__isnull=True
-        ).count(),
-        'upcoming': holidays.filter(start_date__gt=current_date).count(),
-        'past': holidays.filter(
-            Q(end_date__lt=current_date) |
-            Q(start_date__lt=current_date, end_date__isnull=True)
-        ).count(),
-        'public': holidays.filter(holiday_type='PUBLIC').count(),
-        'school_break': holidays.filter(holiday_type='SCHOOL_BREAK').count(),
-    }
+    stats = get_search_stats(holidays, paginator, counts={
+        'school_closed': Q(is_school_closed=True),
+        'partial_closure': Q(is_partial_closure=True),
+        'recurring': Q(is_recurring=True),
+        'current': (
+            Q(start_date__lte=current_date, end_date__gte=current_date) |
+            Q(start_date=current_date, end_date__isnull=True)
+        ),
+        'upcoming': Q(start_date__gt=current_date),
+        'past': Q(end_date__lt=current_date) | Q(start_date__lt=current_date, end_date__isnull=True),
+        'public': Q(holiday_type='PUBLIC'),
+        'school_break': Q(holiday_type='SCHOOL_BREAK'),
+    })
     
     return render(request, 'academics/holidays/_holiday_results.html', {
         'holidays_page': holidays_page,
@@ -208,6 +198,7 @@ def holiday_search(request):
 # SUBJECT SEARCH
 # =============================================================================
 
+@async_htmx_view
 def subject_search(request):
     """HTMX-compatible subject search with pagination and stats"""
     
@@ -262,21 +253,19 @@ def subject_search(request):
     # Paginate
     subjects_page, paginator = paginate_queryset(request, subjects, per_page=10)
     
-    # Calculate stats
-    total = subjects.count()
-    
-    stats = {
-        'total': total,
-        'active': subjects.filter(is_active=True).count(),
-        'inactive': subjects.filter(is_active=False).count(),
-        'compulsory': subjects.filter(is_compulsory=True).count(),
-        'optional': subjects.filter(is_compulsory=False).count(),
-        'with_prerequisites': subjects.filter(prerequisites__isnull=False).distinct().count(),
-        'textbook_required': subjects.filter(textbook_required=True).count(),
-        'beginner': subjects.filter(difficulty_level='BEGINNER').count(),
-        'intermediate': subjects.filter(difficulty_level='INTERMEDIATE').count(),
-        'advanced': subjects.filter(difficulty_level='ADVANCED').count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(subjects, paginator, counts={
+        'active': Q(is_active=True),
+        'inactive': Q(is_active=False),
+        'compulsory': Q(is_compulsory=True),
+        'optional': Q(is_compulsory=False),
+        'textbook_required': Q(textbook_required=True),
+        'beginner': Q(difficulty_level='BEGINNER'),
+        'intermediate': Q(difficulty_level='INTERMEDIATE'),
+        'advanced': Q(difficulty_level='ADVANCED'),
+    }, distinct={
+        'with_prerequisites': ('pk', Q(prerequisites__isnull=False)),
+    })
     
     return render(request, 'academics/subjects/_subject_results.html', {
         'subjects_page': subjects_page,
@@ -288,6 +277,7 @@ def subject_search(request):
 # ACADEMIC LEVEL SEARCH
 # =============================================================================
 
+@async_htmx_view
 def academic_level_search(request):
     """HTMX-compatible academic level search with pagination and stats"""
     
@@ -327,16 +317,14 @@ def academic_level_search(request):
     # Paginate
     levels_page, paginator = paginate_queryset(request, levels, per_page=20)
     
-    # Calculate stats
-    total = levels.count()
-    
-    stats = {
-        'total': total,
-        'active': levels.filter(is_active=True).count(),
-        'with_sections': levels.filter(has_sections=True).count(),
-        'graduation_levels': levels.filter(is_graduation_level=True).count(),
-        'total_classes': sum(level.class_count for level in levels),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(levels, paginator, counts={
+        'active': Q(is_active=True),
+        'with_sections': Q(has_sections=True),
+        'graduation_levels': Q(is_graduation_level=True),
+    }, aggregates={
+        'total_classes': Sum('class_count'),
+    })
     
     return render(request, 'academics/levels/_level_results.html', {
         'levels_page': levels_page,
@@ -348,6 +336,7 @@ def academic_level_search(request):
 # CLASSROOM SEARCH
 # =============================================================================
 
+@async_htmx_view
 def classroom_search(request):
     """HTMX-compatible classroom search with pagination and stats"""
     
@@ -417,21 +406,21 @@ def classroom_search(request):
     # Paginate
     classrooms_page, paginator = paginate_queryset(request, classrooms, per_page=10)
     
-    # Calculate stats
-    total = classrooms.count()
-    
-    stats = {
-        'total': total,
-        'active': classrooms.filter(is_active=True).count(),
-        'regular': classrooms.filter(room_type='REGULAR').count(),
-        'labs': classrooms.filter(room_type__in=['LABORATORY', 'COMPUTER_LAB', 'SCIENCE_LAB']).count(),
-        'with_projector': classrooms.filter(has_projector=True).count(),
-        'with_computer': classrooms.filter(has_computer=True).count(),
-        'with_ac': classrooms.filter(has_air_conditioning=True).count(),
-        'bookable': classrooms.filter(is_bookable=True).count(),
-        'total_capacity': classrooms.aggregate(Sum('capacity'))['capacity__sum'] or 0,
-        'avg_capacity': round(classrooms.aggregate(Avg('capacity'))['capacity__avg'] or 0, 1),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(classrooms, paginator, counts={
+        'active': Q(is_active=True),
+        'regular': Q(room_type='REGULAR'),
+        'labs': Q(room_type__in=['LABORATORY', 'COMPUTER_LAB', 'SCIENCE_LAB']),
+        'with_projector': Q(has_projector=True),
+        'with_computer': Q(has_computer=True),
+        'with_ac': Q(has_air_conditioning=True),
+        'bookable': Q(is_bookable=True),
+    }, sums={
+        'total_capacity': 'capacity',
+    }, aggregates={
+        'avg_capacity': Avg('capacity'),
+    })
+    stats['avg_capacity'] = round(stats['avg_capacity'], 1)
     
     return render(request, 'academics/classrooms/_classroom_results.html', {
         'classrooms_page': classrooms_page,
@@ -443,6 +432,7 @@ def classroom_search(request):
 # CLASS SEARCH
 # =============================================================================
 
+@async_htmx_view
 def class_search(request):
     """HTMX-compatible class search with pagination and stats"""
     
@@ -500,22 +490,21 @@ def class_search(request):
     # Paginate
     classes_page, paginator = paginate_queryset(request, classes, per_page=10)
     
-    # Calculate stats
-    total = classes.count()
-    
-    stats = {
-        'total': total,
-        'active': classes.filter(is_active=True).count(),
-        'with_teacher': classes.filter(class_teacher__isnull=False).count(),
-        'with_classroom': classes.filter(classroom__isnull=False).count(),
-        'total_capacity': classes.aggregate(Sum('max_students'))['max_students__sum'] or 0,
-        'total_enrolled': sum(c.enrollment_count for c in classes),
-        'avg_class_size': round(
-            sum(c.enrollment_count for c in classes) / total if total > 0 else 0,
-            1
-        ),
-        'full_classes': sum(1 for c in classes if c.enrollment_count >= c.max_students),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(classes, paginator, counts={
+        'active': Q(is_active=True),
+        'with_teacher': Q(class_teacher__isnull=False),
+        'with_classroom': Q(classroom__isnull=False),
+        'full_classes': Q(enrollment_count__gte=F('max_students')),
+    }, sums={
+        'total_capacity': 'max_students',
+    }, aggregates={
+        'total_enrolled': Sum('enrollment_count'),
+    })
+    stats['avg_class_size'] = round(
+        stats['total_enrolled'] / stats['total'] if stats['total'] > 0 else 0,
+        1
+    )
     
     return render(request, 'academics/classes/_class_results.html', {
         'classes_page': classes_page,
@@ -527,6 +516,7 @@ def class_search(request):
 # CLASS SUBJECT SEARCH
 # =============================================================================
 
+@async_htmx_view
 def class_subject_search(request):
     """HTMX-compatible class subject search with pagination and stats"""
     
@@ -578,21 +568,18 @@ def class_subject_search(request):
     # Paginate
     class_subjects_page, paginator = paginate_queryset(request, class_subjects, per_page=20)
     
-    # Calculate stats
-    total = class_subjects.count()
-    
-    stats = {
-        'total': total,
-        'active': class_subjects.filter(is_active=True).count(),
-        'compulsory': class_subjects.filter(is_optional=False).count(),
-        'optional': class_subjects.filter(is_optional=True).count(),
-        'with_teacher': class_subjects.filter(teacher__isnull=False).count(),
-        'avg_hours_per_week': round(
-            class_subjects.aggregate(Avg('hours_per_week'))['hours_per_week__avg'] or 0,
-            1
-        ),
-        'total_hours': class_subjects.aggregate(Sum('total_hours'))['total_hours__sum'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(class_subjects, paginator, counts={
+        'active': Q(is_active=True),
+        'compulsory': Q(is_optional=False),
+        'optional': Q(is_optional=True),
+        'with_teacher': Q(teacher__isnull=False),
+    }, sums={
+        'total_hours': 'total_hours',
+    }, aggregates={
+        'avg_hours_per_week': Avg('hours_per_week'),
+    })
+    stats['avg_hours_per_week'] = round(stats['avg_hours_per_week'], 1)
     
     return render(request, 'academics/class_subjects/_class_subject_results.html', {
         'class_subjects_page': class_subjects_page,
@@ -604,6 +591,7 @@ def class_subject_search(request):
 # STUDENT CLASS ENROLLMENT SEARCH
 # =============================================================================
 
+@async_htmx_view
 def enrollment_search(request):
     """HTMX-compatible student enrollment search with pagination and stats"""
     
@@ -677,20 +665,17 @@ def enrollment_search(request):
     # Paginate
     enrollments_page, paginator = paginate_queryset(request, enrollments, per_page=10)
     
-    # Calculate stats
-    total = enrollments.count()
-    
-    stats = {
-        'total': total,
-        'active': enrollments.filter(is_active=True).count(),
-        'ongoing': enrollments.filter(completion_status='ONGOING').count(),
-        'completed': enrollments.filter(completion_status='COMPLETED').count(),
-        'new_admissions': enrollments.filter(enrollment_type='NEW').count(),
-        'continuing': enrollments.filter(enrollment_type='CONTINUING').count(),
-        'transfers': enrollments.filter(enrollment_type='TRANSFER_IN').count(),
-        'repeaters': enrollments.filter(enrollment_type='REPEATER').count(),
-        'with_invoice': enrollments.filter(academic_invoice__isnull=False).count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(enrollments, paginator, counts={
+        'active': Q(is_active=True),
+        'ongoing': Q(completion_status='ONGOING'),
+        'completed': Q(completion_status='COMPLETED'),
+        'new_admissions': Q(enrollment_type='NEW'),
+        'continuing': Q(enrollment_type='CONTINUING'),
+        'transfers': Q(enrollment_type='TRANSFER_IN'),
+        'repeaters': Q(enrollment_type='REPEATER'),
+        'with_invoice': Q(academic_invoice__isnull=False),
+    })
     
     return render(request, 'academics/enrollments/_enrollment_results.html', {
         'enrollments_page': enrollments_page,
@@ -702,6 +687,7 @@ def enrollment_search(request):
 # ACADEMIC PROGRESS SEARCH
 # =============================================================================
 
+@async_htmx_view
 def progress_search(request):
     """HTMX-compatible academic progress search with pagination and stats"""
     
@@ -774,30 +760,22 @@ def progress_search(request):
     # Paginate
     progress_page, paginator = paginate_queryset(request, progress_records, per_page=20)
     
-    # Calculate stats
-    total = progress_records.count()
-    
-    stats = {
-        'total': total,
-        'finalized': progress_records.filter(is_final=True).count(),
-        'eligible_for_promotion': progress_records.filter(is_eligible_for_promotion=True).count(),
-        'promoted': progress_records.filter(promotion_decision='PROMOTED').count(),
-        'repeat': progress_records.filter(promotion_decision='REPEAT').count(),
-        'pending': progress_records.filter(promotion_decision='PENDING').count(),
-        'excellent': progress_records.filter(progress_status='EXCELLENT').count(),
-        'good': progress_records.filter(progress_status='GOOD').count(),
-        'needs_improvement': progress_records.filter(progress_status='NEEDS_IMPROVEMENT').count(),
-        'avg_gpa': round(
-            progress_records.filter(gpa__isnull=False).aggregate(Avg('gpa'))['gpa__avg'] or 0,
-            2
-        ),
-        'avg_attendance': round(
-            progress_records.filter(attendance_percentage__isnull=False).aggregate(
-                Avg('attendance_percentage')
-            )['attendance_percentage__avg'] or 0,
-            1
-        ),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(progress_records, paginator, counts={
+        'finalized': Q(is_final=True),
+        'eligible_for_promotion': Q(is_eligible_for_promotion=True),
+        'promoted': Q(promotion_decision='PROMOTED'),
+        'repeat': Q(promotion_decision='REPEAT'),
+        'pending': Q(promotion_decision='PENDING'),
+        'excellent': Q(progress_status='EXCELLENT'),
+        'good': Q(progress_status='GOOD'),
+        'needs_improvement': Q(progress_status='NEEDS_IMPROVEMENT'),
+    }, aggregates={
+        'avg_gpa': Avg('gpa', filter=Q(gpa__isnull=False)),
+        'avg_attendance': Avg('attendance_percentage', filter=Q(attendance_percentage__isnull=False)),
+    })
+    stats['avg_gpa'] = round(stats['avg_gpa'], 2)
+    stats['avg_attendance'] = round(stats['avg_attendance'], 1)
     
     return render(request, 'academics/progress/_progress_results.html', {
         'progress_page': progress_page,
@@ -809,6 +787,7 @@ def progress_search(request):
 # QUICK STATS ENDPOINTS (for dashboard widgets)
 # =============================================================================
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def session_quick_stats(request):
     """Get quick statistics for academic sessions"""
@@ -826,6 +805,7 @@ def session_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def class_quick_stats(request):
     """Get quick statistics for classes"""
@@ -845,6 +825,7 @@ def class_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def enrollment_quick_stats(request):
     """Get quick statistics for student enrollments"""
@@ -410,32 +410,28 @@ def bulk_enrollment_process(request):
         class_instance = Class.objects.get(pk=class_id)
         session = AcademicSession.objects.get(pk=session_id)
         
-        # Use bulk enrollment service
+        # Queue the enrollments for the background worker (utils.jobs)
         from .services import BulkEnrollmentService
         
-        results = BulkEnrollmentService.bulk_enroll_students(
+        job = BulkEnrollmentService.queue_bulk_enroll_students(
             students=students,
             class_instance=class_instance,
             session=session,
+            user=request.user,
             enrollment_type=enrollment_type
         )
         
-        message = f"Bulk enrollment completed: {len(results['enrolled'])} enrolled, {len(results['failed'])} failed"
-        
-        if results['failed']:
-            message += f". Failures: {', '.join([f['student'].get_full_name() for f in results['failed'][:3]])}"
-            if len(results['failed']) > 3:
-                message += f" and {len(results['failed']) - 3} others"
-        
+        message = f"Bulk enrollment of {job.total_items} students has been queued"
         messages.success(request, message)
         
         return JsonResponse({
             'success': True,
             'message': message,
+            'job_id': str(job.pk),
             'results': {
-                'enrolled_count': len(results['enrolled']),
-                'failed_count': len(results['failed']),
-                'total_count': results['total']
+                'enrolled_count': 0,
+                'failed_count': 0,
+                'total_count': job.total_items
             }
         })
         
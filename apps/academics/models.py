@@ -425,7 +425,7 @@ class AcademicSession(BaseModel):
         # ✅ SMART VALIDATION: Only enforce SchoolConfiguration for regular sessions
         if not self.is_special_session:
             try:
-                config = SchoolConfiguration.get_instance()
+                config = SchoolConfiguration.get_cached_instance()
                 if config:
                     # Validate term_number against config for regular sessions
                     if not config.validate_period_number(self.term_number):
@@ -487,7 +487,7 @@ class AcademicSession(BaseModel):
         if not self.is_special_session:
             # ✅ REGULAR SESSION - strict auto-generation from config
             try:
-                config = SchoolConfiguration.get_instance()
+                config = SchoolConfiguration.get_cached_instance()
                 if config:
                     # Auto-set period_type if blank
                     if not self.period_type:
@@ -0,0 +1,315 @@
+# academics/school_calendar.py
+
+"""
+Working-day calendar of a school.
+
+get_working_days() used to walk a date range one day at a time with one
+Holiday query per day (about 90 queries for a term), and core.utils had its
+own day-by-day loop. The calendar loads the Holiday ranges of a calendar
+year once and keeps:
+
+- a bitmap of holiday days (one byte per day of the year), and
+- running totals of school days, with and without weekends excluded,
+
+so checking a day and counting the school days of any range are O(1), and
+finding the n-th school day after a date is a binary search.
+
+A day is a holiday when any Holiday covers it (start_date to end_date, or
+start_date alone for single-day holidays), exactly as is_holiday() has
+always decided.
+
+Years are cached per school database at two levels, like the settings
+cache (utils.cache.LocalTenantCache): a process-local LRU trusted for
+LOCAL_TTL seconds, and the shared tenant cache ('calendar' namespace).
+Saving or deleting a Holiday invalidates both (academics.signals).
+
+Configuration (settings.SCHOOL_CALENDAR, all keys optional):
+    LOCAL_TTL: Seconds a local year is used before re-checking the shared key.
+    SHARED_TTL: Seconds a year is kept in the shared cache.
+    MAX_ENTRIES: Local LRU size (years x schools).
+
+Example:
+    from academics.school_calendar import working_days_between, nth_school_day_after
+
+    days = working_days_between(term.start_date, term.end_date)
+    due_date = nth_school_day_after(invoice.issue_date, 10)
+"""
+
+import logging
+from array import array
+from bisect import bisect_left
+from datetime import date, timedelta
+
+from django.conf import settings
+
+from utils.cache import LocalTenantCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CALENDAR_SETTINGS = {
+    'LOCAL_TTL': 30,
+    'SHARED_TTL': 86400,
+    'MAX_ENTRIES': 128,
+}
+
+CACHE_NAMESPACE = 'calendar'
+
+# Years searched by nth_school_day_after before giving up
+MAX_SEARCH_YEARS = 10
+
+
+def get_calendar_settings():
+    """
+    Get the school calendar configuration merged with defaults.
+
+    Returns:
+        dict: LOCAL_TTL, SHARED_TTL and MAX_ENTRIES
+    """
+    config = dict(DEFAULT_CALENDAR_SETTINGS)
+    config.update(getattr(settings, 'SCHOOL_CALENDAR', {}) or {})
+    return config
+
+
+_years = LocalTenantCache(get_calendar_settings)
+
+
+# =============================================================================
+# CALENDAR YEAR
+# =============================================================================
+
+class CalendarYear:
+    """
+    School days of one calendar year.
+
+    holidays[i] is 1 when day i of the year (0 = January 1) is a holiday.
+    school_days[mode][i] is the number of school days before day i, for
+    mode 1 (weekends excluded) and mode 0 (weekends count).
+    """
+
+    __slots__ = ('year', 'first_day', 'holidays', 'school_days')
+
+    def __init__(self, year, holiday_ranges):
+        self.year = year
+        self.first_day = date(year, 1, 1)
+        length = (date(year + 1, 1, 1) - self.first_day).days
+
+        holidays = bytearray(length)
+        for start, end in holiday_ranges:
+            first = max((start - self.first_day).days, 0)
+            last = min(((end or start) - self.first_day).days, length - 1)
+            if first <= last:
+                holidays[first:last + 1] = b'\x01' * (last - first + 1)
+        self.holidays = bytes(holidays)
+
+        all_days = array('H', [0])
+        weekdays = array('H', [0])
+        weekday = self.first_day.weekday()
+        for index in range(length):
+            is_open = not holidays[index]
+            all_days.append(all_days[-1] + is_open)
+            weekdays.append(weekdays[-1] + (is_open and (weekday + index) % 7 < 5))
+        self.school_days = (all_days, weekdays)
+
+    def __len__(self):
+        return len(self.holidays)
+
+    def index(self, day):
+        return (day - self.first_day).days
+
+    def is_holiday(self, day):
+        return bool(self.holidays[self.index(day)])
+
+    def count(self, first, last, exclude_weekends=True):
+        """School days from day index first to last (inclusive)."""
+        totals = self.school_days[exclude_weekends]
+        return totals[last + 1] - totals[first]
+
+    def find(self, after, n, exclude_weekends=True):
+        """
+        Day index of the n-th school day after day index after, or None
+        (with the number of school days found) if the year ends first.
+        """
+        totals = self.school_days[exclude_weekends]
+        target = totals[after + 1] + n
+        if target > totals[-1]:
+            return None, totals[-1] - totals[after + 1]
+        # First index whose running total reaches target, minus the leading 0
+        return bisect_left(totals, target) - 1, n
+
+
+def load_calendar_year(year, using=None):
+    """
+    Build the calendar of a year from the Holiday table (one query).
+
+    Args:
+        year (int): Calendar year
+        using (str): Database alias (defaults to the current school database)
+
+    Returns:
+        CalendarYear
+    """
+    from django.db.models import Q
+    from .models import Holiday
+
+    first_day, last_day = date(year, 1, 1), date(year, 12, 31)
+    holidays = Holiday.objects.all()
+    if using:
+        holidays = holidays.using(using)
+
+    ranges = holidays.filter(start_date__lte=last_day).filter(
+        Q(end_date__gte=first_day) | Q(end_date__isnull=True, start_date__gte=first_day)
+    ).values_list('start_date', 'end_date')
+
+    return CalendarYear(year, list(ranges))
+
+
+def get_calendar_year(year, using=None):
+    """
+    Get the (cached) calendar of a year for a school.
+
+    Args:
+        year (int): Calendar year
+        using (str): Database alias (defaults to the current school database)
+
+    Returns:
+        CalendarYear
+    """
+    return _years.get_or_load(
+        f"year:{year}", lambda: load_calendar_year(year, using), CACHE_NAMESPACE, using
+    )
+
+
+def invalidate_school_calendar(using=None):
+    """
+    Drop the cached calendars of a school in every process.
+
+    Called when a Holiday is saved or deleted. Invalidates now and again
+    when the surrounding transaction commits, like invalidate_settings().
+
+    Args:
+        using (str): Database alias (defaults to the current school database)
+    """
+    _years.invalidate(CACHE_NAMESPACE, using)
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+def is_holiday(day, using=None):
+    """
+    Check if a date is covered by a holiday.
+
+    Args:
+        day (date): Date to check
+        using (str): Database alias (defaults to the current school database)
+
+    Returns:
+        bool: True if a Holiday covers the date
+    """
+    return get_calendar_year(day.year, using).is_holiday(day)
+
+
+def is_school_day(day, exclude_weekends=True, using=None):
+    """
+    Check if a date is a school day (not a holiday, nor a weekend day).
+
+    Args:
+        day (date): Date to check
+        exclude_weekends (bool): Saturdays and Sundays are not school days
+        using (str): Database alias (defaults to the current school database)
+
+    Returns:
+        bool: True if school day
+    """
+    if exclude_weekends and day.weekday() >= 5:  # Saturday=5, Sunday=6
+        return False
+    return not is_holiday(day, using)
+
+
+def working_days_between(start_date, end_date, exclude_weekends=True, using=None):
+    """
+    Count the school days from start_date to end_date (both inclusive).
+
+    Args:
+        start_date (date): Range start
+        end_date (date): Range end
+        exclude_weekends (bool): Saturdays and Sundays are not school days
+        using (str): Database alias (defaults to the current school database)
+
+    Returns:
+        int: Number of school days (0 for an empty or reversed range)
+
+    Example:
+        >>> term_days = working_days_between(term.start_date, term.end_date)
+    """
+    if not start_date or not end_date or start_date > end_date:
+        return 0
+
+    total = 0
+    for year in range(start_date.year, end_date.year + 1):
+        calendar = get_calendar_year(year, using)
+        first = calendar.index(start_date) if year == start_date.year else 0
+        last = calendar.index(end_date) if year == end_date.year else len(calendar) - 1
+        total += calendar.count(first, last, exclude_weekends)
+    return total
+
+
+def nth_school_day_after(start_date, n, exclude_weekends=True, using=None):
+    """
+    Find the n-th school day after a date (start_date itself not counted).
+
+    Args:
+        start_date (date): Reference date
+        n (int): Number of school days to move forward (>= 1)
+        exclude_weekends (bool): Saturdays and Sundays are not school days
+        using (str): Database alias (defaults to the current school database)
+
+    Returns:
+        date: The n-th school day, or None if none is found within
+              MAX_SEARCH_YEARS years
+
+    Example:
+        >>> # Fee due 10 school days after the invoice date
+        >>> due_date = nth_school_day_after(invoice.issue_date, 10)
+    """
+    if n < 1:
+        return start_date
+
+    calendar = get_calendar_year(start_date.year, using)
+    after = calendar.index(start_date)
+
+    for _ in range(MAX_SEARCH_YEARS):
+        index, found = calendar.find(after, n, exclude_weekends)
+        if index is not None:
+            return calendar.first_day + timedelta(days=index)
+        n -= found
+        calendar = get_calendar_year(calendar.year + 1, using)
+        after = -1
+
+    return None
+
+
+def school_days_in_month(year, month, exclude_weekends=True, using=None):
+    """
+    List the school days of a month (e.g. for attendance registers).
+
+    Args:
+        year (int): Year
+        month (int): Month (1-12)
+        exclude_weekends (bool): Saturdays and Sundays are not school days
+        using (str): Database alias (defaults to the current school database)
+
+    Returns:
+        list: Dates of the school days, in order
+    """
+    calendar = get_calendar_year(year, using)
+    first_day = date(year, month, 1)
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+
+    days = []
+    for index in range(calendar.index(first_day), calendar.index(next_month - timedelta(days=1)) + 1):
+        day = calendar.first_day + timedelta(days=index)
+        if not calendar.holidays[index] and not (exclude_weekends and day.weekday() >= 5):
+            days.append(day)
+    return days
@@ -33,6 +33,8 @@ from .models import (
     Holiday,
 )
 from students.models import Student
+from utils.jobs import JobHandler
+from fees.invoice_generators import suppress_auto_invoices
 
 # Import utilities
 from .utils import (
@@ -73,6 +75,9 @@ class ClassEnrollmentService:
                 - include_optional_fees: Include optional fees in invoice
                 - discount_amount: Discount to apply
                 - due_date: Custom due date for invoice
+                - defer_invoice: Leave invoicing to the caller (bulk
+                  operations invoice a chunk at once, see
+                  BulkEnrollmentService.invoice_enrollments)
         
         Returns:
             tuple: (enrollment, invoice) - invoice may be None
@@ -137,7 +142,7 @@ class ClassEnrollmentService:
         # =================================================================
         
         invoice = None
-        if enrollment.auto_create_invoice:
+        if enrollment.auto_create_invoice and not kwargs.get('defer_invoice'):
             try:
                 # Try to import fee invoice generator
                 from fees.invoice_generators import ClassEnrollmentInvoiceGenerator
@@ -299,7 +304,8 @@ class ClassEnrollmentService:
             enrollment_type='PROMOTED',
             include_optional_fees=kwargs.get('include_optional_fees', False),
             notes=kwargs.get('notes', f"Promoted from {enrollment.class_instance.get_display_name()}"),
-            send_notifications=kwargs.get('send_notifications', True)
+            send_notifications=kwargs.get('send_notifications', True),
+            defer_invoice=kwargs.get('defer_invoice', False)
         )
         
         # Link to previous enrollment
@@ -484,25 +490,28 @@ class BulkEnrollmentService:
             'total': len(students)
         }
         
-        for student in students:
-            try:
-                enrollment, invoice = ClassEnrollmentService.enroll_student_in_class(
-                    student=student,
-                    class_instance=class_instance,
-                    session=session,
-                    **kwargs
-                )
-                
-                results['enrolled'].append(enrollment)
-                if invoice:
-                    results['invoices'].append(invoice)
+        with suppress_auto_invoices():
+            for student in students:
+                try:
+                    enrollment, _ = ClassEnrollmentService.enroll_student_in_class(
+                        student=student,
+                        class_instance=class_instance,
+                        session=session,
+                        **dict(kwargs, defer_invoice=True)
+                    )
                     
-            except Exception as e:
-                logger.error(f"Error enrolling {student.get_full_name()}: {e}")
-                results['failed'].append({
-                    'student': student,
-                    'error': str(e)
-                })
+                    results['enrolled'].append(enrollment)
+                        
+                except Exception as e:
+                    logger.error(f"Error enrolling {student.get_full_name()}: {e}")
+                    results['failed'].append({
+                        'student': student,
+                        'error': str(e)
+                    })
+        
+        results['invoices'] = BulkEnrollmentService.invoice_enrollments(
+            results['enrolled'], kwargs
+        )
         
         logger.info(
             f"Bulk enrollment completed: {len(results['enrolled'])} enrolled, "
@@ -552,28 +561,31 @@ class BulkEnrollmentService:
             'total': student_count
         }
         
-        for enrollment in enrollments:
-            try:
-                new_enrollment, invoice = ClassEnrollmentService.promote_student_to_next_level(
-                    enrollment=enrollment,
-                    next_class_instance=next_class_instance,
-                    next_session=next_session,
-                    **kwargs
-                )
-                
-                results['promoted'].append(new_enrollment)
-                if invoice:
-                    results['invoices'].append(invoice)
+        with suppress_auto_invoices():
+            for enrollment in enrollments:
+                try:
+                    new_enrollment, _ = ClassEnrollmentService.promote_student_to_next_level(
+                        enrollment=enrollment,
+                        next_class_instance=next_class_instance,
+                        next_session=next_session,
+                        **dict(kwargs, defer_invoice=True)
+                    )
                     
-            except Exception as e:
-                logger.error(
-                    f"Error promoting {enrollment.student.get_full_name()}: {e}"
-                )
-                results['failed'].append({
-                    'enrollment': enrollment,
-                    'student': enrollment.student,
-                    'error': str(e)
-                })
+                    results['promoted'].append(new_enrollment)
+                        
+                except Exception as e:
+                    logger.error(
+                        f"Error promoting {enrollment.student.get_full_name()}: {e}"
+                    )
+                    results['failed'].append({
+                        'enrollment': enrollment,
+                        'student': enrollment.student,
+                        'error': str(e)
+                    })
+        
+        results['invoices'] = BulkEnrollmentService.invoice_enrollments(
+            results['promoted'], kwargs
+        )
         
         logger.info(
             f"Bulk promotion completed: {len(results['promoted'])} promoted, "
@@ -581,6 +593,216 @@ class BulkEnrollmentService:
         )
         
         return results
+    
+    @staticmethod
+    def invoice_enrollments(enrollments, options):
+        """
+        Invoice freshly created enrollments in one batch.
+        
+        Used by the bulk paths, which create their enrollments with
+        defer_invoice inside suppress_auto_invoices(). As in
+        enroll_student_in_class(), invoice errors are logged and do not
+        undo the enrollments.
+        
+        Args:
+            enrollments (list): StudentClassEnrollment instances
+            options (dict): enroll_student_in_class() options
+                (include_optional_fees, discount_amount, due_date)
+        
+        Returns:
+            list: Created FeeInvoice instances
+        """
+        enrollments = [enrollment for enrollment in enrollments if enrollment.auto_create_invoice]
+        if not enrollments:
+            return []
+        
+        try:
+            from fees.invoice_generators import ClassEnrollmentInvoiceGenerator
+            
+            with transaction.atomic(using=StudentClassEnrollment.objects.db):
+                result = ClassEnrollmentInvoiceGenerator.generate_for_enrollments(
+                    enrollments,
+                    include_optional=options.get('include_optional_fees', False),
+                    discount_amount=options.get('discount_amount'),
+                    custom_due_date=options.get('due_date')
+                )
+        except ImportError:
+            logger.debug("Fee invoice generator not available")
+            return []
+        except Exception as e:
+            logger.error(f"Error generating invoices for {len(enrollments)} enrollments: {e}")
+            return []
+        
+        for failure in result['failed']:
+            logger.error(
+                f"Error generating invoice for enrollment {failure['enrollment'].pk}: "
+                f"{failure['error']}"
+            )
+        
+        return result['invoices']
+    
+    @staticmethod
+    def queue_bulk_enroll_students(students, class_instance, session, user=None, **kwargs):
+        """
+        Queue bulk_enroll_students() as a background job.
+        
+        Capacity is checked now; each student is then enrolled by the
+        background worker in its own savepoint (see utils.jobs).
+        
+        Args:
+            students: QuerySet or list of Student instances
+            class_instance (Class): Class to enroll in
+            session (AcademicSession): Academic session
+            user: User queueing the job (audit user of the enrollments)
+            **kwargs: JSON-serializable enroll_student_in_class() options
+        
+        Returns:
+            BackgroundJob: The queued job
+        """
+        from utils.jobs import enqueue_job
+        
+        student_ids = [str(student.pk) for student in students]
+        return enqueue_job(
+            'academics.bulk_enroll_students',
+            params={
+                'student_ids': student_ids,
+                'class_id': str(class_instance.pk),
+                'session_id': str(session.pk),
+                'options': kwargs,
+            },
+            user=user,
+            description=f"Enroll {len(student_ids)} students in {class_instance}"
+        )
+    
+    @staticmethod
+    def queue_bulk_promote_class(class_instance, next_class_instance, next_session, user=None, **kwargs):
+        """
+        Queue bulk_promote_class() as a background job.
+        
+        Args:
+            class_instance (Class): Current class
+            next_class_instance (Class): Target class for promotion
+            next_session (AcademicSession): Target session
+            user: User queueing the job
+            **kwargs: JSON-serializable promote_student_to_next_level() options
+        
+        Returns:
+            BackgroundJob: The queued job
+        """
+        from utils.jobs import enqueue_job
+        
+        return enqueue_job(
+            'academics.bulk_promote_class',
+            params={
+                'class_id': str(class_instance.pk),
+                'next_class_id': str(next_class_instance.pk),
+                'next_session_id': str(next_session.pk),
+                'options': kwargs,
+            },
+            user=user,
+            description=f"Promote {class_instance} to {next_class_instance}"
+        )
+
+
+# -----------------------------------------------------------------------------
+# Background job handlers (see utils.jobs)
+# -----------------------------------------------------------------------------
+
+class EnrollmentJobHandler(JobHandler):
+    """
+    Job that creates class enrollments item by item and invoices them per
+    chunk (process_item() stores each new enrollment in self.enrollments).
+    """
+    
+    def __init__(self):
+        self.enrollments = {}
+    
+    def finish_chunk(self, items, params, job):
+        enrollments, self.enrollments = self.enrollments, {}
+        BulkEnrollmentService.invoice_enrollments(
+            list(enrollments.values()), params.get('options', {})
+        )
+        
+        for item in items:
+            enrollment = enrollments.get(item.key)
+            if enrollment and enrollment.academic_invoice_id:
+                item.message = f"Invoice {enrollment.academic_invoice.invoice_number}"
+
+
+class BulkEnrollStudentsJob(EnrollmentJobHandler):
+    """Background version of BulkEnrollmentService.bulk_enroll_students()"""
+    
+    def prepare(self, params):
+        class_instance = Class.objects.get(pk=params['class_id'])
+        students = Student.objects.filter(pk__in=params['student_ids']).order_by(
+            'last_name', 'first_name'
+        ).values_list('pk', 'first_name', 'last_name')
+        
+        capacity_summary = get_class_capacity_summary(class_instance)
+        if capacity_summary['available_capacity'] < len(params['student_ids']):
+            raise ValueError(
+                f"Insufficient capacity: {capacity_summary['available_capacity']} available, "
+                f"but {len(params['student_ids'])} students requested. "
+                f"Current: {capacity_summary['current_enrollment']}/{capacity_summary['max_students']}"
+            )
+        
+        return [(pk, f"{first_name} {last_name}") for pk, first_name, last_name in students]
+    
+    def setup(self, job):
+        self.class_instance = Class.objects.get(pk=job.params['class_id'])
+        self.session = AcademicSession.objects.get(pk=job.params['session_id'])
+    
+    def process_item(self, key, params, job):
+        with suppress_auto_invoices():
+            enrollment, _ = ClassEnrollmentService.enroll_student_in_class(
+                student=Student.objects.get(pk=key),
+                class_instance=self.class_instance,
+                session=self.session,
+                **dict(params.get('options', {}), defer_invoice=True)
+            )
+        self.enrollments[key] = enrollment
+        return ''
+
+
+class BulkPromoteClassJob(EnrollmentJobHandler):
+    """Background version of BulkEnrollmentService.bulk_promote_class()"""
+    
+    def prepare(self, params):
+        enrollments = StudentClassEnrollment.objects.filter(
+            class_instance_id=params['class_id'],
+            is_active=True,
+            completion_status='ONGOING'
+        ).order_by('student__last_name', 'student__first_name').values_list(
+            'pk', 'student__first_name', 'student__last_name'
+        )
+        items = [(pk, f"{first_name} {last_name}") for pk, first_name, last_name in enrollments]
+        
+        capacity_summary = get_class_capacity_summary(Class.objects.get(pk=params['next_class_id']))
+        if capacity_summary['available_capacity'] < len(items):
+            raise ValueError(
+                f"Insufficient capacity in target class: {capacity_summary['available_capacity']} available, "
+                f"but {len(items)} students to promote. "
+                f"Current: {capacity_summary['current_enrollment']}/{capacity_summary['max_students']}"
+            )
+        
+        return items
+    
+    def setup(self, job):
+        self.next_class_instance = Class.objects.get(pk=job.params['next_class_id'])
+        self.next_session = AcademicSession.objects.get(pk=job.params['next_session_id'])
+    
+    def process_item(self, key, params, job):
+        with suppress_auto_invoices():
+            new_enrollment, _ = ClassEnrollmentService.promote_student_to_next_level(
+                enrollment=StudentClassEnrollment.objects.select_related(
+                    'student', 'class_instance'
+                ).get(pk=key),
+                next_class_instance=self.next_class_instance,
+                next_session=self.next_session,
+                **dict(params.get('options', {}), defer_invoice=True)
+            )
+        self.enrollments[key] = new_enrollment
+        return ''
 
 
 # =============================================================================
@@ -178,9 +178,14 @@ def class_subject_pre_save(sender, instance, **kwargs):
 def holiday_post_save(sender, instance, created, **kwargs):
     """
     Handle post-save operations for Holiday.
+    - Refresh the cached school calendar
     - Log holiday creation
     - Send notifications if enabled
     """
+    from academics.school_calendar import invalidate_school_calendar
+    
+    invalidate_school_calendar(instance._state.db)
+    
     if created:
         logger.info(f"New holiday created: {instance.name} ({instance.start_date})")
         
@@ -194,6 +199,17 @@ def holiday_post_save(sender, instance, created, **kwargs):
                 logger.error(f"Error sending holiday notification: {e}")
 
 
+@receiver(post_delete, sender='academics.Holiday')
+def holiday_post_delete(sender, instance, **kwargs):
+    """
+    Handle post-delete operations for Holiday.
+    - Refresh the cached school calendar
+    """
+    from academics.school_calendar import invalidate_school_calendar
+    
+    invalidate_school_calendar(instance._state.db)
+
+
 # =============================================================================
 # SUBJECT SIGNALS
 # =============================================================================
@@ -256,12 +256,10 @@ def is_holiday(check_date):
     Returns:
         bool: True if date is a holiday
     """
-    from .models import Holiday
+    from .school_calendar import is_holiday as calendar_is_holiday
     
-    return Holiday.objects.filter(
-        Q(start_date__lte=check_date, end_date__gte=check_date) |
-        Q(start_date=check_date, end_date__isnull=True)
-    ).exists()
+    # Cached holiday bitmap of the year (see school_calendar)
+    return calendar_is_holiday(check_date)
 
 
 def get_working_days(start_date, end_date, exclude_weekends=True):
@@ -276,24 +274,10 @@ def get_working_days(start_date, end_date, exclude_weekends=True):
     Returns:
         int: Number of working days
     """
-    from .models import Holiday
-    
-    current_date = start_date
-    working_days = 0
-    
-    while current_date <= end_date:
-        # Check weekends if needed
-        if exclude_weekends and current_date.weekday() >= 5:  # Saturday=5, Sunday=6
-            current_date += timedelta(days=1)
-            continue
-        
-        # Check if it's a holiday
-        if not is_holiday(current_date):
-            working_days += 1
-        
-        current_date += timedelta(days=1)
+    from .school_calendar import working_days_between
     
-    return working_days
+    # O(1) per calendar year instead of one holiday query per day
+    return working_days_between(start_date, end_date, exclude_weekends)
 
 
 def get_upcoming_holidays(days=30):
@@ -680,7 +664,7 @@ def validate_term_number(term_number):
     from core.models import SchoolConfiguration
     
     try:
-        config = SchoolConfiguration.get_instance()
+        config = SchoolConfiguration.get_cached_instance()
         if config:
             max_periods = config.get_period_count()
             if not config.validate_period_number(term_number):
@@ -21,12 +21,14 @@ Audit trail automatically handled by BaseModel
 """
 
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q, Count, Sum, Avg, Prefetch, F
 from django.utils import timezone
 from django.http import JsonResponse, HttpResponse
 from django.db import transaction
+from django.core.exceptions import ValidationError
 from django.core.files.storage import FileSystemStorage
 from datetime import timedelta, date, datetime
 from decimal import Decimal
@@ -1387,6 +1389,20 @@ def student_enrollment_list(request):
         'StudentClassEnrollment': StudentClassEnrollment,
     }
     
+    # Progress of a bulk enrollment just queued by bulk_student_enrollment
+    job_id = request.GET.get('job')
+    if job_id:
+        from utils.jobs import get_job_progress
+        from utils.models import BackgroundJob
+        
+        try:
+            job = BackgroundJob.objects.filter(pk=job_id).first()
+        except ValidationError:
+            job = None
+        
+        if job is not None:
+            context.update({'job': job, 'progress': get_job_progress(job)})
+    
     return render(request, 'academics/enrollments/list.html', context)
 
 
@@ -1718,43 +1734,25 @@ def bulk_student_enrollment(request):
                     enrollment_type = form.cleaned_data.get('enrollment_type', 'BULK')
                     auto_create_invoices = form.cleaned_data.get('auto_create_invoices', True)
                     
-                    result = BulkEnrollmentService.bulk_enroll_students(
+                    # Enrollments run in the background worker (utils.jobs);
+                    # only the capacity check happens in this request
+                    job = BulkEnrollmentService.queue_bulk_enroll_students(
                         students=students,
                         class_instance=class_instance,
                         session=academic_session,
+                        user=request.user,
                         enrollment_type=enrollment_type,
                         auto_create_invoices=auto_create_invoices
                     )
                     
-                    # ✅ Audit trail automatically handled by BaseModel for each enrollment
-                    
-                    success_count = len(result['enrolled'])
-                    failure_count = len(result['failed'])
+                    messages.success(
+                        request,
+                        f"Bulk enrollment of {job.total_items} students has been queued. "
+                        f"Enrollments will appear as they are processed."
+                    )
+                    # The enrollment list shows the job's progress and failures
+                    return redirect(f"{reverse('academics:enrollment_list')}?job={job.pk}")
                     
-                    if success_count > 0:
-                        success_msg = f"Bulk enrollment completed. Successfully enrolled: {success_count}"
-                        if failure_count > 0:
-                            success_msg += f", Failed: {failure_count}"
-                        
-                        # Show first few failures if any
-                        if result['failed']:
-                            failure_details = ", ".join([
-                                f"{fail['student'].get_full_name()}" 
-                                for fail in result['failed'][:3]
-                            ])
-                            if len(result['failed']) > 3:
-                                failure_details += f" and {len(result['failed']) - 3} others"
-                            success_msg += f". Failed students: {failure_details}"
-                        
-                        messages.success(request, success_msg)
-                        return redirect('academics:enrollment_list')
-                    else:
-                        error_details = "; ".join([
-                            f"{fail['student'].get_full_name()}: {fail['error']}" 
-                            for fail in result['failed'][:3]
-                        ])
-                        messages.error(request, f"All enrollments failed. Examples: {error_details}")
-                        
                 except Exception as e:
                     logger.error(f"Bulk enrollment service error: {e}")
                     messages.error(request, f"Bulk enrollment error: {str(e)}")
@@ -366,6 +366,7 @@ class SchoolAdmin(admin.ModelAdmin):
         ('System Configuration', {
             'fields': (
                 'domain', 'database_alias', 'timezone', 'language',
+                'database_name', 'database_host', 'database_port',
             ),
             'classes': ('collapse',)
         }),
@@ -508,7 +509,11 @@ class SchoolAdmin(admin.ModelAdmin):
     
     def activate_subscriptions(self, request, queryset):
         """Activate subscriptions for selected schools"""
+        from schoolara.middleware import SchoolDatabaseMiddleware
+        
         updated = queryset.update(is_active_subscription=True)
+        # update() sends no post_save, so retire the cached tenant records here
+        SchoolDatabaseMiddleware.clear_database_cache()
         self.message_user(
             request,
             f'{updated} school subscription(s) activated.',
@@ -518,7 +523,11 @@ class SchoolAdmin(admin.ModelAdmin):
     
     def deactivate_subscriptions(self, request, queryset):
         """Deactivate subscriptions for selected schools"""
+        from schoolara.middleware import SchoolDatabaseMiddleware
+        
         updated = queryset.update(is_active_subscription=False)
+        # update() sends no post_save, so retire the cached tenant records here
+        SchoolDatabaseMiddleware.clear_database_cache()
         self.message_user(
             request,
             f'{updated} school subscription(s) deactivated.',
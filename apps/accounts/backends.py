@@ -219,6 +219,27 @@ class PermissionBackend(ModelBackend):
             logger.error(f"Invalid user_id format: {user_id}, Error: {e}")
             return None
     
+    def _get_role(self, user_obj):
+        """
+        Get the user's profile role.
+        
+        Uses the tenant record set by SchoolDatabaseMiddleware (no query);
+        without one the profile is loaded once and kept on the user object.
+        
+        Args:
+            user_obj: The user object
+            
+        Returns:
+            tuple: (has_profile, role)
+        """
+        record = getattr(user_obj, 'tenant_record', None)
+        if record is not None:
+            return record['has_profile'], record['role']
+        
+        if hasattr(user_obj, 'profile'):
+            return True, user_obj.profile.role
+        return False, None
+    
     def has_perm(self, user_obj, perm, obj=None):
         """
         Check if user has a specific permission.
@@ -239,20 +260,21 @@ class PermissionBackend(ModelBackend):
             return True
         
         # Check if user has profile and check role-based permissions
-        if hasattr(user_obj, 'profile'):
+        has_profile, role = self._get_role(user_obj)
+        if has_profile:
             # Administrator and Director of Studies have elevated permissions
             admin_roles = ['Administrator', 'Director of Studies']
-            if user_obj.profile.role in admin_roles:
+            if role in admin_roles:
                 return True
             
             # Finance Manager has financial permissions
             if 'financial' in perm.lower() or 'fee' in perm.lower():
-                if user_obj.profile.role == 'Finance Manager':
+                if role == 'Finance Manager':
                     return True
             
             # Registrar has student/registration permissions
             if 'student' in perm.lower() or 'registration' in perm.lower():
-                if user_obj.profile.role in ['Registrar', 'Director of Studies']:
+                if role in ['Registrar', 'Director of Studies']:
                     return True
         
         # Fall back to Django's default permission checking
@@ -277,10 +299,11 @@ class PermissionBackend(ModelBackend):
             return True
         
         # Check via profile if available
-        if hasattr(user_obj, 'profile'):
+        has_profile, role = self._get_role(user_obj)
+        if has_profile:
             # Administrators and Directors have access to all modules
             admin_roles = ['Administrator', 'Director of Studies']
-            if user_obj.profile.role in admin_roles:
+            if role in admin_roles:
                 return True
         
         # Staff users have access to their modules
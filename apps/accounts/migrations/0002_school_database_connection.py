@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='school',
+            name='database_host',
+            field=models.CharField(blank=True, help_text='Database server (blank: same server as the core database)', max_length=191, verbose_name='Database Host'),
+        ),
+        migrations.AddField(
+            model_name='school',
+            name='database_name',
+            field=models.CharField(blank=True, help_text='Database name on the server (blank: <alias>_db)', max_length=64, verbose_name='Database Name'),
+        ),
+        migrations.AddField(
+            model_name='school',
+            name='database_port',
+            field=models.CharField(blank=True, help_text='Database server port (blank: default port)', max_length=10, verbose_name='Database Port'),
+        ),
+    ]
@@ -135,6 +135,24 @@ class School(DefaultDatabaseModel):
         unique=True,
         help_text="Database key e.g. kampala_high_school"
     )
+    database_name = models.CharField(
+        "Database Name",
+        max_length=64,
+        blank=True,
+        help_text="Database name on the server (blank: <alias>_db)"
+    )
+    database_host = models.CharField(
+        "Database Host",
+        max_length=191,
+        blank=True,
+        help_text="Database server (blank: same server as the core database)"
+    )
+    database_port = models.CharField(
+        "Database Port",
+        max_length=10,
+        blank=True,
+        help_text="Database server port (blank: default port)"
+    )
 
     # -------------------------------------------------------------------------
     # SCHOOL CLASSIFICATION
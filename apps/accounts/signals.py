@@ -0,0 +1,86 @@
+# accounts/signals.py
+"""
+Signal handlers for accounts app
+Keeps the tenant resolution records (see SchoolDatabaseMiddleware) and the
+tenant database registry (see schoolara.tenants) in step with the profiles
+and schools they are built from
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+import logging
+
+logger = logging.getLogger(__name__)
+
+# UserProfile fields copied into the tenant record
+TENANT_RECORD_FIELDS = {
+    'school', 'role', 'photo',
+    'theme_color', 'fixed_header', 'fixed_sidebar', 'fixed_footer',
+    'header_class', 'sidebar_class', 'page_tabs_style',
+}
+
+
+# =============================================================================
+# USER PROFILE SIGNALS
+# =============================================================================
+
+@receiver(post_save, sender='accounts.UserProfile')
+def user_profile_post_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Handle post-save operations for UserProfile.
+    - Retire the user's tenant record (school, role or theme may have changed)
+    
+    Saves limited to other fields (login attempts, last activity) keep it.
+    """
+    from schoolara.middleware import SchoolDatabaseMiddleware
+    
+    if update_fields is not None and not TENANT_RECORD_FIELDS.intersection(update_fields):
+        return
+    
+    SchoolDatabaseMiddleware.clear_user_cache(instance.user_id)
+
+
+@receiver(post_delete, sender='accounts.UserProfile')
+def user_profile_post_delete(sender, instance, **kwargs):
+    """
+    Handle post-delete operations for UserProfile.
+    - Retire the user's tenant record
+    """
+    from schoolara.middleware import SchoolDatabaseMiddleware
+    
+    SchoolDatabaseMiddleware.clear_user_cache(instance.user_id)
+
+
+# =============================================================================
+# SCHOOL SIGNALS
+# =============================================================================
+
+@receiver(post_save, sender='accounts.School')
+def school_post_save(sender, instance, created, **kwargs):
+    """
+    Handle post-save operations for School.
+    - Retire all tenant records (database alias, subscription or names may
+      have changed)
+    - Re-read the school's connection settings in every process
+    """
+    from schoolara.middleware import SchoolDatabaseMiddleware
+    from schoolara.tenants import invalidate_tenant_registry
+    
+    # New schools need no invalidation: they are registered on first use
+    if not created:
+        invalidate_tenant_registry()
+        SchoolDatabaseMiddleware.clear_database_cache()
+        logger.info(f"School updated, tenant records will be rebuilt: {instance}")
+
+
+@receiver(post_delete, sender='accounts.School')
+def school_post_delete(sender, instance, **kwargs):
+    """
+    Handle post-delete operations for School.
+    - Retire all tenant records
+    """
+    from schoolara.middleware import SchoolDatabaseMiddleware
+    from schoolara.tenants import invalidate_tenant_registry
+    
+    invalidate_tenant_registry()
+    SchoolDatabaseMiddleware.clear_database_cache()
@@ -13,7 +13,8 @@ from .models import (
     Dormitory,
     BoardingEnrollment
 )
-from utils.utils import parse_filters, paginate_queryset
+from utils.utils import parse_filters, paginate_queryset, get_search_stats
+from utils.async_views import async_htmx_view
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +23,7 @@ logger = logging.getLogger(__name__)
 # DORMITORY SEARCH
 # =============================================================================
 
+@async_htmx_view
 def dormitory_search(request):
     """HTMX-compatible dormitory search with pagination and stats"""
     
@@ -149,26 +151,21 @@ def dormitory_search(request):
     # Paginate
     dormitories_page, paginator = paginate_queryset(request, dormitories, per_page=20)
     
-    # Calculate stats
-    total = dormitories.count()
-    
-    stats = {
-        'total': total,
-        'active': dormitories.filter(is_active=True).count(),
-        'boys': dormitories.filter(dormitory_type='BOYS').count(),
-        'girls': dormitories.filter(dormitory_type='GIRLS').count(),
-        'mixed': dormitories.filter(dormitory_type='MIXED').count(),
-        'total_capacity': dormitories.aggregate(Sum('total_capacity'))['total_capacity__sum'] or 0,
-        'total_occupancy': dormitories.aggregate(Sum('current_occupancy'))['current_occupancy__sum'] or 0,
-        'available_beds': dormitories.aggregate(Sum('available_beds'))['available_beds__sum'] or 0,
-        'full_dormitories': dormitories.filter(
-            current_occupancy__gte=F('total_capacity')
-        ).count(),
-        'needs_maintenance': dormitories.filter(
-            next_maintenance_due__lte=timezone.now().date()
-        ).count(),
-        'avg_occupancy': dormitories.aggregate(Avg('occupancy_ratio'))['occupancy_ratio__avg'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(dormitories, paginator, counts={
+        'active': Q(is_active=True),
+        'boys': Q(dormitory_type='BOYS'),
+        'girls': Q(dormitory_type='GIRLS'),
+        'mixed': Q(dormitory_type='MIXED'),
+        'full_dormitories': Q(current_occupancy__gte=F('total_capacity')),
+        'needs_maintenance': Q(next_maintenance_due__lte=timezone.now().date()),
+    }, sums={
+        'total_capacity': 'total_capacity',
+        'total_occupancy': 'current_occupancy',
+        'available_beds': 'available_beds',
+    }, aggregates={
+        'avg_occupancy': Avg('occupancy_ratio'),
+    })
     
     return render(request, 'boarding/dormitories/_dormitory_results.html', {
         'dormitories_page': dormitories_page,
@@ -180,6 +177,7 @@ def dormitory_search(request):
 # BOARDING ENROLLMENT SEARCH
 # =============================================================================
 
+@async_htmx_view
 def boarding_enrollment_search(request):
     """HTMX-compatible boarding enrollment search with pagination and stats"""
     
@@ -265,26 +263,24 @@ def boarding_enrollment_search(request):
     # Paginate
     enrollments_page, paginator = paginate_queryset(request, enrollments, per_page=20)
     
-    # Calculate stats
-    total = enrollments.count()
-    
-    stats = {
-        'total': total,
-        'pending': enrollments.filter(status='PENDING').count(),
-        'active': enrollments.filter(status='ACTIVE').count(),
-        'suspended': enrollments.filter(status='SUSPENDED').count(),
-        'terminated': enrollments.filter(status='TERMINATED').count(),
-        'completed': enrollments.filter(status='COMPLETED').count(),
-        'full_boarders': enrollments.filter(boarding_type='FULL_BOARDER').count(),
-        'weekly_boarders': enrollments.filter(boarding_type='WEEKLY_BOARDER').count(),
-        'flexi_boarders': enrollments.filter(boarding_type='FLEXI_BOARDER').count(),
-        'with_consent': enrollments.filter(guardian_consent=True).count(),
-        'without_consent': enrollments.filter(guardian_consent=False).count(),
-        'with_invoice': enrollments.exclude(boarding_invoice__isnull=True).count(),
-        'without_invoice': enrollments.filter(boarding_invoice__isnull=True).count(),
-        'unique_students': enrollments.values('student').distinct().count(),
-        'unique_dormitories': enrollments.values('dormitory').distinct().count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(enrollments, paginator, counts={
+        'pending': Q(status='PENDING'),
+        'active': Q(status='ACTIVE'),
+        'suspended': Q(status='SUSPENDED'),
+        'terminated': Q(status='TERMINATED'),
+        'completed': Q(status='COMPLETED'),
+        'full_boarders': Q(boarding_type='FULL_BOARDER'),
+        'weekly_boarders': Q(boarding_type='WEEKLY_BOARDER'),
+        'flexi_boarders': Q(boarding_type='FLEXI_BOARDER'),
+        'with_consent': Q(guardian_consent=True),
+        'without_consent': Q(guardian_consent=False),
+        'with_invoice': ~Q(boarding_invoice__isnull=True),
+        'without_invoice': Q(boarding_invoice__isnull=True),
+    }, distinct={
+        'unique_students': 'student',
+        'unique_dormitories': 'dormitory',
+    })
     
     return render(request, 'boarding/enrollments/_enrollment_results.html', {
         'enrollments_page': enrollments_page,
@@ -296,6 +292,7 @@ def boarding_enrollment_search(request):
 # QUICK STATS ENDPOINTS
 # =============================================================================
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def dormitory_quick_stats(request):
     """Get quick statistics for dormitories"""
@@ -325,6 +322,7 @@ def dormitory_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def boarding_enrollment_quick_stats(request):
     """Get quick statistics for boarding enrollments"""
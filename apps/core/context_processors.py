@@ -1,46 +1,65 @@
 # core/context_processors.py
 
+from django.utils.functional import SimpleLazyObject
+
 from accounts.models import School
+from schoolara.middleware import get_tenant_record
+
+
+def _get_tenant_record(request):
+    """
+    Tenant record of the request's user, resolved once per session by
+    SchoolDatabaseMiddleware.
+    
+    Returns:
+        dict or None: Tenant record, or None for anonymous users
+    """
+    if not request.user.is_authenticated:
+        return None
+    return get_tenant_record(request)
+
 
 def active_school(request):
     """
     Adds the current active school (or subscription info) to all templates.
+    
+    The School is only loaded if a template actually uses it.
     """
-    school = None
-    if request.user.is_authenticated:
-        profile = getattr(request.user, 'userprofile', None)
-        if profile:
-            school = profile.school
-    return {'active_school': school}
+    record = _get_tenant_record(request)
+    if not record or not record['school_id']:
+        return {'active_school': None}
+    
+    school_id = record['school_id']
+    return {
+        'active_school': SimpleLazyObject(
+            lambda: School.objects.using('default').filter(pk=school_id).first()
+        )
+    }
 
 
 def user_context(request):
     """
     Provides user-specific context including profile and theme preferences.
+    
+    Profile values come from the tenant record, so no profile or school
+    query is made.
     """
     context = {}
-    if request.user.is_authenticated:
-        profile = getattr(request.user, 'userprofile', None)
-        
+    record = _get_tenant_record(request)
+    if record:
         # Basic user info
         context['user_first_name'] = request.user.first_name
         context['user_last_name'] = request.user.last_name
         context['user_email'] = request.user.email
         
         # Profile-specific info
-        if profile:
-            context['user_role'] = profile.role
-            context['user_profile_pic'] = profile.photo
-            context['user_school'] = profile.school
+        if record['has_profile']:
+            context['user_role'] = record['role']
+            context['user_profile_pic'] = record['photo_url']
+            context['user_school'] = record['school_name']
             
             # Theme preferences
-            context['fixed_header'] = profile.fixed_header
-            context['fixed_sidebar'] = profile.fixed_sidebar
-            context['fixed_footer'] = profile.fixed_footer
-            context['header_class'] = profile.header_class
-            context['sidebar_class'] = profile.sidebar_class
-            context['page_tabs_style'] = profile.page_tabs_style
-            context['theme_color'] = profile.theme_color
+            context.update(record['theme'])
         
     return context
 
@@ -94,6 +113,10 @@ def theme_colors(request):
         'happy-green': {'label': 'Happy Green', 'text': 'light'},
     }
     
+    # Theme preferences of the user (from the tenant record)
+    record = _get_tenant_record(request)
+    theme = record['theme'] if record else {}
+    
     # Separate basic and gradient colors for template organization
     basic_color_keys = [
         'primary', 'secondary', 'success', 'info', 
@@ -132,14 +155,14 @@ def theme_colors(request):
             'label': 'White Theme',
             'class': 'light',
             'active': request.user.is_authenticated and 
-                     getattr(getattr(request.user, 'userprofile', None), 'theme_color', 'app-theme-white') == 'app-theme-white'
+                     theme.get('theme_color', 'app-theme-white') == 'app-theme-white'
         },
         {
             'value': 'app-theme-gray',
             'label': 'Gray Theme',
             'class': 'light',
             'active': request.user.is_authenticated and 
-                     getattr(getattr(request.user, 'userprofile', None), 'theme_color', '') == 'app-theme-gray'
+                     theme.get('theme_color', '') == 'app-theme-gray'
         },
     ]
     
@@ -149,13 +172,13 @@ def theme_colors(request):
             'value': 'body-tabs-shadow',
             'label': 'Shadow',
             'active': request.user.is_authenticated and 
-                     getattr(getattr(request.user, 'userprofile', None), 'page_tabs_style', 'body-tabs-shadow') == 'body-tabs-shadow'
+                     theme.get('page_tabs_style', 'body-tabs-shadow') == 'body-tabs-shadow'
         },
         {
             'value': 'body-tabs-line',
             'label': 'Line',
             'active': request.user.is_authenticated and 
-                     getattr(getattr(request.user, 'userprofile', None), 'page_tabs_style', '') == 'body-tabs-line'
+                     theme.get('page_tabs_style', '') == 'body-tabs-line'
         },
     ]
     
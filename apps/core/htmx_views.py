@@ -1,8 +1,9 @@
 # core/htmx_views.py
 
 from django.http import JsonResponse, HttpResponse
-from django.shortcuts import render
-from django.db.models import Q, Count, Sum, Avg, F, DecimalField, Case, When
+from django.shortcuts import render, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.db.models import Q, Count, Avg, F, DecimalField, Case, When
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 from datetime import timedelta
@@ -18,7 +19,8 @@ from .models import (
     TaxRate,
     UnitOfMeasure
 )
-from utils.utils import parse_filters, paginate_queryset
+from utils.utils import parse_filters, paginate_queryset, get_search_stats
+from utils.async_views import async_htmx_view
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +29,7 @@ logger = logging.getLogger(__name__)
 # FISCAL YEAR SEARCH
 # =============================================================================
 
+@async_htmx_view
 def fiscal_year_search(request):
     """HTMX-compatible fiscal year search with pagination and stats"""
     
@@ -90,17 +93,15 @@ def fiscal_year_search(request):
     # Paginate
     fiscal_years_page, paginator = paginate_queryset(request, fiscal_years, per_page=20)
     
-    # Calculate stats
-    total = fiscal_years.count()
-    
-    stats = {
-        'total': total,
-        'active': fiscal_years.filter(is_active=True).count(),
-        'draft': fiscal_years.filter(status='DRAFT').count(),
-        'closed': fiscal_years.filter(is_closed=True).count(),
-        'locked': fiscal_years.filter(is_locked=True).count(),
-        'total_periods': fiscal_years.aggregate(Sum('period_count'))['period_count__sum'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(fiscal_years, paginator, counts={
+        'active': Q(is_active=True),
+        'draft': Q(status='DRAFT'),
+        'closed': Q(is_closed=True),
+        'locked': Q(is_locked=True),
+    }, sums={
+        'total_periods': 'period_count',
+    })
     
     return render(request, 'core/fiscal_years/_fiscal_year_results.html', {
         'fiscal_years_page': fiscal_years_page,
@@ -112,6 +113,7 @@ def fiscal_year_search(request):
 # FISCAL PERIOD SEARCH
 # =============================================================================
 
+@async_htmx_view
 def fiscal_period_search(request):
     """HTMX-compatible fiscal period search with pagination and stats"""
     
@@ -179,20 +181,17 @@ def fiscal_period_search(request):
     # Paginate
     periods_page, paginator = paginate_queryset(request, periods, per_page=20)
     
-    # Calculate stats
-    total = periods.count()
-    
-    stats = {
-        'total': total,
-        'active': periods.filter(is_active=True).count(),
-        'closed': periods.filter(is_closed=True).count(),
-        'locked': periods.filter(is_locked=True).count(),
-        'academic_aligned': periods.filter(period_type='ACADEMIC_ALIGNED').count(),
-        'break_period': periods.filter(period_type='BREAK_PERIOD').count(),
-        'grace_period': periods.filter(period_type='GRACE_PERIOD').count(),
-        'monthly': periods.filter(period_type='MONTHLY').count(),
-        'quarterly': periods.filter(period_type='QUARTERLY').count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(periods, paginator, counts={
+        'active': Q(is_active=True),
+        'closed': Q(is_closed=True),
+        'locked': Q(is_locked=True),
+        'academic_aligned': Q(period_type='ACADEMIC_ALIGNED'),
+        'break_period': Q(period_type='BREAK_PERIOD'),
+        'grace_period': Q(period_type='GRACE_PERIOD'),
+        'monthly': Q(period_type='MONTHLY'),
+        'quarterly': Q(period_type='QUARTERLY'),
+    })
     
     return render(request, 'core/fiscal_periods/_period_results.html', {
         'periods_page': periods_page,
@@ -204,6 +203,7 @@ def fiscal_period_search(request):
 # PAYMENT METHOD SEARCH
 # =============================================================================
 
+@async_htmx_view
 def payment_method_search(request):
     """HTMX-compatible payment method search with pagination and stats"""
     
@@ -256,18 +256,15 @@ def payment_method_search(request):
     # Paginate
     payment_methods_page, paginator = paginate_queryset(request, payment_methods, per_page=20)
     
-    # Calculate stats
-    total = payment_methods.count()
-    
-    stats = {
-        'total': total,
-        'active': payment_methods.filter(is_active=True).count(),
-        'cash': payment_methods.filter(method_type='CASH').count(),
-        'mobile_money': payment_methods.filter(method_type='MOBILE_MONEY').count(),
-        'bank_transfer': payment_methods.filter(method_type='BANK_TRANSFER').count(),
-        'with_fees': payment_methods.filter(has_transaction_fee=True).count(),
-        'requires_approval': payment_methods.filter(requires_approval=True).count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(payment_methods, paginator, counts={
+        'active': Q(is_active=True),
+        'cash': Q(method_type='CASH'),
+        'mobile_money': Q(method_type='MOBILE_MONEY'),
+        'bank_transfer': Q(method_type='BANK_TRANSFER'),
+        'with_fees': Q(has_transaction_fee=True),
+        'requires_approval': Q(requires_approval=True),
+    })
     
     return render(request, 'core/payment_methods/_method_results.html', {
         'payment_methods_page': payment_methods_page,
@@ -279,6 +276,7 @@ def payment_method_search(request):
 # TAX RATE SEARCH
 # =============================================================================
 
+@async_htmx_view
 def tax_rate_search(request):
     """HTMX-compatible tax rate search with pagination and stats"""
     
@@ -331,17 +329,14 @@ def tax_rate_search(request):
     # Paginate
     tax_rates_page, paginator = paginate_queryset(request, tax_rates, per_page=20)
     
-    # Calculate stats
-    total = tax_rates.count()
-    
-    stats = {
-        'total': total,
-        'active': tax_rates.filter(is_active=True).count(),
-        'vat': tax_rates.filter(tax_type='VAT').count(),
-        'wht': tax_rates.filter(tax_type__startswith='WHT').count(),
-        'applies_to_fees': tax_rates.filter(applies_to_fees=True).count(),
-        'applies_to_services': tax_rates.filter(applies_to_services=True).count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(tax_rates, paginator, counts={
+        'active': Q(is_active=True),
+        'vat': Q(tax_type='VAT'),
+        'wht': Q(tax_type__startswith='WHT'),
+        'applies_to_fees': Q(applies_to_fees=True),
+        'applies_to_services': Q(applies_to_services=True),
+    })
     
     return render(request, 'core/tax_rates/_rate_results.html', {
         'tax_rates_page': tax_rates_page,
@@ -353,6 +348,7 @@ def tax_rate_search(request):
 # UNIT OF MEASURE SEARCH
 # =============================================================================
 
+@async_htmx_view
 def unit_of_measure_search(request):
     """HTMX-compatible unit of measure search with pagination and stats"""
     
@@ -400,20 +396,17 @@ def unit_of_measure_search(request):
     # Paginate
     units_page, paginator = paginate_queryset(request, units, per_page=20)
     
-    # Calculate stats
-    total = units.count()
-    
-    stats = {
-        'total': total,
-        'active': units.filter(is_active=True).count(),
-        'base_units': units.filter(base_unit__isnull=True).count(),
-        'derived_units': units.filter(base_unit__isnull=False).count(),
-        'length': units.filter(uom_type='LENGTH').count(),
-        'weight': units.filter(uom_type='WEIGHT').count(),
-        'volume': units.filter(uom_type='VOLUME').count(),
-        'area': units.filter(uom_type='AREA').count(),
-        'quantity': units.filter(uom_type='QUANTITY').count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(units, paginator, counts={
+        'active': Q(is_active=True),
+        'base_units': Q(base_unit__isnull=True),
+        'derived_units': Q(base_unit__isnull=False),
+        'length': Q(uom_type='LENGTH'),
+        'weight': Q(uom_type='WEIGHT'),
+        'volume': Q(uom_type='VOLUME'),
+        'area': Q(uom_type='AREA'),
+        'quantity': Q(uom_type='QUANTITY'),
+    })
     
     return render(request, 'core/units/_unit_results.html', {
         'units_page': units_page,
@@ -425,6 +418,7 @@ def unit_of_measure_search(request):
 # QUICK STATS ENDPOINTS
 # =============================================================================
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def fiscal_year_quick_stats(request):
     """Get quick statistics for fiscal years"""
@@ -444,6 +438,7 @@ def fiscal_year_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def fiscal_period_quick_stats(request):
     """Get quick statistics for fiscal periods"""
@@ -462,6 +457,7 @@ def fiscal_period_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def payment_method_quick_stats(request):
     """Get quick statistics for payment methods"""
@@ -477,6 +473,7 @@ def payment_method_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def tax_rate_quick_stats(request):
     """Get quick statistics for tax rates"""
@@ -498,6 +495,7 @@ def tax_rate_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def unit_of_measure_quick_stats(request):
     """Get quick statistics for units of measure"""
@@ -515,6 +513,7 @@ def unit_of_measure_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def system_configuration_stats(request):
     """Get system configuration overview statistics"""
@@ -533,4 +532,68 @@ def system_configuration_stats(request):
         'units_of_measure': UnitOfMeasure.objects.filter(is_active=True).count(),
     }
     
-    return JsonResponse(stats)
\ No newline at end of file
+    return JsonResponse(stats)
+
+# =============================================================================
+# BACKGROUND JOBS
+# =============================================================================
+
+# HTMX stops polling an element when the response status is 286
+HTMX_STOP_POLLING = 286
+
+
+def _job_progress_response(request, job):
+    """Render job progress as an HTMX partial, or JSON for other callers."""
+    from utils.jobs import get_job_progress
+    
+    progress = get_job_progress(job)
+    
+    if not request.headers.get('HX-Request'):
+        return JsonResponse(progress)
+    
+    return render(request, 'core/jobs/_job_progress.html', {
+        'job': job,
+        'progress': progress,
+    }, status=HTMX_STOP_POLLING if job.is_finished else 200)
+
+
+@login_required
+@require_http_methods(["GET"])
+def job_progress(request, pk):
+    """Poll the progress of a background job (see utils.jobs)"""
+    from utils.models import BackgroundJob
+    
+    job = get_object_or_404(BackgroundJob, pk=pk)
+    return _job_progress_response(request, job)
+
+
+@login_required
+@require_http_methods(["POST"])
+def job_retry(request, pk):
+    """Re-queue the failed items of a finished background job"""
+    from utils.jobs import retry_failed_items
+    from utils.models import BackgroundJob
+    
+    job = get_object_or_404(BackgroundJob, pk=pk)
+    
+    try:
+        retry_failed_items(job)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    
+    return _job_progress_response(request, job)
+
+
+@login_required
+@require_http_methods(["POST"])
+def job_cancel(request, pk):
+    """Cancel a pending or running background job"""
+    from utils.jobs import cancel_job
+    from utils.models import BackgroundJob
+    
+    job = get_object_or_404(BackgroundJob, pk=pk)
+    
+    if not cancel_job(job):
+        return JsonResponse({'success': False, 'message': 'Job has already finished'}, status=400)
+    
+    return _job_progress_response(request, job)
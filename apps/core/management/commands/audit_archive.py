@@ -0,0 +1,179 @@
+# management/commands/audit_archive.py
+
+"""
+Audit log retention for all school databases.
+
+Moves AuditLog / FinancialAuditLog rows older than the retention period
+(settings.AUDIT_ARCHIVE) to monthly gzip JSONL files and deletes them from
+the school database, lists the archive files, and streams archived rows
+back on demand. See utils.audit_archive.
+
+USAGE EXAMPLES:
+===============
+
+# 1. Archive both logs for every school (e.g. monthly from cron)
+python manage.py audit_archive archive
+
+# 2. See what would be archived with a shorter retention
+python manage.py audit_archive archive --log audit --days 90 --dry-run
+
+# 3. List the archive files of one school
+python manage.py audit_archive list --only atepi_palabek
+
+# 4. Stream the archived history of one object as JSON lines
+python manage.py audit_archive dump --only atepi_palabek --object-id <uuid> --from 2025-01-01 --to 2025-04-01
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from datetime import datetime, timedelta
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Archive old audit log rows to monthly files, list or read the archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action', choices=['archive', 'list', 'dump'],
+            help='archive old rows, list archive files, or dump archived rows as JSON lines'
+        )
+        parser.add_argument(
+            '--only', type=str, default=None,
+            help='Comma-separated list of school database names to process'
+        )
+        parser.add_argument(
+            '--log', choices=['audit', 'financial', 'all'], default='all',
+            help='Which audit log to process (dump defaults to audit)'
+        )
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Archive rows older than this many days (default: retention setting)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Rows archived per transaction (default: BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only count the rows that would be archived'
+        )
+        parser.add_argument(
+            '--from', dest='date_from', type=str, default=None,
+            help='dump: first date YYYY-MM-DD (inclusive)'
+        )
+        parser.add_argument(
+            '--to', dest='date_to', type=str, default=None,
+            help='dump: last date YYYY-MM-DD (exclusive)'
+        )
+        parser.add_argument(
+            '--object-id', type=str, default=None,
+            help='dump: only rows of this object'
+        )
+        parser.add_argument(
+            '--user-id', type=str, default=None,
+            help='dump: only rows by this user'
+        )
+
+    def handle(self, *args, **options):
+        from schoolara.tenants import ensure_tenant_database, get_school_databases
+        from schoolara.managers import DatabaseContext
+        from utils.audit_archive import ARCHIVED_LOGS
+
+        if options['only']:
+            school_databases = [db.strip() for db in options['only'].split(',')]
+        else:
+            school_databases = get_school_databases()
+
+        if options['log'] == 'all':
+            logs = ['audit'] if options['action'] == 'dump' else list(ARCHIVED_LOGS)
+        else:
+            logs = [options['log']]
+
+        for db in school_databases:
+            if not ensure_tenant_database(db):
+                self.stderr.write(self.style.ERROR(f"Database '{db}' not found"))
+                continue
+
+            with DatabaseContext(db):
+                for log in logs:
+                    try:
+                        if options['action'] == 'archive':
+                            self.archive(db, log, options)
+                        elif options['action'] == 'list':
+                            self.list(db, log)
+                        else:
+                            self.dump(db, log, options)
+                    except CommandError:
+                        raise
+                    except Exception as e:
+                        logger.error(f"Audit archive {options['action']} failed for {db} ({log}): {e}", exc_info=True)
+                        self.stderr.write(self.style.ERROR(f"{db} ({log}): {e}"))
+
+    # -------------------------------------------------------------------------
+    # Actions
+    # -------------------------------------------------------------------------
+
+    def archive(self, db, log, options):
+        from django.utils import timezone
+        from utils.audit_archive import archive_audit_logs
+
+        before = None
+        if options['days'] is not None:
+            before = timezone.now() - timedelta(days=options['days'])
+
+        result = archive_audit_logs(
+            log, db, before=before,
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+
+        verb = 'would archive' if options['dry_run'] else 'archived'
+        months = f" ({result['months'][0]} to {result['months'][-1]})" if result['months'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{db} ({log}): {verb} {result['archived']} rows older than "
+            f"{result['before']:%Y-%m-%d}{months}"
+        ))
+
+    def list(self, db, log):
+        from utils.audit_archive import list_archives
+
+        archives = list_archives(log, db)
+        if not archives:
+            self.stdout.write(f"{db} ({log}): no archives")
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{db} ({log})"))
+        for archive in archives:
+            self.stdout.write(f"  {archive['month']}  {archive['size'] / 1024:10.1f} KB  {archive['path']}")
+
+    def dump(self, db, log, options):
+        from django.core.serializers.json import DjangoJSONEncoder
+        from utils.audit_archive import iter_archived_rows
+
+        filters = {}
+        if options['object_id']:
+            filters['object_id'] = options['object_id']
+        if options['user_id']:
+            filters['user_id'] = options['user_id']
+
+        rows = iter_archived_rows(
+            log, db,
+            start=self.parse_date(options['date_from'], '--from'),
+            end=self.parse_date(options['date_to'], '--to'),
+            **filters
+        )
+        for row in rows:
+            self.stdout.write(json.dumps(row, cls=DjangoJSONEncoder))
+
+    def parse_date(self, value, option):
+        from django.utils import timezone
+
+        if not value:
+            return None
+        try:
+            return timezone.make_aware(datetime.strptime(value, '%Y-%m-%d'))
+        except ValueError:
+            raise CommandError(f"{option} must be in YYYY-MM-DD format")
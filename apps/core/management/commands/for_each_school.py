@@ -0,0 +1,191 @@
+# management/commands/for_each_school.py
+
+"""
+Run a management command on every school database, several at a time.
+
+Each school runs in a worker process (settings.SCHOOL_RUNNER['WORKERS'] or
+--workers at a time) inside DatabaseContext(school). The command gets the
+school as --only when it has that option (mark_overdue_invoices,
+migrate_schools, ...), as --database when it has that one (migrate), and
+otherwise just runs with the school as the current database
+(setup_chart_of_accounts, ...). Output is captured per school; a school
+fails when the command raises or writes to stderr.
+
+A summary table of status, duration and result per school is printed at
+the end, and the command exits with an error when a school failed. Run the
+same command again with --resume to retry only the schools that did not
+succeed. See utils.school_runner.
+
+Options of for_each_school go before the command name; everything after it
+is passed to the command.
+
+USAGE EXAMPLES:
+===============
+
+# 1. Nightly overdue pass, 4 schools at a time
+python manage.py for_each_school --workers 4 mark_overdue_invoices
+
+# 2. Arguments after the command name are passed to it
+python manage.py for_each_school mark_overdue_invoices --no-late-fees
+
+# 3. Migrate school apps everywhere but one school
+python manage.py for_each_school --exclude atepi_pajok migrate_schools --school-apps-only
+
+# 4. Set up the chart of accounts for two schools
+python manage.py for_each_school --only atepi_palabek,atepi_pajok setup_chart_of_accounts
+
+# 5. After a partly failed run: retry the schools that did not succeed
+python manage.py for_each_school --resume mark_overdue_invoices
+
+# 6. Show each school's output
+python manage.py for_each_school --verbosity 2 rollup_audit_activity
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+import argparse
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Characters of a command's last output line shown in the summary
+RESULT_WIDTH = 60
+
+
+class Command(BaseCommand):
+    help = 'Run a management command on every school database in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'command_name',
+            help='Management command to run for each school'
+        )
+        parser.add_argument(
+            'command_args', nargs=argparse.REMAINDER,
+            help='Arguments passed to the command'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Schools processed in parallel (default: SCHOOL_RUNNER WORKERS)'
+        )
+        parser.add_argument(
+            '--only', type=str, default=None,
+            help='Comma-separated list of school database names to process'
+        )
+        parser.add_argument(
+            '--exclude', type=str, default=None,
+            help='Comma-separated list of school database names to skip'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Skip the schools that succeeded in the previous run of the same command'
+        )
+
+    def handle(self, *args, **options):
+        from django.core.management import get_commands
+        from utils.school_runner import (
+            RunState, STATUS_OK, call_command_in_school, for_each_school, select_schools,
+        )
+
+        command_name = options['command_name']
+        command_args = options['command_args'] or []
+        verbosity = options['verbosity']
+
+        if command_name == 'for_each_school':
+            raise CommandError("for_each_school cannot run itself")
+        if command_name not in get_commands():
+            raise CommandError(f"Unknown command: '{command_name}'")
+        if options['workers'] is not None and options['workers'] < 1:
+            raise CommandError("--workers must be at least 1")
+
+        schools, unknown = select_schools(
+            only=self._split(options['only']),
+            exclude=self._split(options['exclude']),
+        )
+        for alias in unknown:
+            self.stderr.write(self.style.ERROR(f"Database '{alias}' not found"))
+
+        state = RunState(' '.join([command_name, *command_args]))
+        if options['resume']:
+            completed = state.load().completed() & set(schools)
+            if completed:
+                self.stdout.write(f"Resuming: skipping {len(completed)} schools completed in the previous run")
+        else:
+            state.clear()
+
+        pending = [school for school in schools if school not in state.completed()]
+        if not pending:
+            self.stdout.write(self.style.WARNING('No school databases to process.'))
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Running '{' '.join([command_name, *command_args])}' on {len(pending)} schools"
+        ))
+
+        finished = []
+
+        def report(result):
+            finished.append(result)
+            progress = f"[{len(finished)}/{len(pending)}] {result['school']}"
+            if result['status'] == STATUS_OK:
+                self.stdout.write(self.style.SUCCESS(f"{progress} done in {result['duration']:.1f}s"))
+                if verbosity >= 2 and result['result']['output'].strip():
+                    self.stdout.write(result['result']['output'].rstrip())
+            else:
+                self.stderr.write(self.style.ERROR(f"{progress} failed: {result['error']}"))
+                if verbosity >= 2 and result.get('traceback'):
+                    self.stderr.write(result['traceback'].rstrip())
+
+        started = time.monotonic()
+        results = for_each_school(
+            call_command_in_school, pending, command_name, command_args,
+            verbosity=verbosity, workers=options['workers'], state=state, on_result=report,
+        )
+        elapsed = time.monotonic() - started
+
+        self._write_summary(results, elapsed)
+
+        failed = [result['school'] for result in results if result['status'] != STATUS_OK]
+        if failed:
+            raise CommandError(
+                f"{len(failed)} of {len(results)} schools failed ({', '.join(failed)}); "
+                f"rerun with --resume to retry them"
+            )
+        state.clear()
+
+    def _write_summary(self, results, elapsed):
+        """Print the per-school status, duration and result table."""
+        from utils.school_runner import STATUS_OK
+
+        rows = []
+        for result in results:
+            if result['status'] == STATUS_OK:
+                lines = [line for line in result['result']['output'].splitlines() if line.strip()]
+                detail = lines[-1].strip() if lines else ''
+            else:
+                detail = result['error'] or ''
+            if len(detail) > RESULT_WIDTH:
+                detail = detail[:RESULT_WIDTH - 3] + '...'
+            rows.append((result['school'], result['status'].upper(), f"{result['duration']:.1f}s", detail))
+
+        headers = ('School', 'Status', 'Duration', 'Result')
+        widths = [max(len(row[i]) for row in [headers, *rows]) for i in range(3)]
+
+        def format_row(row):
+            return '  '.join(value.ljust(width) for value, width in zip(row[:3], widths)) + '  ' + row[3]
+
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING(format_row(headers)))
+        for row in rows:
+            style = self.style.SUCCESS if row[1] == STATUS_OK.upper() else self.style.ERROR
+            self.stdout.write(style(format_row(row)))
+
+        total = sum(result['duration'] for result in results)
+        succeeded = sum(1 for result in results if result['status'] == STATUS_OK)
+        self.stdout.write(
+            f"\n{succeeded}/{len(results)} schools succeeded in {elapsed:.1f}s "
+            f"({total:.1f}s of school time)"
+        )
+
+    def _split(self, value):
+        return [alias.strip() for alias in value.split(',') if alias.strip()] if value else None
@@ -0,0 +1,88 @@
+# management/commands/mark_overdue_invoices.py
+
+"""
+Nightly overdue pass for all school databases.
+
+For each school: marks PENDING/PARTIALLY_PAID invoices past their due date
+as OVERDUE with one set-based UPDATE, then records late fees on overdue
+invoices past the grace period (FinancialSettings) in batches. See
+InvoiceBulkOperations.mark_overdue_invoices and
+InvoiceCalculator.apply_late_fees.
+
+USAGE EXAMPLES:
+===============
+
+# 1. Run the pass for every school (e.g. from cron at 00:30)
+python manage.py mark_overdue_invoices
+
+# 2. One school only, without late fees
+python manage.py mark_overdue_invoices --only atepi_palabek --no-late-fees
+
+# 3. Re-run for a past date
+python manage.py mark_overdue_invoices --date 2025-03-01
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from datetime import datetime
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Mark overdue invoices and apply late fees for all school databases'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only', type=str, default=None,
+            help='Comma-separated list of school database names to process'
+        )
+        parser.add_argument(
+            '--date', type=str, default=None,
+            help='Reference date YYYY-MM-DD (default: today in school time)'
+        )
+        parser.add_argument(
+            '--no-late-fees', action='store_true',
+            help='Only mark invoices as overdue'
+        )
+
+    def handle(self, *args, **options):
+        from schoolara.tenants import ensure_tenant_database, get_school_databases
+        from schoolara.managers import DatabaseContext
+        from fees.services import InvoiceBulkOperations, InvoiceCalculator
+
+        today = None
+        if options['date']:
+            try:
+                today = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("--date must be in YYYY-MM-DD format")
+
+        if options['only']:
+            school_databases = [db.strip() for db in options['only'].split(',')]
+        else:
+            school_databases = get_school_databases()
+
+        for db in school_databases:
+            if not ensure_tenant_database(db):
+                self.stderr.write(self.style.ERROR(f"Database '{db}' not found"))
+                continue
+
+            started = time.monotonic()
+
+            with DatabaseContext(db):
+                try:
+                    marked = InvoiceBulkOperations.mark_overdue_invoices(today)
+                    message = f"{db}: {marked} invoices marked overdue"
+
+                    if not options['no_late_fees']:
+                        late_fees = InvoiceCalculator.apply_late_fees(today)
+                        message += f", {late_fees['count']} late fees ({late_fees['total']})"
+
+                    self.stdout.write(self.style.SUCCESS(
+                        f"{message} in {time.monotonic() - started:.1f}s"
+                    ))
+                except Exception as e:
+                    logger.error(f"Error in overdue pass for {db}: {e}", exc_info=True)
+                    self.stderr.write(self.style.ERROR(f"{db}: {e}"))
@@ -33,7 +33,6 @@ python manage.py migrate_schools finance --only atepi_palabek --fake-initial
 
 from django.core.management.base import BaseCommand
 from django.core.management import call_command
-from django.conf import settings
 from django.db import connections
 import logging
 
@@ -89,15 +88,14 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
+        from schoolara.tenants import ensure_tenant_database, get_school_databases
+
         # Determine databases to migrate
         if options['only']:
             school_databases = [db.strip() for db in options['only'].split(',')]
         else:
-            # Default: all databases starting with 'school_' in settings
-            school_databases = [
-                db for db in settings.DATABASES.keys()
-                if db != 'default'  # everything else is a school DB
-            ]
+            # Default: every school database (settings and School table)
+            school_databases = get_school_databases()
 
         if not school_databases:
             self.stdout.write(self.style.WARNING('No school databases found.'))
@@ -123,8 +121,8 @@ class Command(BaseCommand):
 
         # Loop through each school database
         for db in school_databases:
-            if db not in settings.DATABASES:
-                self.stderr.write(self.style.ERROR(f"Database '{db}' not found in settings"))
+            if not ensure_tenant_database(db):
+                self.stderr.write(self.style.ERROR(f"Database '{db}' not found"))
                 continue
 
             self.stdout.write(self.style.MIGRATE_HEADING(f"\nMigrating database: {db}"))
@@ -146,3 +144,8 @@ class Command(BaseCommand):
 
             except Exception as e:
                 self.stderr.write(self.style.ERROR(f"Error migrating {db}: {str(e)}"))
+
+            finally:
+                # Connections are persistent (CONN_MAX_AGE): do not keep one
+                # open per school for the rest of the run
+                connections[db].close()
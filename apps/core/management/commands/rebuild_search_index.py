@@ -0,0 +1,71 @@
+# management/commands/rebuild_search_index.py
+
+"""
+Rebuild the full-text search index (utils.search) of school databases.
+
+USAGE EXAMPLES:
+===============
+
+# 1. Rebuild every indexed entity in every school database
+python manage.py rebuild_search_index
+
+# 2. Rebuild one school only
+python manage.py rebuild_search_index --only atepi_palabek
+
+# 3. Rebuild only students and guardians (comma-separated)
+python manage.py rebuild_search_index --entity students.student,students.guardian
+"""
+
+from django.core.management.base import BaseCommand
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index for all school databases'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only', type=str, default=None,
+            help='Comma-separated list of school database names to index'
+        )
+        parser.add_argument(
+            '--entity', type=str, default=None,
+            help='Comma-separated list of model labels to index (default: all)'
+        )
+
+    def handle(self, *args, **options):
+        from schoolara.tenants import ensure_tenant_database, get_school_databases
+        from schoolara.managers import DatabaseContext
+        from utils.search import SEARCH_INDEXES, rebuild_index
+
+        if options['only']:
+            school_databases = [db.strip() for db in options['only'].split(',')]
+        else:
+            school_databases = get_school_databases()
+
+        if options['entity']:
+            entities = [entity.strip().lower() for entity in options['entity'].split(',')]
+            unknown = [entity for entity in entities if entity not in SEARCH_INDEXES]
+            if unknown:
+                self.stderr.write(self.style.ERROR(f"Not indexed: {', '.join(unknown)}"))
+                return
+        else:
+            entities = list(SEARCH_INDEXES)
+
+        for db in school_databases:
+            if not ensure_tenant_database(db):
+                self.stderr.write(self.style.ERROR(f"Database '{db}' not found"))
+                continue
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\nIndexing database: {db}"))
+
+            with DatabaseContext(db):
+                for entity in entities:
+                    try:
+                        count = rebuild_index(entity, using=db)
+                        self.stdout.write(f"  {entity}: {count} documents")
+                    except Exception as e:
+                        logger.error(f"Error rebuilding search index for {entity} on {db}: {e}")
+                        self.stderr.write(self.style.ERROR(f"  {entity}: {e}"))
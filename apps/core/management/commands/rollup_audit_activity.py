@@ -0,0 +1,65 @@
+# management/commands/rollup_audit_activity.py
+
+"""
+Nightly compaction of the audit logs into daily rollups.
+
+For each school: rolls AuditLog and FinancialAuditLog activity of every
+closed day since the last run up into AuditDailyRollup rows, which the
+audit dashboards read instead of the raw logs. See
+utils.audit_rollups.rollup_audit_activity.
+
+USAGE EXAMPLES:
+===============
+
+# 1. Roll up every school (e.g. from cron at 00:15)
+python manage.py rollup_audit_activity
+
+# 2. One school only
+python manage.py rollup_audit_activity --only atepi_palabek
+"""
+
+from django.core.management.base import BaseCommand
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Roll audit log activity up into daily rollups for all school databases'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only', type=str, default=None,
+            help='Comma-separated list of school database names to process'
+        )
+
+    def handle(self, *args, **options):
+        from schoolara.tenants import ensure_tenant_database, get_school_databases
+        from schoolara.managers import DatabaseContext
+        from utils.audit_rollups import rollup_audit_activity
+
+        if options['only']:
+            school_databases = [db.strip() for db in options['only'].split(',')]
+        else:
+            school_databases = get_school_databases()
+
+        for db in school_databases:
+            if not ensure_tenant_database(db):
+                self.stderr.write(self.style.ERROR(f"Database '{db}' not found"))
+                continue
+
+            started = time.monotonic()
+
+            with DatabaseContext(db):
+                try:
+                    rolled_up = rollup_audit_activity(db)
+                    summary = ', '.join(
+                        f"{source.lower()} up to {day or '-'}" for source, day in rolled_up.items()
+                    )
+                    self.stdout.write(self.style.SUCCESS(
+                        f"{db}: {summary} in {time.monotonic() - started:.1f}s"
+                    ))
+                except Exception as e:
+                    logger.error(f"Error rolling up audit activity for {db}: {e}", exc_info=True)
+                    self.stderr.write(self.style.ERROR(f"{db}: {e}"))
@@ -0,0 +1,104 @@
+# management/commands/run_background_jobs.py
+
+"""
+Background job worker (utils.jobs) for all school databases.
+
+Polls every school database for due jobs, restores the school database
+and the user who queued the job, and processes its items chunk by chunk.
+Run one or more workers under a process supervisor (systemd, supervisord).
+
+USAGE EXAMPLES:
+===============
+
+# 1. Run the worker (polls until stopped)
+python manage.py run_background_jobs
+
+# 2. Process the jobs that are due now and exit (e.g. from cron)
+python manage.py run_background_jobs --once
+
+# 3. Only serve some schools
+python manage.py run_background_jobs --only atepi_palabek,atepi_pajok
+"""
+
+from django.core.management.base import BaseCommand
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs for all school databases'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only', type=str, default=None,
+            help='Comma-separated list of school database names to serve'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Process the jobs that are due and exit'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=None,
+            help='Seconds to wait when no job is due (default: POLL_INTERVAL)'
+        )
+        parser.add_argument(
+            '--worker-name', type=str, default=None,
+            help='Name recorded on claimed jobs (default: host:pid)'
+        )
+
+    def handle(self, *args, **options):
+        from schoolara.tenants import ensure_tenant_database, get_school_databases
+        from django.db import close_old_connections
+        from utils.jobs import (
+            get_job_settings, default_worker_name, release_stale_jobs,
+            claim_next_job, run_job,
+        )
+
+        if options['only']:
+            school_databases = [db.strip() for db in options['only'].split(',')]
+        else:
+            school_databases = get_school_databases()
+
+        unknown = [db for db in school_databases if not ensure_tenant_database(db)]
+        if unknown:
+            self.stderr.write(self.style.ERROR(f"Database(s) not found: {', '.join(unknown)}"))
+            return
+
+        worker_name = options['worker_name'] or default_worker_name()
+        sleep = options['sleep'] if options['sleep'] is not None else get_job_settings()['POLL_INTERVAL']
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Worker {worker_name} serving {len(school_databases)} school database(s)"
+        ))
+
+        try:
+            while True:
+                processed = 0
+
+                for db in school_databases:
+                    close_old_connections()
+                    try:
+                        release_stale_jobs(db)
+                        job = claim_next_job(db, worker_name)
+                        while job is not None:
+                            self.stdout.write(f"[{db}] {job.description or job.job_type}...")
+                            job = run_job(job)
+                            self.stdout.write(
+                                f"[{db}] {job.get_status_display()}: {job.succeeded_items} succeeded, "
+                                f"{job.failed_items} failed of {job.total_items}"
+                            )
+                            processed += 1
+                            job = claim_next_job(db, worker_name)
+                    except Exception as e:
+                        logger.error(f"Background job worker error on {db}: {e}", exc_info=True)
+                        self.stderr.write(self.style.ERROR(f"[{db}] {e}"))
+
+                if options['once']:
+                    break
+                if not processed:
+                    time.sleep(sleep)
+
+        except KeyboardInterrupt:
+            self.stdout.write("Worker stopped")
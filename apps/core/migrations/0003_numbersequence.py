@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Document type and prefix this counter belongs to', max_length=150, unique=True, verbose_name='Sequence Key')),
+                ('last_value', models.PositiveBigIntegerField(default=0, help_text='Last number handed out for this key', verbose_name='Last Value')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+            ],
+            options={
+                'verbose_name': 'Number Sequence',
+                'verbose_name_plural': 'Number Sequences',
+                'ordering': ['key'],
+            },
+        ),
+    ]
@@ -5,12 +5,14 @@ Core models for School Management System
 Updated with timezone support and SACCO best practices
 """
 
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from datetime import date, timedelta
 from decimal import Decimal, InvalidOperation
 from utils.models import BaseModel
+from schoolara.managers import SchoolManager
 from django.utils import timezone
 from zoneinfo import ZoneInfo, available_timezones
 import pycountry
@@ -624,6 +626,11 @@ class SchoolConfiguration(BaseModel):
         """Ensure only one instance exists (singleton pattern)"""
         self.pk = 1  # ⭐ Force pk=1
         super().save(*args, **kwargs)
+        self.clear_cache(using=self._state.db)
+        
+        # The middleware caches the operational timezone separately
+        from schoolara.middleware import SchoolDatabaseMiddleware
+        SchoolDatabaseMiddleware.clear_timezone_cache(self._state.db)
         logger.debug(f"SchoolConfiguration saved with pk: {self.pk}")
 
     def delete(self, *args, **kwargs):
@@ -634,30 +641,26 @@ class SchoolConfiguration(BaseModel):
     @classmethod 
     def get_cached_instance(cls):
         """
-        Get school configuration instance with simple in-memory caching.
-        This provides a cached version to avoid repeated database queries.
-        """
-        import threading
-        if not hasattr(threading.current_thread(), '_school_config_cache'):
-            threading.current_thread()._school_config_cache = None
+        Get the current school's configuration from the settings cache.
         
-        cached = threading.current_thread()._school_config_cache
+        Cached per school database in this process and in the shared Django
+        cache, and invalidated by save(). Use get_instance() to edit.
         
-        if cached is None:
-            try:
-                cached = cls.get_instance()
-                threading.current_thread()._school_config_cache = cached
-            except Exception:
-                return None
+        Returns:
+            SchoolConfiguration or None if it could not be loaded
+        """
+        from utils.settings_cache import get_cached_settings
         
-        return cached
+        try:
+            return get_cached_settings(cls, cls.get_instance)
+        except Exception:
+            return None
 
     @classmethod 
-    def clear_cache(cls):
-        """Clear the cached configuration instance"""
-        import threading
-        if hasattr(threading.current_thread(), '_school_config_cache'):
-            threading.current_thread()._school_config_cache = None
+    def clear_cache(cls, using=None):
+        """Clear the cached configuration instance (in every process)"""
+        from utils.settings_cache import invalidate_settings
+        invalidate_settings(cls, using=using)
     
     # -------------------------------------------------------------------------
     # STRING REPRESENTATION
@@ -1326,6 +1329,7 @@ class FinancialSettings(BaseModel):
         """Ensure only one instance exists (singleton pattern)"""
         self.pk = 1
         super().save(*args, **kwargs)
+        self.clear_cache(using=self._state.db)
     
     def delete(self, *args, **kwargs):
         """Prevent deletion of the singleton instance"""
@@ -1335,6 +1339,27 @@ class FinancialSettings(BaseModel):
     def load(cls):
         """Alternative method name for getting the instance."""
         return cls.get_instance()
+    
+    @classmethod
+    def get_cached_instance(cls):
+        """
+        Get the current school's financial settings from the settings cache.
+        
+        Avoids the get_or_create() round trip of get_instance() on every
+        payment, invoice and journal write. Invalidated by save(). Use
+        get_instance() when the settings are going to be edited.
+        
+        Returns:
+            FinancialSettings: A private copy of the cached instance
+        """
+        from utils.settings_cache import get_cached_settings
+        return get_cached_settings(cls, cls.get_instance)
+    
+    @classmethod
+    def clear_cache(cls, using=None):
+        """Clear the cached settings instance (in every process)"""
+        from utils.settings_cache import invalidate_settings
+        invalidate_settings(cls, using=using)
 
     # -------------------------------------------------------------------------
     # STRING REPRESENTATION
@@ -2907,6 +2932,13 @@ class FiscalPeriod(BaseModel):
         
         self.save()
         
+        # Snapshot account balances so ledger reports can start from this period
+        try:
+            from finance.models import AccountPeriodBalance
+            AccountPeriodBalance.rebuild_for_period(self)
+        except Exception as e:
+            logger.error(f"Error building account balances for period {self}: {e}", exc_info=True)
+        
         logger.info(f"Fiscal period {self} closed by {self.get_closed_by_name()}")
     
     def lock_period(self, user=None):
@@ -2980,6 +3012,10 @@ class FiscalPeriod(BaseModel):
         
         self.save()
         
+        # Balances of this and later periods may change again
+        from finance.models import AccountPeriodBalance
+        AccountPeriodBalance.invalidate_from(self)
+        
         user_name = user.get_full_name() if user else "System"
         logger.warning(f"Fiscal period {self} reopened by {user_name}")
     
@@ -4107,4 +4143,162 @@ class UnitOfMeasure(BaseModel):
                 check=models.Q(conversion_factor__gt=0),
                 name='positive_conversion_factor'
             ),
-        ]
\ No newline at end of file
+        ]
+
+
+# =============================================================================
+# DOCUMENT NUMBER SEQUENCES
+# =============================================================================
+
+class NumberSequence(models.Model):
+    """
+    Per-school counter for document numbers (invoices, payments, receipts,
+    journal entries, staff IDs, ...).
+    
+    One row per sequence key, e.g. 'fees.invoice:INV-2024-'. Allocating a
+    number is a single-row UPDATE ... SET last_value = last_value + n, so
+    concurrent generators only contend on that one row instead of range
+    locking every document sharing the prefix.
+    
+    allocate() joins the caller's transaction: the row lock is held until
+    it commits and a rollback also rolls back the counter. FeeInvoice,
+    Payment (payment and receipt numbers) and JournalEntry save atomically
+    with the number their pre_save signal reserves, so their numbering is
+    gap-free. Numbers reserved outside a transaction (staff IDs, expenses,
+    ...) are committed before the document is saved, and a failed save
+    skips its number.
+    
+    Deliberately not a BaseModel - counters are bumped on every document
+    and must not produce audit entries of their own.
+    """
+    
+    key = models.CharField(
+        "Sequence Key",
+        max_length=150,
+        unique=True,
+        help_text="Document type and prefix this counter belongs to"
+    )
+    last_value = models.PositiveBigIntegerField(
+        "Last Value",
+        default=0,
+        help_text="Last number handed out for this key"
+    )
+    updated_at = models.DateTimeField("Updated At", auto_now=True)
+    
+    # Use SchoolManager for automatic database routing
+    objects = SchoolManager()
+    
+    class Meta:
+        verbose_name = "Number Sequence"
+        verbose_name_plural = "Number Sequences"
+        ordering = ['key']
+    
+    def __str__(self):
+        return f"{self.key} = {self.last_value}"
+    
+    # -------------------------------------------------------------------------
+    # ALLOCATION
+    # -------------------------------------------------------------------------
+    
+    @classmethod
+    def allocate(cls, key, count=1, seed=None):
+        """
+        Reserve ``count`` consecutive numbers for a sequence key.
+        
+        Reserve inside the document's transaction to keep the numbering
+        gap-free (see the class docstring).
+        
+        Args:
+            key: Sequence key (document type + prefix)
+            count: How many numbers to reserve (block pre-allocation for bulk runs)
+            seed: Callable returning the highest number already in use.
+                  Only called the first time a key is used, so existing
+                  documents numbered before sequences existed are respected.
+        
+        Returns:
+            range: The reserved numbers
+        
+        Example:
+            >>> numbers = NumberSequence.allocate('fees.invoice:INV-2024-', count=40)
+            >>> [f"INV-2024-{n:04d}" for n in numbers]
+        """
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        
+        queryset = cls.objects.get_queryset()
+        using = queryset.db
+        
+        with transaction.atomic(using=using):
+            updated = queryset.filter(key=key).update(
+                last_value=F('last_value') + count,
+                updated_at=timezone.now()
+            )
+            
+            if not updated:
+                start = seed() if seed else 0
+                try:
+                    with transaction.atomic(using=using):
+                        cls.objects.using(using).create(key=key, last_value=start + count)
+                except IntegrityError:
+                    # Another process created the row first - increment it instead
+                    queryset.filter(key=key).update(
+                        last_value=F('last_value') + count,
+                        updated_at=timezone.now()
+                    )
+            
+            last_value = queryset.filter(key=key).values_list('last_value', flat=True).get()
+        
+        return range(last_value - count + 1, last_value + 1)
+    
+    @classmethod
+    def next_value(cls, key, seed=None):
+        """
+        Reserve the next number for a sequence key.
+        
+        Returns:
+            int: The reserved number
+        """
+        return cls.allocate(key, count=1, seed=seed)[0]
+    
+    @classmethod
+    def allocate_formatted(cls, sequence_name, model, field_name, prefix, count=1,
+                           width=4, separator='-'):
+        """
+        Reserve ``count`` formatted document numbers for a prefix.
+        
+        The sequence key is ``'<sequence_name>:<prefix>'`` and is seeded
+        from the highest number already stored in ``model.field_name`` the
+        first time the prefix is used.
+        
+        Args:
+            sequence_name: Sequence namespace (e.g., 'fees.invoice')
+            model: Document model, used to seed the sequence on first use
+            field_name: Document number field on the model
+            prefix: Everything before the numeric part (e.g., 'INV-2024-');
+                    empty for unprefixed numbers
+            count: How many numbers to reserve
+            width: Zero-padding width of the numeric part
+            separator: Separator before the numeric part in existing numbers
+        
+        Returns:
+            list: Formatted document numbers in sequence order
+        
+        Example:
+            >>> NumberSequence.allocate_formatted(
+            ...     'finance.expense', Expense, 'expense_number', 'EXP-2024-', width=5
+            ... )
+            ['EXP-2024-00042']
+        """
+        from core.utils import get_max_sequence_suffix
+        
+        numbers = cls.allocate(
+            f"{sequence_name}:{prefix}",
+            count=count,
+            seed=lambda: get_max_sequence_suffix(
+                model.objects.all(),
+                field_name,
+                prefix,
+                separator=separator if prefix else None
+            )
+        )
+        return [f"{prefix}{number:0{width}d}" for number in numbers]
@@ -1,3 +1,165 @@
-from django.test import TestCase
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase, override_settings
+
+from schoolara import middleware
+from schoolara.db import pool
+
+
+class FakeDatabaseWrapper:
+    """The parts of a DatabaseWrapper the pool mixin hooks into, without a server."""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.connection = None
+        self.in_atomic_block = False
+        self.health_check_enabled = False
+        self.health_check_done = True
+
+    def get_new_connection(self, conn_params):
+        return object()
+
+    def ensure_connection(self):
+        if self.connection is None:
+            self.connection = self.get_new_connection({})
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        self.ensure_connection()
+        return object()
+
+    def _close(self):
+        pass
+
+    def close(self):
+        if self.connection is not None:
+            self._close()
+            self.connection = None
+
+    def close_if_health_check_failed(self):
+        pass
+
+    def close_if_unusable_or_obsolete(self):
+        if self.connection is not None:
+            self.health_check_done = False
+
+
+class PooledWrapper(pool.PooledConnectionMixin, FakeDatabaseWrapper):
+    pass
+
+
+@override_settings(DATABASE_POOL={'MAX_CONNECTIONS': 2, 'TIMEOUT': 1})
+class ConnectionBudgetTests(SimpleTestCase):
+    alias = 'pool_test_school'
+
+    def setUp(self):
+        pool._budgets.pop(self.alias, None)
+        pool._metrics.pop(self.alias, None)
+
+    def run_in_threads(self, count, target):
+        """Run target(index) in count threads, returning {index: error}."""
+        errors = {}
+
+        def run(index):
+            try:
+                target(index)
+            except (OperationalError, threading.BrokenBarrierError) as e:
+                errors[index] = e
+
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def request(self, wrapper):
+        """One request: a query, then close_old_connections at request_finished."""
+        wrapper._cursor()
+        wrapper.close_if_unusable_or_obsolete()
+
+    def test_idle_persistent_connections_do_not_starve_other_threads(self):
+        limit = 2
+        wrappers = [PooledWrapper(self.alias) for _ in range(limit + 1)]
+        idle = threading.Barrier(limit + 1, timeout=5)
+
+        def worker(index):
+            if index < limit:
+                # Serve a request, then sit idle with the connection open
+                self.request(wrappers[index])
+                idle.wait()
+                idle.wait()
+            else:
+                idle.wait()
+                try:
+                    self.request(wrappers[index])
+                finally:
+                    idle.wait()
+
+        errors = self.run_in_threads(limit + 1, worker)
+
+        self.assertEqual(errors, {})
+        metrics = pool.get_pool_metrics(self.alias)
+        self.assertEqual(metrics['connects'], limit + 1)
+        self.assertEqual(metrics['open'], limit + 1)
+        self.assertEqual(metrics['in_use'], 0)
+        self.assertEqual(metrics['timeouts'], 0)
+
+    def test_waiter_gets_slot_when_a_request_finishes(self):
+        wrappers = [PooledWrapper(self.alias) for _ in range(3)]
+        busy = threading.Barrier(3, timeout=5)
+
+        def worker(index):
+            if index < 2:
+                wrappers[index]._cursor()
+                busy.wait()
+                wrappers[index].close_if_unusable_or_obsolete()
+            else:
+                busy.wait()
+                self.request(wrappers[index])
+
+        errors = self.run_in_threads(3, worker)
+
+        self.assertEqual(errors, {})
+        self.assertEqual(pool.get_pool_metrics(self.alias)['in_use'], 0)
+
+    @override_settings(DATABASE_POOL={'MAX_CONNECTIONS': 2, 'TIMEOUT': 0.1})
+    def test_checked_out_connections_are_bounded(self):
+        busy = [PooledWrapper(self.alias) for _ in range(2)]
+        for wrapper in busy:
+            wrapper._cursor()
+
+        with self.assertRaises(OperationalError):
+            PooledWrapper(self.alias)._cursor()
+        self.assertEqual(pool.get_pool_metrics(self.alias)['timeouts'], 1)
+
+        busy[0].close_if_unusable_or_obsolete()
+        PooledWrapper(self.alias)._cursor()
+
+    def test_connection_in_transaction_stays_checked_out(self):
+        wrapper = PooledWrapper(self.alias)
+        wrapper._cursor()
+        wrapper.in_atomic_block = True
+
+        wrapper.close_if_unusable_or_obsolete()
+        self.assertEqual(pool.get_pool_metrics(self.alias)['in_use'], 1)
+
+        wrapper.in_atomic_block = False
+        wrapper.close()
+        metrics = pool.get_pool_metrics(self.alias)
+        self.assertEqual(metrics['in_use'], 0)
+        self.assertEqual(metrics['open'], 0)
+
+
+class TimezoneCacheTests(SimpleTestCase):
+
+    def test_clearing_a_timezone_keeps_tenant_stamps(self):
+        with mock.patch.object(middleware, 'tenant_cache') as tenant_cache:
+            middleware.SchoolDatabaseMiddleware.clear_timezone_cache('atepi_palabek')
+
+        tenant_cache.delete.assert_called_once_with(
+            'school_tz_atepi_palabek', **middleware.SchoolDatabaseMiddleware.ROUTING_CACHE
+        )
+        self.assertFalse(tenant_cache.invalidate_namespace.called)
@@ -34,4 +34,12 @@ urlpatterns = [
      # System Configuration
      path('htmx/system/quick-stats/', htmx_views.system_configuration_stats, name='system_configuration_stats'),
 
+     # =============================================================================
+     # BACKGROUND JOBS
+     # =============================================================================
+
+     path('htmx/jobs/<uuid:pk>/progress/', htmx_views.job_progress, name='job_progress'),
+     path('htmx/jobs/<uuid:pk>/retry/', htmx_views.job_retry, name='job_retry'),
+     path('htmx/jobs/<uuid:pk>/cancel/', htmx_views.job_cancel, name='job_cancel'),
+
 ]
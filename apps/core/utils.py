@@ -5,24 +5,23 @@ Central utilities for School Management System
 Prevents code duplication and ensures consistency across all apps
 """
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.http import HttpResponse
 from decimal import Decimal, InvalidOperation
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Thread-local storage for recursion detection
-import threading
-_thread_locals = threading.local()
+# Context-local flag for recursion detection (per request/task, see schoolara.managers)
+from contextvars import ContextVar
+_in_timezone_query = ContextVar('in_timezone_query', default=False)
 
 def _is_in_timezone_query():
     """Check if we're currently in a timezone query to prevent recursion"""
-    return getattr(_thread_locals, 'in_timezone_query', False)
+    return _in_timezone_query.get()
 
 def _set_timezone_query_flag(value):
     """Set the timezone query flag"""
-    _thread_locals.in_timezone_query = value
+    _in_timezone_query.set(value)
 
 
 # =============================================================================
@@ -44,7 +43,7 @@ def get_base_currency():
     """
     try:
         from core.models import FinancialSettings
-        settings = FinancialSettings.get_instance()
+        settings = FinancialSettings.get_cached_instance()
         return settings.school_currency if settings else 'UGX'
     except Exception as e:
         logger.warning(f"Could not fetch currency from settings: {e}")
@@ -69,7 +68,7 @@ def format_money(amount, include_symbol=True):
     """
     try:
         from core.models import FinancialSettings
-        settings = FinancialSettings.get_instance()
+        settings = FinancialSettings.get_cached_instance()
         if settings:
             return settings.format_currency(amount, include_symbol)
     except Exception as e:
@@ -554,22 +553,15 @@ def is_school_day(check_date=None, exclude_weekends=True):
         >>>     print("Dec 25 is a school day")
     
     Note:
-        This is a basic implementation. Extend with:
-        - School holiday calendar integration
-        - Public holiday checking
-        - Half-day/exam day handling
+        Holidays come from the school calendar (academics.school_calendar),
+        which caches the Holiday ranges of each year.
     """
+    from academics.school_calendar import is_school_day as calendar_is_school_day
+    
     if check_date is None:
         check_date = get_school_today()
     
-    # Check weekend
-    if exclude_weekends and check_date.weekday() >= 5:  # Saturday=5, Sunday=6
-        return False
-    
-    # TODO: Check against school holiday calendar
-    # TODO: Check against public holidays
-    
-    return True
+    return calendar_is_school_day(check_date, exclude_weekends)
 
 
 def get_school_days_between(start_date, end_date, exclude_weekends=True):
@@ -594,18 +586,9 @@ def get_school_days_between(start_date, end_date, exclude_weekends=True):
         >>> )
         >>> print(f"School days in January: {school_days}")
     """
-    if not start_date or not end_date or start_date > end_date:
-        return 0
+    from academics.school_calendar import working_days_between
     
-    count = 0
-    current = start_date
-    
-    while current <= end_date:
-        if is_school_day(current, exclude_weekends):
-            count += 1
-        current += timedelta(days=1)
-    
-    return count
+    return working_days_between(start_date, end_date, exclude_weekends)
 
 
 # =============================================================================
@@ -862,6 +845,43 @@ def generate_reference_number(prefix, sequence_number, year=None):
     return f"{prefix}-{year}-{sequence_number:05d}"
 
 
+def get_max_sequence_suffix(queryset, field_name, prefix='', separator='-'):
+    """
+    Get the highest numeric suffix already used for a document number prefix.
+    
+    Used to seed a NumberSequence the first time a prefix is used, so
+    numbering continues after documents created before sequences existed.
+    Compares numbers numerically (a string MAX ranks '9999' above '10000').
+    
+    Args:
+        queryset: Queryset of the document model
+        field_name: Document number field (e.g., 'invoice_number')
+        prefix: Number prefix (e.g., 'INV-2024-'); empty for unprefixed numbers
+        separator: Separator before the numeric part
+        
+    Returns:
+        int: Highest number in use, 0 if none
+    
+    Example:
+        >>> from core.utils import get_max_sequence_suffix
+        >>> get_max_sequence_suffix(FeeInvoice.objects.all(), 'invoice_number', 'INV-2024-')
+        10001
+    """
+    if prefix:
+        queryset = queryset.filter(**{f"{field_name}__startswith": prefix})
+    
+    highest = 0
+    for number in queryset.exclude(**{field_name: ''}).exclude(
+        **{f"{field_name}__isnull": True}
+    ).values_list(field_name, flat=True).iterator():
+        suffix = number[len(prefix):] if prefix else number
+        suffix = suffix.split(separator)[-1] if separator else suffix
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    
+    return highest
+
+
 # =============================================================================
 # VALIDATION UTILITIES
 # =============================================================================
@@ -943,39 +963,32 @@ def validate_no_overlap(start_date, end_date, existing_ranges, obj_to_exclude=No
 
 def generate_csv_response(data, filename, headers=None):
     """
-    Generate CSV HTTP response from data.
+    Generate a streaming CSV HTTP response from data.
+    
+    Rows are written to the client as they are produced, so pass a
+    generator (e.g. utils.exports.iter_queryset_rows) for large exports.
     
     Args:
-        data: List of lists/tuples containing row data
+        data: Iterable of lists/tuples containing row data
         filename: Output filename
         headers: Optional list of column headers
         
     Returns:
-        HttpResponse: CSV download response
+        StreamingHttpResponse: CSV download response
     
     Example:
         >>> from core.utils import generate_csv_response
+        >>> from utils.exports import iter_queryset_rows
         >>> 
         >>> def export_students(request):
-        >>>     students = Student.objects.all()
-        >>>     data = [[s.admission_number, s.name, s.grade] for s in students]
-        >>>     headers = ['Admission No', 'Name', 'Grade']
+        >>>     students = Student.objects.order_by('admission_number')
+        >>>     data = iter_queryset_rows(students, ['admission_number', 'first_name', 'last_name'])
+        >>>     headers = ['Admission No', 'First Name', 'Last Name']
         >>>     return generate_csv_response(data, 'students.csv', headers)
     """
-    import csv
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    writer = csv.writer(response)
-    
-    if headers:
-        writer.writerow(headers)
-    
-    for row in data:
-        writer.writerow(row)
+    from utils.exports import stream_csv_response
     
-    return response
+    return stream_csv_response(data, filename, headers)
 
 
 # =============================================================================
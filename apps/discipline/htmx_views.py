@@ -9,7 +9,9 @@ from datetime import timedelta
 import logging
 
 from .models import DisciplinaryRecord
-from utils.utils import parse_filters, paginate_queryset
+from utils.utils import parse_filters, paginate_queryset, get_search_stats
+from utils.async_views import async_htmx_view
+from utils.search import search_queryset
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +20,7 @@ logger = logging.getLogger(__name__)
 # DISCIPLINARY RECORD SEARCH
 # =============================================================================
 
+@async_htmx_view
 def disciplinary_record_search(request):
     """HTMX-compatible disciplinary record search with pagination and stats"""
     
@@ -49,12 +52,12 @@ def disciplinary_record_search(request):
     ).order_by('-incident_date')
     
     if query:
-        records = records.filter(
+        records = search_queryset(records, query, fallback=(
             Q(incident_number__icontains=query) |
             Q(student__first_name__icontains=query) |
             Q(student__last_name__icontains=query) |
             Q(incident_description__icontains=query)
-        )
+        ))
     
     if student:
         records = records.filter(student_id=student)
@@ -92,15 +95,14 @@ def disciplinary_record_search(request):
     
     records_page, paginator = paginate_queryset(request, records, per_page=20)
     
-    stats = {
-        'total': records.count(),
-        'resolved': records.filter(is_resolved=True).count(),
-        'unresolved': records.filter(is_resolved=False).count(),
-        'minor': records.filter(severity_level='minor').count(),
-        'moderate': records.filter(severity_level='moderate').count(),
-        'major': records.filter(severity_level='major').count(),
-        'severe': records.filter(severity_level='severe').count(),
-    }
+    stats = get_search_stats(records, paginator, counts={
+        'resolved': Q(is_resolved=True),
+        'unresolved': Q(is_resolved=False),
+        'minor': Q(severity_level='minor'),
+        'moderate': Q(severity_level='moderate'),
+        'major': Q(severity_level='major'),
+        'severe': Q(severity_level='severe'),
+    })
     
     return render(request, 'discipline/records/_record_results.html', {
         'records_page': records_page,
@@ -108,6 +110,7 @@ def disciplinary_record_search(request):
     })
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def disciplinary_quick_stats(request):
     """Get quick statistics for disciplinary records"""
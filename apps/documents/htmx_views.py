@@ -10,7 +10,8 @@ from decimal import Decimal
 import logging
 
 from .models import StudentDocument, DocumentAccessLog
-from utils.utils import parse_filters, paginate_queryset
+from utils.utils import parse_filters, paginate_queryset, paginate_queryset_by_cursor, get_search_stats
+from utils.async_views import async_htmx_view
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +20,7 @@ logger = logging.getLogger(__name__)
 # STUDENT DOCUMENT SEARCH
 # =============================================================================
 
+@async_htmx_view
 def student_document_search(request):
     """HTMX-compatible student document search with pagination and stats"""
     
@@ -141,31 +143,23 @@ def student_document_search(request):
     # Paginate
     documents_page, paginator = paginate_queryset(request, documents, per_page=20)
     
-    # Calculate stats
-    total = documents.count()
+    # Calculate stats (one aggregate query, total from the paginator)
     today = timezone.now().date()
     thirty_days_from_now = today + timedelta(days=30)
     
-    stats = {
-        'total': total,
-        'verified': documents.filter(is_verified=True).count(),
-        'pending_verification': documents.filter(
-            status='pending_review',
-            is_verified=False
-        ).count(),
-        'approved': documents.filter(status='approved').count(),
-        'rejected': documents.filter(status='rejected').count(),
-        'expired': documents.filter(expiry_date__lt=today).count(),
-        'expiring_soon': documents.filter(
-            expiry_date__lte=thirty_days_from_now,
-            expiry_date__gt=today
-        ).count(),
-        'required_documents': documents.filter(is_required=True).count(),
-        'unique_students': documents.values('student').distinct().count(),
-        'total_file_size': documents.aggregate(
-            total=Sum('file_size')
-        )['total'] or 0,
-    }
+    stats = get_search_stats(documents, paginator, counts={
+        'verified': Q(is_verified=True),
+        'pending_verification': Q(status='pending_review', is_verified=False),
+        'approved': Q(status='approved'),
+        'rejected': Q(status='rejected'),
+        'expired': Q(expiry_date__lt=today),
+        'expiring_soon': Q(expiry_date__lte=thirty_days_from_now, expiry_date__gt=today),
+        'required_documents': Q(is_required=True),
+    }, distinct={
+        'unique_students': 'student',
+    }, sums={
+        'total_file_size': 'file_size',
+    })
     
     return render(request, 'documents/student_documents/_document_results.html', {
         'documents_page': documents_page,
@@ -177,6 +171,7 @@ def student_document_search(request):
 # DOCUMENT ACCESS LOG SEARCH
 # =============================================================================
 
+@async_htmx_view
 def document_access_log_search(request):
     """HTMX-compatible document access log search with pagination and stats"""
     
@@ -238,22 +233,22 @@ def document_access_log_search(request):
         logs = logs.filter(access_datetime__lte=end_datetime)
     
     # Paginate
-    logs_page, paginator = paginate_queryset(request, logs, per_page=20)
-    
-    # Calculate stats
-    total = logs.count()
+    logs_page, paginator = paginate_queryset_by_cursor(
+        request, logs, per_page=20, ordering=('-access_datetime', '-id'), approximate_count=True
+    )
     
-    stats = {
-        'total': total,
-        'successful': logs.filter(was_successful=True).count(),
-        'failed': logs.filter(was_successful=False).count(),
-        'views': logs.filter(access_type='view').count(),
-        'downloads': logs.filter(access_type='download').count(),
-        'edits': logs.filter(access_type='edit').count(),
-        'unique_documents': logs.values('document').distinct().count(),
-        'unique_users': logs.values('created_by_id').distinct().count(),
-        'unique_ips': logs.values('ip_address').distinct().count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(logs, paginator, counts={
+        'successful': Q(was_successful=True),
+        'failed': Q(was_successful=False),
+        'views': Q(access_type='view'),
+        'downloads': Q(access_type='download'),
+        'edits': Q(access_type='edit'),
+    }, distinct={
+        'unique_documents': 'document',
+        'unique_users': 'created_by_id',
+        'unique_ips': 'ip_address',
+    })
     
     return render(request, 'documents/access_logs/_log_results.html', {
         'logs_page': logs_page,
@@ -349,6 +344,7 @@ def expiry_timeline(request):
 # VERIFICATION QUEUE
 # =============================================================================
 
+@async_htmx_view
 def verification_queue_stats(request):
     """Get statistics on verification queue"""
     
@@ -382,6 +378,7 @@ def verification_queue_stats(request):
 # QUICK STATS ENDPOINTS
 # =============================================================================
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def document_quick_stats(request):
     """Get quick statistics for student documents"""
@@ -414,6 +411,7 @@ def document_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def document_status_stats(request):
     """Get document status distribution statistics"""
@@ -451,6 +449,7 @@ def document_status_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def confidentiality_stats(request):
     """Get confidentiality level distribution"""
@@ -468,6 +467,7 @@ def confidentiality_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def access_activity_stats(request):
     """Get document access activity statistics"""
@@ -505,6 +505,7 @@ def access_activity_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def student_document_profile_stats(request):
     """Get statistics for a specific student's documents"""
@@ -548,6 +549,7 @@ def student_document_profile_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def document_storage_stats(request):
     """Get storage usage statistics"""
@@ -585,6 +587,7 @@ def document_storage_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def recent_uploads_stats(request):
     """Get statistics on recent uploads"""
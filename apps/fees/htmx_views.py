@@ -28,7 +28,8 @@ from .models import (
     DiscountApplication,
     Refund
 )
-from utils.utils import parse_filters, paginate_queryset
+from utils.utils import parse_filters, paginate_queryset, paginate_queryset_by_cursor, get_search_stats
+from utils.async_views import async_htmx_view
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +38,7 @@ logger = logging.getLogger(__name__)
 # STUDENT ACCOUNT SEARCH
 # =============================================================================
 
+@async_htmx_view
 def student_account_search(request):
     """HTMX-compatible student account search with pagination and stats"""
     
@@ -93,22 +95,20 @@ def student_account_search(request):
     # Paginate
     accounts_page, paginator = paginate_queryset(request, accounts, per_page=20)
     
-    # Calculate stats
-    total = accounts.count()
-    
-    stats = {
-        'total': total,
-        'active': accounts.filter(status='ACTIVE').count(),
-        'suspended': accounts.filter(status='SUSPENDED').count(),
-        'with_debt': accounts.filter(current_balance__lt=0).count(),
-        'with_credit': accounts.filter(current_balance__gt=0).count(),
-        'zero_balance': accounts.filter(current_balance=0).count(),
-        'total_debt': abs(accounts.filter(current_balance__lt=0).aggregate(
-            Sum('current_balance'))['current_balance__sum'] or 0),
-        'total_credit': accounts.filter(current_balance__gt=0).aggregate(
-            Sum('current_balance'))['current_balance__sum'] or 0,
-        'avg_balance': accounts.aggregate(Avg('current_balance'))['current_balance__avg'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(accounts, paginator, counts={
+        'active': Q(status='ACTIVE'),
+        'suspended': Q(status='SUSPENDED'),
+        'with_debt': Q(current_balance__lt=0),
+        'with_credit': Q(current_balance__gt=0),
+        'zero_balance': Q(current_balance=0),
+    }, sums={
+        'total_debt': ('current_balance', Q(current_balance__lt=0)),
+        'total_credit': ('current_balance', Q(current_balance__gt=0)),
+    }, aggregates={
+        'avg_balance': Avg('current_balance'),
+    })
+    stats['total_debt'] = abs(stats['total_debt'])
     
     return render(request, 'fees/accounts/_account_results.html', {
         'accounts_page': accounts_page,
@@ -120,6 +120,7 @@ def student_account_search(request):
 # ACCOUNT TRANSACTION SEARCH
 # =============================================================================
 
+@async_htmx_view
 def account_transaction_search(request):
     """HTMX-compatible account transaction search with pagination and stats"""
     
@@ -189,22 +190,20 @@ def account_transaction_search(request):
             pass
     
     # Paginate
-    transactions_page, paginator = paginate_queryset(request, transactions, per_page=20)
-    
-    # Calculate stats
-    total = transactions.count()
-    
-    stats = {
-        'total': total,
-        'credits': transactions.filter(transaction_type='CREDIT').count(),
-        'debits': transactions.filter(transaction_type='DEBIT').count(),
-        'payments': transactions.filter(transaction_type='PAYMENT').count(),
-        'invoices': transactions.filter(transaction_type='INVOICE').count(),
-        'total_credit_amount': transactions.filter(transaction_type__in=['CREDIT', 'PAYMENT']).aggregate(
-            Sum('amount'))['amount__sum'] or 0,
-        'total_debit_amount': transactions.filter(transaction_type__in=['DEBIT', 'INVOICE']).aggregate(
-            Sum('amount'))['amount__sum'] or 0,
-    }
+    transactions_page, paginator = paginate_queryset_by_cursor(
+        request, transactions, per_page=20, ordering=('-created_at', '-id')
+    )
+    
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(transactions, paginator, counts={
+        'credits': Q(transaction_type='CREDIT'),
+        'debits': Q(transaction_type='DEBIT'),
+        'payments': Q(transaction_type='PAYMENT'),
+        'invoices': Q(transaction_type='INVOICE'),
+    }, sums={
+        'total_credit_amount': ('amount', Q(transaction_type__in=['CREDIT', 'PAYMENT'])),
+        'total_debit_amount': ('amount', Q(transaction_type__in=['DEBIT', 'INVOICE'])),
+    })
     
     return render(request, 'fees/transactions/_transaction_results.html', {
         'transactions_page': transactions_page,
@@ -216,6 +215,7 @@ def account_transaction_search(request):
 # DISPLAY GROUP SEARCH
 # =============================================================================
 
+@async_htmx_view
 def display_group_search(request):
     """HTMX-compatible display group search with pagination and stats"""
     
@@ -250,16 +250,14 @@ def display_group_search(request):
     # Paginate
     groups_page, paginator = paginate_queryset(request, groups, per_page=20)
     
-    # Calculate stats
-    total = groups.count()
-    
-    stats = {
-        'total': total,
-        'active': groups.filter(is_active=True).count(),
-        'grouped': groups.filter(show_as_group=True).count(),
-        'ungrouped': groups.filter(show_as_group=False).count(),
-        'total_categories': sum(g.category_count for g in groups),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(groups, paginator, counts={
+        'active': Q(is_active=True),
+        'grouped': Q(show_as_group=True),
+        'ungrouped': Q(show_as_group=False),
+    }, aggregates={
+        'total_categories': Sum('category_count'),
+    })
     
     return render(request, 'fees/display_groups/_group_results.html', {
         'groups_page': groups_page,
@@ -271,6 +269,7 @@ def display_group_search(request):
 # FEE CATEGORY SEARCH
 # =============================================================================
 
+@async_htmx_view
 def fee_category_search(request):
     """HTMX-compatible fee category search with pagination and stats"""
     
@@ -336,20 +335,17 @@ def fee_category_search(request):
     # Paginate
     categories_page, paginator = paginate_queryset(request, categories, per_page=20)
     
-    # Calculate stats
-    total = categories.count()
-    
-    stats = {
-        'total': total,
-        'active': categories.filter(is_active=True).count(),
-        'mandatory': categories.filter(is_mandatory=True).count(),
-        'optional': categories.filter(is_mandatory=False).count(),
-        'refundable': categories.filter(is_refundable=True).count(),
-        'taxable': categories.filter(is_taxable=True).count(),
-        'recurring': categories.filter(is_recurring=True).count(),
-        'tuition': categories.filter(category_type='TUITION').count(),
-        'boarding': categories.filter(category_type='BOARDING').count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(categories, paginator, counts={
+        'active': Q(is_active=True),
+        'mandatory': Q(is_mandatory=True),
+        'optional': Q(is_mandatory=False),
+        'refundable': Q(is_refundable=True),
+        'taxable': Q(is_taxable=True),
+        'recurring': Q(is_recurring=True),
+        'tuition': Q(category_type='TUITION'),
+        'boarding': Q(category_type='BOARDING'),
+    })
     
     return render(request, 'fees/categories/_category_results.html', {
         'categories_page': categories_page,
@@ -361,6 +357,7 @@ def fee_category_search(request):
 # FEE STRUCTURE SEARCH
 # =============================================================================
 
+@async_htmx_view
 def fee_structure_search(request):
     """HTMX-compatible fee structure search with pagination and stats"""
     
@@ -418,18 +415,15 @@ def fee_structure_search(request):
     # Paginate
     structures_page, paginator = paginate_queryset(request, structures, per_page=20)
     
-    # Calculate stats
-    total = structures.count()
-    
-    stats = {
-        'total': total,
-        'active': structures.filter(is_active=True).count(),
-        'standard': structures.filter(structure_type='STANDARD').count(),
-        'boarder': structures.filter(structure_type='BOARDER').count(),
-        'day_scholar': structures.filter(structure_type='DAY_SCHOLAR').count(),
-        'scholarship': structures.filter(structure_type='SCHOLARSHIP').count(),
-        'with_late_fees': structures.filter(charges_late_fee=True).count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(structures, paginator, counts={
+        'active': Q(is_active=True),
+        'standard': Q(structure_type='STANDARD'),
+        'boarder': Q(structure_type='BOARDER'),
+        'day_scholar': Q(structure_type='DAY_SCHOLAR'),
+        'scholarship': Q(structure_type='SCHOLARSHIP'),
+        'with_late_fees': Q(charges_late_fee=True),
+    })
     
     return render(request, 'fees/structures/_structure_results.html', {
         'structures_page': structures_page,
@@ -441,6 +435,7 @@ def fee_structure_search(request):
 # FEE INVOICE SEARCH
 # =============================================================================
 
+@async_htmx_view
 def fee_invoice_search(request):
     """HTMX-compatible fee invoice search with pagination and stats"""
     
@@ -524,25 +519,21 @@ def fee_invoice_search(request):
     # Paginate
     invoices_page, paginator = paginate_queryset(request, invoices, per_page=20)
     
-    # Calculate stats
-    total = invoices.count()
+    # Calculate stats (one aggregate query, total from the paginator)
     today = timezone.now().date()
     
-    stats = {
-        'total': total,
-        'pending': invoices.filter(status='PENDING').count(),
-        'partially_paid': invoices.filter(status='PARTIALLY_PAID').count(),
-        'paid': invoices.filter(status='PAID').count(),
-        'overdue': invoices.filter(
-            due_date__lt=today,
-            status__in=['PENDING', 'PARTIALLY_PAID', 'OVERDUE']
-        ).count(),
-        'total_amount': invoices.aggregate(Sum('total_amount'))['total_amount__sum'] or 0,
-        'total_paid': invoices.aggregate(Sum('paid_amount'))['paid_amount__sum'] or 0,
-        'total_balance': invoices.aggregate(Sum('balance'))['balance__sum'] or 0,
-        'with_scholarships': invoices.filter(has_scholarships_applied=True).count(),
-        'with_discounts': invoices.filter(has_discounts_applied=True).count(),
-    }
+    stats = get_search_stats(invoices, paginator, counts={
+        'pending': Q(status='PENDING'),
+        'partially_paid': Q(status='PARTIALLY_PAID'),
+        'paid': Q(status='PAID'),
+        'overdue': Q(due_date__lt=today, status__in=['PENDING', 'PARTIALLY_PAID', 'OVERDUE']),
+        'with_scholarships': Q(has_scholarships_applied=True),
+        'with_discounts': Q(has_discounts_applied=True),
+    }, sums={
+        'total_amount': 'total_amount',
+        'total_paid': 'paid_amount',
+        'total_balance': 'balance',
+    })
     
     return render(request, 'fees/invoices/_invoice_results.html', {
         'invoices_page': invoices_page,
@@ -554,6 +545,7 @@ def fee_invoice_search(request):
 # PAYMENT SEARCH
 # =============================================================================
 
+@async_htmx_view
 def payment_search(request):
     """HTMX-compatible payment search with pagination and stats"""
     
@@ -642,23 +634,19 @@ def payment_search(request):
     # Paginate
     payments_page, paginator = paginate_queryset(request, payments, per_page=20)
     
-    # Calculate stats
-    total = payments.count()
-    
-    stats = {
-        'total': total,
-        'completed': payments.filter(status='COMPLETED').count(),
-        'pending': payments.filter(status='PENDING').count(),
-        'failed': payments.filter(status='FAILED').count(),
-        'verified': payments.filter(is_verified=True).count(),
-        'unverified': payments.filter(is_verified=False).count(),
-        'total_amount': payments.filter(status='COMPLETED').aggregate(
-            Sum('amount'))['amount__sum'] or 0,
-        'total_overpayment': payments.aggregate(
-            Sum('overpayment_amount'))['overpayment_amount__sum'] or 0,
-        'avg_payment': payments.filter(status='COMPLETED').aggregate(
-            Avg('amount'))['amount__avg'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(payments, paginator, counts={
+        'completed': Q(status='COMPLETED'),
+        'pending': Q(status='PENDING'),
+        'failed': Q(status='FAILED'),
+        'verified': Q(is_verified=True),
+        'unverified': Q(is_verified=False),
+    }, sums={
+        'total_amount': ('amount', Q(status='COMPLETED')),
+        'total_overpayment': 'overpayment_amount',
+    }, aggregates={
+        'avg_payment': Avg('amount', filter=Q(status='COMPLETED')),
+    })
     
     return render(request, 'fees/payments/_payment_results.html', {
         'payments_page': payments_page,
@@ -670,6 +658,7 @@ def payment_search(request):
 # SCHOLARSHIP PROGRAM SEARCH
 # =============================================================================
 
+@async_htmx_view
 def scholarship_program_search(request):
     """HTMX-compatible scholarship program search with pagination and stats"""
     
@@ -728,20 +717,18 @@ def scholarship_program_search(request):
     # Paginate
     programs_page, paginator = paginate_queryset(request, programs, per_page=20)
     
-    # Calculate stats
-    total = programs.count()
-    
-    stats = {
-        'total': total,
-        'active': programs.filter(is_active=True).count(),
-        'accepting_applications': programs.filter(is_accepting_applications=True).count(),
-        'total_budget': programs.aggregate(Sum('total_budget_amount'))['total_budget_amount__sum'] or 0,
-        'total_used': programs.aggregate(Sum('current_budget_used'))['current_budget_used__sum'] or 0,
-        'total_recipients': programs.aggregate(Sum('current_recipient_count'))['current_recipient_count__sum'] or 0,
-        'academic_merit': programs.filter(scholarship_type='ACADEMIC_MERIT').count(),
-        'need_based': programs.filter(scholarship_type='NEED_BASED').count(),
-        'full_scholarship': programs.filter(scholarship_type='FULL_SCHOLARSHIP').count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(programs, paginator, counts={
+        'active': Q(is_active=True),
+        'accepting_applications': Q(is_accepting_applications=True),
+        'academic_merit': Q(scholarship_type='ACADEMIC_MERIT'),
+        'need_based': Q(scholarship_type='NEED_BASED'),
+        'full_scholarship': Q(scholarship_type='FULL_SCHOLARSHIP'),
+    }, sums={
+        'total_budget': 'total_budget_amount',
+        'total_used': 'current_budget_used',
+        'total_recipients': 'current_recipient_count',
+    })
     
     return render(request, 'fees/scholarships/_program_results.html', {
         'programs_page': programs_page,
@@ -753,6 +740,7 @@ def scholarship_program_search(request):
 # SCHOLARSHIP APPLICATION SEARCH
 # =============================================================================
 
+@async_htmx_view
 def scholarship_application_search(request):
     """HTMX-compatible scholarship application search with pagination and stats"""
     
@@ -808,21 +796,17 @@ def scholarship_application_search(request):
     # Paginate
     applications_page, paginator = paginate_queryset(request, applications, per_page=20)
     
-    # Calculate stats
-    total = applications.count()
-    
-    stats = {
-        'total': total,
-        'submitted': applications.filter(status='SUBMITTED').count(),
-        'under_review': applications.filter(status='UNDER_REVIEW').count(),
-        'approved': applications.filter(status='APPROVED').count(),
-        'rejected': applications.filter(status='REJECTED').count(),
-        'waitlisted': applications.filter(status='WAITLISTED').count(),
-        'total_requested': applications.aggregate(
-            Sum('requested_amount'))['requested_amount__sum'] or 0,
-        'total_approved': applications.filter(status='APPROVED').aggregate(
-            Sum('approved_amount'))['approved_amount__sum'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(applications, paginator, counts={
+        'submitted': Q(status='SUBMITTED'),
+        'under_review': Q(status='UNDER_REVIEW'),
+        'approved': Q(status='APPROVED'),
+        'rejected': Q(status='REJECTED'),
+        'waitlisted': Q(status='WAITLISTED'),
+    }, sums={
+        'total_requested': 'requested_amount',
+        'total_approved': ('approved_amount', Q(status='APPROVED')),
+    })
     
     return render(request, 'fees/scholarships/_application_results.html', {
         'applications_page': applications_page,
@@ -834,6 +818,7 @@ def scholarship_application_search(request):
 # STUDENT SCHOLARSHIP SEARCH
 # =============================================================================
 
+@async_htmx_view
 def student_scholarship_search(request):
     """HTMX-compatible student scholarship search with pagination and stats"""
     
@@ -887,22 +872,17 @@ def student_scholarship_search(request):
     # Paginate
     scholarships_page, paginator = paginate_queryset(request, scholarships, per_page=20)
     
-    # Calculate stats
-    total = scholarships.count()
-    
-    stats = {
-        'total': total,
-        'active': scholarships.filter(status='ACTIVE').count(),
-        'suspended': scholarships.filter(status='SUSPENDED').count(),
-        'completed': scholarships.filter(status='COMPLETED').count(),
-        'total_awarded': scholarships.aggregate(
-            Sum('amount_awarded'))['amount_awarded__sum'] or 0,
-        'total_used': scholarships.aggregate(
-            Sum('total_amount_used'))['total_amount_used__sum'] or 0,
-        'total_remaining': scholarships.aggregate(
-            Sum('remaining_amount'))['remaining_amount__sum'] or 0,
-        'renewable': scholarships.filter(is_renewable=True).count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(scholarships, paginator, counts={
+        'active': Q(status='ACTIVE'),
+        'suspended': Q(status='SUSPENDED'),
+        'completed': Q(status='COMPLETED'),
+        'renewable': Q(is_renewable=True),
+    }, sums={
+        'total_awarded': 'amount_awarded',
+        'total_used': 'total_amount_used',
+        'total_remaining': 'remaining_amount',
+    })
     
     return render(request, 'fees/scholarships/_scholarship_results.html', {
         'scholarships_page': scholarships_page,
@@ -914,6 +894,7 @@ def student_scholarship_search(request):
 # DISCOUNT SEARCH
 # =============================================================================
 
+@async_htmx_view
 def discount_search(request):
     """HTMX-compatible discount search with pagination and stats"""
     
@@ -971,21 +952,17 @@ def discount_search(request):
     # Paginate
     discounts_page, paginator = paginate_queryset(request, discounts, per_page=20)
     
-    # Calculate stats
-    total = discounts.count()
-    
-    stats = {
-        'total': total,
-        'active': discounts.filter(is_active=True).count(),
-        'auto_apply': discounts.filter(auto_apply=True).count(),
-        'percentage': discounts.filter(discount_type='PERCENTAGE').count(),
-        'fixed': discounts.filter(discount_type='FIXED').count(),
-        'waiver': discounts.filter(discount_type='WAIVER').count(),
-        'total_budget': discounts.aggregate(
-            Sum('budget_limit'))['budget_limit__sum'] or 0,
-        'total_used': discounts.aggregate(
-            Sum('current_budget_used'))['current_budget_used__sum'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(discounts, paginator, counts={
+        'active': Q(is_active=True),
+        'auto_apply': Q(auto_apply=True),
+        'percentage': Q(discount_type='PERCENTAGE'),
+        'fixed': Q(discount_type='FIXED'),
+        'waiver': Q(discount_type='WAIVER'),
+    }, sums={
+        'total_budget': 'budget_limit',
+        'total_used': 'current_budget_used',
+    })
     
     return render(request, 'fees/discounts/_discount_results.html', {
         'discounts_page': discounts_page,
@@ -997,6 +974,7 @@ def discount_search(request):
 # REFUND SEARCH
 # =============================================================================
 
+@async_htmx_view
 def refund_search(request):
     """HTMX-compatible refund search with pagination and stats"""
     
@@ -1074,22 +1052,19 @@ def refund_search(request):
     # Paginate
     refunds_page, paginator = paginate_queryset(request, refunds, per_page=20)
     
-    # Calculate stats
-    total = refunds.count()
-    
-    stats = {
-        'total': total,
-        'requested': refunds.filter(status='REQUESTED').count(),
-        'under_review': refunds.filter(status='UNDER_REVIEW').count(),
-        'approved': refunds.filter(status='APPROVED').count(),
-        'rejected': refunds.filter(status='REJECTED').count(),
-        'completed': refunds.filter(status='COMPLETED').count(),
-        'total_amount': refunds.aggregate(Sum('amount'))['amount__sum'] or 0,
-        'total_approved': refunds.filter(status__in=['APPROVED', 'PROCESSING', 'COMPLETED']).aggregate(
-            Sum('approved_amount'))['approved_amount__sum'] or 0,
-        'overpayment': refunds.filter(refund_type='OVERPAYMENT').count(),
-        'withdrawal': refunds.filter(refund_type='WITHDRAWAL').count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(refunds, paginator, counts={
+        'requested': Q(status='REQUESTED'),
+        'under_review': Q(status='UNDER_REVIEW'),
+        'approved': Q(status='APPROVED'),
+        'rejected': Q(status='REJECTED'),
+        'completed': Q(status='COMPLETED'),
+        'overpayment': Q(refund_type='OVERPAYMENT'),
+        'withdrawal': Q(refund_type='WITHDRAWAL'),
+    }, sums={
+        'total_amount': 'amount',
+        'total_approved': ('approved_amount', Q(status__in=['APPROVED', 'PROCESSING', 'COMPLETED'])),
+    })
     
     return render(request, 'fees/refunds/_refund_results.html', {
         'refunds_page': refunds_page,
@@ -1101,6 +1076,7 @@ def refund_search(request):
 # QUICK STATS ENDPOINTS (for dashboard widgets)
 # =============================================================================
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def invoice_quick_stats(request):
     """Get quick statistics for invoices"""
@@ -1123,6 +1099,7 @@ def invoice_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def payment_quick_stats(request):
     """Get quick statistics for payments"""
@@ -1151,6 +1128,7 @@ def payment_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def scholarship_quick_stats(request):
     """Get quick statistics for scholarships"""
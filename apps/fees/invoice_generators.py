@@ -5,17 +5,60 @@ Centralized invoice generation for all enrollment types.
 PERMISSIVE - Uses what's available, skips what's not found.
 """
 
+from contextlib import contextmanager
+from contextvars import ContextVar
 from decimal import Decimal
+from django.db import transaction
+from django.db.models import Prefetch, QuerySet
 from django.utils import timezone
 from datetime import timedelta
 import logging
+import uuid
 
-from fees.models import FeeInvoice, FeeInvoiceItem, FeesCategory, FeesStructure
-from fees.utils import generate_invoice_number
+from fees.models import FeeInvoice, FeeInvoiceItem, FeesCategory, FeesStructure, FeesStructureItem
+from fees.utils import generate_invoice_number, generate_invoice_numbers
 from core.models import FinancialSettings, FiscalPeriod
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT/UPDATE statement for the bulk generation path
+BULK_BATCH_SIZE = 500
+
+
+# Set while bulk operations create enrollments they invoice themselves
+_auto_invoices_suppressed = ContextVar('auto_invoices_suppressed', default=False)
+
+
+# =============================================================================
+# AUTO-INVOICE SUPPRESSION
+# =============================================================================
+
+@contextmanager
+def suppress_auto_invoices():
+    """
+    Stop the auto-invoice signal from invoicing class enrollments one by one.
+    
+    Bulk enrollment and promotion create a chunk of enrollments inside this
+    block, then invoice the whole chunk with
+    ClassEnrollmentInvoiceGenerator.generate_for_enrollments(). Only the
+    current thread/task is affected.
+    
+    Example:
+        with suppress_auto_invoices():
+            enrollments = [create_enrollment(student) for student in chunk]
+        ClassEnrollmentInvoiceGenerator.generate_for_enrollments(enrollments)
+    """
+    token = _auto_invoices_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _auto_invoices_suppressed.reset(token)
+
+
+def auto_invoices_suppressed():
+    """True inside suppress_auto_invoices()."""
+    return _auto_invoices_suppressed.get()
+
 
 # =============================================================================
 # CUSTOM EXCEPTIONS
@@ -38,12 +81,17 @@ class ClassEnrollmentInvoiceGenerator:
         """
         Generate invoice for class enrollment.
         
+        Runs the batch path for a single enrollment, so the single and bulk
+        invoices are built identically. The enrollment is NOT linked to the
+        invoice here - the caller (auto-invoice signal) does that.
+        
         Args:
             class_enrollment: StudentClassEnrollment instance
             **kwargs: Additional options
                 - custom_due_date: Override due date
                 - include_optional: Include optional fees
-                - discount_amount: Apply discount
+                - discount_amount: Invoice discount to record (item final
+                  amounts already include item discounts)
                 
         Returns:
             FeeInvoice instance
@@ -51,32 +99,124 @@ class ClassEnrollmentInvoiceGenerator:
         Raises:
             FeeStructureNotFoundError: If no fee structure exists
         """
-        student = class_enrollment.student
-        session = class_enrollment.academic_session
-        class_instance = class_enrollment.class_instance
+        result = ClassEnrollmentInvoiceGenerator._generate_batch(
+            [class_enrollment],
+            link_enrollments=False,
+            **kwargs
+        )
         
-        # Get fee structure - MUST exist for academic fees
-        fee_structures = FeesStructure.objects.filter(
-            applicable_sessions=session,
-            academic_levels=class_instance.academic_level,
-            is_active=True
+        if result['failed']:
+            raise result['failed'][0]['error']
+        
+        invoice = result['invoices'][0]
+        logger.info(
+            f"Generated class enrollment invoice {invoice.invoice_number} "
+            f"for {class_enrollment.student.get_full_name()} with {invoice.items_count} items"
         )
         
-        if not fee_structures.exists():
-            raise FeeStructureNotFoundError(
-                f"No active fee structure found for {class_instance.academic_level} "
-                f"in {session.name}. Please create a fee structure in Admin → Fees → Fee Structures."
+        return invoice
+    
+    @staticmethod
+    def generate_for_enrollments(enrollments, link_enrollments=True, **kwargs):
+        """
+        Generate invoices for many class enrollments at once (term start).
+        
+        Fee structures, financial settings and the fiscal period are resolved
+        once, invoice numbers are allocated as one block, and invoices, items,
+        account transactions and student account balances are written with
+        bulk queries. Enrollments that already have an academic invoice are
+        skipped; enrollments without a usable fee structure are reported in
+        'failed' and do not stop the batch.
+        
+        Args:
+            enrollments: StudentClassEnrollment queryset or list
+            link_enrollments: Set academic_invoice on each enrollment (default True)
+            **kwargs: Same options as generate()
+            
+        Returns:
+            dict: {
+                'invoices': list of created FeeInvoice,
+                'created': int,
+                'skipped': int,
+                'failed': list of {'enrollment', 'error'},
+                'total_amount': Decimal,
+                'batch_id': str
+            }
+            
+        Example:
+            enrollments = StudentClassEnrollment.objects.filter(
+                academic_session=session,
+                is_active=True,
+                academic_invoice__isnull=True
             )
+            result = ClassEnrollmentInvoiceGenerator.generate_for_enrollments(enrollments)
+            print(f"Created {result['created']} invoices")
+        """
+        from utils.audit import log_financial_activity
         
-        # Get settings
-        settings = FinancialSettings.get_instance()
+        result = ClassEnrollmentInvoiceGenerator._generate_batch(
+            enrollments,
+            link_enrollments=link_enrollments,
+            **kwargs
+        )
         
-        # Calculate due date
-        due_date = kwargs.get('custom_due_date') or (
-            timezone.now().date() + timedelta(days=settings.default_payment_terms_days)
+        logger.info(
+            f"Bulk class invoice generation {result['batch_id']}: "
+            f"{result['created']} created, {result['skipped']} skipped, "
+            f"{len(result['failed'])} failed, total {result['total_amount']}"
         )
         
-        # Get fiscal period
+        if result['created']:
+            log_financial_activity(
+                action='BULK_INVOICE_CREATE',
+                amount=result['total_amount'],
+                additional_data={
+                    'created': result['created'],
+                    'skipped': result['skipped'],
+                    'failed': len(result['failed']),
+                    'invoice_numbers': [
+                        result['invoices'][0].invoice_number,
+                        result['invoices'][-1].invoice_number,
+                    ],
+                },
+                batch_id=result['batch_id'],
+                is_automated=True,
+            )
+        
+        return result
+    
+    @staticmethod
+    def _generate_batch(enrollments, link_enrollments=True, **kwargs):
+        """Build and bulk insert invoices for enrollments. See generate_for_enrollments()."""
+        from academics.models import StudentClassEnrollment
+        
+        if isinstance(enrollments, QuerySet):
+            enrollments = enrollments.select_related(
+                'student',
+                'academic_session',
+                'class_instance__academic_level',
+                'class_instance__academic_session'
+            )
+        enrollments = list(enrollments)
+        
+        result = {
+            'invoices': [],
+            'created': 0,
+            'skipped': 0,
+            'failed': [],
+            'total_amount': Decimal('0.00'),
+            'batch_id': str(uuid.uuid4()),
+        }
+        
+        if not enrollments:
+            return result
+        
+        # =================================================================
+        # STEP 1: RESOLVE SHARED STATE ONCE
+        # =================================================================
+        settings = FinancialSettings.get_cached_instance()
+        account_mappings = settings.get_account_mappings()
+        
         fiscal_period = FiscalPeriod.get_current_fiscal_period()
         if not fiscal_period:
             raise ValueError(
@@ -84,71 +224,264 @@ class ClassEnrollmentInvoiceGenerator:
                 "Please create a fiscal period in Admin → Core → Fiscal Periods."
             )
         
-        # Generate invoice number
-        invoice_number = generate_invoice_number()
-        
-        # Create invoice
-        invoice = FeeInvoice.objects.create(
-            invoice_number=invoice_number,
-            student=student,
-            academic_session=session,
-            fiscal_period=fiscal_period,
-            issue_date=timezone.now().date(),
-            due_date=due_date,
-            status='PENDING',
-            notes=f"Academic fees for {class_instance.get_display_name()}",
-            revenue_account=settings.default_service_revenue_account,
-            receivable_account=settings.default_receivables_account,
+        issue_date = timezone.now().date()
+        due_date = kwargs.get('custom_due_date') or (
+            issue_date + timedelta(days=settings.default_payment_terms_days)
         )
-        
-        # Add items from fee structures
         include_optional = kwargs.get('include_optional', False)
-        items_added = 0
+        discount_amount = Decimal(str(kwargs.get('discount_amount') or '0.00'))
+        
+        # =================================================================
+        # STEP 2: MATCH ENROLLMENTS TO FEE TEMPLATES
+        # =================================================================
+        templates = {}
+        pending = []
+        
+        for enrollment in enrollments:
+            if enrollment.academic_invoice_id:
+                result['skipped'] += 1
+                continue
+            
+            class_instance = enrollment.class_instance
+            key = (enrollment.academic_session_id, class_instance.academic_level_id)
+            
+            if key not in templates:
+                try:
+                    templates[key] = ClassEnrollmentInvoiceGenerator._build_fee_template(
+                        enrollment.academic_session,
+                        class_instance.academic_level,
+                        include_optional
+                    )
+                except FeeStructureNotFoundError as e:
+                    templates[key] = e
+            
+            template = templates[key]
+            if isinstance(template, Exception):
+                result['failed'].append({'enrollment': enrollment, 'error': template})
+                continue
+            
+            pending.append((enrollment, template))
+        
+        if not pending:
+            return result
+        
+        # =================================================================
+        # STEP 3: BULK INSERT INVOICES AND ITEMS
+        # =================================================================
+        with transaction.atomic(using=FeeInvoice.objects.db):
+            invoice_numbers = generate_invoice_numbers(len(pending))
+            
+            invoices = []
+            for (enrollment, template), invoice_number in zip(pending, invoice_numbers):
+                # discount_amount is recorded, not deducted: totals are the
+                # sum of item final amounts, as calculate_totals() computes them
+                total_amount = template['total_amount']
+                invoice = FeeInvoice(
+                    invoice_number=invoice_number,
+                    student=enrollment.student,
+                    academic_session=enrollment.academic_session,
+                    fiscal_period=fiscal_period,
+                    fee_structure=template['fee_structure'],
+                    issue_date=issue_date,
+                    due_date=due_date,
+                    subtotal_amount=template['subtotal_amount'],
+                    discount_amount=discount_amount,
+                    tax_amount=template['tax_amount'],
+                    total_amount=total_amount,
+                    paid_amount=Decimal('0.00'),
+                    balance=total_amount,
+                    status='PENDING',
+                    notes=f"Academic fees for {enrollment.class_instance.get_display_name()}",
+                    revenue_account=account_mappings.default_service_revenue_account,
+                    receivable_account=account_mappings.default_receivables_account,
+                )
+                invoice.items_count = len(template['items'])
+                invoices.append(invoice)
+            
+            FeeInvoice.bulk_create_audited(invoices, batch_size=BULK_BATCH_SIZE)
+            
+            items = [
+                FeeInvoiceItem(invoice=invoice, **line)
+                for invoice, (_, template) in zip(invoices, pending)
+                for line in template['items']
+            ]
+            FeeInvoiceItem.bulk_create_audited(items, batch_size=BULK_BATCH_SIZE)
+            
+            # =============================================================
+            # STEP 4: CHARGE STUDENT ACCOUNTS (fee_invoice_post_save in bulk)
+            # =============================================================
+            ClassEnrollmentInvoiceGenerator._charge_student_accounts(invoices)
+            
+            # =============================================================
+            # STEP 5: LINK ENROLLMENTS
+            # =============================================================
+            if link_enrollments:
+                linked = []
+                for (enrollment, _), invoice in zip(pending, invoices):
+                    enrollment.academic_invoice = invoice
+                    linked.append(enrollment)
+                StudentClassEnrollment.bulk_update_audited(
+                    linked,
+                    ['academic_invoice'],
+                    batch_size=BULK_BATCH_SIZE
+                )
         
+        result['invoices'] = invoices
+        result['created'] = len(invoices)
+        result['total_amount'] = sum(
+            (invoice.total_amount for invoice in invoices),
+            Decimal('0.00')
+        )
+        
+        return result
+    
+    @staticmethod
+    def _build_fee_template(session, academic_level, include_optional):
+        """
+        Resolve the fee structures for a session/level and pre-compute lines.
+        
+        Returns:
+            dict: fee_structure (highest priority), items (FeeInvoiceItem
+                  field dicts), subtotal_amount, tax_amount, total_amount
+                  
+        Raises:
+            FeeStructureNotFoundError: If no structure or no items apply
+        """
+        from fees.services import InvoiceCalculator
+        
+        fee_structures = list(
+            FeesStructure.objects.filter(
+                applicable_sessions=session,
+                academic_levels=academic_level,
+                is_active=True
+            ).prefetch_related(
+                Prefetch(
+                    'items',
+                    queryset=FeesStructureItem.objects.select_related('fee_category')
+                )
+            ).order_by('priority').distinct()
+        )
+        
+        if not fee_structures:
+            raise FeeStructureNotFoundError(
+                f"No active fee structure found for {academic_level} "
+                f"in {session.name}. Please create a fee structure in Admin → Fees → Fee Structures."
+            )
+        
+        items = []
         for fee_structure in fee_structures:
-            for fee_item in fee_structure.items.filter(is_active=True):
+            for fee_item in fee_structure.items.all():
+                category = fee_item.fee_category
+                
                 # Skip optional fees if not requested
-                if not include_optional and not fee_item.fee_category.is_mandatory:
+                if not include_optional and not category.is_mandatory:
                     continue
                 
-                FeeInvoiceItem.objects.create(
-                    invoice=invoice,
-                    fee_category=fee_item.fee_category,
-                    description=fee_item.description or fee_item.fee_category.name,
-                    quantity=Decimal('1.00'),
-                    unit_amount=fee_item.amount,
-                    amount=fee_item.amount,
-                    tax_percentage=(
-                        fee_item.fee_category.default_tax_rate 
-                        if fee_item.fee_category.is_taxable 
-                        else Decimal('0.00')
-                    ),
-                )
-                items_added += 1
-        
-        if items_added == 0:
-            # Delete the empty invoice
-            invoice.delete()
+                if fee_item.tax_percentage:
+                    tax_percentage = fee_item.tax_percentage
+                elif category.is_taxable:
+                    tax_percentage = category.default_tax_rate
+                else:
+                    tax_percentage = Decimal('0.00')
+                
+                totals = InvoiceCalculator.calculate_line_item_totals({
+                    'amount': fee_item.amount,
+                    'quantity': Decimal('1.00'),
+                    'tax_percentage': tax_percentage,
+                    'discount_percentage': fee_item.discount_percentage,
+                })
+                subtotal = totals['subtotal'].quantize(Decimal('0.01'))
+                final_amount = totals['total_amount'].quantize(Decimal('0.01'))
+                
+                items.append({
+                    'fee_category': category,
+                    'description': category.name,
+                    'quantity': Decimal('1.00'),
+                    'unit_amount': fee_item.amount,
+                    'amount': subtotal,
+                    'tax_percentage': tax_percentage,
+                    'tax_amount': totals['tax_amount'],
+                    'discount_percentage': fee_item.discount_percentage,
+                    'discount_amount': totals['discount_amount'],
+                    'total_discount_amount': totals['discount_amount'],
+                    'has_regular_discount': totals['discount_amount'] > 0,
+                    'final_amount': final_amount,
+                    'original_amount': subtotal,
+                })
+        
+        if not items:
             raise FeeStructureNotFoundError(
-                f"Fee structure exists but contains no items for {class_instance.academic_level} "
+                f"Fee structure exists but contains no items for {academic_level} "
                 f"in {session.name}. Please add fee items to the structure."
             )
         
-        # Recalculate invoice totals
-        invoice.calculate_totals()
-        
-        # Apply discount if provided
-        discount_amount = kwargs.get('discount_amount')
-        if discount_amount:
-            invoice.discount_amount = Decimal(str(discount_amount))
-            invoice.save()
+        # Same sums as fee_invoice_item_post_save
+        return {
+            'fee_structure': fee_structures[0],
+            'items': items,
+            'subtotal_amount': sum((line['amount'] for line in items), Decimal('0.00')),
+            'tax_amount': sum((line['tax_amount'] for line in items), Decimal('0.00')),
+            'total_amount': sum((line['final_amount'] for line in items), Decimal('0.00')),
+        }
+    
+    @staticmethod
+    def _charge_student_accounts(invoices):
+        """
+        Post invoice charges to student accounts with bulk queries.
         
-        logger.info(
-            f"Generated class enrollment invoice {invoice.invoice_number} "
-            f"for {student.get_full_name()} with {items_added} items"
+        Mirrors fee_invoice_post_save: one INVOICE AccountTransaction per
+        invoice and updated balance/total charged on the StudentAccount.
+        """
+        from fees.models import StudentAccount, AccountTransaction
+        
+        students = {invoice.student_id: invoice.student for invoice in invoices}
+        accounts = {
+            account.student_id: account
+            for account in StudentAccount.objects.filter(student_id__in=students)
+        }
+        
+        # Reuse the loaded students so __str__ (audit object_repr) doesn't query
+        for student_id, account in accounts.items():
+            account.student = students[student_id]
+        
+        missing = [
+            StudentAccount(student=student)
+            for student_id, student in students.items()
+            if student_id not in accounts
+        ]
+        if missing:
+            StudentAccount.bulk_create_audited(missing, batch_size=BULK_BATCH_SIZE)
+            for account in missing:
+                accounts[account.student_id] = account
+        
+        now = timezone.now()
+        transactions = []
+        for invoice in invoices:
+            account = accounts[invoice.student_id]
+            new_balance = account.current_balance - invoice.total_amount
+            
+            transactions.append(AccountTransaction(
+                student_account=account,
+                transaction_type='INVOICE',
+                amount=-invoice.total_amount,  # Negative = charge
+                description=f"Invoice {invoice.invoice_number}",
+                balance_after=new_balance,
+                invoice=invoice,
+                academic_session=invoice.academic_session,
+                fiscal_period=invoice.fiscal_period,
+                reference_number=invoice.invoice_number
+            ))
+            
+            account.current_balance = new_balance
+            account.total_fees_charged += invoice.total_amount
+            account.last_transaction_date = now
+        
+        AccountTransaction.bulk_create_audited(transactions, batch_size=BULK_BATCH_SIZE)
+        StudentAccount.bulk_update_audited(
+            accounts.values(),
+            ['current_balance', 'total_fees_charged', 'last_transaction_date'],
+            batch_size=BULK_BATCH_SIZE
         )
-        
-        return invoice
 
 
 # =============================================================================
@@ -182,7 +515,7 @@ class BoardingEnrollmentInvoiceGenerator:
         """
         student = boarding_enrollment.student
         session = boarding_enrollment.academic_session
-        settings = FinancialSettings.get_instance()
+        settings = FinancialSettings.get_cached_instance()
         
         # =================================================================
         # STEP 1: FIND APPLICABLE FEE STRUCTURE
@@ -221,20 +554,23 @@ class BoardingEnrollmentInvoiceGenerator:
                 "Please create a fiscal period in Admin → Core → Fiscal Periods."
             )
         
-        invoice_number = generate_invoice_number()
-        
-        invoice = FeeInvoice.objects.create(
-            invoice_number=invoice_number,
-            student=student,
-            academic_session=session,
-            fiscal_period=fiscal_period,
-            issue_date=timezone.now().date(),
-            due_date=due_date,
-            status='PENDING',
-            notes=f"Boarding fees for {boarding_enrollment.get_boarding_type_display()}",
-            revenue_account=settings.boarding_revenue_account or settings.default_service_revenue_account,
-            receivable_account=settings.default_receivables_account,
-        )
+        # Reserve the number in the insert's transaction so a failed create
+        # does not burn it
+        with transaction.atomic(using=FeeInvoice.objects.db):
+            invoice_number = generate_invoice_number()
+            
+            invoice = FeeInvoice.objects.create(
+                invoice_number=invoice_number,
+                student=student,
+                academic_session=session,
+                fiscal_period=fiscal_period,
+                issue_date=timezone.now().date(),
+                due_date=due_date,
+                status='PENDING',
+                notes=f"Boarding fees for {boarding_enrollment.get_boarding_type_display()}",
+                revenue_account=settings.boarding_revenue_account or settings.default_service_revenue_account,
+                receivable_account=settings.default_receivables_account,
+            )
         
         # =================================================================
         # STEP 3: ADD ALL ITEMS FROM FEE STRUCTURES
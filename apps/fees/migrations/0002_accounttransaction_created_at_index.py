@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0003_initial'),
+        ('core', '0003_numbersequence'),
+        ('fees', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accounttransaction',
+            index=models.Index(fields=['created_at'], name='fees_accoun_created_f1c524_idx'),
+        ),
+    ]
@@ -14,14 +14,15 @@ Comprehensive fee management system with:
 All user tracking handled automatically by BaseModel
 """
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Sum
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from decimal import Decimal
 import logging
 
-from utils.models import BaseModel
+from utils.models import BaseModel, TimeOrderedBaseModel
 from core.models import PaymentMethod, TaxRate, FiscalYear, FiscalPeriod
 from academics.models import AcademicLevel, Class, AcademicSession
 from students.models import Student
@@ -141,7 +142,7 @@ class StudentAccount(BaseModel):
         return f"{self.student.get_full_name()} - Balance: {self.current_balance}"
 
 
-class AccountTransaction(BaseModel):
+class AccountTransaction(TimeOrderedBaseModel):
     """Individual transactions on student accounts"""
     
     TRANSACTION_TYPES = [
@@ -249,6 +250,7 @@ class AccountTransaction(BaseModel):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['student_account', '-created_at']),
+            models.Index(fields=['created_at']),
             models.Index(fields=['transaction_type']),
             models.Index(fields=['reference_number']),
             models.Index(fields=['academic_session']),
@@ -810,6 +812,9 @@ class FeeInvoice(BaseModel):
         ('UNCOLLECTIBLE', 'Uncollectible'),
     ]
     
+    # Statuses that still expect payment (see is_overdue)
+    OPEN_STATUSES = ['PENDING', 'PARTIALLY_PAID', 'OVERDUE']
+    
     # -------------------------------------------------------------------------
     # IDENTIFICATION
     # -------------------------------------------------------------------------
@@ -995,6 +1000,96 @@ class FeeInvoice(BaseModel):
     def __str__(self):
         return f"{self.invoice_number} - {self.student.get_full_name()}"
 
+    # -------------------------------------------------------------------------
+    # SAVE
+    # -------------------------------------------------------------------------
+
+    def save(self, *args, **kwargs):
+        """
+        Save in one transaction with the invoice number reserved by the
+        pre_save signal, so a failed insert also rolls back the
+        NumberSequence and leaves no gap in the numbering.
+        """
+        with transaction.atomic(using=kwargs.get('using') or type(self).objects.db):
+            return super().save(*args, **kwargs)
+
+    # -------------------------------------------------------------------------
+    # OVERDUE STATUS
+    # -------------------------------------------------------------------------
+
+    @property
+    def days_overdue(self):
+        """Days past the due date (0 if not yet due), in school time."""
+        from core.utils import get_school_today
+
+        if not self.due_date:
+            return 0
+        return max((get_school_today() - self.due_date).days, 0)
+
+    @property
+    def is_overdue(self):
+        """Past due with a balance outstanding and still expecting payment."""
+        return (
+            self.status in self.OPEN_STATUSES
+            and self.balance > 0
+            and self.days_overdue > 0
+        )
+
+    # -------------------------------------------------------------------------
+    # TOTALS
+    # -------------------------------------------------------------------------
+
+    def calculate_totals(self):
+        """
+        Recalculate subtotal, tax, total and balance from the invoice items.
+
+        Uses a single aggregate query. Item signals normally keep the totals
+        current incrementally (see adjust_totals); call this after bulk item
+        changes or to repair drift.
+        """
+        totals = self.items.aggregate(
+            subtotal=Sum('amount'),
+            tax=Sum('tax_amount'),
+            total=Sum('final_amount'),
+        )
+
+        self.subtotal_amount = totals['subtotal'] or Decimal('0.00')
+        self.tax_amount = totals['tax'] or Decimal('0.00')
+        self.total_amount = totals['total'] or Decimal('0.00')
+        self.balance = self.total_amount - self.paid_amount
+
+        self.save(update_fields=[
+            'subtotal_amount', 'tax_amount', 'total_amount', 'balance'
+        ])
+
+    @classmethod
+    def adjust_totals(cls, pk, subtotal_delta=Decimal('0.00'), tax_delta=Decimal('0.00'),
+                      total_delta=Decimal('0.00')):
+        """
+        Apply an item delta to an invoice's totals in a single UPDATE.
+
+        The arithmetic happens in the database (F() expressions), so
+        concurrent item writes can't overwrite each other's totals.
+
+        Args:
+            pk: Invoice primary key
+            subtotal_delta: Change in the sum of item amounts
+            tax_delta: Change in the sum of item tax amounts
+            total_delta: Change in the sum of item final amounts
+
+        Returns:
+            int: Number of invoices updated (0 or 1)
+
+        Example:
+            FeeInvoice.adjust_totals(item.invoice_id, item.amount, item.tax_amount, item.final_amount)
+        """
+        return cls.objects.filter(pk=pk).update(
+            subtotal_amount=F('subtotal_amount') + subtotal_delta,
+            tax_amount=F('tax_amount') + tax_delta,
+            total_amount=F('total_amount') + total_delta,
+            balance=F('balance') + total_delta,
+        )
+
 
 class FeeInvoiceItem(BaseModel):
     """Individual items within a fee invoice"""
@@ -1422,6 +1517,19 @@ class Payment(BaseModel):
     def __str__(self):
         return f"{self.payment_number} - {self.student.get_full_name()}"
     
+    # -------------------------------------------------------------------------
+    # SAVE
+    # -------------------------------------------------------------------------
+    
+    def save(self, *args, **kwargs):
+        """
+        Save in one transaction with the payment and receipt numbers
+        reserved by the pre_save signal, so a failed insert hands both
+        numbers back to their NumberSequence.
+        """
+        with transaction.atomic(using=kwargs.get('using') or type(self).objects.db):
+            return super().save(*args, **kwargs)
+    
     # -------------------------------------------------------------------------
     # HELPER METHODS
     # -------------------------------------------------------------------------
@@ -25,9 +25,17 @@ from students.models import Student
 from academics.models import AcademicSession
 from core.models import FinancialSettings
 from finance.models import JournalEntry, JournalTransaction, Journal
+from utils.deferred_totals import DeferredTotals
+from utils.jobs import JobHandler
 
 logger = logging.getLogger(__name__)
 
+# Invoice fields loaded by the set-based overdue pass (status, plus str(invoice) for audit)
+OVERDUE_AUDIT_FIELDS = [
+    'invoice_number', 'status', 'due_date',
+    'student__first_name', 'student__middle_name', 'student__last_name',
+]
+
 
 # =============================================================================
 # INVOICE SERVICE - CORE INVOICE OPERATIONS
@@ -93,7 +101,7 @@ class InvoiceService:
             )
         
         # Get settings for defaults
-        settings = FinancialSettings.get_instance()
+        settings = FinancialSettings.get_cached_instance()
         
         # Set default accounts if not provided
         if not invoice_data.get('revenue_account'):
@@ -106,9 +114,10 @@ class InvoiceService:
         # Create invoice
         invoice = FeeInvoice.objects.create(**invoice_data)
         
-        # Add items if provided
-        for item_data in items_data:
-            InvoiceService.add_invoice_item(invoice, item_data)
+        # Add items if provided (totals calculated once at the end)
+        with DeferredTotals():
+            for item_data in items_data:
+                InvoiceService.add_invoice_item(invoice, item_data)
         
         logger.info(f"Created invoice {invoice.invoice_number} for {invoice.student.get_full_name()}")
         
@@ -667,7 +676,7 @@ class InvoiceCalculator:
         Returns:
             Decimal: Late fee amount applied
         """
-        settings = FinancialSettings.get_instance()
+        settings = FinancialSettings.get_cached_instance()
         
         if not settings.late_fee_enabled:
             return Decimal('0.00')
@@ -693,6 +702,76 @@ class InvoiceCalculator:
         
         return late_fee
     
+    @staticmethod
+    def apply_late_fees(today=None, batch_size=1000):
+        """
+        Batch version of apply_late_fee() for the nightly overdue pass.
+        
+        Records the late fee on every OVERDUE invoice that is past the
+        grace period and has no late fee yet (so each invoice is charged
+        once). Invoices are read in primary key batches with only the
+        fields the calculation and audit need, and written back with one
+        bulk UPDATE per batch.
+        
+        Args:
+            today (date): Reference date (default: today in school time)
+            batch_size (int): Invoices per batch
+            
+        Returns:
+            dict: {'count': invoices charged, 'total': Decimal total late fees}
+        """
+        from core.utils import get_school_today
+        
+        settings = FinancialSettings.get_cached_instance()
+        result = {'count': 0, 'total': Decimal('0.00')}
+        
+        if not settings.late_fee_enabled or not settings.late_fee_percentage:
+            return result
+        
+        today = today or get_school_today()
+        # days_overdue > grace_period_days
+        cutoff = today - timedelta(days=settings.grace_period_days)
+        
+        invoices = FeeInvoice.objects.filter(
+            status='OVERDUE',
+            due_date__lt=cutoff,
+            late_fee_amount=0,
+            balance__gt=0
+        ).select_related('student').only(
+            *OVERDUE_AUDIT_FIELDS, 'balance', 'late_fee_amount',
+            'updated_by_id', 'updated_from_ip'
+        ).order_by('pk')
+        
+        last_pk = None
+        while True:
+            batch = invoices.filter(pk__gt=last_pk) if last_pk else invoices
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            
+            charged = []
+            for invoice in batch:
+                late_fee = (invoice.balance * settings.late_fee_percentage / 100).quantize(Decimal('0.01'))
+                if late_fee > 0:
+                    invoice.late_fee_amount = late_fee
+                    invoice.change_reason = "Late fee"
+                    charged.append(invoice)
+                    result['total'] += late_fee
+            
+            # One transaction per batch, so its audit entries are one bulk insert
+            with transaction.atomic(using=invoices.db):
+                FeeInvoice.bulk_update_audited(charged, ['late_fee_amount'])
+            result['count'] += len(charged)
+        
+        logger.info(
+            f"Applied late fees to {result['count']} invoices "
+            f"(total {result['total']}, {settings.late_fee_percentage}% after "
+            f"{settings.grace_period_days} days)"
+        )
+        
+        return result
+    
     @staticmethod
     def calculate_payment_breakdown(invoice):
         """
@@ -836,28 +915,78 @@ class InvoiceBulkOperations:
         return results
     
     @staticmethod
-    def mark_overdue_invoices():
+    def mark_overdue_invoices(today=None):
         """
         Mark all overdue invoices.
-        Called by scheduled task.
+        Called by scheduled task (manage.py mark_overdue_invoices).
+        
+        Set-based: one UPDATE over every PENDING/PARTIALLY_PAID invoice
+        past its due date with a balance outstanding, with the audit
+        entries bulk-inserted on commit. Invoice signals are not sent
+        (a status change has no signal side effects).
+        
+        Args:
+            today (date): Reference date (default: today in school time)
         
         Returns:
             int: Number of invoices marked as overdue
         """
-        from django.db.models import Q
+        from core.utils import get_school_today
         
-        today = timezone.now().date()
+        today = today or get_school_today()
         
         overdue_invoices = FeeInvoice.objects.filter(
-            Q(status='PENDING') | Q(status='PARTIALLY_PAID'),
-            due_date__lt=today
+            status__in=['PENDING', 'PARTIALLY_PAID'],
+            due_date__lt=today,
+            balance__gt=0
+        ).select_related('student').only(*OVERDUE_AUDIT_FIELDS)
+        
+        count = FeeInvoice.update_audited(
+            overdue_invoices,
+            change_reason=f"Past due date (overdue pass of {today})",
+            status='OVERDUE'
         )
         
-        count = 0
-        for invoice in overdue_invoices:
-            if InvoiceService.mark_invoice_as_overdue(invoice):
-                count += 1
-        
         logger.info(f"Marked {count} invoices as overdue")
         
-        return count
\ No newline at end of file
+        return count
+    
+    @staticmethod
+    def queue_mark_overdue_invoices(user=None):
+        """
+        Queue the overdue pass (mark_overdue_invoices() and
+        InvoiceCalculator.apply_late_fees()) as a background job.
+        
+        Args:
+            user: User queueing the job
+        
+        Returns:
+            BackgroundJob: The queued job
+        """
+        from utils.jobs import enqueue_job
+        
+        return enqueue_job(
+            'fees.mark_overdue_invoices',
+            user=user,
+            description="Mark overdue invoices"
+        )
+
+
+# -----------------------------------------------------------------------------
+# Background job handlers (see utils.jobs)
+# -----------------------------------------------------------------------------
+
+class MarkOverdueInvoicesJob(JobHandler):
+    """
+    Background version of the nightly overdue pass.
+    
+    The pass is set-based, so the job has a single item.
+    """
+    
+    def prepare(self, params):
+        return [('overdue-pass', 'Mark overdue invoices and apply late fees')]
+    
+    def process_item(self, key, params, job):
+        count = InvoiceBulkOperations.mark_overdue_invoices()
+        late_fees = InvoiceCalculator.apply_late_fees()
+        return f"{count} marked overdue, {late_fees['count']} late fees ({late_fees['total']})"
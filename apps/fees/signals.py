@@ -8,12 +8,12 @@ Auto-processing for:
 - Payment number/receipt generation and account assignment  
 - Refund number generation and account assignment
 - Student account balance updates
-- Invoice total recalculation
+- Incremental invoice totals (item deltas applied with F())
 - Audit logging
 - Data integrity validation
 """
 
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 import logging
@@ -23,9 +23,12 @@ logger = logging.getLogger(__name__)
 from academics.models import StudentClassEnrollment
 from boarding.models import BoardingEnrollment
 
+from utils.deferred_totals import ItemTotals
+
 from fees.invoice_generators import (
     ClassEnrollmentInvoiceGenerator,
-    BoardingEnrollmentInvoiceGenerator
+    BoardingEnrollmentInvoiceGenerator,
+    auto_invoices_suppressed,
 )
 
 # Import number generation from utils.py (centralized)
@@ -60,7 +63,7 @@ def fee_invoice_pre_save(sender, instance, **kwargs):
         from core.models import FinancialSettings
         
         try:
-            settings = FinancialSettings.get_instance()
+            settings = FinancialSettings.get_cached_instance()
             
             if settings:
                 # Assign revenue account
@@ -170,7 +173,7 @@ def payment_pre_save(sender, instance, **kwargs):
         from core.models import FinancialSettings
         
         try:
-            settings = FinancialSettings.get_instance()
+            settings = FinancialSettings.get_cached_instance()
             
             if settings:
                 # Assign deposit account based on payment method
@@ -315,7 +318,7 @@ def refund_pre_save(sender, instance, **kwargs):
         from core.models import FinancialSettings
         
         try:
-            settings = FinancialSettings.get_instance()
+            settings = FinancialSettings.get_cached_instance()
             
             if settings:
                 # Assign refund account (where money comes from)
@@ -428,36 +431,49 @@ def refund_post_save(sender, instance, created, **kwargs):
 # FEE INVOICE ITEM SIGNALS
 # =============================================================================
 
+# Invoice totals follow their items through F() deltas (see utils.deferred_totals)
+_invoice_item_totals = ItemTotals(
+    'invoice',
+    ('amount', 'tax_amount', 'final_amount'),
+    ['subtotal_amount', 'tax_amount', 'total_amount', 'balance']
+)
+
+
+@receiver(pre_save, sender='fees.FeeInvoiceItem')
+def fee_invoice_item_pre_save(sender, instance, **kwargs):
+    """
+    Pre-save processing for invoice items:
+    - Remember the persisted totals so post_save can apply only the difference
+    """
+    _invoice_item_totals.pre_save(instance)
+
+
 @receiver(post_save, sender='fees.FeeInvoiceItem')
 def fee_invoice_item_post_save(sender, instance, created, **kwargs):
     """
     Post-save processing for invoice items:
-    - Recalculate invoice totals
+    - Apply the item's change to the invoice totals (F() delta, no item reload)
     """
     # Skip if in raw mode
     if kwargs.get('raw', False):
         return
     
     try:
-        # Recalculate invoice totals
-        invoice = instance.invoice
-        
-        # Sum all items
-        items = invoice.items.all()
-        invoice.subtotal_amount = sum(item.amount for item in items)
-        invoice.tax_amount = sum(item.tax_amount for item in items)
-        invoice.total_amount = sum(item.final_amount for item in items)
-        invoice.balance = invoice.total_amount - invoice.paid_amount
-        
-        # Save without triggering signals again
-        invoice.save(update_fields=[
-            'subtotal_amount', 'tax_amount', 'total_amount', 'balance'
-        ])
-        
-        logger.debug(f"Recalculated totals for invoice {invoice.invoice_number}")
-    
+        _invoice_item_totals.post_save(instance, created)
+    except Exception as e:
+        logger.error(f"Error updating invoice totals: {e}", exc_info=True)
+
+
+@receiver(post_delete, sender='fees.FeeInvoiceItem')
+def fee_invoice_item_post_delete(sender, instance, **kwargs):
+    """
+    Post-delete processing for invoice items:
+    - Remove the item's amounts from the invoice totals
+    """
+    try:
+        _invoice_item_totals.post_delete(instance)
     except Exception as e:
-        logger.error(f"Error recalculating invoice totals: {e}", exc_info=True)
+        logger.error(f"Error updating invoice totals after item deletion: {e}", exc_info=True)
 
 
 # =============================================================================
@@ -549,10 +565,15 @@ def auto_generate_class_enrollment_invoice(sender, instance, created, **kwargs):
     the generation based on enrollment state.
     
     Uses the exact field name 'academic_invoice' from StudentClassEnrollment model.
+    Skipped inside suppress_auto_invoices() (bulk operations invoice in batches).
     """
     if kwargs.get('raw', False):
         return
     
+    # Bulk enrollment/promotion invoices its enrollments per chunk
+    if auto_invoices_suppressed():
+        return
+    
     # Only generate if auto_create_invoice is enabled
     if not instance.auto_create_invoice:
         logger.debug(f"Skipping auto-invoice generation for enrollment {instance.id} - auto_create_invoice is False")
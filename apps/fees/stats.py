@@ -20,6 +20,8 @@ from datetime import timedelta, date, datetime
 from decimal import Decimal
 import logging
 
+from utils.utils import get_search_stats
+
 logger = logging.getLogger(__name__)
 
 # =============================================================================
@@ -339,18 +341,18 @@ def get_invoice_statistics(filters=None):
         ('over_90_days', Q(due_date__lt=today - timedelta(days=90))),
     ]
     
+    # All buckets in one conditional aggregate
+    aging_data = get_search_stats(
+        invoices.filter(status__in=['PENDING', 'PARTIALLY_PAID', 'OVERDUE']),
+        counts={label: condition for label, condition in aging_ranges},
+        sums={f"{label}_total": ('balance', condition) for label, condition in aging_ranges},
+    )
+    
     stats['aging'] = {}
     for label, condition in aging_ranges:
-        aging_data = invoices.filter(
-            condition,
-            status__in=['PENDING', 'PARTIALLY_PAID', 'OVERDUE']
-        ).aggregate(
-            count=Count('id'),
-            total=Coalesce(Sum('balance'), Decimal('0.00')),
-        )
         stats['aging'][label] = {
-            'count': aging_data['count'],
-            'total': float(aging_data['total']),
+            'count': aging_data[label],
+            'total': float(aging_data[f"{label}_total"]),
         }
     
     # Scholarship and discount usage
@@ -1185,33 +1187,22 @@ def get_financial_dashboard(academic_session_id=None, fiscal_period_id=None):
     
     # Outstanding by aging
     today = timezone.now().date()
+    open_statuses = Q(status__in=['PENDING', 'PARTIALLY_PAID', 'OVERDUE'])
+    aging_totals = get_search_stats(invoices, sums={
+        'current': ('balance', Q(due_date__gte=today, status__in=['PENDING', 'PARTIALLY_PAID'])),
+        'overdue_1_30': ('balance', open_statuses & Q(
+            due_date__lt=today,
+            due_date__gte=today - timedelta(days=30)
+        )),
+        'overdue_31_60': ('balance', open_statuses & Q(
+            due_date__lt=today - timedelta(days=30),
+            due_date__gte=today - timedelta(days=60)
+        )),
+        'overdue_over_60': ('balance', open_statuses & Q(due_date__lt=today - timedelta(days=60))),
+    })
     dashboard['outstanding_aging'] = {
-        'current': float(
-            invoices.filter(
-                due_date__gte=today,
-                status__in=['PENDING', 'PARTIALLY_PAID']
-            ).aggregate(total=Coalesce(Sum('balance'), Decimal('0.00')))['total']
-        ),
-        'overdue_1_30': float(
-            invoices.filter(
-                due_date__lt=today,
-                due_date__gte=today - timedelta(days=30),
-                status__in=['PENDING', 'PARTIALLY_PAID', 'OVERDUE']
-            ).aggregate(total=Coalesce(Sum('balance'), Decimal('0.00')))['total']
-        ),
-        'overdue_31_60': float(
-            invoices.filter(
-                due_date__lt=today - timedelta(days=30),
-                due_date__gte=today - timedelta(days=60),
-                status__in=['PENDING', 'PARTIALLY_PAID', 'OVERDUE']
-            ).aggregate(total=Coalesce(Sum('balance'), Decimal('0.00')))['total']
-        ),
-        'overdue_over_60': float(
-            invoices.filter(
-                due_date__lt=today - timedelta(days=60),
-                status__in=['PENDING', 'PARTIALLY_PAID', 'OVERDUE']
-            ).aggregate(total=Coalesce(Sum('balance'), Decimal('0.00')))['total']
-        ),
+        label: float(aging_totals[label])
+        for label in ('current', 'overdue_1_30', 'overdue_31_60', 'overdue_over_60')
     }
     
     return dashboard
\ No newline at end of file
@@ -1,3 +1,35 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .invoice_generators import ClassEnrollmentInvoiceGenerator, suppress_auto_invoices
+from .signals import auto_generate_class_enrollment_invoice
+
+
+class AutoInvoiceSuppressionTests(SimpleTestCase):
+
+    def enrollment(self):
+        return mock.Mock(
+            auto_create_invoice=True,
+            is_active=True,
+            completion_status='ONGOING',
+            academic_invoice=None,
+        )
+
+    def test_signal_invoices_enrollment(self):
+        enrollment = self.enrollment()
+        with mock.patch.object(ClassEnrollmentInvoiceGenerator, 'generate') as generate:
+            auto_generate_class_enrollment_invoice(None, enrollment, created=True)
+
+        generate.assert_called_once_with(enrollment)
+        enrollment.save.assert_called_once_with(update_fields=['academic_invoice'])
+
+    def test_signal_skips_enrollments_created_by_bulk_operations(self):
+        enrollment = self.enrollment()
+        with mock.patch.object(ClassEnrollmentInvoiceGenerator, 'generate') as generate:
+            with suppress_auto_invoices():
+                auto_generate_class_enrollment_invoice(None, enrollment, created=True)
+            self.assertFalse(generate.called)
+
+            auto_generate_class_enrollment_invoice(None, enrollment, created=True)
+            self.assertTrue(generate.called)
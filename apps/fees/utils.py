@@ -5,6 +5,7 @@ Fee Management Utility Functions
 
 Contains:
 - Reference number generation (invoices, payments, receipts, refunds, applications)
+  backed by per-school NumberSequence counters
 - Invoice display organization
 - Validation utilities
 - Calculation helpers
@@ -26,6 +27,20 @@ logger = logging.getLogger(__name__)
 # REFERENCE NUMBER GENERATION
 # =============================================================================
 
+def _build_number_prefix(prefix, include_year, year):
+    """
+    Build the part of a document number that precedes the sequence.
+    
+    Returns:
+        str: e.g. 'INV-2024-', 'INV-' or '' (no prefix)
+    """
+    if prefix and include_year:
+        return f"{prefix}-{year}-"
+    elif prefix:
+        return f"{prefix}-"
+    return ""
+
+
 def generate_invoice_number():
     """
     Generate unique invoice number using company settings.
@@ -37,72 +52,31 @@ def generate_invoice_number():
     Returns:
         str: Unique invoice number
     """
+    return generate_invoice_numbers(1)[0]
+
+
+def generate_invoice_numbers(count):
+    """
+    Reserve a block of consecutive invoice numbers (for bulk invoice runs).
+    
+    Args:
+        count: Number of invoice numbers to reserve
+        
+    Returns:
+        list: Unique invoice numbers in sequence order
+    """
     from fees.models import FeeInvoice
-    from core.models import FinancialSettings
+    from core.models import FinancialSettings, NumberSequence
     
-    settings = FinancialSettings.get_instance()
+    settings = FinancialSettings.get_cached_instance()
     prefix = settings.invoice_prefix.strip() if settings.invoice_prefix else ""
-    include_year = settings.include_year_in_invoice_number
-    
-    current_year = timezone.now().year
-    
-    # Build the prefix pattern for searching
-    if prefix and include_year:
-        search_prefix = f"{prefix}-{current_year}-"
-    elif prefix:
-        search_prefix = f"{prefix}-"
-    else:
-        search_prefix = ""
+    number_prefix = _build_number_prefix(
+        prefix, settings.include_year_in_invoice_number, timezone.now().year
+    )
     
-    with transaction.atomic():
-        if search_prefix:
-            queryset = FeeInvoice.objects.filter(
-                invoice_number__startswith=search_prefix
-            ).select_for_update()
-        else:
-            # No prefix: get all numeric invoice numbers
-            queryset = FeeInvoice.objects.select_for_update()
-        
-        result = queryset.aggregate(max_number=Max('invoice_number'))
-        
-        if result['max_number']:
-            try:
-                # Extract the numeric part (last segment after split)
-                if search_prefix:
-                    last_number = int(result['max_number'].split('-')[-1])
-                else:
-                    # Try to parse as pure number
-                    last_number = int(result['max_number'])
-                new_number = last_number + 1
-            except (ValueError, IndexError):
-                # Fallback: iterate to find max
-                numbers = []
-                for invoice_num in queryset.values_list('invoice_number', flat=True):
-                    try:
-                        if search_prefix:
-                            num = int(invoice_num.split('-')[-1])
-                        else:
-                            num = int(''.join(filter(str.isdigit, invoice_num)))
-                        numbers.append(num)
-                    except (ValueError, IndexError):
-                        continue
-                new_number = max(numbers) + 1 if numbers else 1
-        else:
-            new_number = 1
-        
-        # Format the number
-        if new_number <= 9999:
-            formatted_number = f"{new_number:04d}"
-        else:
-            formatted_number = str(new_number)
-        
-        # Build final invoice number
-        if prefix and include_year:
-            return f"{prefix}-{current_year}-{formatted_number}"
-        elif prefix:
-            return f"{prefix}-{formatted_number}"
-        else:
-            return formatted_number
+    return NumberSequence.allocate_formatted(
+        'fees.invoice', FeeInvoice, 'invoice_number', number_prefix, count, width=4
+    )
 
 
 def generate_payment_number():
@@ -114,64 +88,17 @@ def generate_payment_number():
         str: Unique payment number
     """
     from fees.models import Payment
-    from core.models import FinancialSettings
+    from core.models import FinancialSettings, NumberSequence
     
-    settings = FinancialSettings.get_instance()
+    settings = FinancialSettings.get_cached_instance()
     prefix = settings.payment_prefix.strip() if settings.payment_prefix else ""
-    include_year = settings.include_year_in_payment_number
-    
-    current_year = timezone.now().year
-    
-    if prefix and include_year:
-        search_prefix = f"{prefix}-{current_year}-"
-    elif prefix:
-        search_prefix = f"{prefix}-"
-    else:
-        search_prefix = ""
+    number_prefix = _build_number_prefix(
+        prefix, settings.include_year_in_payment_number, timezone.now().year
+    )
     
-    with transaction.atomic():
-        if search_prefix:
-            queryset = Payment.objects.filter(
-                payment_number__startswith=search_prefix
-            ).select_for_update()
-        else:
-            queryset = Payment.objects.select_for_update()
-        
-        result = queryset.aggregate(max_number=Max('payment_number'))
-        
-        if result['max_number']:
-            try:
-                if search_prefix:
-                    last_number = int(result['max_number'].split('-')[-1])
-                else:
-                    last_number = int(result['max_number'])
-                new_number = last_number + 1
-            except (ValueError, IndexError):
-                numbers = []
-                for payment_num in queryset.values_list('payment_number', flat=True):
-                    try:
-                        if search_prefix:
-                            num = int(payment_num.split('-')[-1])
-                        else:
-                            num = int(''.join(filter(str.isdigit, payment_num)))
-                        numbers.append(num)
-                    except (ValueError, IndexError):
-                        continue
-                new_number = max(numbers) + 1 if numbers else 1
-        else:
-            new_number = 1
-        
-        if new_number <= 9999:
-            formatted_number = f"{new_number:04d}"
-        else:
-            formatted_number = str(new_number)
-        
-        if prefix and include_year:
-            return f"{prefix}-{current_year}-{formatted_number}"
-        elif prefix:
-            return f"{prefix}-{formatted_number}"
-        else:
-            return formatted_number
+    return NumberSequence.allocate_formatted(
+        'fees.payment', Payment, 'payment_number', number_prefix, 1, width=4
+    )[0]
 
 
 def generate_receipt_number():
@@ -183,64 +110,15 @@ def generate_receipt_number():
         str: Unique receipt number
     """
     from fees.models import Payment
-    from core.models import FinancialSettings
+    from core.models import FinancialSettings, NumberSequence
     
-    settings = FinancialSettings.get_instance()
+    settings = FinancialSettings.get_cached_instance()
     prefix = settings.receipt_prefix.strip() if settings.receipt_prefix else ""
+    number_prefix = _build_number_prefix(prefix, False, None)
     
-    if prefix:
-        search_prefix = f"{prefix}-"
-    else:
-        search_prefix = ""
-    
-    with transaction.atomic():
-        if search_prefix:
-            queryset = Payment.objects.filter(
-                receipt_number__startswith=search_prefix
-            ).select_for_update()
-        else:
-            queryset = Payment.objects.filter(
-                receipt_number__isnull=False
-            ).exclude(receipt_number='').select_for_update()
-        
-        result = queryset.aggregate(max_number=Max('receipt_number'))
-        
-        if result['max_number']:
-            try:
-                if search_prefix:
-                    last_number = int(result['max_number'].split('-')[-1])
-                else:
-                    last_number = int(result['max_number'])
-                new_number = last_number + 1
-            except (ValueError, IndexError):
-                numbers = []
-                for receipt_num in queryset.values_list('receipt_number', flat=True):
-                    try:
-                        if search_prefix and receipt_num.startswith(search_prefix):
-                            num = int(receipt_num.split('-')[-1])
-                        else:
-                            # Handle legacy formats
-                            numeric_part = ''.join(filter(str.isdigit, receipt_num))
-                            if numeric_part:
-                                num = int(numeric_part)
-                            else:
-                                continue
-                        numbers.append(num)
-                    except (ValueError, IndexError):
-                        continue
-                new_number = max(numbers) + 1 if numbers else 1
-        else:
-            new_number = 1
-        
-        if new_number <= 999999:
-            formatted_number = f"{new_number:06d}"
-        else:
-            formatted_number = str(new_number)
-        
-        if prefix:
-            return f"{prefix}-{formatted_number}"
-        else:
-            return formatted_number
+    return NumberSequence.allocate_formatted(
+        'fees.receipt', Payment, 'receipt_number', number_prefix, 1, width=6
+    )[0]
 
 
 def generate_refund_number():
@@ -252,36 +130,13 @@ def generate_refund_number():
         str: Unique refund number
     """
     from fees.models import Refund
+    from core.models import NumberSequence
     
-    current_year = timezone.now().year
-    prefix = "RFND"
-    search_prefix = f"{prefix}-{current_year}-"
+    number_prefix = _build_number_prefix("RFND", True, timezone.now().year)
     
-    with transaction.atomic():
-        queryset = Refund.objects.filter(
-            refund_number__startswith=search_prefix
-        ).select_for_update()
-        
-        result = queryset.aggregate(max_number=Max('refund_number'))
-        
-        if result['max_number']:
-            try:
-                last_number = int(result['max_number'].split('-')[-1])
-                new_number = last_number + 1
-            except (ValueError, IndexError):
-                numbers = []
-                for refund_num in queryset.values_list('refund_number', flat=True):
-                    try:
-                        num = int(refund_num.split('-')[-1])
-                        numbers.append(num)
-                    except (ValueError, IndexError):
-                        continue
-                new_number = max(numbers) + 1 if numbers else 1
-        else:
-            new_number = 1
-        
-        formatted_number = f"{new_number:04d}"
-        return f"{prefix}-{current_year}-{formatted_number}"
+    return NumberSequence.allocate_formatted(
+        'fees.refund', Refund, 'refund_number', number_prefix, 1, width=4
+    )[0]
 
 
 def generate_scholarship_application_number():
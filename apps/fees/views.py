@@ -17,6 +17,7 @@ All views include proper permissions, messaging, and error handling
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import (
     Q, Count, Sum, Avg, F, Prefetch, DecimalField,
     Case, When, Value, IntegerField
@@ -765,11 +766,12 @@ def fee_invoice_create(request):
         form = FeeInvoiceForm(request.POST)
         if form.is_valid():
             invoice = form.save(commit=False)
-            # Number is auto-generated by signal, but can be overridden here if needed
-            if not invoice.invoice_number:
-                invoice.invoice_number = generate_invoice_number()
-            invoice.save()
-            form.save_m2m()
+            with transaction.atomic(using=FeeInvoice.objects.db):
+                # Number is auto-generated by signal, but can be overridden here if needed
+                if not invoice.invoice_number:
+                    invoice.invoice_number = generate_invoice_number()
+                invoice.save()
+                form.save_m2m()
             
             messages.success(
                 request,
@@ -950,12 +952,13 @@ def payment_create(request):
         form = PaymentForm(request.POST)
         if form.is_valid():
             payment = form.save(commit=False)
-            # Numbers are auto-generated by signal, but can be overridden if needed
-            if not payment.payment_number:
-                payment.payment_number = generate_payment_number()
-            if not payment.receipt_number:
-                payment.receipt_number = generate_receipt_number()
-            payment.save()
+            with transaction.atomic(using=Payment.objects.db):
+                # Numbers are auto-generated by signal, but can be overridden if needed
+                if not payment.payment_number:
+                    payment.payment_number = generate_payment_number()
+                if not payment.receipt_number:
+                    payment.receipt_number = generate_receipt_number()
+                payment.save()
             
             messages.success(
                 request,
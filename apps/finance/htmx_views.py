@@ -20,7 +20,8 @@ from .models import (
     Budget,
     BudgetLine
 )
-from utils.utils import parse_filters, paginate_queryset
+from utils.utils import parse_filters, paginate_queryset, paginate_queryset_by_cursor, get_search_stats
+from utils.async_views import async_htmx_view
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,7 @@ logger = logging.getLogger(__name__)
 # ACCOUNT TYPE SEARCH
 # =============================================================================
 
+@async_htmx_view
 def account_type_search(request):
     """HTMX-compatible account type search with pagination and stats"""
     
@@ -73,19 +75,17 @@ def account_type_search(request):
     # Paginate
     account_types_page, paginator = paginate_queryset(request, account_types, per_page=20)
     
-    # Calculate stats
-    total = account_types.count()
-    
-    stats = {
-        'total': total,
-        'active': account_types.filter(is_active=True).count(),
-        'asset': account_types.filter(account_type='ASSET').count(),
-        'liability': account_types.filter(account_type='LIABILITY').count(),
-        'equity': account_types.filter(account_type='EQUITY').count(),
-        'revenue': account_types.filter(account_type='REVENUE').count(),
-        'expense': account_types.filter(account_type='EXPENSE').count(),
-        'total_accounts': sum(at.account_count for at in account_types),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(account_types, paginator, counts={
+        'active': Q(is_active=True),
+        'asset': Q(account_type='ASSET'),
+        'liability': Q(account_type='LIABILITY'),
+        'equity': Q(account_type='EQUITY'),
+        'revenue': Q(account_type='REVENUE'),
+        'expense': Q(account_type='EXPENSE'),
+    }, aggregates={
+        'total_accounts': Sum('account_count'),
+    })
     
     return render(request, 'finance/account_types/_type_results.html', {
         'account_types_page': account_types_page,
@@ -97,6 +97,7 @@ def account_type_search(request):
 # ACCOUNT SEARCH
 # =============================================================================
 
+@async_htmx_view
 def account_search(request):
     """HTMX-compatible account search with pagination and stats"""
     
@@ -202,22 +203,20 @@ def account_search(request):
     # Paginate
     accounts_page, paginator = paginate_queryset(request, accounts, per_page=20)
     
-    # Calculate stats
-    total = accounts.count()
-    
-    stats = {
-        'total': total,
-        'active': accounts.filter(is_active=True).count(),
-        'bank_accounts': accounts.filter(is_bank_account=True).count(),
-        'cash_accounts': accounts.filter(is_cash_account=True).count(),
-        'mobile_money': accounts.filter(is_mobile_money_account=True).count(),
-        'receivable': accounts.filter(is_receivable_account=True).count(),
-        'payable': accounts.filter(is_payable_account=True).count(),
-        'revenue': accounts.filter(is_revenue_account=True).count(),
-        'expense': accounts.filter(is_expense_account=True).count(),
-        'total_balance': accounts.aggregate(Sum('current_balance'))['current_balance__sum'] or 0,
-        'parent_accounts': accounts.filter(parent_account__isnull=True).count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(accounts, paginator, counts={
+        'active': Q(is_active=True),
+        'bank_accounts': Q(is_bank_account=True),
+        'cash_accounts': Q(is_cash_account=True),
+        'mobile_money': Q(is_mobile_money_account=True),
+        'receivable': Q(is_receivable_account=True),
+        'payable': Q(is_payable_account=True),
+        'revenue': Q(is_revenue_account=True),
+        'expense': Q(is_expense_account=True),
+        'parent_accounts': Q(parent_account__isnull=True),
+    }, sums={
+        'total_balance': 'current_balance',
+    })
     
     return render(request, 'finance/accounts/_account_results.html', {
         'accounts_page': accounts_page,
@@ -229,6 +228,7 @@ def account_search(request):
 # EXPENSE CATEGORY SEARCH
 # =============================================================================
 
+@async_htmx_view
 def expense_category_search(request):
     """HTMX-compatible expense category search with pagination and stats"""
     
@@ -269,19 +269,17 @@ def expense_category_search(request):
     # Paginate
     categories_page, paginator = paginate_queryset(request, categories, per_page=20)
     
-    # Calculate stats
-    total = categories.count()
-    
-    stats = {
-        'total': total,
-        'active': categories.filter(is_active=True).count(),
-        'requires_approval': categories.filter(requires_approval=True).count(),
-        'administrative': categories.filter(category_type='ADMINISTRATIVE').count(),
-        'academic': categories.filter(category_type='ACADEMIC').count(),
-        'staff': categories.filter(category_type='STAFF').count(),
-        'facilities': categories.filter(category_type='FACILITIES').count(),
-        'total_expenses': sum(c.expense_count for c in categories),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(categories, paginator, counts={
+        'active': Q(is_active=True),
+        'requires_approval': Q(requires_approval=True),
+        'administrative': Q(category_type='ADMINISTRATIVE'),
+        'academic': Q(category_type='ACADEMIC'),
+        'staff': Q(category_type='STAFF'),
+        'facilities': Q(category_type='FACILITIES'),
+    }, aggregates={
+        'total_expenses': Sum('expense_count'),
+    })
     
     return render(request, 'finance/expense_categories/_category_results.html', {
         'categories_page': categories_page,
@@ -293,6 +291,7 @@ def expense_category_search(request):
 # EXPENSE SEARCH
 # =============================================================================
 
+@async_htmx_view
 def expense_search(request):
     """HTMX-compatible expense search with pagination and stats"""
     
@@ -384,23 +383,19 @@ def expense_search(request):
     # Paginate
     expenses_page, paginator = paginate_queryset(request, expenses, per_page=20)
     
-    # Calculate stats
-    total = expenses.count()
-    
-    stats = {
-        'total': total,
-        'draft': expenses.filter(status='DRAFT').count(),
-        'pending_approval': expenses.filter(status='PENDING_APPROVAL').count(),
-        'approved': expenses.filter(status='APPROVED').count(),
-        'paid': expenses.filter(status='PAID').count(),
-        'rejected': expenses.filter(status='REJECTED').count(),
-        'total_amount': expenses.aggregate(Sum('total_amount'))['total_amount__sum'] or 0,
-        'approved_amount': expenses.filter(status__in=['APPROVED', 'PAID']).aggregate(
-            Sum('total_amount'))['total_amount__sum'] or 0,
-        'paid_amount': expenses.filter(status='PAID').aggregate(
-            Sum('total_amount'))['total_amount__sum'] or 0,
-        'recurring': expenses.filter(is_recurring=True).count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(expenses, paginator, counts={
+        'draft': Q(status='DRAFT'),
+        'pending_approval': Q(status='PENDING_APPROVAL'),
+        'approved': Q(status='APPROVED'),
+        'paid': Q(status='PAID'),
+        'rejected': Q(status='REJECTED'),
+        'recurring': Q(is_recurring=True),
+    }, sums={
+        'total_amount': 'total_amount',
+        'approved_amount': ('total_amount', Q(status__in=['APPROVED', 'PAID'])),
+        'paid_amount': ('total_amount', Q(status='PAID')),
+    })
     
     return render(request, 'finance/expenses/_expense_results.html', {
         'expenses_page': expenses_page,
@@ -412,6 +407,7 @@ def expense_search(request):
 # EXPENSE PAYMENT SEARCH
 # =============================================================================
 
+@async_htmx_view
 def expense_payment_search(request):
     """HTMX-compatible expense payment search with pagination and stats"""
     
@@ -492,20 +488,17 @@ def expense_payment_search(request):
     # Paginate
     payments_page, paginator = paginate_queryset(request, payments, per_page=20)
     
-    # Calculate stats
-    total = payments.count()
-    
-    stats = {
-        'total': total,
-        'pending': payments.filter(status='PENDING').count(),
-        'processed': payments.filter(status='PROCESSED').count(),
-        'verified': payments.filter(is_verified=True).count(),
-        'unverified': payments.filter(is_verified=False).count(),
-        'total_amount': payments.filter(status__in=['PROCESSED', 'VERIFIED']).aggregate(
-            Sum('amount'))['amount__sum'] or 0,
-        'total_fees': payments.aggregate(Sum('processing_fee'))['processing_fee__sum'] or 0,
-        'total_bank_charges': payments.aggregate(Sum('bank_charges'))['bank_charges__sum'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(payments, paginator, counts={
+        'pending': Q(status='PENDING'),
+        'processed': Q(status='PROCESSED'),
+        'verified': Q(is_verified=True),
+        'unverified': Q(is_verified=False),
+    }, sums={
+        'total_amount': ('amount', Q(status__in=['PROCESSED', 'VERIFIED'])),
+        'total_fees': 'processing_fee',
+        'total_bank_charges': 'bank_charges',
+    })
     
     return render(request, 'finance/expense_payments/_payment_results.html', {
         'payments_page': payments_page,
@@ -517,6 +510,7 @@ def expense_payment_search(request):
 # JOURNAL SEARCH
 # =============================================================================
 
+@async_htmx_view
 def journal_search(request):
     """HTMX-compatible journal search with pagination and stats"""
     
@@ -551,20 +545,18 @@ def journal_search(request):
     # Paginate
     journals_page, paginator = paginate_queryset(request, journals, per_page=20)
     
-    # Calculate stats
-    total = journals.count()
-    
-    stats = {
-        'total': total,
-        'active': journals.filter(is_active=True).count(),
-        'general': journals.filter(journal_type='GENERAL').count(),
-        'fees': journals.filter(journal_type='FEES').count(),
-        'expenses': journals.filter(journal_type='EXPENSES').count(),
-        'cash': journals.filter(journal_type='CASH').count(),
-        'bank': journals.filter(journal_type='BANK').count(),
-        'payroll': journals.filter(journal_type='PAYROLL').count(),
-        'total_entries': sum(j.entry_count for j in journals),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(journals, paginator, counts={
+        'active': Q(is_active=True),
+        'general': Q(journal_type='GENERAL'),
+        'fees': Q(journal_type='FEES'),
+        'expenses': Q(journal_type='EXPENSES'),
+        'cash': Q(journal_type='CASH'),
+        'bank': Q(journal_type='BANK'),
+        'payroll': Q(journal_type='PAYROLL'),
+    }, aggregates={
+        'total_entries': Sum('entry_count'),
+    })
     
     return render(request, 'finance/journals/_journal_results.html', {
         'journals_page': journals_page,
@@ -576,6 +568,7 @@ def journal_search(request):
 # JOURNAL ENTRY SEARCH
 # =============================================================================
 
+@async_htmx_view
 def journal_entry_search(request):
     """HTMX-compatible journal entry search with pagination and stats"""
     
@@ -648,19 +641,15 @@ def journal_entry_search(request):
     # Paginate
     entries_page, paginator = paginate_queryset(request, entries, per_page=20)
     
-    # Calculate stats
-    total = entries.count()
-    
-    stats = {
-        'total': total,
-        'draft': entries.filter(status='DRAFT').count(),
-        'posted': entries.filter(status='POSTED').count(),
-        'reversed': entries.filter(status='REVERSED').count(),
-        'total_debits': entries.filter(status='POSTED').aggregate(
-            Sum('total_debit'))['total_debit__sum'] or 0,
-        'total_credits': entries.filter(status='POSTED').aggregate(
-            Sum('total_credit'))['total_credit__sum'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(entries, paginator, counts={
+        'draft': Q(status='DRAFT'),
+        'posted': Q(status='POSTED'),
+        'reversed': Q(status='REVERSED'),
+    }, sums={
+        'total_debits': ('total_debit', Q(status='POSTED')),
+        'total_credits': ('total_credit', Q(status='POSTED')),
+    })
     
     return render(request, 'finance/journal_entries/_entry_results.html', {
         'entries_page': entries_page,
@@ -672,6 +661,7 @@ def journal_entry_search(request):
 # JOURNAL TRANSACTION SEARCH
 # =============================================================================
 
+@async_htmx_view
 def journal_transaction_search(request):
     """HTMX-compatible journal transaction search with pagination and stats"""
     
@@ -735,20 +725,18 @@ def journal_transaction_search(request):
             pass
     
     # Paginate
-    transactions_page, paginator = paginate_queryset(request, transactions, per_page=20)
-    
-    # Calculate stats
-    total = transactions.count()
-    
-    stats = {
-        'total': total,
-        'debits': transactions.filter(is_debit=True).count(),
-        'credits': transactions.filter(is_debit=False).count(),
-        'total_debit_amount': transactions.filter(is_debit=True).aggregate(
-            Sum('amount'))['amount__sum'] or 0,
-        'total_credit_amount': transactions.filter(is_debit=False).aggregate(
-            Sum('amount'))['amount__sum'] or 0,
-    }
+    transactions_page, paginator = paginate_queryset_by_cursor(
+        request, transactions, per_page=20, ordering=('-journal_entry__entry_date', 'id')
+    )
+    
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(transactions, paginator, counts={
+        'debits': Q(is_debit=True),
+        'credits': Q(is_debit=False),
+    }, sums={
+        'total_debit_amount': ('amount', Q(is_debit=True)),
+        'total_credit_amount': ('amount', Q(is_debit=False)),
+    })
     
     return render(request, 'finance/transactions/_transaction_results.html', {
         'transactions_page': transactions_page,
@@ -760,6 +748,7 @@ def journal_transaction_search(request):
 # BUDGET SEARCH
 # =============================================================================
 
+@async_htmx_view
 def budget_search(request):
     """HTMX-compatible budget search with pagination and stats"""
     
@@ -826,24 +815,18 @@ def budget_search(request):
     # Paginate
     budgets_page, paginator = paginate_queryset(request, budgets, per_page=20)
     
-    # Calculate stats
-    total = budgets.count()
-    
-    stats = {
-        'total': total,
-        'draft': budgets.filter(status='DRAFT').count(),
-        'approved': budgets.filter(status='APPROVED').count(),
-        'active': budgets.filter(status='ACTIVE').count(),
-        'closed': budgets.filter(status='CLOSED').count(),
-        'total_revenue_budget': budgets.aggregate(
-            Sum('total_revenue_budget'))['total_revenue_budget__sum'] or 0,
-        'total_expense_budget': budgets.aggregate(
-            Sum('total_expense_budget'))['total_expense_budget__sum'] or 0,
-        'total_actual_revenue': budgets.aggregate(
-            Sum('actual_revenue_total'))['actual_revenue_total__sum'] or 0,
-        'total_actual_expense': budgets.aggregate(
-            Sum('actual_expense_total'))['actual_expense_total__sum'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(budgets, paginator, counts={
+        'draft': Q(status='DRAFT'),
+        'approved': Q(status='APPROVED'),
+        'active': Q(status='ACTIVE'),
+        'closed': Q(status='CLOSED'),
+    }, sums={
+        'total_revenue_budget': 'total_revenue_budget',
+        'total_expense_budget': 'total_expense_budget',
+        'total_actual_revenue': 'actual_revenue_total',
+        'total_actual_expense': 'actual_expense_total',
+    })
     
     return render(request, 'finance/budgets/_budget_results.html', {
         'budgets_page': budgets_page,
@@ -855,6 +838,7 @@ def budget_search(request):
 # BUDGET LINE SEARCH
 # =============================================================================
 
+@async_htmx_view
 def budget_line_search(request):
     """HTMX-compatible budget line search with pagination and stats"""
     
@@ -918,19 +902,17 @@ def budget_line_search(request):
     # Paginate
     lines_page, paginator = paginate_queryset(request, lines, per_page=20)
     
-    # Calculate stats
-    total = lines.count()
-    
-    stats = {
-        'total': total,
-        'revenue_lines': lines.filter(line_type='REVENUE').count(),
-        'expense_lines': lines.filter(line_type='EXPENSE').count(),
-        'total_budgeted': lines.aggregate(Sum('budgeted_amount'))['budgeted_amount__sum'] or 0,
-        'total_actual': lines.aggregate(Sum('actual_amount'))['actual_amount__sum'] or 0,
-        'total_variance': lines.aggregate(Sum('variance'))['variance__sum'] or 0,
-        'over_budget': lines.filter(actual_amount__gt=F('budgeted_amount')).count(),
-        'under_budget': lines.filter(actual_amount__lt=F('budgeted_amount')).count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(lines, paginator, counts={
+        'revenue_lines': Q(line_type='REVENUE'),
+        'expense_lines': Q(line_type='EXPENSE'),
+        'over_budget': Q(actual_amount__gt=F('budgeted_amount')),
+        'under_budget': Q(actual_amount__lt=F('budgeted_amount')),
+    }, sums={
+        'total_budgeted': 'budgeted_amount',
+        'total_actual': 'actual_amount',
+        'total_variance': 'variance',
+    })
     
     return render(request, 'finance/budget_lines/_line_results.html', {
         'lines_page': lines_page,
@@ -942,6 +924,7 @@ def budget_line_search(request):
 # QUICK STATS ENDPOINTS (for dashboard widgets)
 # =============================================================================
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def account_quick_stats(request):
     """Get quick statistics for accounts"""
@@ -965,6 +948,7 @@ def account_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def expense_quick_stats(request):
     """Get quick statistics for expenses"""
@@ -991,6 +975,7 @@ def expense_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def budget_quick_stats(request):
     """Get quick statistics for budgets"""
@@ -1014,6 +999,7 @@ def budget_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def journal_entry_quick_stats(request):
     """Get quick statistics for journal entries"""
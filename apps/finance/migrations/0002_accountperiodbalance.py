@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:29
+
+import django.db.models.deletion
+import uuid
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_numbersequence'),
+        ('finance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountPeriodBalance',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(db_index=True, help_text="When this record was created (in school's operational timezone)", verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(db_index=True, help_text="When this record was last updated (in school's operational timezone)", verbose_name='Updated At')),
+                ('created_by_id', models.CharField(blank=True, db_index=True, help_text='ID of user who created this record', max_length=50, null=True, verbose_name='Created By ID')),
+                ('updated_by_id', models.CharField(blank=True, db_index=True, help_text='ID of user who last updated this record', max_length=50, null=True, verbose_name='Updated By ID')),
+                ('created_from_ip', models.GenericIPAddressField(blank=True, help_text='IP address from which this record was created', null=True, verbose_name='Created From IP')),
+                ('updated_from_ip', models.GenericIPAddressField(blank=True, help_text='IP address from which this record was last updated', null=True, verbose_name='Updated From IP')),
+                ('change_reason', models.CharField(blank=True, help_text='Explanation for why this change was made', max_length=255, null=True, verbose_name='Change Reason')),
+                ('opening_debit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Posted debits in all earlier periods', max_digits=15, verbose_name='Opening Debit')),
+                ('opening_credit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Posted credits in all earlier periods', max_digits=15, verbose_name='Opening Credit')),
+                ('debit_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Period Debits')),
+                ('credit_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Period Credits')),
+                ('closing_debit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Opening debit plus period debits', max_digits=15, verbose_name='Closing Debit')),
+                ('closing_credit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Opening credit plus period credits', max_digits=15, verbose_name='Closing Credit')),
+                ('transaction_count', models.PositiveIntegerField(default=0, verbose_name='Period Transactions')),
+                ('closing_transaction_count', models.PositiveIntegerField(default=0, help_text='Posted transactions up to the end of this period', verbose_name='Closing Transactions')),
+                ('is_final', models.BooleanField(db_index=True, default=False, help_text='Rebuilt from the ledger when the period was closed and unchanged since', verbose_name='Is Final')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_balances', to='finance.account', verbose_name='Account')),
+                ('fiscal_period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='account_balances', to='core.fiscalperiod', verbose_name='Fiscal Period')),
+            ],
+            options={
+                'verbose_name': 'Account Period Balance',
+                'verbose_name_plural': 'Account Period Balances',
+                'ordering': ['fiscal_period__start_date', 'account__account_number'],
+                'indexes': [models.Index(fields=['fiscal_period', 'is_final'], name='finance_acc_fiscal__92a6df_idx')],
+                'unique_together': {('account', 'fiscal_period')},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:01
+
+import utils.fields
+import utils.ids
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_accountperiodbalance'),
+    ]
+
+    operations = [
+        # Decodes the existing CHAR(32) ids into BINARY(16) on MySQL (see utils.fields)
+        utils.fields.ConvertToCompactUUID(
+            model_name='journaltransaction',
+            name='id',
+            field=utils.fields.CompactUUIDField(default=utils.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -14,7 +14,7 @@ All business logic properly separated with utils.py integration
 User tracking handled automatically by BaseModel
 """
 
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
@@ -23,7 +23,7 @@ from decimal import Decimal
 from datetime import datetime, timedelta
 import logging
 
-from utils.models import BaseModel
+from utils.models import BaseModel, TimeOrderedBaseModel
 from core.models import UnitOfMeasure, PaymentMethod, TaxRate, FinancialSettings, FiscalYear, FiscalPeriod
 from academics.models import AcademicSession
 
@@ -1634,6 +1634,19 @@ class JournalEntry(BaseModel):
     def __str__(self):
         return f"{self.entry_number} - {self.description}"
     
+    # -------------------------------------------------------------------------
+    # SAVE
+    # -------------------------------------------------------------------------
+    
+    def save(self, *args, **kwargs):
+        """
+        Save in one transaction with the entry number reserved by the
+        pre_save signal, so journal numbering stays gap-free when the
+        insert fails.
+        """
+        with transaction.atomic(using=kwargs.get('using') or type(self).objects.db):
+            return super().save(*args, **kwargs)
+    
     # -------------------------------------------------------------------------
     # HELPER METHODS
     # -------------------------------------------------------------------------
@@ -1675,7 +1688,7 @@ class JournalEntry(BaseModel):
             return None
 
 
-class JournalTransaction(BaseModel):
+class JournalTransaction(TimeOrderedBaseModel):
     """Individual debit/credit transactions within journal entries"""
     
     # -------------------------------------------------------------------------
@@ -1731,6 +1744,353 @@ class JournalTransaction(BaseModel):
         return f"{self.journal_entry.entry_number} - {self.account.account_number} ({trans_type})"
 
 
+# =============================================================================
+# ACCOUNT PERIOD BALANCES
+# =============================================================================
+
+class AccountPeriodBalance(BaseModel):
+    """
+    Snapshot of an account's posted journal activity in one fiscal period.
+    
+    Opening and closing amounts are cumulative (all posted activity in
+    earlier periods, ordered by start date). Balances are kept as raw debit
+    and credit totals so the normal balance can be derived for any account
+    type with calculate_normal_balance().
+    
+    Rows are rebuilt from the ledger when a period is closed (is_final=True)
+    and kept current for open periods by the journal posting signals. A
+    balance "as of now" is then the closing row of the last closed period
+    plus the posted activity of the periods after it, instead of a scan of
+    every JournalTransaction since the school started.
+    """
+    
+    # -------------------------------------------------------------------------
+    # CORE RELATIONSHIPS
+    # -------------------------------------------------------------------------
+    
+    account = models.ForeignKey(
+        Account,
+        verbose_name="Account",
+        on_delete=models.CASCADE,
+        related_name='period_balances'
+    )
+    fiscal_period = models.ForeignKey(
+        FiscalPeriod,
+        verbose_name="Fiscal Period",
+        on_delete=models.CASCADE,
+        related_name='account_balances'
+    )
+    
+    # -------------------------------------------------------------------------
+    # BALANCES
+    # -------------------------------------------------------------------------
+    
+    opening_debit = models.DecimalField(
+        "Opening Debit", max_digits=15, decimal_places=2, default=Decimal('0.00'),
+        help_text="Posted debits in all earlier periods"
+    )
+    opening_credit = models.DecimalField(
+        "Opening Credit", max_digits=15, decimal_places=2, default=Decimal('0.00'),
+        help_text="Posted credits in all earlier periods"
+    )
+    debit_total = models.DecimalField(
+        "Period Debits", max_digits=15, decimal_places=2, default=Decimal('0.00')
+    )
+    credit_total = models.DecimalField(
+        "Period Credits", max_digits=15, decimal_places=2, default=Decimal('0.00')
+    )
+    closing_debit = models.DecimalField(
+        "Closing Debit", max_digits=15, decimal_places=2, default=Decimal('0.00'),
+        help_text="Opening debit plus period debits"
+    )
+    closing_credit = models.DecimalField(
+        "Closing Credit", max_digits=15, decimal_places=2, default=Decimal('0.00'),
+        help_text="Opening credit plus period credits"
+    )
+    transaction_count = models.PositiveIntegerField("Period Transactions", default=0)
+    closing_transaction_count = models.PositiveIntegerField(
+        "Closing Transactions", default=0,
+        help_text="Posted transactions up to the end of this period"
+    )
+    
+    # -------------------------------------------------------------------------
+    # STATUS
+    # -------------------------------------------------------------------------
+    
+    is_final = models.BooleanField(
+        "Is Final",
+        default=False,
+        db_index=True,
+        help_text="Rebuilt from the ledger when the period was closed and unchanged since"
+    )
+    
+    # -------------------------------------------------------------------------
+    # META CLASS
+    # -------------------------------------------------------------------------
+    
+    class Meta:
+        verbose_name = "Account Period Balance"
+        verbose_name_plural = "Account Period Balances"
+        ordering = ['fiscal_period__start_date', 'account__account_number']
+        unique_together = [['account', 'fiscal_period']]
+        indexes = [
+            models.Index(fields=['fiscal_period', 'is_final']),
+        ]
+    
+    # -------------------------------------------------------------------------
+    # STRING REPRESENTATION
+    # -------------------------------------------------------------------------
+    
+    def __str__(self):
+        return f"{self.account.account_number} - {self.fiscal_period.name}"
+    
+    # -------------------------------------------------------------------------
+    # BALANCE METHODS
+    # -------------------------------------------------------------------------
+    
+    def get_opening_balance(self):
+        """Get the opening balance on the account's normal side"""
+        from finance.utils import calculate_normal_balance
+        return calculate_normal_balance(self.account, self.opening_debit, self.opening_credit)
+    
+    def get_closing_balance(self):
+        """Get the closing balance on the account's normal side"""
+        from finance.utils import calculate_normal_balance
+        return calculate_normal_balance(self.account, self.closing_debit, self.closing_credit)
+    
+    # -------------------------------------------------------------------------
+    # SNAPSHOT MAINTENANCE
+    # -------------------------------------------------------------------------
+    
+    @classmethod
+    def rebuild_for_period(cls, fiscal_period):
+        """
+        Rebuild the snapshot rows of a fiscal period from the ledger.
+        
+        Opening amounts come from the previous period's final rows when
+        they exist, otherwise from one aggregate over all earlier periods.
+        Period activity is one GROUP BY account aggregate. Rows are final
+        when the period is closed.
+        
+        Args:
+            fiscal_period: FiscalPeriod instance
+            
+        Returns:
+            int: Number of rows written
+            
+        Example:
+            AccountPeriodBalance.rebuild_for_period(period)
+        """
+        from django.db import transaction
+        from finance.utils import aggregate_account_activity
+        
+        opening = cls._get_opening_activity(fiscal_period)
+        activity = aggregate_account_activity(
+            Q(journal_entry__status='POSTED', journal_entry__fiscal_period=fiscal_period)
+        )
+        
+        zero = Decimal('0.00')
+        empty = {'debit_total': zero, 'credit_total': zero, 'transaction_count': 0}
+        
+        rows = []
+        for account_id in set(opening) | set(activity):
+            start = opening.get(account_id, empty)
+            period = activity.get(account_id, empty)
+            rows.append(cls(
+                account_id=account_id,
+                fiscal_period=fiscal_period,
+                opening_debit=start['debit_total'],
+                opening_credit=start['credit_total'],
+                debit_total=period['debit_total'],
+                credit_total=period['credit_total'],
+                closing_debit=start['debit_total'] + period['debit_total'],
+                closing_credit=start['credit_total'] + period['credit_total'],
+                transaction_count=period['transaction_count'],
+                closing_transaction_count=start['transaction_count'] + period['transaction_count'],
+                is_final=fiscal_period.is_closed,
+            ))
+        
+        with transaction.atomic(using=cls.objects.db):
+            cls.objects.filter(fiscal_period=fiscal_period).delete()
+            cls.bulk_create_audited(rows, batch_size=500)
+        
+        logger.info(
+            f"Rebuilt {len(rows)} account balances for fiscal period {fiscal_period} "
+            f"({'final' if fiscal_period.is_closed else 'provisional'})"
+        )
+        
+        return len(rows)
+    
+    @classmethod
+    def _get_opening_activity(cls, fiscal_period):
+        """Cumulative activity before a period, from snapshots or the ledger."""
+        from finance.utils import aggregate_account_activity
+        
+        previous = FiscalPeriod.objects.filter(
+            start_date__lt=fiscal_period.start_date
+        ).order_by('-start_date').first()
+        
+        if previous is None:
+            return {}
+        
+        if previous.is_closed:
+            rows = list(cls.objects.filter(fiscal_period=previous).values(
+                'account_id', 'closing_debit', 'closing_credit',
+                'closing_transaction_count', 'is_final'
+            ))
+            if rows and all(row['is_final'] for row in rows):
+                return {
+                    row['account_id']: {
+                        'debit_total': row['closing_debit'],
+                        'credit_total': row['closing_credit'],
+                        'transaction_count': row['closing_transaction_count'],
+                    }
+                    for row in rows
+                }
+        
+        return aggregate_account_activity(
+            Q(journal_entry__status='POSTED',
+              journal_entry__fiscal_period__start_date__lt=fiscal_period.start_date)
+        )
+    
+    @classmethod
+    def apply_delta(cls, account_id, fiscal_period, debit=Decimal('0.00'),
+                    credit=Decimal('0.00'), count=0):
+        """
+        Add posted (or un-posted, with negative amounts) activity to a period row.
+        
+        Uses F() expressions so concurrent postings never lose updates. The
+        row is created on first use. Changing a closed period invalidates
+        its snapshot and every later one (their cumulative amounts are now
+        stale) until the period is closed again.
+        
+        Args:
+            account_id: Account primary key
+            fiscal_period: FiscalPeriod instance
+            debit: Debit amount to add
+            credit: Credit amount to add
+            count: Transaction count to add
+        """
+        from core.utils import get_school_current_time
+        
+        rows = cls.objects.filter(account_id=account_id, fiscal_period=fiscal_period)
+        changes = {
+            'debit_total': F('debit_total') + debit,
+            'credit_total': F('credit_total') + credit,
+            'closing_debit': F('closing_debit') + debit,
+            'closing_credit': F('closing_credit') + credit,
+            'transaction_count': F('transaction_count') + count,
+            'closing_transaction_count': F('closing_transaction_count') + count,
+            'updated_at': get_school_current_time(),
+        }
+        
+        if not rows.update(**changes):
+            now = get_school_current_time()
+            cls.objects.bulk_create(
+                [cls(account_id=account_id, fiscal_period=fiscal_period,
+                     created_at=now, updated_at=now)],
+                ignore_conflicts=True
+            )
+            rows.update(**changes)
+        
+        if fiscal_period.is_closed:
+            cls.invalidate_from(fiscal_period)
+    
+    @classmethod
+    def invalidate_from(cls, fiscal_period):
+        """
+        Mark the snapshots of a period and all later periods as not final.
+        
+        Called when a closed period changes or is reopened. Balance queries
+        stop using these rows as a starting point until the periods are
+        closed (rebuilt) again.
+        
+        Args:
+            fiscal_period: First FiscalPeriod whose snapshot is stale
+            
+        Returns:
+            int: Number of rows invalidated
+        """
+        count = cls.objects.filter(
+            fiscal_period__start_date__gte=fiscal_period.start_date,
+            is_final=True
+        ).update(is_final=False)
+        
+        if count:
+            logger.warning(
+                f"Invalidated {count} account balance snapshots from fiscal period {fiscal_period}"
+            )
+        
+        return count
+    
+    # -------------------------------------------------------------------------
+    # BALANCE QUERIES
+    # -------------------------------------------------------------------------
+    
+    @classmethod
+    def get_snapshot_base(cls, end_date=None):
+        """
+        Get the latest closed period usable as a starting balance.
+        
+        A period qualifies when its rows are final, it ends on or before
+        end_date, and no earlier period is still open or stale.
+        
+        Args:
+            end_date: Date the balance is requested for (optional)
+            
+        Returns:
+            FiscalPeriod or None
+        """
+        from django.db.models import Exists, OuterRef
+        
+        start_date = OuterRef('fiscal_period__start_date')
+        rows = cls.objects.filter(is_final=True).exclude(
+            Exists(FiscalPeriod.objects.filter(
+                is_closed=False, start_date__lte=start_date
+            ))
+        ).exclude(
+            Exists(cls.objects.filter(
+                is_final=False, fiscal_period__start_date__lte=start_date
+            ))
+        )
+        
+        if end_date:
+            rows = rows.filter(fiscal_period__end_date__lte=end_date)
+        
+        row = rows.select_related('fiscal_period').order_by(
+            '-fiscal_period__start_date'
+        ).first()
+        
+        return row.fiscal_period if row else None
+    
+    @classmethod
+    def get_closing_activity(cls, fiscal_period, account_ids=None):
+        """
+        Get cumulative activity at the end of a period from its snapshot rows.
+        
+        Args:
+            fiscal_period: FiscalPeriod instance
+            account_ids: Optional iterable restricting the accounts
+            
+        Returns:
+            dict: {account_id: {'debit_total', 'credit_total', 'transaction_count'}}
+        """
+        rows = cls.objects.filter(fiscal_period=fiscal_period)
+        if account_ids is not None:
+            rows = rows.filter(account_id__in=list(account_ids))
+        
+        return {
+            row['account_id']: {
+                'debit_total': row['closing_debit'],
+                'credit_total': row['closing_credit'],
+                'transaction_count': row['closing_transaction_count'],
+            }
+            for row in rows.values(
+                'account_id', 'closing_debit', 'closing_credit', 'closing_transaction_count'
+            )
+        }
+
+
 # =============================================================================
 # BUDGET MANAGEMENT
 # =============================================================================
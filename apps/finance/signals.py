@@ -9,22 +9,28 @@ Automatic triggers for:
 - Account balance updates
 - Journal entry validation
 - Fiscal period enforcement
+- Account period balance snapshots
 - Audit logging
 """
 
 from django.db.models.signals import pre_save, post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
+from decimal import Decimal
 import logging
 
 from finance.models import (
     JournalEntry, JournalTransaction, Expense, 
-    Budget, Account
+    Budget, Account, AccountPeriodBalance
 )
 from finance.utils import (
     generate_journal_entry_number, generate_expense_number,
-    validate_journal_entry, validate_fiscal_period
+    validate_journal_entry, validate_fiscal_period,
+    get_account_tree, invalidate_account_tree,
+    aggregate_account_activity
 )
 
 logger = logging.getLogger(__name__)
@@ -137,7 +143,7 @@ def journal_transaction_post_save(sender, instance, created, **kwargs):
     if created:
         logger.debug(
             f"Journal transaction created: Entry {instance.journal_entry.entry_number} - "
-            f"Account {instance.account.code} - "
+            f"Account {instance.account.account_number} - "
             f"{'Debit' if instance.is_debit else 'Credit'}: {instance.amount}"
         )
 
@@ -150,7 +156,7 @@ def journal_transaction_post_delete(sender, instance, **kwargs):
     """
     logger.debug(
         f"Journal transaction deleted: Entry {instance.journal_entry.entry_number} - "
-        f"Account {instance.account.code}"
+        f"Account {instance.account.account_number}"
     )
 
 
@@ -158,28 +164,22 @@ def journal_transaction_post_delete(sender, instance, **kwargs):
 def journal_transaction_pre_save(sender, instance, **kwargs):
     """
     Pre-save processing for journal transactions:
-    - Validate account is active and not a header
+    - Validate account is active
     - Validate amount is positive
     - Prevent changes to posted entries
     """
     # Validate account
     if not instance.account.is_active:
         raise ValidationError(
-            f"Cannot create transaction for inactive account {instance.account.code}"
-        )
-    
-    if instance.account.is_header:
-        raise ValidationError(
-            f"Cannot create transaction for header account {instance.account.code}. "
-            f"Use a child account instead."
+            f"Cannot create transaction for inactive account {instance.account.account_number}"
         )
     
     # Validate amount
     if instance.amount <= 0:
         raise ValidationError("Transaction amount must be positive")
     
-    # Prevent changes to posted entries
-    if instance.pk:  # Existing transaction
+    # Prevent changes to posted entries (UUID pk is set before the first save)
+    if not instance._state.adding:  # Existing transaction
         if instance.journal_entry.status == 'POSTED':
             raise ValidationError(
                 f"Cannot modify transaction in posted journal entry {instance.journal_entry.entry_number}"
@@ -276,7 +276,7 @@ def create_expense_journal_entry(expense):
     from core.models import FinancialSettings
     
     # Get default accounts
-    settings = FinancialSettings.get_instance()
+    settings = FinancialSettings.get_cached_instance()
     if not settings:
         logger.warning("FinancialSettings not found, skipping journal entry creation")
         return
@@ -415,6 +415,13 @@ def budget_post_save(sender, instance, created, **kwargs):
 # ACCOUNT SIGNALS
 # =============================================================================
 
+def _invalidate_account_tree(instance):
+    """Drop the cached account tree now and again when the transaction commits."""
+    using = instance._state.db
+    invalidate_account_tree(using)
+    transaction.on_commit(lambda: invalidate_account_tree(using), using=using)
+
+
 @receiver(pre_save, sender=Account)
 def account_pre_save(sender, instance, **kwargs):
     """
@@ -424,20 +431,24 @@ def account_pre_save(sender, instance, **kwargs):
     - Ensure header accounts have children
     """
     # Validate parent account
-    if instance.parent_account:
+    if instance.parent_account_id:
         # Prevent circular references
-        if instance.pk and instance.parent_account == instance:
+        if instance.pk and instance.parent_account_id == instance.pk:
             raise ValidationError("Account cannot be its own parent")
         
-        # Check for circular reference in hierarchy
-        parent = instance.parent_account
-        while parent:
-            if parent == instance:
+        # Check for circular reference in hierarchy (cached parent links,
+        # no query per hop)
+        parents = get_account_tree()['parents']
+        parent_id = instance.parent_account_id
+        visited = set()
+        while parent_id is not None and parent_id not in visited:
+            if parent_id == instance.pk:
                 raise ValidationError("Circular reference detected in account hierarchy")
-            parent = parent.parent_account
+            visited.add(parent_id)
+            parent_id = parents.get(parent_id)
         
         # Parent and child must be same account type
-        if instance.account_type != instance.parent_account.account_type:
+        if instance.account_type_id != instance.parent_account.account_type_id:
             raise ValidationError(
                 "Child account must have the same account type as parent"
             )
@@ -448,15 +459,18 @@ def account_post_save(sender, instance, created, **kwargs):
     """
     Post-save processing for accounts:
     - Log account creation
+    - Invalidate the cached account tree
     """
+    _invalidate_account_tree(instance)
+    
     # Skip if in raw mode
     if kwargs.get('raw', False):
         return
     
     if created:
         logger.info(
-            f"Account created: {instance.code} - {instance.name} - "
-            f"Type: {instance.account_type.code}"
+            f"Account created: {instance.account_number} - {instance.name} - "
+            f"Type: {instance.account_type.account_type}"
         )
 
 
@@ -466,21 +480,93 @@ def account_pre_delete(sender, instance, **kwargs):
     Pre-delete processing for accounts:
     - Prevent deletion of accounts with transactions
     - Prevent deletion of accounts with children
+    - Invalidate the cached account tree
     """
     # Check for transactions
     if instance.journal_transactions.exists():
         raise ValidationError(
-            f"Cannot delete account {instance.code} because it has transactions. "
+            f"Cannot delete account {instance.account_number} because it has transactions. "
             f"Deactivate it instead."
         )
     
     # Check for child accounts
     if Account.objects.filter(parent_account=instance).exists():
         raise ValidationError(
-            f"Cannot delete account {instance.code} because it has child accounts"
+            f"Cannot delete account {instance.account_number} because it has child accounts"
+        )
+    
+    _invalidate_account_tree(instance)
+    
+    logger.info(f"Deleting account: {instance.account_number} - {instance.name}")
+
+
+# =============================================================================
+# ACCOUNT PERIOD BALANCES
+# =============================================================================
+
+@receiver(post_save, sender=JournalTransaction)
+def journal_transaction_update_period_balance(sender, instance, created, **kwargs):
+    """
+    Add a transaction created in an already posted entry to its period balance.
+    
+    Services create POSTED entries first and add their transactions after,
+    so this is where most postings reach AccountPeriodBalance.
+    """
+    # Skip if in raw mode
+    if kwargs.get('raw', False):
+        return
+    
+    if not created or instance.journal_entry.status != 'POSTED':
+        return
+    
+    amount = instance.amount
+    AccountPeriodBalance.apply_delta(
+        instance.account_id,
+        instance.journal_entry.fiscal_period,
+        debit=amount if instance.is_debit else Decimal('0.00'),
+        credit=Decimal('0.00') if instance.is_debit else amount,
+        count=1
+    )
+
+
+@receiver(post_save, sender=JournalEntry)
+def journal_entry_update_period_balances(sender, instance, created, **kwargs):
+    """
+    Apply an entry's transactions to its period balances when it is posted,
+    and remove them when a posted entry is reversed (or otherwise leaves
+    the POSTED status).
+    """
+    # Skip if in raw mode
+    if kwargs.get('raw', False):
+        return
+    
+    # New entries have no transactions yet
+    if created:
+        return
+    
+    previous_status = getattr(instance, '_previous_status', None)
+    was_posted = previous_status == 'POSTED'
+    is_posted = instance.status == 'POSTED'
+    
+    if was_posted == is_posted:
+        return
+    
+    sign = 1 if is_posted else -1
+    activity = aggregate_account_activity(Q(journal_entry=instance))
+    
+    for account_id, totals in activity.items():
+        AccountPeriodBalance.apply_delta(
+            account_id,
+            instance.fiscal_period,
+            debit=sign * totals['debit_total'],
+            credit=sign * totals['credit_total'],
+            count=sign * totals['transaction_count']
         )
     
-    logger.info(f"Deleting account: {instance.code} - {instance.name}")
+    logger.debug(
+        f"Applied journal entry {instance.entry_number} ({previous_status} -> {instance.status}) "
+        f"to {len(activity)} account period balances"
+    )
 
 
 # =============================================================================
@@ -1,3 +1,32 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.db import router
+from django.test import SimpleTestCase
+
+from schoolara.managers import DatabaseContext, get_current_db
+
+from .models import Account
+from .utils import export_trial_balance_to_csv
+
+
+class TrialBalanceExportTests(SimpleTestCase):
+
+    def test_export_reads_the_school_database_of_the_request(self):
+        routed = []
+
+        def trial_balance(start_date=None, end_date=None):
+            routed.append(router.db_for_read(Account))
+            return {'accounts': [], 'total_debits': 0, 'total_credits': 0}
+
+        with mock.patch('finance.utils.calculate_trial_balance', side_effect=trial_balance):
+            with DatabaseContext('atepi_palabek'):
+                lines = export_trial_balance_to_csv()
+
+            # StreamingHttpResponse consumes the body after the middleware
+            # has reset the database context
+            self.assertIsNone(get_current_db())
+            body = ''.join(lines)
+
+        self.assertEqual(routed, ['atepi_palabek'])
+        self.assertTrue(body.startswith('Account Number,'))
+        self.assertIsNone(get_current_db())
@@ -8,18 +8,20 @@ Provides helper functions for:
 - Account balance calculations
 - Financial period validations
 - Journal entry validations
-- Reporting calculations
-- Account tree traversal
+- Reporting calculations (from per-period balance snapshots where possible)
+- Account tree traversal (cached chart of accounts per school)
 """
 
-from django.db import transaction
-from django.db.models import Max, Sum, Q
+from django.db.models import Case, Count, DecimalField, Q, Sum, When
 from django.utils import timezone
 from decimal import Decimal
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Account categories (AccountType.account_type) with a debit normal balance
+DEBIT_NORMAL_TYPES = ('ASSET', 'EXPENSE')
+
 
 # =============================================================================
 # REFERENCE NUMBER GENERATION
@@ -37,6 +39,7 @@ def generate_journal_entry_number(journal=None):
         str: Unique journal entry number
     """
     from finance.models import JournalEntry
+    from core.models import NumberSequence
     
     current_year = timezone.now().year
     
@@ -45,25 +48,9 @@ def generate_journal_entry_number(journal=None):
     else:
         prefix = f"JE-{current_year}-"
     
-    with transaction.atomic():
-        queryset = JournalEntry.objects.filter(
-            entry_number__startswith=prefix
-        ).select_for_update()
-        
-        result = queryset.aggregate(max_number=Max('entry_number'))
-        
-        if result['max_number']:
-            try:
-                last_number = int(result['max_number'].split('-')[-1])
-                new_number = last_number + 1
-            except (ValueError, IndexError):
-                new_number = queryset.count() + 1
-        else:
-            new_number = 1
-        
-        formatted_number = f"{new_number:05d}"
-        
-        return f"{prefix}{formatted_number}"
+    return NumberSequence.allocate_formatted(
+        'finance.journal_entry', JournalEntry, 'entry_number', prefix, width=5
+    )[0]
 
 
 def generate_expense_number():
@@ -75,29 +62,14 @@ def generate_expense_number():
         str: Unique expense number
     """
     from finance.models import Expense
+    from core.models import NumberSequence
     
     current_year = timezone.now().year
     prefix = f"EXP-{current_year}-"
     
-    with transaction.atomic():
-        queryset = Expense.objects.filter(
-            expense_number__startswith=prefix
-        ).select_for_update()
-        
-        result = queryset.aggregate(max_number=Max('expense_number'))
-        
-        if result['max_number']:
-            try:
-                last_number = int(result['max_number'].split('-')[-1])
-                new_number = last_number + 1
-            except (ValueError, IndexError):
-                new_number = queryset.count() + 1
-        else:
-            new_number = 1
-        
-        formatted_number = f"{new_number:05d}"
-        
-        return f"{prefix}{formatted_number}"
+    return NumberSequence.allocate_formatted(
+        'finance.expense', Expense, 'expense_number', prefix, width=5
+    )[0]
 
 
 def generate_budget_code(fiscal_year, department=None):
@@ -155,26 +127,20 @@ def calculate_account_balance(account, start_date=None, end_date=None):
     """
     from finance.models import JournalTransaction
     
-    # Build query
-    query = Q(account=account, journal_entry__status='POSTED')
-    
-    if start_date:
-        query &= Q(journal_entry__entry_date__gte=start_date)
-    
-    if end_date:
-        query &= Q(journal_entry__entry_date__lte=end_date)
-    
-    # Get transactions
-    transactions = JournalTransaction.objects.filter(query)
-    
-    # Calculate totals
-    debit_total = transactions.filter(is_debit=True).aggregate(
-        total=Sum('amount')
-    )['total'] or Decimal('0.00')
+    if start_date is None:
+        # Cumulative balance: closed period snapshot plus later activity
+        totals = get_account_activity(end_date=end_date, account_ids=[account.pk]).get(
+            account.pk, {'debit_total': None, 'credit_total': None, 'transaction_count': 0}
+        )
+    else:
+        # Debits, credits and count in one aggregate query
+        totals = JournalTransaction.objects.filter(
+            _posted_transactions_filter(start_date, end_date),
+            account=account
+        ).aggregate(**_activity_aggregates())
     
-    credit_total = transactions.filter(is_debit=False).aggregate(
-        total=Sum('amount')
-    )['total'] or Decimal('0.00')
+    debit_total = totals['debit_total'] or Decimal('0.00')
+    credit_total = totals['credit_total'] or Decimal('0.00')
     
     # Calculate balance based on account type
     balance = calculate_normal_balance(account, debit_total, credit_total)
@@ -183,7 +149,7 @@ def calculate_account_balance(account, start_date=None, end_date=None):
         'debit_total': debit_total,
         'credit_total': credit_total,
         'balance': balance,
-        'transaction_count': transactions.count()
+        'transaction_count': totals['transaction_count']
     }
 
 
@@ -206,9 +172,7 @@ def calculate_normal_balance(account, debit_total, credit_total):
     Returns:
         Decimal: Account balance (positive or negative)
     """
-    account_type = account.account_type.code
-    
-    if account_type in ['ASSET', 'EXPENSE']:
+    if account.account_type.account_type in DEBIT_NORMAL_TYPES:
         # Debit balance accounts
         balance = debit_total - credit_total
     else:  # LIABILITY, EQUITY, REVENUE
@@ -222,6 +186,10 @@ def get_account_balance_tree(account, start_date=None, end_date=None):
     """
     Get account balance including all child accounts.
     
+    The subtree comes from the cached account tree and its activity from a
+    single get_account_activity() query; totals are rolled up bottom-up in
+    memory.
+    
     Args:
         account: Account instance
         start_date: Start date (optional)
@@ -234,31 +202,47 @@ def get_account_balance_tree(account, start_date=None, end_date=None):
             'children': [nested dicts for child accounts]
         }
     """
-    from finance.models import Account
+    tree = get_account_tree()
+    subtree_ids = [account.pk] + _get_descendant_ids(tree, account.pk)
     
-    # Calculate this account's balance
-    balance_data = calculate_account_balance(account, start_date, end_date)
+    accounts = _load_accounts(subtree_ids)
+    accounts[account.pk] = account
+    activity = get_account_activity(start_date, end_date, account_ids=subtree_ids)
     
-    # Get child accounts
-    children = []
-    for child in Account.objects.filter(parent_account=account, is_active=True):
-        child_data = get_account_balance_tree(child, start_date, end_date)
-        children.append(child_data)
+    empty = {
+        'debit_total': Decimal('0.00'),
+        'credit_total': Decimal('0.00'),
+        'transaction_count': 0,
+    }
     
-    # Calculate total including children
-    total_balance = balance_data['balance']
-    for child in children:
-        total_balance += child['balance']
+    def build(node):
+        totals = activity.get(node.pk, empty)
+        own_balance = calculate_normal_balance(
+            node, totals['debit_total'], totals['credit_total']
+        )
+        
+        children = [
+            build(accounts[child_id])
+            for child_id in tree['children'].get(node.pk, ())
+            if child_id in accounts
+        ]
+        
+        # Calculate total including children
+        total_balance = own_balance
+        for child in children:
+            total_balance += child['balance']
+        
+        return {
+            'account': node,
+            'own_balance': own_balance,
+            'balance': total_balance,
+            'debit_total': totals['debit_total'],
+            'credit_total': totals['credit_total'],
+            'transaction_count': totals['transaction_count'],
+            'children': children
+        }
     
-    return {
-        'account': account,
-        'own_balance': balance_data['balance'],
-        'balance': total_balance,
-        'debit_total': balance_data['debit_total'],
-        'credit_total': balance_data['credit_total'],
-        'transaction_count': balance_data['transaction_count'],
-        'children': children
-    }
+    return build(account)
 
 
 # =============================================================================
@@ -284,15 +268,15 @@ def validate_fiscal_period(fiscal_period):
     
     # Check if period is closed
     if fiscal_period.is_closed:
-        errors.append(f"Fiscal period {fiscal_period.period_name} is closed")
+        errors.append(f"Fiscal period {fiscal_period.name} is closed")
     
     # Check if period is in the future
     if fiscal_period.start_date > timezone.now().date():
-        warnings.append(f"Fiscal period {fiscal_period.period_name} has not started yet")
+        warnings.append(f"Fiscal period {fiscal_period.name} has not started yet")
     
     # Check if period has ended
     if fiscal_period.end_date < timezone.now().date():
-        warnings.append(f"Fiscal period {fiscal_period.period_name} has ended")
+        warnings.append(f"Fiscal period {fiscal_period.name} has ended")
     
     valid = len(errors) == 0
     
@@ -483,6 +467,168 @@ def validate_journal_transaction(transaction):
 # REPORTING CALCULATIONS
 # =============================================================================
 
+def get_account_activity(start_date=None, end_date=None, account_ids=None):
+    """
+    Aggregate posted journal activity for every account.
+    
+    Without a start_date the totals are cumulative. They start from the
+    AccountPeriodBalance snapshot of the last closed period and only the
+    periods after it are read from JournalTransaction, so the cost follows
+    the open periods rather than the age of the ledger. With a start_date
+    it is a single GROUP BY account pass over the date range.
+    
+    Args:
+        start_date: Start date (optional)
+        end_date: End date (optional)
+        account_ids: Optional iterable restricting the accounts
+        
+    Returns:
+        dict: {account_id: {'debit_total', 'credit_total', 'transaction_count'}}
+              Accounts without activity are absent.
+    """
+    if account_ids is not None:
+        account_ids = list(account_ids)
+    
+    if start_date is None:
+        return _get_cumulative_activity(end_date, account_ids)
+    
+    return aggregate_account_activity(
+        _posted_transactions_filter(start_date, end_date),
+        account_ids=account_ids
+    )
+
+
+def aggregate_account_activity(*filters, account_ids=None):
+    """
+    Sum journal transactions per account in one GROUP BY query.
+    
+    Args:
+        *filters: Q objects applied to JournalTransaction (include the
+                  journal entry status - nothing is filtered implicitly)
+        account_ids: Optional iterable restricting the accounts
+        
+    Returns:
+        dict: {account_id: {'debit_total', 'credit_total', 'transaction_count'}}
+        
+    Example:
+        aggregate_account_activity(
+            Q(journal_entry__status='POSTED', journal_entry__fiscal_period=period)
+        )
+    """
+    from finance.models import JournalTransaction
+    
+    transactions = JournalTransaction.objects.filter(*filters)
+    if account_ids is not None:
+        transactions = transactions.filter(account_id__in=list(account_ids))
+    
+    rows = transactions.values('account_id').annotate(
+        **_activity_aggregates()
+    ).order_by()
+    
+    return {
+        row['account_id']: {
+            'debit_total': row['debit_total'] or Decimal('0.00'),
+            'credit_total': row['credit_total'] or Decimal('0.00'),
+            'transaction_count': row['transaction_count'],
+        }
+        for row in rows
+    }
+
+
+def get_account_balances(start_date=None, end_date=None, account_types=None):
+    """
+    Get balances for all active accounts from one activity aggregate.
+    
+    Runs two queries in total: the accounts and get_account_activity().
+    
+    Args:
+        start_date: Start date (optional)
+        end_date: End date (optional)
+        account_types: Optional list of categories ('ASSET', 'REVENUE', ...)
+        
+    Returns:
+        list: Dicts ordered by account number: {
+            'account': Account instance,
+            'debit_total': Decimal,
+            'credit_total': Decimal,
+            'transaction_count': int,
+            'balance': Decimal (normal balance)
+        }
+    """
+    from finance.models import Account
+    
+    accounts = Account.objects.filter(is_active=True).select_related('account_type')
+    if account_types:
+        accounts = accounts.filter(account_type__account_type__in=account_types)
+    accounts = list(accounts.order_by('account_number'))
+    
+    activity = get_account_activity(start_date, end_date)
+    empty = {
+        'debit_total': Decimal('0.00'),
+        'credit_total': Decimal('0.00'),
+        'transaction_count': 0,
+    }
+    
+    balances = []
+    for account in accounts:
+        totals = activity.get(account.pk, empty)
+        balances.append({
+            'account': account,
+            'debit_total': totals['debit_total'],
+            'credit_total': totals['credit_total'],
+            'transaction_count': totals['transaction_count'],
+            'balance': calculate_normal_balance(
+                account, totals['debit_total'], totals['credit_total']
+            ),
+        })
+    
+    return balances
+
+
+def rollup_account_balances(balances):
+    """
+    Add each account's descendants to its totals, bottom-up, in memory.
+    
+    Adds 'total_debit', 'total_credit' and 'total_balance' to every row.
+    Child balances are converted to the parent's normal side, so a contra
+    account reduces its parent's total.
+    
+    Args:
+        balances: Rows from get_account_balances() (should cover whole
+                  subtrees - accounts outside the list are ignored)
+        
+    Returns:
+        dict: {account_id: row} for tree lookups
+    """
+    by_id = {row['account'].pk: row for row in balances}
+    
+    for row in balances:
+        row['total_debit'] = row['debit_total']
+        row['total_credit'] = row['credit_total']
+    
+    # Depth of each account in the supplied tree, so children roll up first
+    def depth(row):
+        level = 0
+        parent_id = row['account'].parent_account_id
+        while parent_id in by_id and level < len(by_id):
+            level += 1
+            parent_id = by_id[parent_id]['account'].parent_account_id
+        return level
+    
+    for row in sorted(balances, key=depth, reverse=True):
+        parent = by_id.get(row['account'].parent_account_id)
+        if parent is not None:
+            parent['total_debit'] += row['total_debit']
+            parent['total_credit'] += row['total_credit']
+    
+    for row in balances:
+        row['total_balance'] = calculate_normal_balance(
+            row['account'], row['total_debit'], row['total_credit']
+        )
+    
+    return by_id
+
+
 def calculate_trial_balance(start_date=None, end_date=None):
     """
     Calculate trial balance for all accounts.
@@ -499,33 +645,21 @@ def calculate_trial_balance(start_date=None, end_date=None):
             'balanced': bool
         }
     """
-    from finance.models import Account
-    
     accounts_data = []
     total_debits = Decimal('0.00')
     total_credits = Decimal('0.00')
     
-    # Get all leaf accounts (non-header)
-    accounts = Account.objects.filter(is_active=True, is_header=False)
-    
-    for account in accounts:
-        balance_data = calculate_account_balance(account, start_date, end_date)
+    for balance_data in get_account_balances(start_date, end_date):
+        account = balance_data['account']
+        is_debit_normal = account.account_type.account_type in DEBIT_NORMAL_TYPES
         
         # Determine debit or credit balance
-        if balance_data['balance'] >= 0:
-            if account.account_type.code in ['ASSET', 'EXPENSE']:
-                debit_balance = balance_data['balance']
-                credit_balance = Decimal('0.00')
-            else:
-                debit_balance = Decimal('0.00')
-                credit_balance = balance_data['balance']
+        if (balance_data['balance'] >= 0) == is_debit_normal:
+            debit_balance = abs(balance_data['balance'])
+            credit_balance = Decimal('0.00')
         else:
-            if account.account_type.code in ['ASSET', 'EXPENSE']:
-                debit_balance = Decimal('0.00')
-                credit_balance = abs(balance_data['balance'])
-            else:
-                debit_balance = abs(balance_data['balance'])
-                credit_balance = Decimal('0.00')
+            debit_balance = Decimal('0.00')
+            credit_balance = abs(balance_data['balance'])
         
         if debit_balance != 0 or credit_balance != 0:
             accounts_data.append({
@@ -566,45 +700,12 @@ def calculate_income_statement(start_date, end_date):
             'expense_accounts': list
         }
     """
-    from finance.models import Account
-    
-    # Get revenue accounts
-    revenue_accounts = Account.objects.filter(
-        account_type__code='REVENUE',
-        is_active=True,
-        is_header=False
+    sections = _group_balances_by_type(
+        get_account_balances(start_date, end_date, account_types=['REVENUE', 'EXPENSE'])
     )
     
-    revenue_data = []
-    total_revenue = Decimal('0.00')
-    
-    for account in revenue_accounts:
-        balance_data = calculate_account_balance(account, start_date, end_date)
-        if balance_data['balance'] != 0:
-            revenue_data.append({
-                'account': account,
-                'amount': balance_data['balance']
-            })
-            total_revenue += balance_data['balance']
-    
-    # Get expense accounts
-    expense_accounts = Account.objects.filter(
-        account_type__code='EXPENSE',
-        is_active=True,
-        is_header=False
-    )
-    
-    expense_data = []
-    total_expenses = Decimal('0.00')
-    
-    for account in expense_accounts:
-        balance_data = calculate_account_balance(account, start_date, end_date)
-        if balance_data['balance'] != 0:
-            expense_data.append({
-                'account': account,
-                'amount': balance_data['balance']
-            })
-            total_expenses += balance_data['balance']
+    total_revenue = sections['REVENUE']['total']
+    total_expenses = sections['EXPENSE']['total']
     
     # Calculate net income
     net_income = total_revenue - total_expenses
@@ -613,8 +714,8 @@ def calculate_income_statement(start_date, end_date):
         'revenue': total_revenue,
         'expenses': total_expenses,
         'net_income': net_income,
-        'revenue_accounts': revenue_data,
-        'expense_accounts': expense_data
+        'revenue_accounts': sections['REVENUE']['accounts'],
+        'expense_accounts': sections['EXPENSE']['accounts']
     }
 
 
@@ -636,79 +737,111 @@ def calculate_balance_sheet(as_of_date=None):
             'equity_accounts': list
         }
     """
-    from finance.models import Account
-    
     if not as_of_date:
         as_of_date = timezone.now().date()
     
-    # Assets
-    asset_accounts = Account.objects.filter(
-        account_type__code='ASSET',
-        is_active=True,
-        is_header=False
+    sections = _group_balances_by_type(
+        get_account_balances(end_date=as_of_date, account_types=['ASSET', 'LIABILITY', 'EQUITY'])
     )
     
-    asset_data = []
-    total_assets = Decimal('0.00')
+    total_assets = sections['ASSET']['total']
+    total_liabilities = sections['LIABILITY']['total']
+    total_equity = sections['EQUITY']['total']
     
-    for account in asset_accounts:
-        balance_data = calculate_account_balance(account, end_date=as_of_date)
-        if balance_data['balance'] != 0:
-            asset_data.append({
-                'account': account,
-                'amount': balance_data['balance']
-            })
-            total_assets += balance_data['balance']
+    # Check if balanced (Assets = Liabilities + Equity)
+    balanced = abs(total_assets - (total_liabilities + total_equity)) < Decimal('0.01')
     
-    # Liabilities
-    liability_accounts = Account.objects.filter(
-        account_type__code='LIABILITY',
-        is_active=True,
-        is_header=False
-    )
+    return {
+        'assets': total_assets,
+        'liabilities': total_liabilities,
+        'equity': total_equity,
+        'balanced': balanced,
+        'asset_accounts': sections['ASSET']['accounts'],
+        'liability_accounts': sections['LIABILITY']['accounts'],
+        'equity_accounts': sections['EQUITY']['accounts']
+    }
+
+
+def _group_balances_by_type(balances):
+    """Split non-zero balances into {category: {'accounts': [...], 'total': Decimal}}."""
+    from finance.models import AccountType
     
-    liability_data = []
-    total_liabilities = Decimal('0.00')
+    sections = {
+        code: {'accounts': [], 'total': Decimal('0.00')}
+        for code, _ in AccountType.ACCOUNT_TYPE_CHOICES
+    }
     
-    for account in liability_accounts:
-        balance_data = calculate_account_balance(account, end_date=as_of_date)
-        if balance_data['balance'] != 0:
-            liability_data.append({
-                'account': account,
-                'amount': balance_data['balance']
-            })
-            total_liabilities += balance_data['balance']
+    for balance_data in balances:
+        if balance_data['balance'] == 0:
+            continue
+        section = sections[balance_data['account'].account_type.account_type]
+        section['accounts'].append({
+            'account': balance_data['account'],
+            'amount': balance_data['balance']
+        })
+        section['total'] += balance_data['balance']
+    
+    return sections
+
+
+def _posted_transactions_filter(start_date=None, end_date=None):
+    """Q for POSTED journal transactions within an optional date range."""
+    query = Q(journal_entry__status='POSTED')
     
-    # Equity
-    equity_accounts = Account.objects.filter(
-        account_type__code='EQUITY',
-        is_active=True,
-        is_header=False
-    )
+    if start_date:
+        query &= Q(journal_entry__entry_date__gte=start_date)
     
-    equity_data = []
-    total_equity = Decimal('0.00')
+    if end_date:
+        query &= Q(journal_entry__entry_date__lte=end_date)
     
-    for account in equity_accounts:
-        balance_data = calculate_account_balance(account, end_date=as_of_date)
-        if balance_data['balance'] != 0:
-            equity_data.append({
-                'account': account,
-                'amount': balance_data['balance']
-            })
-            total_equity += balance_data['balance']
+    return query
+
+
+def _get_cumulative_activity(end_date=None, account_ids=None):
+    """Cumulative activity: last usable period snapshot plus later posted activity."""
+    from finance.models import AccountPeriodBalance
     
-    # Check if balanced (Assets = Liabilities + Equity)
-    balanced = abs(total_assets - (total_liabilities + total_equity)) < Decimal('0.01')
+    base_period = AccountPeriodBalance.get_snapshot_base(end_date)
+    
+    if base_period is None:
+        return aggregate_account_activity(
+            _posted_transactions_filter(end_date=end_date),
+            account_ids=account_ids
+        )
     
+    activity = AccountPeriodBalance.get_closing_activity(base_period, account_ids)
+    
+    later = aggregate_account_activity(
+        _posted_transactions_filter(end_date=end_date),
+        Q(journal_entry__fiscal_period__start_date__gt=base_period.start_date),
+        account_ids=account_ids
+    )
+    
+    for account_id, totals in later.items():
+        if account_id not in activity:
+            activity[account_id] = totals
+            continue
+        merged = activity[account_id]
+        activity[account_id] = {
+            'debit_total': merged['debit_total'] + totals['debit_total'],
+            'credit_total': merged['credit_total'] + totals['credit_total'],
+            'transaction_count': merged['transaction_count'] + totals['transaction_count'],
+        }
+    
+    return activity
+
+
+def _activity_aggregates():
+    """Conditional debit/credit sums and a row count for JournalTransaction."""
+    amount_field = DecimalField(max_digits=15, decimal_places=2)
     return {
-        'assets': total_assets,
-        'liabilities': total_liabilities,
-        'equity': total_equity,
-        'balanced': balanced,
-        'asset_accounts': asset_data,
-        'liability_accounts': liability_data,
-        'equity_accounts': equity_data
+        'debit_total': Sum(
+            Case(When(is_debit=True, then='amount'), output_field=amount_field)
+        ),
+        'credit_total': Sum(
+            Case(When(is_debit=False, then='amount'), output_field=amount_field)
+        ),
+        'transaction_count': Count('id'),
     }
 
 
@@ -716,6 +849,100 @@ def calculate_balance_sheet(as_of_date=None):
 # ACCOUNT TREE TRAVERSAL
 # =============================================================================
 
+ACCOUNT_TREE_CACHE_TIMEOUT = 3600  # 1 hour
+
+
+def get_account_tree(using=None):
+    """
+    Get the chart of accounts structure for a school, cached per database.
+    
+    Only IDs and parent links are cached (built with one query); callers
+    load the Account rows they need with a single pk__in query. The cache
+    is invalidated by the account signals (see invalidate_account_tree).
+    
+    Args:
+        using: Database alias (default: current school database)
+        
+    Returns:
+        dict: {
+            'parents': {account_id: parent_id or None},
+            'children': {account_id: [active child ids, by account number]},
+            'roots': [active top-level ids, by account number]
+        }
+    """
+    from finance.models import Account
+    from schoolara.managers import get_current_db
+    from utils.cache import tenant_cache
+    
+    using = using or get_current_db() or 'default'
+    
+    tree = tenant_cache.get('account_tree', namespace='finance', using=using)
+    if tree is not None:
+        return tree
+    
+    parents = {}
+    children = {}
+    roots = []
+    
+    rows = Account.objects.using(using).order_by('account_number').values_list(
+        'pk', 'parent_account_id', 'is_active'
+    )
+    for pk, parent_id, is_active in rows:
+        parents[pk] = parent_id
+        if not is_active:
+            continue
+        if parent_id is None:
+            roots.append(pk)
+        else:
+            children.setdefault(parent_id, []).append(pk)
+    
+    tree = {'parents': parents, 'children': children, 'roots': roots}
+    tenant_cache.set(
+        'account_tree', tree, ACCOUNT_TREE_CACHE_TIMEOUT, namespace='finance', using=using
+    )
+    logger.debug(f"Built account tree for {using}: {len(parents)} accounts")
+    
+    return tree
+
+
+def invalidate_account_tree(using=None):
+    """
+    Clear the cached account tree for a school database.
+    
+    Args:
+        using: Database alias (default: current school database)
+    """
+    from schoolara.managers import get_current_db
+    from utils.cache import tenant_cache
+    
+    using = using or get_current_db() or 'default'
+    tenant_cache.delete('account_tree', namespace='finance', using=using)
+    logger.debug(f"Cleared account tree cache for {using}")
+
+
+def _get_descendant_ids(tree, account_id):
+    """Active descendant IDs of an account in depth-first (display) order."""
+    descendant_ids = []
+    stack = list(reversed(tree['children'].get(account_id, ())))
+    
+    while stack:
+        child_id = stack.pop()
+        descendant_ids.append(child_id)
+        stack.extend(reversed(tree['children'].get(child_id, ())))
+    
+    return descendant_ids
+
+
+def _load_accounts(account_ids):
+    """Load accounts by ID in one query: {pk: Account}."""
+    from finance.models import Account
+    
+    if not account_ids:
+        return {}
+    
+    return Account.objects.select_related('account_type').in_bulk(list(account_ids))
+
+
 def get_account_hierarchy(root_account=None):
     """
     Get complete account hierarchy as nested structure.
@@ -726,23 +953,31 @@ def get_account_hierarchy(root_account=None):
     Returns:
         list: Nested account structure
     """
-    from finance.models import Account
+    tree = get_account_tree()
     
     if root_account:
-        accounts = Account.objects.filter(parent_account=root_account, is_active=True)
+        top_ids = tree['children'].get(root_account.pk, [])
     else:
-        accounts = Account.objects.filter(parent_account__isnull=True, is_active=True)
-    
-    hierarchy = []
-    
-    for account in accounts.order_by('code'):
-        account_data = {
-            'account': account,
-            'children': get_account_hierarchy(account)
-        }
-        hierarchy.append(account_data)
-    
-    return hierarchy
+        top_ids = tree['roots']
+    
+    subtree_ids = []
+    for account_id in top_ids:
+        subtree_ids.append(account_id)
+        subtree_ids.extend(_get_descendant_ids(tree, account_id))
+    
+    accounts = _load_accounts(subtree_ids)
+    
+    def build(account_ids):
+        return [
+            {
+                'account': accounts[account_id],
+                'children': build(tree['children'].get(account_id, ()))
+            }
+            for account_id in account_ids
+            if account_id in accounts
+        ]
+    
+    return build(top_ids)
 
 
 def get_all_child_accounts(account, include_self=False):
@@ -756,18 +991,13 @@ def get_all_child_accounts(account, include_self=False):
     Returns:
         list: All child accounts
     """
-    from finance.models import Account
-    
-    children = []
-    
-    if include_self:
-        children.append(account)
+    descendant_ids = _get_descendant_ids(get_account_tree(), account.pk)
+    accounts = _load_accounts(descendant_ids)
     
-    direct_children = Account.objects.filter(parent_account=account, is_active=True)
-    
-    for child in direct_children:
-        children.append(child)
-        children.extend(get_all_child_accounts(child, include_self=False))
+    children = [account] if include_self else []
+    children.extend(
+        accounts[account_id] for account_id in descendant_ids if account_id in accounts
+    )
     
     return children
 
@@ -782,12 +1012,17 @@ def get_account_path(account):
     Returns:
         list: Path of accounts from root to this account
     """
-    path = [account]
-    current = account
+    parents = get_account_tree()['parents']
+    
+    ancestor_ids = []
+    parent_id = parents.get(account.pk, account.parent_account_id)
+    while parent_id is not None and parent_id not in ancestor_ids:
+        ancestor_ids.append(parent_id)
+        parent_id = parents.get(parent_id)
     
-    while current.parent_account:
-        current = current.parent_account
-        path.insert(0, current)
+    accounts = _load_accounts(ancestor_ids)
+    path = [accounts[account_id] for account_id in reversed(ancestor_ids) if account_id in accounts]
+    path.append(account)
     
     return path
 
@@ -861,46 +1096,49 @@ def export_trial_balance_to_csv(start_date=None, end_date=None):
     """
     Export trial balance to CSV format.
     
+    Returns CSV text one row at a time, so it can be passed straight to a
+    StreamingHttpResponse. The report itself is built with two queries, in
+    the school database current when this is called (not when the response
+    is streamed).
+    
     Returns:
-        str: CSV data as string
+        generator: CSV-formatted lines
+        
+    Example:
+        response = StreamingHttpResponse(
+            export_trial_balance_to_csv(start, end),
+            content_type='text/csv'
+        )
+        response['Content-Disposition'] = 'attachment; filename="trial_balance.csv"'
     """
-    import csv
-    from io import StringIO
+    from utils.exports import bind_database, iter_csv
     
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # Header
-    writer.writerow([
-        'Account Code',
+    def rows():
+        trial_balance = calculate_trial_balance(start_date, end_date)
+        
+        for account_data in trial_balance['accounts']:
+            yield [
+                account_data['account'].account_number,
+                account_data['account'].name,
+                account_data['account'].account_type.name,
+                account_data['debit_balance'],
+                account_data['credit_balance']
+            ]
+        
+        # Totals
+        yield []
+        yield [
+            'TOTAL',
+            '',
+            '',
+            trial_balance['total_debits'],
+            trial_balance['total_credits']
+        ]
+    
+    return bind_database(iter_csv(rows(), headers=[
+        'Account Number',
         'Account Name',
         'Account Type',
         'Debit Balance',
         'Credit Balance'
-    ])
-    
-    # Get trial balance
-    trial_balance = calculate_trial_balance(start_date, end_date)
-    
-    # Data
-    for account_data in trial_balance['accounts']:
-        account = account_data['account']
-        writer.writerow([
-            account.code,
-            account.name,
-            account.account_type.name,
-            account_data['debit_balance'],
-            account_data['credit_balance']
-        ])
-    
-    # Totals
-    writer.writerow([])
-    writer.writerow([
-        'TOTAL',
-        '',
-        '',
-        trial_balance['total_debits'],
-        trial_balance['total_credits']
-    ])
-    
-    return output.getvalue()
\ No newline at end of file
+    ]))
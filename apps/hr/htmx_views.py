@@ -21,7 +21,9 @@ from .models import (
     Attendance,
     Payroll,
 )
-from utils.utils import parse_filters, paginate_queryset
+from utils.utils import parse_filters, paginate_queryset, get_search_stats
+from utils.async_views import async_htmx_view
+from utils.search import search_queryset
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +32,7 @@ logger = logging.getLogger(__name__)
 # DEPARTMENT SEARCH
 # =============================================================================
 
+@async_htmx_view
 def department_search(request):
     """HTMX-compatible department search with pagination and stats"""
     
@@ -86,20 +89,19 @@ def department_search(request):
     # Paginate
     departments_page, paginator = paginate_queryset(request, departments, per_page=20)
     
-    # Calculate stats
-    total = departments.count()
-    
-    stats = {
-        'total': total,
-        'active': departments.filter(is_active=True).count(),
-        'academic': departments.filter(is_academic=True).count(),
-        'administrative': departments.filter(department_type='ADMINISTRATIVE').count(),
-        'support': departments.filter(department_type='SUPPORT').count(),
-        'parent_departments': departments.filter(parent_department__isnull=True).count(),
-        'sub_departments': departments.filter(parent_department__isnull=False).count(),
-        'total_staff': sum(d.staff_count for d in departments),
-        'total_budget': departments.aggregate(Sum('annual_budget'))['annual_budget__sum'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(departments, paginator, counts={
+        'active': Q(is_active=True),
+        'academic': Q(is_academic=True),
+        'administrative': Q(department_type='ADMINISTRATIVE'),
+        'support': Q(department_type='SUPPORT'),
+        'parent_departments': Q(parent_department__isnull=True),
+        'sub_departments': Q(parent_department__isnull=False),
+    }, sums={
+        'total_budget': 'annual_budget',
+    }, aggregates={
+        'total_staff': Sum('staff_count'),
+    })
     
     return render(request, 'hr/departments/_department_results.html', {
         'departments_page': departments_page,
@@ -111,6 +113,7 @@ def department_search(request):
 # DESIGNATION SEARCH
 # =============================================================================
 
+@async_htmx_view
 def designation_search(request):
     """HTMX-compatible designation search with pagination and stats"""
     
@@ -173,21 +176,17 @@ def designation_search(request):
     # Paginate
     designations_page, paginator = paginate_queryset(request, designations, per_page=20)
     
-    # Calculate stats
-    total = designations.count()
-    
-    stats = {
-        'total': total,
-        'active': designations.filter(is_active=True).count(),
-        'teaching': designations.filter(is_teaching=True).count(),
-        'management': designations.filter(is_management=True).count(),
-        'with_reports_to': designations.filter(reports_to__isnull=False).count(),
-        'total_staff': sum(d.staff_count for d in designations),
-        'avg_min_salary': designations.filter(min_salary__isnull=False).aggregate(
-            Avg('min_salary'))['min_salary__avg'] or 0,
-        'avg_max_salary': designations.filter(max_salary__isnull=False).aggregate(
-            Avg('max_salary'))['max_salary__avg'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(designations, paginator, counts={
+        'active': Q(is_active=True),
+        'teaching': Q(is_teaching=True),
+        'management': Q(is_management=True),
+        'with_reports_to': Q(reports_to__isnull=False),
+    }, aggregates={
+        'avg_min_salary': Avg('min_salary', filter=Q(min_salary__isnull=False)),
+        'avg_max_salary': Avg('max_salary', filter=Q(max_salary__isnull=False)),
+        'total_staff': Sum('staff_count'),
+    })
     
     return render(request, 'hr/designations/_designation_results.html', {
         'designations_page': designations_page,
@@ -199,6 +198,7 @@ def designation_search(request):
 # CONTRACT SEARCH
 # =============================================================================
 
+@async_htmx_view
 def contract_search(request):
     """HTMX-compatible contract search with pagination and stats"""
     
@@ -266,28 +266,26 @@ def contract_search(request):
     # Paginate
     contracts_page, paginator = paginate_queryset(request, contracts, per_page=20)
     
-    # Calculate stats
-    total = contracts.count()
+    # Calculate stats (one aggregate query, total from the paginator)
     today = timezone.now().date()
     
-    stats = {
-        'total': total,
-        'active': contracts.filter(status='ACTIVE').count(),
-        'draft': contracts.filter(status='DRAFT').count(),
-        'expired': contracts.filter(status='EXPIRED').count(),
-        'terminated': contracts.filter(status='TERMINATED').count(),
-        'permanent': contracts.filter(contract_type='PERMANENT').count(),
-        'fixed_term': contracts.filter(contract_type='FIXED_TERM').count(),
-        'expiring_soon': contracts.filter(
+    stats = get_search_stats(contracts, paginator, counts={
+        'active': Q(status='ACTIVE'),
+        'draft': Q(status='DRAFT'),
+        'expired': Q(status='EXPIRED'),
+        'terminated': Q(status='TERMINATED'),
+        'permanent': Q(contract_type='PERMANENT'),
+        'fixed_term': Q(contract_type='FIXED_TERM'),
+        'expiring_soon': Q(
             status='ACTIVE',
             end_date__lte=today + timedelta(days=30),
             end_date__gte=today
-        ).count(),
-        'avg_salary': contracts.filter(status='ACTIVE').aggregate(
-            Avg('basic_salary'))['basic_salary__avg'] or 0,
-        'total_salary_obligation': contracts.filter(status='ACTIVE').aggregate(
-            Sum('basic_salary'))['basic_salary__sum'] or 0,
-    }
+        ),
+    }, sums={
+        'total_salary_obligation': ('basic_salary', Q(status='ACTIVE')),
+    }, aggregates={
+        'avg_salary': Avg('basic_salary', filter=Q(status='ACTIVE')),
+    })
     
     return render(request, 'hr/contracts/_contract_results.html', {
         'contracts_page': contracts_page,
@@ -299,6 +297,7 @@ def contract_search(request):
 # STAFF SEARCH
 # =============================================================================
 
+@async_htmx_view
 def staff_search(request):
     """HTMX-compatible staff search with pagination and stats"""
     
@@ -329,7 +328,7 @@ def staff_search(request):
     
     # Apply text search
     if query:
-        staff = staff.filter(
+        staff = search_queryset(staff, query, fallback=(
             Q(first_name__icontains=query) |
             Q(middle_name__icontains=query) |
             Q(last_name__icontains=query) |
@@ -337,7 +336,7 @@ def staff_search(request):
             Q(phone_number__icontains=query) |
             Q(personal_email__icontains=query) |
             Q(national_id__icontains=query)
-        )
+        ))
     
     # Apply filters
     if employment_status:
@@ -361,20 +360,17 @@ def staff_search(request):
     # Paginate
     staff_page, paginator = paginate_queryset(request, staff, per_page=20)
     
-    # Calculate stats
-    total = staff.count()
-    
-    stats = {
-        'total': total,
-        'active': staff.filter(is_active=True).count(),
-        'full_time': staff.filter(employment_status='FT').count(),
-        'part_time': staff.filter(employment_status='PT').count(),
-        'contract': staff.filter(employment_status='CT').count(),
-        'male': staff.filter(gender='M').count(),
-        'female': staff.filter(gender='F').count(),
-        'with_active_contract': staff.filter(active_contract_count__gt=0).count(),
-        'teachers': staff.filter(teacher__isnull=False).count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(staff, paginator, counts={
+        'active': Q(is_active=True),
+        'full_time': Q(employment_status='FT'),
+        'part_time': Q(employment_status='PT'),
+        'contract': Q(employment_status='CT'),
+        'male': Q(gender='M'),
+        'female': Q(gender='F'),
+        'with_active_contract': Q(active_contract_count__gt=0),
+        'teachers': Q(teacher__isnull=False),
+    })
     
     return render(request, 'hr/staff/_staff_results.html', {
         'staff_page': staff_page,
@@ -386,6 +382,7 @@ def staff_search(request):
 # TEACHER SEARCH
 # =============================================================================
 
+@async_htmx_view
 def teacher_search(request):
     """HTMX-compatible teacher search with pagination and stats"""
     
@@ -448,19 +445,17 @@ def teacher_search(request):
     # Paginate
     teachers_page, paginator = paginate_queryset(request, teachers, per_page=20)
     
-    # Calculate stats
-    total = teachers.count()
-    
-    stats = {
-        'total': total,
-        'active': teachers.filter(staff__is_active=True).count(),
-        'class_teachers': teachers.filter(is_class_teacher=True).count(),
-        'can_teach_online': teachers.filter(can_teach_online=True).count(),
-        'basic_literacy': teachers.filter(digital_literacy_level='BASIC').count(),
-        'advanced_literacy': teachers.filter(digital_literacy_level='ADVANCED').count(),
-        'avg_teaching_load': teachers.aggregate(Avg('current_teaching_load'))['current_teaching_load__avg'] or 0,
-        'total_classes': sum(t.class_count for t in teachers),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(teachers, paginator, counts={
+        'active': Q(staff__is_active=True),
+        'class_teachers': Q(is_class_teacher=True),
+        'can_teach_online': Q(can_teach_online=True),
+        'basic_literacy': Q(digital_literacy_level='BASIC'),
+        'advanced_literacy': Q(digital_literacy_level='ADVANCED'),
+    }, aggregates={
+        'avg_teaching_load': Avg('current_teaching_load'),
+        'total_classes': Sum('class_count'),
+    })
     
     return render(request, 'hr/teachers/_teacher_results.html', {
         'teachers_page': teachers_page,
@@ -472,6 +467,7 @@ def teacher_search(request):
 # SALARY HISTORY SEARCH
 # =============================================================================
 
+@async_htmx_view
 def salary_history_search(request):
     """HTMX-compatible salary history search with pagination and stats"""
     
@@ -527,22 +523,22 @@ def salary_history_search(request):
     # Paginate
     salary_changes_page, paginator = paginate_queryset(request, salary_changes, per_page=20)
     
-    # Calculate stats
-    total = salary_changes.count()
-    
-    stats = {
-        'total': total,
-        'initial': salary_changes.filter(change_type='INITIAL').count(),
-        'increment': salary_changes.filter(change_type='INCREMENT').count(),
-        'promotion': salary_changes.filter(change_type='PROMOTION').count(),
-        'avg_new_salary': salary_changes.aggregate(Avg('new_salary'))['new_salary__avg'] or 0,
-        'avg_increase': salary_changes.filter(previous_salary__isnull=False).aggregate(
-            avg_increase=Avg(F('new_salary') - F('previous_salary'))
-        )['avg_increase'] or 0,
-        'total_salary_increase': salary_changes.filter(previous_salary__isnull=False).aggregate(
-            total=Sum(F('new_salary') - F('previous_salary'))
-        )['total'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(salary_changes, paginator, counts={
+        'initial': Q(change_type='INITIAL'),
+        'increment': Q(change_type='INCREMENT'),
+        'promotion': Q(change_type='PROMOTION'),
+    }, aggregates={
+        'avg_new_salary': Avg('new_salary'),
+        'avg_increase': Avg(
+            F('new_salary') - F('previous_salary'),
+            filter=Q(previous_salary__isnull=False)
+        ),
+        'total_salary_increase': Sum(
+            F('new_salary') - F('previous_salary'),
+            filter=Q(previous_salary__isnull=False)
+        ),
+    })
     
     return render(request, 'hr/salary_history/_history_results.html', {
         'salary_changes_page': salary_changes_page,
@@ -554,6 +550,7 @@ def salary_history_search(request):
 # ATTENDANCE SEARCH
 # =============================================================================
 
+@async_htmx_view
 def attendance_search(request):
     """HTMX-compatible attendance search with pagination and stats"""
     
@@ -601,22 +598,19 @@ def attendance_search(request):
     # Paginate
     attendance_page, paginator = paginate_queryset(request, attendance_records, per_page=20)
     
-    # Calculate stats
-    total = attendance_records.count()
-    
-    stats = {
-        'total': total,
-        'present': attendance_records.filter(status='PRESENT').count(),
-        'absent': attendance_records.filter(status='ABSENT').count(),
-        'late': attendance_records.filter(status='LATE').count(),
-        'on_leave': attendance_records.filter(status='LEAVE').count(),
-        'office': attendance_records.filter(work_mode='OFFICE').count(),
-        'remote': attendance_records.filter(work_mode='REMOTE').count(),
-        'avg_work_hours': attendance_records.filter(work_hours__isnull=False).aggregate(
-            Avg('work_hours'))['work_hours__avg'] or 0,
-        'total_overtime': attendance_records.aggregate(
-            Sum('overtime_hours'))['overtime_hours__sum'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(attendance_records, paginator, counts={
+        'present': Q(status='PRESENT'),
+        'absent': Q(status='ABSENT'),
+        'late': Q(status='LATE'),
+        'on_leave': Q(status='LEAVE'),
+        'office': Q(work_mode='OFFICE'),
+        'remote': Q(work_mode='REMOTE'),
+    }, sums={
+        'total_overtime': 'overtime_hours',
+    }, aggregates={
+        'avg_work_hours': Avg('work_hours', filter=Q(work_hours__isnull=False)),
+    })
     
     return render(request, 'hr/attendance/_attendance_results.html', {
         'attendance_page': attendance_page,
@@ -628,6 +622,7 @@ def attendance_search(request):
 # PAYROLL SEARCH
 # =============================================================================
 
+@async_htmx_view
 def payroll_search(request):
     """HTMX-compatible payroll search with pagination and stats"""
     
@@ -696,23 +691,18 @@ def payroll_search(request):
     # Paginate
     payrolls_page, paginator = paginate_queryset(request, payrolls, per_page=20)
     
-    # Calculate stats
-    total = payrolls.count()
-    
-    stats = {
-        'total': total,
-        'draft': payrolls.filter(status='DRAFT').count(),
-        'approved': payrolls.filter(status='APPROVED').count(),
-        'paid': payrolls.filter(status='PAID').count(),
-        'total_gross_pay': payrolls.filter(status='PAID').aggregate(
-            Sum('gross_pay'))['gross_pay__sum'] or 0,
-        'total_net_pay': payrolls.filter(status='PAID').aggregate(
-            Sum('net_pay'))['net_pay__sum'] or 0,
-        'total_deductions': payrolls.filter(status='PAID').aggregate(
-            Sum('total_deductions'))['total_deductions__sum'] or 0,
-        'avg_net_pay': payrolls.filter(status='PAID').aggregate(
-            Avg('net_pay'))['net_pay__avg'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(payrolls, paginator, counts={
+        'draft': Q(status='DRAFT'),
+        'approved': Q(status='APPROVED'),
+        'paid': Q(status='PAID'),
+    }, sums={
+        'total_gross_pay': ('gross_pay', Q(status='PAID')),
+        'total_net_pay': ('net_pay', Q(status='PAID')),
+        'total_deductions': ('total_deductions', Q(status='PAID')),
+    }, aggregates={
+        'avg_net_pay': Avg('net_pay', filter=Q(status='PAID')),
+    })
     
     return render(request, 'hr/payroll/_payroll_results.html', {
         'payrolls_page': payrolls_page,
@@ -724,6 +714,7 @@ def payroll_search(request):
 # CONTRACT BENEFIT SEARCH
 # =============================================================================
 
+@async_htmx_view
 def contract_benefit_search(request):
     """HTMX-compatible contract benefit search with pagination and stats"""
     
@@ -769,20 +760,17 @@ def contract_benefit_search(request):
     # Paginate
     benefits_page, paginator = paginate_queryset(request, benefits, per_page=20)
     
-    # Calculate stats
-    total = benefits.count()
-    
-    stats = {
-        'total': total,
-        'active': benefits.filter(is_active=True).count(),
-        'health_insurance': benefits.filter(benefit_type='HEALTH_INSURANCE').count(),
-        'housing': benefits.filter(benefit_type='HOUSING').count(),
-        'transport': benefits.filter(benefit_type='TRANSPORT').count(),
-        'total_value': benefits.filter(monetary_value__isnull=False).aggregate(
-            Sum('monetary_value'))['monetary_value__sum'] or 0,
-        'avg_value': benefits.filter(monetary_value__isnull=False).aggregate(
-            Avg('monetary_value'))['monetary_value__avg'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(benefits, paginator, counts={
+        'active': Q(is_active=True),
+        'health_insurance': Q(benefit_type='HEALTH_INSURANCE'),
+        'housing': Q(benefit_type='HOUSING'),
+        'transport': Q(benefit_type='TRANSPORT'),
+    }, sums={
+        'total_value': ('monetary_value', Q(monetary_value__isnull=False)),
+    }, aggregates={
+        'avg_value': Avg('monetary_value', filter=Q(monetary_value__isnull=False)),
+    })
     
     return render(request, 'hr/benefits/_benefit_results.html', {
         'benefits_page': benefits_page,
@@ -794,6 +782,7 @@ def contract_benefit_search(request):
 # QUICK STATS ENDPOINTS (for dashboard widgets)
 # =============================================================================
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def staff_quick_stats(request):
     """Get quick statistics for staff"""
@@ -811,6 +800,7 @@ def staff_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def contract_quick_stats(request):
     """Get quick statistics for contracts"""
@@ -837,6 +827,7 @@ def contract_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def payroll_quick_stats(request):
     """Get quick statistics for payroll"""
@@ -862,6 +853,7 @@ def payroll_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def attendance_quick_stats(request):
     """Get quick statistics for attendance"""
@@ -33,8 +33,9 @@ from hr.utils import (
     validate_staff_data, validate_contract_data
 )
 from finance.models import JournalEntry, JournalTransaction, Journal
-from core.models import FinancialSettings, FiscalPeriod
+from core.models import FinancialSettings, FiscalPeriod, NumberSequence
 from fees.models import PaymentMethod
+from utils.jobs import JobHandler
 
 logger = logging.getLogger(__name__)
 
@@ -45,7 +46,7 @@ logger = logging.getLogger(__name__)
 
 class StaffIDGenerationService:
     """
-    Generate unique staff IDs with database locking.
+    Generate unique staff IDs from per-school number sequences.
     Uses utils.py for pure logic, adds DB operations here.
     """
     
@@ -115,34 +116,14 @@ class StaffIDGenerationService:
         )
 
         # -----------------------------
-        # Generate sequential number WITH DB LOCK
+        # Generate sequential number from the school's NumberSequence
         # -----------------------------
         while True:
-            # Use select_for_update to prevent race conditions
-            last_staff = (
-                Staff.objects
-                .select_for_update()
-                .filter(staff_id__startswith=prefix)
-                .order_by("-staff_id")
-                .first()
-            )
-
-            if last_staff:
-                try:
-                    last_seq = int(last_staff.staff_id.split("-")[-1])
-                    next_seq = last_seq + 1
-                except (ValueError, IndexError):
-                    next_seq = (
-                        Staff.objects
-                        .filter(staff_id__startswith=prefix)
-                        .count() + 1
-                    )
-            else:
-                next_seq = 1
-
-            staff_id = f"{prefix}{next_seq:03d}"
+            staff_id = NumberSequence.allocate_formatted(
+                'hr.staff_id', Staff, 'staff_id', prefix, width=3
+            )[0]
 
-            # Double-check uniqueness
+            # Double-check uniqueness (IDs may have been entered manually)
             if not Staff.objects.filter(staff_id=staff_id).exists():
                 logger.info(f"Generated staff ID: {staff_id}")
                 return staff_id
@@ -154,7 +135,7 @@ class StaffIDGenerationService:
 
 class ContractNumberGenerationService:
     """
-    Generate unique contract numbers with database locking.
+    Generate unique contract numbers from per-school number sequences.
     Uses utils.py for pure logic, adds DB operations here.
     """
     
@@ -192,32 +173,13 @@ class ContractNumberGenerationService:
         # Build prefix using pure utility
         prefix = build_contract_number_prefix(current_year, type_code)
         
-        # Generate sequential number WITH DB LOCK
+        # Generate sequential number from the school's NumberSequence
         while True:
-            last_contract = (
-                Contract.objects
-                .select_for_update()
-                .filter(contract_number__startswith=prefix)
-                .order_by("-contract_number")
-                .first()
-            )
-            
-            if last_contract:
-                try:
-                    last_seq = int(last_contract.contract_number.split("/")[-1])
-                    next_seq = last_seq + 1
-                except (ValueError, IndexError):
-                    next_seq = (
-                        Contract.objects
-                        .filter(contract_number__startswith=prefix)
-                        .count() + 1
-                    )
-            else:
-                next_seq = 1
+            contract_number = NumberSequence.allocate_formatted(
+                'hr.contract', Contract, 'contract_number', prefix, width=4, separator='/'
+            )[0]
             
-            contract_number = f"{prefix}{next_seq:04d}"
-            
-            # Double-check uniqueness
+            # Double-check uniqueness (numbers may have been entered manually)
             if not Contract.objects.filter(contract_number=contract_number).exists():
                 logger.info(f"Generated contract number: {contract_number}")
                 return contract_number
@@ -554,7 +516,7 @@ class PayrollAccountingService:
             return existing_entry
         
         # Get accounts from settings
-        settings = FinancialSettings.get_instance()
+        settings = FinancialSettings.get_cached_instance()
         if not settings:
             raise ValueError("FinancialSettings not found")
         
@@ -671,7 +633,7 @@ class PayrollAccountingService:
             raise ValueError("Can only create disbursement entry for paid payroll")
         
         # Get accounts
-        settings = FinancialSettings.get_instance()
+        settings = FinancialSettings.get_cached_instance()
         accounts = settings.get_payroll_accounts()
         
         # Determine bank/cash account based on payment method
@@ -746,7 +708,7 @@ class PayrollAccountingService:
         Returns:
             JournalEntry instance
         """
-        settings = FinancialSettings.get_instance()
+        settings = FinancialSettings.get_cached_instance()
         accounts = settings.get_payroll_accounts()
         
         # Determine liability account
@@ -908,6 +870,55 @@ class PayrollProcessingService:
                 })
         
         return results
+    
+    @staticmethod
+    def queue_bulk_process_payroll(payrolls, user=None):
+        """
+        Queue bulk_process_payroll() as a background job.
+        
+        Each payroll is processed by the background worker in its own
+        savepoint, so one failing payroll does not undo the others.
+        
+        Args:
+            payrolls: QuerySet or list of draft Payroll instances
+            user: User processing payroll (recorded as approver)
+            
+        Returns:
+            BackgroundJob: The queued job
+        """
+        from utils.jobs import enqueue_job
+        
+        payroll_ids = [str(payroll.pk) for payroll in payrolls]
+        return enqueue_job(
+            'hr.bulk_process_payroll',
+            params={'payroll_ids': payroll_ids},
+            user=user,
+            description=f"Process {len(payroll_ids)} payrolls"
+        )
+
+
+# -----------------------------------------------------------------------------
+# Background job handlers (see utils.jobs)
+# -----------------------------------------------------------------------------
+
+class BulkProcessPayrollJob(JobHandler):
+    """Background version of PayrollProcessingService.bulk_process_payroll()"""
+    
+    def prepare(self, params):
+        payrolls = Payroll.objects.filter(pk__in=params['payroll_ids']).order_by(
+            'staff__last_name', 'staff__first_name'
+        ).values_list('pk', 'staff__first_name', 'staff__last_name')
+        return [(pk, f"{first_name} {last_name}") for pk, first_name, last_name in payrolls]
+    
+    def process_item(self, key, params, job):
+        from utils.context import get_request_context
+        
+        context = get_request_context() or {}
+        result = PayrollProcessingService.process_payroll(
+            Payroll.objects.select_related('staff').get(pk=key),
+            user=context.get('user')
+        )
+        return f"Journal entry {result['journal_entry']}" if result['journal_entry'] else ''
 
 
 # =============================================================================
@@ -17,7 +17,9 @@ from .models import (
     SiblingRelationship,
     EnrollmentStatusHistory
 )
-from utils.utils import parse_filters, paginate_queryset
+from utils.utils import parse_filters, paginate_queryset, get_search_stats
+from utils.async_views import async_htmx_view
+from utils.search import search_queryset
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +28,7 @@ logger = logging.getLogger(__name__)
 # STUDENT SEARCH
 # =============================================================================
 
+@async_htmx_view
 def student_search(request):
     """HTMX-compatible student search with pagination and stats"""
     
@@ -67,7 +70,7 @@ def student_search(request):
     
     # Apply text search
     if query:
-        students = students.filter(
+        students = search_queryset(students, query, fallback=(
             Q(admission_number__icontains=query) |
             Q(national_student_number__icontains=query) |
             Q(first_name__icontains=query) |
@@ -76,7 +79,7 @@ def student_search(request):
             Q(phone_number__icontains=query) |
             Q(personal_email__icontains=query) |
             Q(birth_certificate_number__icontains=query)
-        )
+        ))
     
     # Apply filters
     if enrollment_status:
@@ -134,26 +137,23 @@ def student_search(request):
     # Paginate
     students_page, paginator = paginate_queryset(request, students, per_page=10)
     
-    # Calculate stats
-    total = students.count()
-    
-    stats = {
-        'total': total,
-        'active': students.filter(enrollment_status='ACTIVE').count(),
-        'suspended': students.filter(enrollment_status='SUSPENDED').count(),
-        'graduated': students.filter(enrollment_status='GRADUATED').count(),
-        'transferred': students.filter(enrollment_status='TRANSFERRED').count(),
-        'withdrawn': students.filter(enrollment_status='WITHDRAWN').count(),
-        'male': students.filter(gender='M').count(),
-        'female': students.filter(gender='F').count(),
-        'special_needs': students.filter(has_special_needs=True).count(),
-        'transportation': students.filter(transportation_required=True).count(),
-        'medical_alerts': students.filter(
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(students, paginator, counts={
+        'active': Q(enrollment_status='ACTIVE'),
+        'suspended': Q(enrollment_status='SUSPENDED'),
+        'graduated': Q(enrollment_status='GRADUATED'),
+        'transferred': Q(enrollment_status='TRANSFERRED'),
+        'withdrawn': Q(enrollment_status='WITHDRAWN'),
+        'male': Q(gender='M'),
+        'female': Q(gender='F'),
+        'special_needs': Q(has_special_needs=True),
+        'transportation': Q(transportation_required=True),
+        'medical_alerts': (
             Q(medical_conditions__isnull=False) & ~Q(medical_conditions='') |
             Q(allergies__isnull=False) & ~Q(allergies='') |
             Q(medications__isnull=False) & ~Q(medications='')
-        ).count(),
-    }
+        ),
+    })
     
     return render(request, 'students/_student_results.html', {
         'students_page': students_page,
@@ -165,6 +165,7 @@ def student_search(request):
 # GUARDIAN SEARCH
 # =============================================================================
 
+@async_htmx_view
 def guardian_search(request):
     """HTMX-compatible guardian search with pagination and stats"""
     
@@ -202,7 +203,7 @@ def guardian_search(request):
     
     # Apply text search
     if query:
-        guardians = guardians.filter(
+        guardians = search_queryset(guardians, query, fallback=(
             Q(first_name__icontains=query) |
             Q(middle_name__icontains=query) |
             Q(last_name__icontains=query) |
@@ -211,7 +212,7 @@ def guardian_search(request):
             Q(email__icontains=query) |
             Q(national_id__icontains=query) |
             Q(employer__icontains=query)
-        )
+        ))
     
     # Apply filters
     if guardian_type:
@@ -235,23 +236,20 @@ def guardian_search(request):
     # Paginate
     guardians_page, paginator = paginate_queryset(request, guardians, per_page=20)
     
-    # Calculate stats
-    total = guardians.count()
-    
-    stats = {
-        'total': total,
-        'active': guardians.filter(is_active=True).count(),
-        'primary': guardians.filter(guardian_type='PRIMARY').count(),
-        'secondary': guardians.filter(guardian_type='SECONDARY').count(),
-        'emergency': guardians.filter(guardian_type='EMERGENCY').count(),
-        'financial': guardians.filter(guardian_type='FINANCIAL').count(),
-        'male': guardians.filter(gender='M').count(),
-        'female': guardians.filter(gender='F').count(),
-        'with_email': guardians.exclude(Q(email='') | Q(email__isnull=True)).count(),
-        'total_students': sum(g.student_count for g in guardians),
-        'avg_income': guardians.filter(monthly_income__isnull=False).aggregate(
-            Avg('monthly_income'))['monthly_income__avg'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(guardians, paginator, counts={
+        'active': Q(is_active=True),
+        'primary': Q(guardian_type='PRIMARY'),
+        'secondary': Q(guardian_type='SECONDARY'),
+        'emergency': Q(guardian_type='EMERGENCY'),
+        'financial': Q(guardian_type='FINANCIAL'),
+        'male': Q(gender='M'),
+        'female': Q(gender='F'),
+        'with_email': ~(Q(email='') | Q(email__isnull=True)),
+    }, aggregates={
+        'avg_income': Avg('monthly_income', filter=Q(monthly_income__isnull=False)),
+        'total_students': Sum('student_count'),
+    })
     
     return render(request, 'students/guardians/_guardian_results.html', {
         'guardians_page': guardians_page,
@@ -263,6 +261,7 @@ def guardian_search(request):
 # STUDENT-GUARDIAN RELATIONSHIP SEARCH
 # =============================================================================
 
+@async_htmx_view
 def student_guardian_search(request):
     """HTMX-compatible student-guardian relationship search with pagination and stats"""
     
@@ -336,22 +335,19 @@ def student_guardian_search(request):
     # Paginate
     relationships_page, paginator = paginate_queryset(request, relationships, per_page=20)
     
-    # Calculate stats
-    total = relationships.count()
-    
-    stats = {
-        'total': total,
-        'active': relationships.filter(is_active=True).count(),
-        'primary': relationships.filter(is_primary=True).count(),
-        'financial_responsible': relationships.filter(is_financial_responsible=True).count(),
-        'emergency_contacts': relationships.filter(emergency_contact_priority__lte=5).count(),
-        'can_pickup': relationships.filter(can_pickup=True).count(),
-        'can_authorize_medical': relationships.filter(can_authorize_medical=True).count(),
-        'has_custody': relationships.filter(has_custody=True).count(),
-        'fathers': relationships.filter(relationship='FATHER').count(),
-        'mothers': relationships.filter(relationship='MOTHER').count(),
-        'guardians': relationships.filter(relationship='GUARDIAN').count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(relationships, paginator, counts={
+        'active': Q(is_active=True),
+        'primary': Q(is_primary=True),
+        'financial_responsible': Q(is_financial_responsible=True),
+        'emergency_contacts': Q(emergency_contact_priority__lte=5),
+        'can_pickup': Q(can_pickup=True),
+        'can_authorize_medical': Q(can_authorize_medical=True),
+        'has_custody': Q(has_custody=True),
+        'fathers': Q(relationship='FATHER'),
+        'mothers': Q(relationship='MOTHER'),
+        'guardians': Q(relationship='GUARDIAN'),
+    })
     
     return render(request, 'students/relationships/_relationship_results.html', {
         'relationships_page': relationships_page,
@@ -363,6 +359,7 @@ def student_guardian_search(request):
 # SIBLING RELATIONSHIP SEARCH
 # =============================================================================
 
+@async_htmx_view
 def sibling_search(request):
     """HTMX-compatible sibling relationship search with pagination and stats"""
     
@@ -410,20 +407,17 @@ def sibling_search(request):
     # Paginate
     siblings_page, paginator = paginate_queryset(request, siblings, per_page=20)
     
-    # Calculate stats
-    total = siblings.count()
-    
-    stats = {
-        'total': total,
-        'verified': siblings.filter(is_verified=True).count(),
-        'unverified': siblings.filter(is_verified=False).count(),
-        'full': siblings.filter(relationship_type='FULL').count(),
-        'half': siblings.filter(relationship_type='HALF').count(),
-        'step': siblings.filter(relationship_type='STEP').count(),
-        'adopted': siblings.filter(relationship_type='ADOPTED').count(),
-        'foster': siblings.filter(relationship_type='FOSTER').count(),
-        'cousin': siblings.filter(relationship_type='COUSIN').count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(siblings, paginator, counts={
+        'verified': Q(is_verified=True),
+        'unverified': Q(is_verified=False),
+        'full': Q(relationship_type='FULL'),
+        'half': Q(relationship_type='HALF'),
+        'step': Q(relationship_type='STEP'),
+        'adopted': Q(relationship_type='ADOPTED'),
+        'foster': Q(relationship_type='FOSTER'),
+        'cousin': Q(relationship_type='COUSIN'),
+    })
     
     return render(request, 'students/siblings/_sibling_results.html', {
         'siblings_page': siblings_page,
@@ -435,6 +429,7 @@ def sibling_search(request):
 # ENROLLMENT STATUS HISTORY SEARCH
 # =============================================================================
 
+@async_htmx_view
 def enrollment_status_history_search(request):
     """HTMX-compatible enrollment status history search with pagination and stats"""
     
@@ -498,36 +493,17 @@ def enrollment_status_history_search(request):
     # Paginate
     history_page, paginator = paginate_queryset(request, history, per_page=20)
     
-    # Calculate stats
-    total = history.count()
-    
-    # Count status changes by type
-    status_changes = {}
-    for status_choice in Student.ENROLLMENT_STATUS_CHOICES:
-        status_code = status_choice[0]
-        status_changes[f'{status_code.lower()}_to'] = history.filter(
-            new_status=status_code
-        ).count()
-        status_changes[f'{status_code.lower()}_from'] = history.filter(
-            previous_status=status_code
-        ).count()
-    
-    stats = {
-        'total': total,
-        'approved': history.filter(is_approved=True).count(),
-        'pending_approval': history.filter(
-            approval_required=True,
-            is_approved=False
-        ).count(),
-        'to_suspended': history.filter(new_status='SUSPENDED').count(),
-        'to_withdrawn': history.filter(new_status='WITHDRAWN').count(),
-        'to_graduated': history.filter(new_status='GRADUATED').count(),
-        'to_transferred': history.filter(new_status='TRANSFERRED').count(),
-        'to_active': history.filter(new_status='ACTIVE').count(),
-        'this_year': history.filter(
-            effective_date__year=timezone.now().year
-        ).count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(history, paginator, counts={
+        'approved': Q(is_approved=True),
+        'pending_approval': Q(approval_required=True, is_approved=False),
+        'to_suspended': Q(new_status='SUSPENDED'),
+        'to_withdrawn': Q(new_status='WITHDRAWN'),
+        'to_graduated': Q(new_status='GRADUATED'),
+        'to_transferred': Q(new_status='TRANSFERRED'),
+        'to_active': Q(new_status='ACTIVE'),
+        'this_year': Q(effective_date__year=timezone.now().year),
+    })
     
     return render(request, 'students/enrollment_history/_history_results.html', {
         'history_page': history_page,
@@ -539,6 +515,7 @@ def enrollment_status_history_search(request):
 # QUICK STATS ENDPOINTS (for dashboard widgets)
 # =============================================================================
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def student_quick_stats(request):
     """Get quick statistics for students"""
@@ -588,6 +565,7 @@ def student_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def guardian_quick_stats(request):
     """Get quick statistics for guardians"""
@@ -615,6 +593,7 @@ def guardian_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def enrollment_status_quick_stats(request):
     """Get quick statistics for enrollment status changes"""
@@ -648,6 +627,7 @@ def enrollment_status_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def medical_alerts_quick_stats(request):
     """Get quick statistics for students with medical alerts"""
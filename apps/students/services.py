@@ -13,6 +13,7 @@ import logging
 
 from .models import Student, Guardian, StudentGuardian, EnrollmentStatusHistory
 from academics.models import StudentClassEnrollment, Class, AcademicSession
+from utils.jobs import JobHandler
 
 logger = logging.getLogger(__name__)
 
@@ -629,56 +630,16 @@ class BulkStudentOperationsService:
         
         for student in students_queryset:
             try:
-                # Check eligibility if required
-                if only_eligible:
-                    from academics.models import AcademicProgress
-                    progress = AcademicProgress.objects.filter(
-                        student=student
-                    ).order_by('-academic_session__start_date').first()
-                    
-                    if not progress or not progress.is_eligible_for_promotion:
-                        error_count += 1
-                        messages.append(f"{student.get_full_name()}: Not eligible for promotion")
-                        continue
-                
-                # Get next level
-                if not student.current_academic_level:
-                    error_count += 1
-                    messages.append(f"{student.get_full_name()}: No current academic level set")
-                    continue
-                
-                next_level = student.current_academic_level.next_level
-                if not next_level:
-                    error_count += 1
-                    messages.append(f"{student.get_full_name()}: No next level defined")
-                    continue
-                
-                # Find appropriate class in next level
-                target_class = Class.objects.filter(
-                    academic_level=next_level,
-                    academic_session=target_session,
-                    is_active=True
-                ).first()
-                
-                if not target_class:
-                    error_count += 1
-                    messages.append(
-                        f"{student.get_full_name()}: No class available in {next_level} "
-                        f"for {target_session}"
-                    )
-                    continue
-                
-                # Enroll in new class
-                enrollment, created, enroll_messages = StudentEnrollmentService.enroll_student_in_class(
-                    student=student,
-                    class_instance=target_class,
-                    enrollment_type='PROMOTED'
+                message = BulkStudentOperationsService.promote_student_to_next_level(
+                    student, target_session, only_eligible
                 )
-                
-                if created:
+                if message:
                     success_count += 1
-                    messages.append(f"{student.get_full_name()}: Promoted to {next_level}")
+                    messages.append(f"{student.get_full_name()}: {message}")
                 
+            except ValueError as e:
+                error_count += 1
+                messages.append(f"{student.get_full_name()}: {str(e)}")
             except Exception as e:
                 error_count += 1
                 messages.append(f"{student.get_full_name()}: Promotion failed - {str(e)}")
@@ -690,6 +651,109 @@ class BulkStudentOperationsService:
         logger.info(f"Bulk promotion to {target_session}: {success_count}/{students_queryset.count()}")
         
         return success_count, error_count, messages
+    
+    @staticmethod
+    def promote_student_to_next_level(student, target_session, only_eligible=True):
+        """
+        Promote one student to their next academic level.
+        
+        Args:
+            student (Student): Student to promote
+            target_session (AcademicSession): Target session for promotion
+            only_eligible (bool): Require promotion eligibility
+            
+        Returns:
+            str: Result message, or None if the student was already enrolled
+            
+        Raises:
+            ValueError: If the student cannot be promoted
+        """
+        # Check eligibility if required
+        if only_eligible:
+            from academics.models import AcademicProgress
+            progress = AcademicProgress.objects.filter(
+                student=student
+            ).order_by('-academic_session__start_date').first()
+            
+            if not progress or not progress.is_eligible_for_promotion:
+                raise ValueError("Not eligible for promotion")
+        
+        # Get next level
+        if not student.current_academic_level:
+            raise ValueError("No current academic level set")
+        
+        next_level = student.current_academic_level.next_level
+        if not next_level:
+            raise ValueError("No next level defined")
+        
+        # Find appropriate class in next level
+        target_class = Class.objects.filter(
+            academic_level=next_level,
+            academic_session=target_session,
+            is_active=True
+        ).first()
+        
+        if not target_class:
+            raise ValueError(f"No class available in {next_level} for {target_session}")
+        
+        # Enroll in new class
+        enrollment, created, enroll_messages = StudentEnrollmentService.enroll_student_in_class(
+            student=student,
+            class_instance=target_class,
+            enrollment_type='PROMOTED'
+        )
+        
+        return f"Promoted to {next_level}" if created else None
+    
+    @staticmethod
+    def queue_promote_students_to_next_level(students_queryset, target_session,
+                                             only_eligible=True, user=None):
+        """
+        Queue promote_students_to_next_level() as a background job.
+        
+        Args:
+            students_queryset (QuerySet): Students to promote
+            target_session (AcademicSession): Target session for promotion
+            only_eligible (bool): Only promote eligible students
+            user: User queueing the job
+            
+        Returns:
+            BackgroundJob: The queued job
+        """
+        from utils.jobs import enqueue_job
+        
+        student_ids = [str(pk) for pk in students_queryset.values_list('pk', flat=True)]
+        return enqueue_job(
+            'students.promote_students_to_next_level',
+            params={
+                'student_ids': student_ids,
+                'target_session_id': str(target_session.pk),
+                'only_eligible': only_eligible,
+            },
+            user=user,
+            description=f"Promote {len(student_ids)} students to {target_session}"
+        )
+
+
+# -----------------------------------------------------------------------------
+# Background job handlers (see utils.jobs)
+# -----------------------------------------------------------------------------
+
+class PromoteStudentsJob(JobHandler):
+    """Background version of BulkStudentOperationsService.promote_students_to_next_level()"""
+    
+    def prepare(self, params):
+        students = Student.objects.filter(pk__in=params['student_ids']).order_by(
+            'last_name', 'first_name'
+        ).values_list('pk', 'first_name', 'last_name')
+        return [(pk, f"{first_name} {last_name}") for pk, first_name, last_name in students]
+    
+    def process_item(self, key, params, job):
+        return BulkStudentOperationsService.promote_student_to_next_level(
+            Student.objects.select_related('current_academic_level').get(pk=key),
+            AcademicSession.objects.get(pk=params['target_session_id']),
+            params.get('only_eligible', True)
+        ) or 'Already enrolled'
 
 
 # =============================================================================
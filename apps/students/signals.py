@@ -424,19 +424,17 @@ def validate_guardian_email_uniqueness(sender, instance, **kwargs):
 def invalidate_student_cache(sender, instance, **kwargs):
     """
     Invalidate cached student data when student changes.
+    Keys live in the current school's 'students' namespace.
     """
-    from django.core.cache import cache
+    from utils.cache import tenant_cache
     
     # Clear student-specific caches
-    cache_keys = [
+    tenant_cache.delete_many([
         f'student_{instance.pk}',
         f'student_admission_{instance.admission_number}',
         'student_list',
         'student_stats',
-    ]
-    
-    for key in cache_keys:
-        cache.delete(key)
+    ], namespace='students')
 
 
 @receiver(post_save, sender=StudentGuardian)
@@ -445,8 +443,9 @@ def invalidate_guardian_relationship_cache(sender, instance, **kwargs):
     """
     Invalidate cached guardian relationship data.
     """
-    from django.core.cache import cache
+    from utils.cache import tenant_cache
     
-    cache.delete(f'student_guardians_{instance.student.pk}')
-    cache.delete(f'guardian_students_{instance.guardian.pk}')
-
+    tenant_cache.delete_many([
+        f'student_guardians_{instance.student_id}',
+        f'guardian_students_{instance.guardian_id}',
+    ], namespace='students')
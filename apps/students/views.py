@@ -22,7 +22,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q, Count, Sum, Avg, Prefetch
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse
 from django.db import transaction
 from django.core.files.storage import FileSystemStorage
 from formtools.wizard.views import SessionWizardView
@@ -31,16 +31,6 @@ from decimal import Decimal
 import os
 import logging
 
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from io import BytesIO
-
 from .models import (
     Student,
     Guardian,
@@ -1268,233 +1258,172 @@ def birthday_report(request):
 # EXPORT FUNCTIONS
 # =============================================================================
 
+def _export_age(date_of_birth, today):
+    """Age in years at today (Student.get_age() for values_list rows)."""
+    if not date_of_birth:
+        return ''
+    return (
+        today.year - date_of_birth.year
+        - ((today.month, today.day) < (date_of_birth.month, date_of_birth.day))
+    )
+
+
+def _export_full_name(first_name, middle_name, last_name):
+    """Full name as get_full_name() formats it."""
+    if middle_name:
+        return f"{first_name} {middle_name} {last_name}"
+    return f"{first_name} {last_name}"
+
+
+def _student_export_rows():
+    """Student export rows as value dicts, streamed in chunks."""
+    from utils.exports import iter_queryset_rows, choice_labels
+
+    genders = choice_labels(Student, 'gender')
+    statuses = choice_labels(Student, 'enrollment_status')
+    today = date.today()
+
+    students = Student.objects.order_by('admission_number')
+    fields = [
+        'admission_number', 'first_name', 'middle_name', 'last_name', 'gender',
+        'date_of_birth', 'current_academic_level__name', 'enrollment_status',
+        'phone_number', 'personal_email', 'admission_date',
+    ]
+
+    def _row(values):
+        row = dict(zip(fields, values))
+        row['full_name'] = _export_full_name(row['first_name'], row['middle_name'], row['last_name'])
+        row['gender'] = genders.get(row['gender'], row['gender'])
+        row['enrollment_status'] = statuses.get(row['enrollment_status'], row['enrollment_status'])
+        row['age'] = _export_age(row['date_of_birth'], today)
+        return row
+
+    return iter_queryset_rows(students, fields, row=_row)
+
+
+def _guardian_export_rows():
+    """Guardian export rows as value dicts, streamed in chunks."""
+    from utils.exports import iter_queryset_rows, choice_labels
+
+    guardian_types = choice_labels(Guardian, 'guardian_type')
+
+    guardians = Guardian.objects.annotate(
+        student_count=Count('students', distinct=True)
+    ).order_by('last_name', 'first_name')
+    fields = [
+        'first_name', 'middle_name', 'last_name', 'guardian_type', 'primary_phone',
+        'email', 'occupation', 'employer', 'home_address', 'student_count', 'is_active',
+    ]
+
+    def _row(values):
+        row = dict(zip(fields, values))
+        row['full_name'] = _export_full_name(row['first_name'], row['middle_name'], row['last_name'])
+        row['guardian_type'] = guardian_types.get(row['guardian_type'], row['guardian_type'])
+        return row
+
+    return iter_queryset_rows(guardians, fields, row=_row)
+
+
 @login_required
 def export_students_excel(request):
-    """Export students to Excel"""
-    
-    # Get filtered students
-    students = Student.objects.select_related(
-        'current_academic_level'
-    ).order_by('admission_number')
-    
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Students"
-    
-    # Headers
+    """Export students to Excel (streamed, write-only workbook)"""
+    from utils.exports import excel_response, format_date
+
     headers = [
         'Admission Number', 'Full Name', 'Gender', 'Date of Birth', 'Age',
         'Current Grade', 'Status', 'Phone', 'Email', 'Admission Date'
     ]
-    ws.append(headers)
-    
-    # Style headers
-    for cell in ws[1]:
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-        cell.font = Font(bold=True, color='FFFFFF')
-    
-    # Data rows
-    for student in students:
-        ws.append([
-            student.admission_number,
-            student.get_full_name(),
-            student.get_gender_display(),
-            student.date_of_birth.strftime('%Y-%m-%d') if student.date_of_birth else '',
-            student.age,
-            str(student.current_academic_level) if student.current_academic_level else '',
-            student.get_enrollment_status_display(),
-            student.phone_number or '',
-            student.personal_email or '',
-            student.admission_date.strftime('%Y-%m-%d') if student.admission_date else '',
-        ])
-    
-    # Prepare response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    rows = (
+        [
+            student['admission_number'],
+            student['full_name'],
+            student['gender'],
+            format_date(student['date_of_birth']),
+            student['age'],
+            student['current_academic_level__name'] or '',
+            student['enrollment_status'],
+            student['phone_number'] or '',
+            student['personal_email'] or '',
+            format_date(student['admission_date']),
+        ]
+        for student in _student_export_rows()
     )
-    response['Content-Disposition'] = f'attachment; filename="students_{timezone.now().strftime("%Y%m%d")}.xlsx"'
-    
-    wb.save(response)
-    return response
+
+    filename = f'students_{timezone.now().strftime("%Y%m%d")}.xlsx'
+    return excel_response(rows, filename, headers, title='Students')
 
 
 @login_required
 def export_students_pdf(request):
     """Export students to PDF"""
-    
-    students = Student.objects.select_related(
-        'current_academic_level'
-    ).order_by('admission_number')
-    
-    # Create PDF
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4))
-    elements = []
-    
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=30,
-        alignment=TA_CENTER
+    from utils.exports import pdf_response
+
+    headers = ['Admission #', 'Name', 'Gender', 'Age', 'Grade', 'Status']
+
+    rows = (
+        [
+            student['admission_number'],
+            student['full_name'][:30],
+            student['gender'],
+            student['age'],
+            (student['current_academic_level__name'] or '')[:20],
+            student['enrollment_status'],
+        ]
+        for student in _student_export_rows()
     )
-    
-    # Title
-    elements.append(Paragraph('Student List', title_style))
-    elements.append(Spacer(1, 20))
-    
-    # Table data
-    data = [['Admission #', 'Name', 'Gender', 'Age', 'Grade', 'Status']]
-    
-    for student in students:
-        data.append([
-            student.admission_number,
-            student.get_full_name()[:30],
-            student.get_gender_display(),
-            str(student.age),
-            str(student.current_academic_level)[:20] if student.current_academic_level else '',
-            student.get_enrollment_status_display()
-        ])
-    
-    # Create table
-    table = Table(data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    elements.append(table)
-    doc.build(elements)
-    
-    # Prepare response
-    buffer.seek(0)
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="students_{timezone.now().strftime("%Y%m%d")}.pdf"'
-    
-    return response
+
+    filename = f'students_{timezone.now().strftime("%Y%m%d")}.pdf'
+    return pdf_response(rows, filename, headers, title='Student List')
 
 
 @login_required
 def export_guardians_excel(request):
-    """Export guardians to Excel"""
-    
-    guardians = Guardian.objects.annotate(
-        student_count=Count('students', distinct=True)
-    ).order_by('last_name', 'first_name')
-    
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Guardians"
-    
-    # Headers
+    """Export guardians to Excel (streamed, write-only workbook)"""
+    from utils.exports import excel_response
+
     headers = [
         'Full Name', 'Type', 'Primary Phone', 'Email', 'Occupation',
         'Employer', 'Home Address', '# Students', 'Status'
     ]
-    ws.append(headers)
-    
-    # Style headers
-    for cell in ws[1]:
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-        cell.font = Font(bold=True, color='FFFFFF')
-    
-    # Data rows
-    for guardian in guardians:
-        ws.append([
-            guardian.get_full_name(),
-            guardian.get_guardian_type_display(),
-            guardian.primary_phone,
-            guardian.email or '',
-            guardian.occupation or '',
-            guardian.employer or '',
-            guardian.home_address or '',
-            guardian.student_count,
-            'Active' if guardian.is_active else 'Inactive',
-        ])
-    
-    # Prepare response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    rows = (
+        [
+            guardian['full_name'],
+            guardian['guardian_type'],
+            guardian['primary_phone'],
+            guardian['email'] or '',
+            guardian['occupation'] or '',
+            guardian['employer'] or '',
+            guardian['home_address'] or '',
+            guardian['student_count'],
+            'Active' if guardian['is_active'] else 'Inactive',
+        ]
+        for guardian in _guardian_export_rows()
     )
-    response['Content-Disposition'] = f'attachment; filename="guardians_{timezone.now().strftime("%Y%m%d")}.xlsx"'
-    
-    wb.save(response)
-    return response
+
+    filename = f'guardians_{timezone.now().strftime("%Y%m%d")}.xlsx'
+    return excel_response(rows, filename, headers, title='Guardians')
 
 
 @login_required
 def export_guardians_pdf(request):
     """Export guardians to PDF"""
-    
-    guardians = Guardian.objects.annotate(
-        student_count=Count('students', distinct=True)
-    ).order_by('last_name', 'first_name')
-    
-    # Create PDF
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4))
-    elements = []
-    
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=30,
-        alignment=TA_CENTER
+    from utils.exports import pdf_response
+
+    headers = ['Name', 'Type', 'Phone', 'Email', 'Occupation', '# Students']
+
+    rows = (
+        [
+            guardian['full_name'][:30],
+            guardian['guardian_type'],
+            guardian['primary_phone'],
+            (guardian['email'] or '')[:25],
+            (guardian['occupation'] or '')[:20],
+            guardian['student_count'],
+        ]
+        for guardian in _guardian_export_rows()
     )
-    
-    # Title
-    elements.append(Paragraph('Guardian List', title_style))
-    elements.append(Spacer(1, 20))
-    
-    # Table data
-    data = [['Name', 'Type', 'Phone', 'Email', 'Occupation', '# Students']]
-    
-    for guardian in guardians:
-        data.append([
-            guardian.get_full_name()[:30],
-            guardian.get_guardian_type_display(),
-            guardian.primary_phone,
-            guardian.email[:25] if guardian.email else '',
-            guardian.occupation[:20] if guardian.occupation else '',
-            str(guardian.student_count),
-        ])
-    
-    # Create table
-    table = Table(data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    elements.append(table)
-    doc.build(elements)
-    
-    # Prepare response
-    buffer.seek(0)
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="guardians_{timezone.now().strftime("%Y%m%d")}.pdf"'
-    
-    return response
\ No newline at end of file
+
+    filename = f'guardians_{timezone.now().strftime("%Y%m%d")}.pdf'
+    return pdf_response(rows, filename, headers, title='Guardian List')
\ No newline at end of file
@@ -13,6 +13,9 @@ class UniformsConfig(AppConfig):
         Import signal handlers when the app is ready.
         This ensures signals are connected when Django starts.
         """
+        # Sale item totals (see uniforms/item_signals.py)
+        import uniforms.item_signals  # noqa: F401
+        
         # Import signals to register them
         try:
             import uniforms.signals  # noqa: F401
@@ -23,7 +23,8 @@ from .models import (
     StudentUniformSize,
     MeasurementSession
 )
-from utils.utils import parse_filters, paginate_queryset
+from utils.utils import parse_filters, paginate_queryset, get_search_stats
+from utils.async_views import async_htmx_view
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +33,7 @@ logger = logging.getLogger(__name__)
 # MEASUREMENT TYPE SEARCH
 # =============================================================================
 
+@async_htmx_view
 def measurement_type_search(request):
     """HTMX-compatible measurement type search with pagination and stats"""
     
@@ -77,18 +79,16 @@ def measurement_type_search(request):
     # Paginate
     measurement_types_page, paginator = paginate_queryset(request, measurement_types, per_page=20)
     
-    # Calculate stats
-    total = measurement_types.count()
-    
-    stats = {
-        'total': total,
-        'active': measurement_types.filter(is_active=True).count(),
-        'required': measurement_types.filter(is_required=True).count(),
-        'uniform': measurement_types.filter(category='UNIFORM').count(),
-        'sports': measurement_types.filter(category='SPORTS').count(),
-        'health': measurement_types.filter(category='HEALTH').count(),
-        'total_measurements': sum(mt.measurement_count for mt in measurement_types),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(measurement_types, paginator, counts={
+        'active': Q(is_active=True),
+        'required': Q(is_required=True),
+        'uniform': Q(category='UNIFORM'),
+        'sports': Q(category='SPORTS'),
+        'health': Q(category='HEALTH'),
+    }, aggregates={
+        'total_measurements': Sum('measurement_count'),
+    })
     
     return render(request, 'uniforms/measurement_types/_type_results.html', {
         'measurement_types_page': measurement_types_page,
@@ -100,6 +100,7 @@ def measurement_type_search(request):
 # STUDENT MEASUREMENT SEARCH
 # =============================================================================
 
+@async_htmx_view
 def student_measurement_search(request):
     """HTMX-compatible student measurement search with pagination and stats"""
     
@@ -168,19 +169,17 @@ def student_measurement_search(request):
     # Paginate
     measurements_page, paginator = paginate_queryset(request, measurements, per_page=20)
     
-    # Calculate stats
-    total = measurements.count()
-    
-    stats = {
-        'total': total,
-        'current': measurements.filter(is_current=True).count(),
-        'verified': measurements.filter(is_verified=True).count(),
-        'unverified': measurements.filter(is_verified=False).count(),
-        'admission': measurements.filter(measurement_context='ADMISSION').count(),
-        'annual': measurements.filter(measurement_context='ANNUAL').count(),
-        'uniform_order': measurements.filter(measurement_context='UNIFORM_ORDER').count(),
-        'unique_students': measurements.values('student').distinct().count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(measurements, paginator, counts={
+        'current': Q(is_current=True),
+        'verified': Q(is_verified=True),
+        'unverified': Q(is_verified=False),
+        'admission': Q(measurement_context='ADMISSION'),
+        'annual': Q(measurement_context='ANNUAL'),
+        'uniform_order': Q(measurement_context='UNIFORM_ORDER'),
+    }, distinct={
+        'unique_students': 'student',
+    })
     
     return render(request, 'uniforms/measurements/_measurement_results.html', {
         'measurements_page': measurements_page,
@@ -192,6 +191,7 @@ def student_measurement_search(request):
 # UNIFORM SIZE SEARCH
 # =============================================================================
 
+@async_htmx_view
 def uniform_size_search(request):
     """HTMX-compatible uniform size search with pagination and stats"""
     
@@ -243,18 +243,16 @@ def uniform_size_search(request):
     # Paginate
     sizes_page, paginator = paginate_queryset(request, sizes, per_page=20)
     
-    # Calculate stats
-    total = sizes.count()
-    
-    stats = {
-        'total': total,
-        'active': sizes.filter(is_active=True).count(),
-        'numeric': sizes.filter(size_type='NUMERIC').count(),
-        'alpha': sizes.filter(size_type='ALPHA').count(),
-        'age_based': sizes.filter(size_type='AGE_BASED').count(),
-        'custom': sizes.filter(size_type='CUSTOM').count(),
-        'total_items': sum(s.item_count for s in sizes),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(sizes, paginator, counts={
+        'active': Q(is_active=True),
+        'numeric': Q(size_type='NUMERIC'),
+        'alpha': Q(size_type='ALPHA'),
+        'age_based': Q(size_type='AGE_BASED'),
+        'custom': Q(size_type='CUSTOM'),
+    }, aggregates={
+        'total_items': Sum('item_count'),
+    })
     
     return render(request, 'uniforms/sizes/_size_results.html', {
         'sizes_page': sizes_page,
@@ -266,6 +264,7 @@ def uniform_size_search(request):
 # UNIFORM ITEM SEARCH
 # =============================================================================
 
+@async_htmx_view
 def uniform_item_search(request):
     """HTMX-compatible uniform item search with pagination and stats"""
     
@@ -353,24 +352,18 @@ def uniform_item_search(request):
     # Paginate
     items_page, paginator = paginate_queryset(request, items, per_page=20)
     
-    # Calculate stats
-    total = items.count()
-    
-    stats = {
-        'total': total,
-        'active': items.filter(is_active=True).count(),
-        'mandatory': items.filter(is_mandatory=True).count(),
-        'low_stock': items.filter(current_stock__lte=F('reorder_level')).count(),
-        'out_of_stock': items.filter(current_stock=0).count(),
-        'uniform': items.filter(item_type='UNIFORM').count(),
-        'sports': items.filter(item_type='SPORTS').count(),
-        'total_stock_value': items.aggregate(
-            total=Sum(F('current_stock') * F('unit_cost'))
-        )['total'] or 0,
-        'total_selling_value': items.aggregate(
-            total=Sum(F('current_stock') * F('selling_price'))
-        )['total'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(items, paginator, counts={
+        'active': Q(is_active=True),
+        'mandatory': Q(is_mandatory=True),
+        'low_stock': Q(current_stock__lte=F('reorder_level')),
+        'out_of_stock': Q(current_stock=0),
+        'uniform': Q(item_type='UNIFORM'),
+        'sports': Q(item_type='SPORTS'),
+    }, aggregates={
+        'total_stock_value': Sum(F('current_stock') * F('unit_cost')),
+        'total_selling_value': Sum(F('current_stock') * F('selling_price')),
+    })
     
     return render(request, 'uniforms/items/_item_results.html', {
         'items_page': items_page,
@@ -382,6 +375,7 @@ def uniform_item_search(request):
 # UNIFORM STOCK SEARCH
 # =============================================================================
 
+@async_htmx_view
 def uniform_stock_search(request):
     """HTMX-compatible uniform stock search with pagination and stats"""
     
@@ -429,18 +423,16 @@ def uniform_stock_search(request):
     # Paginate
     stock_page, paginator = paginate_queryset(request, stock, per_page=20)
     
-    # Calculate stats
-    total = stock.count()
-    
-    stats = {
-        'total': total,
-        'total_quantity': stock.aggregate(Sum('quantity'))['quantity__sum'] or 0,
-        'total_reserved': stock.aggregate(Sum('reserved_quantity'))['reserved_quantity__sum'] or 0,
-        'total_cost_value': stock.aggregate(Sum('total_cost_value'))['total_cost_value__sum'] or 0,
-        'total_selling_value': stock.aggregate(Sum('total_selling_value'))['total_selling_value__sum'] or 0,
-        'out_of_stock': stock.filter(quantity=0).count(),
-        'low_stock': stock.filter(quantity__lte=F('uniform_item__reorder_level')).count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(stock, paginator, counts={
+        'out_of_stock': Q(quantity=0),
+        'low_stock': Q(quantity__lte=F('uniform_item__reorder_level')),
+    }, sums={
+        'total_quantity': 'quantity',
+        'total_reserved': 'reserved_quantity',
+        'total_cost_value': 'total_cost_value',
+        'total_selling_value': 'total_selling_value',
+    })
     
     return render(request, 'uniforms/stock/_stock_results.html', {
         'stock_page': stock_page,
@@ -452,6 +444,7 @@ def uniform_stock_search(request):
 # PURCHASE ORDER SEARCH
 # =============================================================================
 
+@async_htmx_view
 def purchase_order_search(request):
     """HTMX-compatible purchase order search with pagination and stats"""
     
@@ -523,20 +516,18 @@ def purchase_order_search(request):
     # Paginate
     orders_page, paginator = paginate_queryset(request, orders, per_page=20)
     
-    # Calculate stats
-    total = orders.count()
-    
-    stats = {
-        'total': total,
-        'draft': orders.filter(status='DRAFT').count(),
-        'submitted': orders.filter(status='SUBMITTED').count(),
-        'approved': orders.filter(status='APPROVED').count(),
-        'received': orders.filter(status='RECEIVED').count(),
-        'partial': orders.filter(status='PARTIAL').count(),
-        'total_amount': orders.aggregate(Sum('total_amount'))['total_amount__sum'] or 0,
-        'total_paid': orders.aggregate(Sum('paid_amount'))['paid_amount__sum'] or 0,
-        'total_balance': orders.aggregate(Sum('balance_due'))['balance_due__sum'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(orders, paginator, counts={
+        'draft': Q(status='DRAFT'),
+        'submitted': Q(status='SUBMITTED'),
+        'approved': Q(status='APPROVED'),
+        'received': Q(status='RECEIVED'),
+        'partial': Q(status='PARTIAL'),
+    }, sums={
+        'total_amount': 'total_amount',
+        'total_paid': 'paid_amount',
+        'total_balance': 'balance_due',
+    })
     
     return render(request, 'uniforms/purchase_orders/_order_results.html', {
         'orders_page': orders_page,
@@ -548,6 +539,7 @@ def purchase_order_search(request):
 # UNIFORM SALE SEARCH
 # =============================================================================
 
+@async_htmx_view
 def uniform_sale_search(request):
     """HTMX-compatible uniform sale search with pagination and stats"""
     
@@ -635,22 +627,19 @@ def uniform_sale_search(request):
     # Paginate
     sales_page, paginator = paginate_queryset(request, sales, per_page=20)
     
-    # Calculate stats
-    total = sales.count()
-    
-    stats = {
-        'total': total,
-        'draft': sales.filter(status='DRAFT').count(),
-        'pending': sales.filter(status='PENDING').count(),
-        'paid': sales.filter(status='PAID').count(),
-        'issued': sales.filter(status='ISSUED').count(),
-        'total_sales': sales.filter(sale_type='SALE').aggregate(
-            Sum('total_amount'))['total_amount__sum'] or 0,
-        'total_cost': sales.aggregate(Sum('total_cost'))['total_cost__sum'] or 0,
-        'total_profit': sales.aggregate(Sum('gross_profit'))['gross_profit__sum'] or 0,
-        'total_paid': sales.aggregate(Sum('paid_amount'))['paid_amount__sum'] or 0,
-        'total_balance': sales.aggregate(Sum('balance'))['balance__sum'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(sales, paginator, counts={
+        'draft': Q(status='DRAFT'),
+        'pending': Q(status='PENDING'),
+        'paid': Q(status='PAID'),
+        'issued': Q(status='ISSUED'),
+    }, sums={
+        'total_sales': ('total_amount', Q(sale_type='SALE')),
+        'total_cost': 'total_cost',
+        'total_profit': 'gross_profit',
+        'total_paid': 'paid_amount',
+        'total_balance': 'balance',
+    })
     
     return render(request, 'uniforms/sales/_sale_results.html', {
         'sales_page': sales_page,
@@ -662,6 +651,7 @@ def uniform_sale_search(request):
 # STUDENT UNIFORM SIZE SEARCH
 # =============================================================================
 
+@async_htmx_view
 def student_uniform_size_search(request):
     """HTMX-compatible student uniform size search with pagination and stats"""
     
@@ -727,20 +717,18 @@ def student_uniform_size_search(request):
     # Paginate
     size_recommendations_page, paginator = paginate_queryset(request, size_recommendations, per_page=20)
     
-    # Calculate stats
-    total = size_recommendations.count()
-    
-    stats = {
-        'total': total,
-        'current': size_recommendations.filter(is_current=True).count(),
-        'measured': size_recommendations.filter(sizing_method='MEASURED').count(),
-        'fitted': size_recommendations.filter(sizing_method='FITTED').count(),
-        'high_confidence': size_recommendations.filter(confidence_level='HIGH').count(),
-        'medium_confidence': size_recommendations.filter(confidence_level='MEDIUM').count(),
-        'low_confidence': size_recommendations.filter(confidence_level='LOW').count(),
-        'with_growth_allowance': size_recommendations.filter(growth_allowance=True).count(),
-        'unique_students': size_recommendations.values('student').distinct().count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(size_recommendations, paginator, counts={
+        'current': Q(is_current=True),
+        'measured': Q(sizing_method='MEASURED'),
+        'fitted': Q(sizing_method='FITTED'),
+        'high_confidence': Q(confidence_level='HIGH'),
+        'medium_confidence': Q(confidence_level='MEDIUM'),
+        'low_confidence': Q(confidence_level='LOW'),
+        'with_growth_allowance': Q(growth_allowance=True),
+    }, distinct={
+        'unique_students': 'student',
+    })
     
     return render(request, 'uniforms/student_sizes/_size_recommendation_results.html', {
         'size_recommendations_page': size_recommendations_page,
@@ -752,6 +740,7 @@ def student_uniform_size_search(request):
 # MEASUREMENT SESSION SEARCH
 # =============================================================================
 
+@async_htmx_view
 def measurement_session_search(request):
     """HTMX-compatible measurement session search with pagination and stats"""
     
@@ -805,20 +794,16 @@ def measurement_session_search(request):
     # Paginate
     sessions_page, paginator = paginate_queryset(request, sessions, per_page=20)
     
-    # Calculate stats
-    total = sessions.count()
-    
-    stats = {
-        'total': total,
-        'planned': sessions.filter(status='PLANNED').count(),
-        'in_progress': sessions.filter(status='IN_PROGRESS').count(),
-        'completed': sessions.filter(status='COMPLETED').count(),
-        'cancelled': sessions.filter(status='CANCELLED').count(),
-        'total_students_measured': sessions.aggregate(
-            Sum('total_students_measured'))['total_students_measured__sum'] or 0,
-        'total_measurements': sessions.aggregate(
-            Sum('total_measurements_taken'))['total_measurements_taken__sum'] or 0,
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(sessions, paginator, counts={
+        'planned': Q(status='PLANNED'),
+        'in_progress': Q(status='IN_PROGRESS'),
+        'completed': Q(status='COMPLETED'),
+        'cancelled': Q(status='CANCELLED'),
+    }, sums={
+        'total_students_measured': 'total_students_measured',
+        'total_measurements': 'total_measurements_taken',
+    })
     
     return render(request, 'uniforms/measurement_sessions/_session_results.html', {
         'sessions_page': sessions_page,
@@ -830,6 +815,7 @@ def measurement_session_search(request):
 # QUICK STATS ENDPOINTS (for dashboard widgets)
 # =============================================================================
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def inventory_quick_stats(request):
     """Get quick statistics for uniform inventory"""
@@ -859,6 +845,7 @@ def inventory_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def sales_quick_stats(request):
     """Get quick statistics for uniform sales"""
@@ -889,6 +876,7 @@ def sales_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def purchase_order_quick_stats(request):
     """Get quick statistics for purchase orders"""
@@ -908,6 +896,7 @@ def purchase_order_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def measurement_quick_stats(request):
     """Get quick statistics for measurements"""
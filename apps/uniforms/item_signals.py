@@ -0,0 +1,74 @@
+# uniforms/item_signals.py
+
+"""
+Uniform sale item signals
+
+Keep each UniformSale's totals in step with its items by applying only the
+item's change (F() delta) to the sale; see UniformSale.adjust_totals and
+utils.deferred_totals.
+
+Connected on their own in UniformsConfig.ready(): the other receivers in
+uniforms.signals (auto-invoicing, journal entries, stock) are not connected.
+"""
+
+from django.db.models.signals import post_save, pre_save, post_delete
+from django.dispatch import receiver
+import logging
+
+from utils.deferred_totals import ItemTotals
+
+from .models import UniformSaleItem
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# UNIFORM SALE ITEM SIGNALS
+# =============================================================================
+
+# Sale totals follow their items through F() deltas (see utils.deferred_totals)
+_sale_item_totals = ItemTotals(
+    'sale',
+    ('total_price', 'tax_amount', 'total_cost'),
+    [
+        'subtotal', 'total_cost', 'tax_amount', 'total_amount', 'balance',
+        'gross_profit', 'gross_margin_percentage'
+    ]
+)
+
+
+@receiver(pre_save, sender=UniformSaleItem)
+def uniform_sale_item_pre_save(sender, instance, **kwargs):
+    """
+    Pre-save processing for sale item.
+    - Remember the persisted totals so post_save can apply only the difference
+    """
+    _sale_item_totals.pre_save(instance)
+
+
+@receiver(post_save, sender=UniformSaleItem)
+def uniform_sale_item_post_save(sender, instance, created, **kwargs):
+    """
+    Post-save processing for sale item.
+    - Apply the item's change to the sale totals (F() delta, no item reload)
+    """
+    # Skip if in raw mode
+    if kwargs.get('raw', False):
+        return
+    
+    try:
+        _sale_item_totals.post_save(instance, created)
+    except Exception as e:
+        logger.error(f"Error in uniform_sale_item_post_save: {e}", exc_info=True)
+
+
+@receiver(post_delete, sender=UniformSaleItem)
+def uniform_sale_item_post_delete(sender, instance, **kwargs):
+    """
+    Post-delete processing for sale item.
+    - Remove the item's amounts from the sale totals
+    """
+    try:
+        _sale_item_totals.post_delete(instance)
+    except Exception as e:
+        logger.error(f"Error in uniform_sale_item_post_delete: {e}", exc_info=True)
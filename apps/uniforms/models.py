@@ -15,6 +15,7 @@ All user tracking handled automatically by BaseModel
 """
 
 from django.db import models
+from django.db.models import Case, F, Q, Sum, Value, When
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -702,7 +703,7 @@ class UniformItem(BaseModel):
         """
         from core.models import FinancialSettings
         
-        settings = FinancialSettings.get_instance()
+        settings = FinancialSettings.get_cached_instance()
         if not settings:
             return {}
         
@@ -1449,7 +1450,7 @@ class UniformSale(BaseModel):
         """
         from core.models import FinancialSettings
         
-        settings = FinancialSettings.get_instance()
+        settings = FinancialSettings.get_cached_instance()
         if not settings:
             return {}
         
@@ -1487,15 +1488,22 @@ class UniformSale(BaseModel):
         """
         Calculate all totals from sale items.
         Should be called after adding/modifying items.
+        
+        Uses a single aggregate query. Item signals normally keep the totals
+        current incrementally (see adjust_totals).
         """
-        items = self.items.all()
+        totals = self.items.aggregate(
+            subtotal=Sum('total_price'),
+            total_cost=Sum('total_cost'),
+            tax=Sum('tax_amount'),
+        )
         
         # Calculate subtotal and cost
-        self.subtotal = sum(item.total_price for item in items)
-        self.total_cost = sum(item.total_cost for item in items)
+        self.subtotal = totals['subtotal'] or Decimal('0.00')
+        self.total_cost = totals['total_cost'] or Decimal('0.00')
         
         # Calculate tax
-        self.tax_amount = sum(item.tax_amount for item in items)
+        self.tax_amount = totals['tax'] or Decimal('0.00')
         
         # Calculate total
         self.total_amount = self.subtotal + self.tax_amount - self.discount_amount
@@ -1503,15 +1511,57 @@ class UniformSale(BaseModel):
         # Calculate balance
         self.balance = self.total_amount - self.paid_amount
         
-        # Calculate gross profit and margin
-        if self.total_amount > 0:
-            self.gross_profit = self.total_amount - self.total_cost
-            self.gross_margin_percentage = (self.gross_profit / self.total_amount) * 100
-        else:
-            self.gross_profit = Decimal('0.00')
-            self.gross_margin_percentage = Decimal('0.00')
-        
+        # Gross profit and margin are calculated in save()
         self.save()
+    
+    @classmethod
+    def adjust_totals(cls, pk, subtotal_delta=Decimal('0.00'), tax_delta=Decimal('0.00'),
+                      cost_delta=Decimal('0.00')):
+        """
+        Apply an item delta to a sale's totals without reloading its items.
+        
+        The first UPDATE applies the deltas with F() expressions; the second
+        derives gross profit and margin from the updated totals the same way
+        save() does.
+        
+        Args:
+            pk: Sale primary key
+            subtotal_delta: Change in the sum of item total prices
+            tax_delta: Change in the sum of item tax amounts
+            cost_delta: Change in the sum of item total costs
+            
+        Returns:
+            int: Number of sales updated (0 or 1)
+        """
+        total_delta = subtotal_delta + tax_delta
+        queryset = cls.objects.filter(pk=pk)
+        
+        updated = queryset.update(
+            subtotal=F('subtotal') + subtotal_delta,
+            total_cost=F('total_cost') + cost_delta,
+            tax_amount=F('tax_amount') + tax_delta,
+            total_amount=F('total_amount') + total_delta,
+            balance=F('balance') + total_delta,
+        )
+        
+        if updated:
+            # Separate statement: within one UPDATE, F('total_amount') is the
+            # old value on most backends but the new one on MySQL.
+            has_total = Q(total_amount__gt=0)
+            queryset.update(
+                gross_profit=Case(
+                    When(has_total, then=F('total_amount') - F('total_cost')),
+                    default=Value(Decimal('0.00')),
+                    output_field=models.DecimalField(max_digits=12, decimal_places=2),
+                ),
+                gross_margin_percentage=Case(
+                    When(has_total, then=(F('total_amount') - F('total_cost')) * 100 / F('total_amount')),
+                    default=Value(Decimal('0.00')),
+                    output_field=models.DecimalField(max_digits=5, decimal_places=2),
+                ),
+            )
+        
+        return updated
 
 
 class UniformSaleItem(BaseModel):
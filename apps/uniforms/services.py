@@ -32,6 +32,7 @@ from finance.models import (
     JournalEntry, JournalTransaction, Journal, Account
 )
 from core.models import FiscalPeriod, FinancialSettings
+from utils.deferred_totals import DeferredTotals
 
 logger = logging.getLogger(__name__)
 
@@ -113,24 +114,25 @@ class UniformInvoiceService:
             notes=f"Uniform sale: {uniform_sale.sale_number}"
         )
         
-        # Create invoice items
-        for sale_item in uniform_sale.items.all():
-            size_desc = f" - Size {sale_item.size.name}" if sale_item.size else ""
+        # Create invoice items (totals calculated once at the end)
+        with DeferredTotals():
+            for sale_item in uniform_sale.items.all():
+                size_desc = f" - Size {sale_item.size.name}" if sale_item.size else ""
             
-            FeeInvoiceItem.objects.create(
-                invoice=invoice,
-                fee_category=uniform_category,
-                description=f"{sale_item.uniform_item.name}{size_desc}",
-                quantity=sale_item.quantity,
-                unit_amount=sale_item.unit_price,
-                amount=sale_item.total_price,
-                tax_percentage=sale_item.tax_percentage,
-                tax_amount=sale_item.tax_amount,
-                discount_percentage=sale_item.discount_percentage,
-                discount_amount=sale_item.discount_amount,
-                total_discount_amount=sale_item.discount_amount,
-                final_amount=sale_item.total_price + sale_item.tax_amount - sale_item.discount_amount
-            )
+                FeeInvoiceItem.objects.create(
+                    invoice=invoice,
+                    fee_category=uniform_category,
+                    description=f"{sale_item.uniform_item.name}{size_desc}",
+                    quantity=sale_item.quantity,
+                    unit_amount=sale_item.unit_price,
+                    amount=sale_item.total_price,
+                    tax_percentage=sale_item.tax_percentage,
+                    tax_amount=sale_item.tax_amount,
+                    discount_percentage=sale_item.discount_percentage,
+                    discount_amount=sale_item.discount_amount,
+                    total_discount_amount=sale_item.discount_amount,
+                    final_amount=sale_item.total_price + sale_item.tax_amount - sale_item.discount_amount
+                )
         
         # Link invoice to sale
         uniform_sale.fee_invoice = invoice
@@ -1020,7 +1022,7 @@ class UniformSaleBuilder:
                 tax_percentage = tax_rate.rate
             else:
                 # Use default tax rate
-                settings = FinancialSettings.get_instance()
+                settings = FinancialSettings.get_cached_instance()
                 if settings:
                     tax_percentage = settings.default_tax_rate
         
@@ -1089,20 +1091,18 @@ class UniformSaleBuilder:
             status='DRAFT'
         )
         
-        # Create sale items
-        for item_data in self.items:
-            UniformSaleItem.objects.create(
-                sale=sale,
-                uniform_item=item_data['uniform_item'],
-                size=item_data['size'],
-                quantity=item_data['quantity'],
-                unit_price=item_data['unit_price'],
-                unit_cost=item_data['unit_cost'],
-                tax_percentage=item_data['tax_percentage']
-            )
-        
-        # Calculate totals
-        sale.calculate_totals()
+        # Create sale items - totals are calculated once when the block exits
+        with DeferredTotals():
+            for item_data in self.items:
+                UniformSaleItem.objects.create(
+                    sale=sale,
+                    uniform_item=item_data['uniform_item'],
+                    size=item_data['size'],
+                    quantity=item_data['quantity'],
+                    unit_price=item_data['unit_price'],
+                    unit_cost=item_data['unit_cost'],
+                    tax_percentage=item_data['tax_percentage']
+                )
         
         logger.info(f"Created uniform sale {sale.sale_number} in DRAFT status")
         
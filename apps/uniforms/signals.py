@@ -12,7 +12,7 @@ Automatic triggers for:
 """
 
 from django.db.models.signals import (
-    post_save, pre_save, post_delete, pre_delete
+    post_save, pre_save, pre_delete
 )
 from django.dispatch import receiver
 from django.db import transaction
@@ -130,46 +130,6 @@ def uniform_sale_pre_delete(sender, instance, **kwargs):
         logger.error(f"Error in uniform_sale_pre_delete: {e}", exc_info=True)
 
 
-# =============================================================================
-# UNIFORM SALE ITEM SIGNALS
-# =============================================================================
-
-@receiver(post_save, sender=UniformSaleItem)
-def uniform_sale_item_post_save(sender, instance, created, **kwargs):
-    """
-    Post-save processing for sale item.
-    - Recalculate sale totals
-    """
-    # Skip if in raw mode
-    if kwargs.get('raw', False):
-        return
-    
-    try:
-        # Recalculate sale totals
-        sale = instance.sale
-        sale.calculate_totals()
-        logger.debug(f"Recalculated totals for sale {sale.sale_number}")
-    
-    except Exception as e:
-        logger.error(f"Error in uniform_sale_item_post_save: {e}", exc_info=True)
-
-
-@receiver(post_delete, sender=UniformSaleItem)
-def uniform_sale_item_post_delete(sender, instance, **kwargs):
-    """
-    Post-delete processing for sale item.
-    - Recalculate sale totals
-    """
-    try:
-        # Recalculate sale totals
-        sale = instance.sale
-        sale.calculate_totals()
-        logger.debug(f"Recalculated totals after item deletion for sale {sale.sale_number}")
-    
-    except Exception as e:
-        logger.error(f"Error in uniform_sale_item_post_delete: {e}", exc_info=True)
-
-
 # =============================================================================
 # UNIFORM PURCHASE ORDER SIGNALS
 # =============================================================================
@@ -224,7 +184,7 @@ def create_purchase_order_journal_entry(purchase_order):
     from core.models import FinancialSettings
     
     # Get default accounts
-    settings = FinancialSettings.get_instance()
+    settings = FinancialSettings.get_cached_instance()
     if not settings:
         logger.warning("FinancialSettings not found, skipping journal entry")
         return
@@ -680,9 +640,11 @@ def disable_uniform_signals():
         enable_uniform_signals()
     """
     from django.db.models import signals
+    from . import item_signals
     
     signals.post_save.disconnect(uniform_sale_post_save, sender=UniformSale)
-    signals.post_save.disconnect(uniform_sale_item_post_save, sender=UniformSaleItem)
+    signals.post_save.disconnect(item_signals.uniform_sale_item_post_save, sender=UniformSaleItem)
+    signals.post_delete.disconnect(item_signals.uniform_sale_item_post_delete, sender=UniformSaleItem)
     signals.post_save.disconnect(uniform_stock_post_save, sender=UniformStock)
     signals.post_save.disconnect(student_measurement_post_save, sender=StudentMeasurement)
     
@@ -697,10 +659,16 @@ def enable_uniform_signals():
     # Just need to re-import the module
     import importlib
     import sys
+    from django.db.models import signals
+    from . import item_signals
     
     if 'uniforms.signals' in sys.modules:
         importlib.reload(sys.modules['uniforms.signals'])
     
+    # The item receivers live in item_signals, which the reload doesn't touch
+    signals.post_save.connect(item_signals.uniform_sale_item_post_save, sender=UniformSaleItem)
+    signals.post_delete.connect(item_signals.uniform_sale_item_post_delete, sender=UniformSaleItem)
+    
     logger.info("Uniform signals re-enabled")
 
 
@@ -29,37 +29,21 @@ def generate_uniform_sale_number():
     Generate unique uniform sale number.
     Format: US-YYYY-NNNNN (e.g., US-2024-00001)
     
+    Numbers come from the school's NumberSequence (one row per year), seeded
+    from existing sales the first time a year is used.
+    
     Returns:
         str: Unique sale number
     """
     from .models import UniformSale
+    from core.models import NumberSequence
     
     current_year = timezone.now().year
     prefix = f"US-{current_year}-"
     
-    with transaction.atomic():
-        # Get the highest number for current year
-        queryset = UniformSale.objects.filter(
-            sale_number__startswith=prefix
-        ).select_for_update()
-        
-        result = queryset.aggregate(max_number=Max('sale_number'))
-        
-        if result['max_number']:
-            try:
-                # Extract numeric part (last segment)
-                last_number = int(result['max_number'].split('-')[-1])
-                new_number = last_number + 1
-            except (ValueError, IndexError):
-                # Fallback: count and increment
-                new_number = queryset.count() + 1
-        else:
-            new_number = 1
-        
-        # Format with leading zeros
-        formatted_number = f"{new_number:05d}"
-        
-        return f"{prefix}{formatted_number}"
+    return NumberSequence.allocate_formatted(
+        'uniforms.sale', UniformSale, 'sale_number', prefix, width=5
+    )[0]
 
 
 def generate_purchase_order_number():
@@ -443,7 +427,7 @@ def calculate_uniform_bundle_price(items_with_quantities):
     """
     from core.models import FinancialSettings
     
-    settings = FinancialSettings.get_instance()
+    settings = FinancialSettings.get_cached_instance()
     default_tax_rate = settings.default_tax_rate if settings else Decimal('18.00')
     
     subtotal = Decimal('0.00')
@@ -869,18 +853,23 @@ def export_stock_levels_to_csv():
     """
     Export current stock levels to CSV format.
     
+    Returns CSV text one row at a time (pass it to a StreamingHttpResponse).
+    Items and their size-level stock are read as two ordered value streams
+    and merged by item, so no model instances are built and memory stays
+    flat however large the catalogue is. Both streams read the school
+    database current when this is called, not when the response is streamed.
+    
     Returns:
-        str: CSV data as string
+        generator: CSV-formatted lines
+    
+    Example:
+        response = StreamingHttpResponse(export_stock_levels_to_csv(), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="stock_levels.csv"'
     """
     from .models import UniformItem, UniformStock
-    import csv
-    from io import StringIO
-    
-    output = StringIO()
-    writer = csv.writer(output)
+    from utils.exports import bind_database, iter_csv, iter_queryset_rows
     
-    # Header
-    writer.writerow([
+    headers = [
         'Item Code',
         'Item Name',
         'Category',
@@ -893,47 +882,69 @@ def export_stock_levels_to_csv():
         'Stock Value (Cost)',
         'Stock Value (Selling)',
         'Status'
-    ])
-    
-    # Data
-    items = UniformItem.objects.filter(is_active=True).prefetch_related('stock_records')
-    
-    for item in items:
-        if item.requires_sizing:
-            # Export by size
-            for stock in item.stock_records.all():
-                writer.writerow([
-                    item.code,
-                    item.name,
-                    item.category,
-                    stock.size.name,
-                    stock.quantity,
-                    stock.reserved_quantity,
-                    stock.available_quantity,
-                    item.unit_cost,
-                    item.selling_price,
-                    stock.quantity * item.unit_cost,
-                    stock.quantity * item.selling_price,
-                    'Low Stock' if item.is_low_stock else 'OK'
-                ])
-        else:
-            # Export total stock
-            writer.writerow([
-                item.code,
-                item.name,
-                item.category,
-                'N/A',
-                item.current_stock,
-                0,
-                item.current_stock,
-                item.unit_cost,
-                item.selling_price,
-                item.stock_value,
-                item.stock_value_selling,
-                'Low Stock' if item.is_low_stock else 'OK'
-            ])
-    
-    return output.getvalue()
+    ]
+    
+    items = iter_queryset_rows(
+        UniformItem.objects.filter(is_active=True).order_by('item_type', 'name', 'pk'),
+        ['pk', 'code', 'name', 'category', 'requires_sizing', 'current_stock',
+         'reorder_level', 'unit_cost', 'selling_price']
+    )
+    # Same item order as above, so both streams can be merged in one pass
+    stock_records = iter_queryset_rows(
+        UniformStock.objects.filter(
+            uniform_item__is_active=True,
+            uniform_item__requires_sizing=True
+        ).order_by(
+            'uniform_item__item_type', 'uniform_item__name', 'uniform_item_id',
+            'size__display_order', 'size__name'
+        ),
+        ['uniform_item_id', 'size__name', 'quantity', 'reserved_quantity']
+    )
+    
+    def rows():
+        stock = next(stock_records, None)
+        
+        for (pk, code, name, category, requires_sizing, current_stock,
+             reorder_level, unit_cost, selling_price) in items:
+            status = 'Low Stock' if current_stock <= reorder_level else 'OK'
+            
+            if requires_sizing:
+                # Export by size
+                while stock is not None and stock[0] == pk:
+                    _, size_name, quantity, reserved = stock
+                    yield [
+                        code,
+                        name,
+                        category,
+                        size_name,
+                        quantity,
+                        reserved,
+                        quantity - reserved,
+                        unit_cost,
+                        selling_price,
+                        quantity * unit_cost,
+                        quantity * selling_price,
+                        status
+                    ]
+                    stock = next(stock_records, None)
+            else:
+                # Export total stock
+                yield [
+                    code,
+                    name,
+                    category,
+                    'N/A',
+                    current_stock,
+                    0,
+                    current_stock,
+                    unit_cost,
+                    selling_price,
+                    current_stock * unit_cost,
+                    current_stock * selling_price,
+                    status
+                ]
+    
+    return bind_database(iter_csv(rows(), headers))
 
 
 # =============================================================================
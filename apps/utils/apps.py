@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class UtilsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "utils"
+
+    def ready(self):
+        """
+        Connect search index maintenance signals when the app is ready.
+        """
+        from utils.search import connect_signals
+        connect_signals()
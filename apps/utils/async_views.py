@@ -0,0 +1,67 @@
+# utils/async_views.py
+
+"""
+Async variants of the HTMX search and stats endpoints.
+
+The dashboards poll many small search and stats endpoints. Under WSGI each
+poll holds a worker for its whole duration. Served from an ASGI server
+(schoolara.asgi) with settings.ASYNC_HTMX_VIEWS enabled, the endpoints
+decorated with @async_htmx_view become async views that run the existing
+view code on a thread pool, so one worker process serves many concurrent
+polls.
+
+The whole view runs in one pool thread (sync_to_async with
+thread_sensitive=False) rather than awaiting Django's async ORM methods
+query by query: those go through a single shared thread, which would
+serialize every request of the process. The tenant, audit and timezone
+context is carried into the pool thread because it is kept in contextvars
+(schoolara.managers, utils.context).
+
+With ASYNC_HTMX_VIEWS off (the default, for WSGI) the decorator returns the
+view unchanged.
+
+Example:
+    @async_htmx_view
+    @require_http_methods(["GET"])
+    def invoice_quick_stats(request):
+        ...
+"""
+
+from functools import wraps
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+
+def async_htmx_view(view):
+    """
+    Serve a sync HTMX view as an async view when ASYNC_HTMX_VIEWS is on.
+
+    Args:
+        view: Sync view function
+
+    Returns:
+        Async view (or the view itself when ASYNC_HTMX_VIEWS is off)
+    """
+    if not getattr(settings, 'ASYNC_HTMX_VIEWS', False):
+        return view
+
+    def run_view(request, *args, **kwargs):
+        from django.db import close_old_connections
+        from schoolara.tenants import release_tenant_connections
+
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            # Pool threads do not see request_finished: apply CONN_MAX_AGE
+            # and the tenant connection limits here
+            close_old_connections()
+            release_tenant_connections()
+
+    run_in_pool = sync_to_async(run_view, thread_sensitive=False)
+
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        return await run_in_pool(request, *args, **kwargs)
+
+    return markcoroutinefunction(async_view)
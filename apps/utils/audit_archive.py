@@ -0,0 +1,261 @@
+# utils/audit_archive.py
+
+"""
+Retention and archival of the audit log tables.
+
+AuditLog and FinancialAuditLog get a row for every save in every school
+database and used to grow forever, so the timestamp-range queries of the
+audit screens and every insert worked against an ever larger table. Rows
+older than the retention period are now moved to compressed monthly
+archive files and deleted from the database:
+
+    <ROOT>/<database>/<table>/<YYYY-MM>.jsonl.gz
+
+Each line is one row as JSON (the values() of the row). A file may hold
+several gzip members (one per archiving run), which gzip readers handle
+transparently. Rows are written and fsynced before they are deleted, so a
+crash can at worst archive a batch twice; iter_archived_rows() skips
+duplicate IDs.
+
+Daily counts are rolled up (utils.audit_rollups) before rows are archived,
+so the audit dashboards keep covering archived days.
+
+Rather than MySQL partitioning (which requires the partitioning column in
+every unique key, including the UUID primary key), the hot tables stay
+small through this rollover, and AuditLog IDs are time-ordered (UUIDv7,
+see utils.ids) so inserts append to the clustered index and the archived
+rows are a contiguous range at its start.
+
+Configuration (settings.AUDIT_ARCHIVE, all keys optional):
+    ROOT: Directory of the archive files.
+    RETENTION_DAYS: Days of AuditLog kept in the database.
+    FINANCIAL_RETENTION_DAYS: Days of FinancialAuditLog kept in the database.
+    BATCH_SIZE: Rows archived and deleted per transaction.
+
+Example:
+    from utils.audit_archive import archive_audit_logs, iter_archived_rows
+
+    archive_audit_logs('audit', using='atepi_palabek')
+    for row in iter_archived_rows('audit', 'atepi_palabek', start, end, object_id=str(pk)):
+        ...
+"""
+
+import gzip
+import json
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_SETTINGS = {
+    'ROOT': os.path.join(settings.BASE_DIR, 'audit_archive'),
+    'RETENTION_DAYS': 180,
+    'FINANCIAL_RETENTION_DAYS': 730,
+    'BATCH_SIZE': 5000,
+}
+
+# Archivable logs: {name: (model label, retention setting)}
+ARCHIVED_LOGS = {
+    'audit': ('utils.AuditLog', 'RETENTION_DAYS'),
+    'financial': ('utils.FinancialAuditLog', 'FINANCIAL_RETENTION_DAYS'),
+}
+
+ARCHIVE_SUFFIX = '.jsonl.gz'
+
+
+def get_archive_settings():
+    """
+    Get the audit archive configuration merged with defaults.
+
+    Returns:
+        dict: ROOT, RETENTION_DAYS, FINANCIAL_RETENTION_DAYS, BATCH_SIZE
+    """
+    config = dict(DEFAULT_ARCHIVE_SETTINGS)
+    config.update(getattr(settings, 'AUDIT_ARCHIVE', {}) or {})
+    return config
+
+
+def get_log_model(log):
+    """Model class of an archivable log ('audit' or 'financial')."""
+    from django.apps import apps
+
+    try:
+        return apps.get_model(ARCHIVED_LOGS[log][0])
+    except KeyError:
+        raise ValueError(f"Unknown audit log: {log} (expected one of {', '.join(ARCHIVED_LOGS)})")
+
+
+def get_archive_dir(log, using):
+    """Directory holding the monthly archive files of one log in one school database."""
+    return os.path.join(get_archive_settings()['ROOT'], using, get_log_model(log)._meta.db_table)
+
+
+# =============================================================================
+# ARCHIVING
+# =============================================================================
+
+def archive_audit_logs(log, using, before=None, batch_size=None, dry_run=False):
+    """
+    Move rows older than the retention period to the monthly archive files.
+
+    Args:
+        log (str): 'audit' or 'financial'
+        using (str): School database alias
+        before (datetime): Archive rows with timestamp before this
+                           (default: now minus the log's retention days)
+        batch_size (int): Rows per transaction (default: BATCH_SIZE)
+        dry_run (bool): Only count the rows that would be archived
+                        (writes nothing, not even the activity rollups)
+
+    Returns:
+        dict: {'archived': int, 'months': sorted list of 'YYYY-MM', 'before': datetime}
+    """
+    from utils.audit_rollups import rollup_audit_activity, get_activity_start
+
+    model = get_log_model(log)
+    config = get_archive_settings()
+    batch_size = batch_size or config['BATCH_SIZE']
+
+    if before is None:
+        before = timezone.now() - timedelta(days=config[ARCHIVED_LOGS[log][1]])
+
+    # Roll the dashboards' daily counts up first; days that are not rolled
+    # up yet (today) are never archived, or their counts would be lost
+    if not dry_run:
+        rollup_audit_activity(using)
+    before = min(before, get_activity_start(0))
+
+    result = {'archived': 0, 'months': set(), 'before': before}
+    old_rows = model.objects.using(using).filter(timestamp__lt=before)
+
+    if dry_run:
+        result['archived'] = old_rows.count()
+        result['months'] = sorted(
+            value.strftime('%Y-%m')
+            for value in old_rows.dates('timestamp', 'month')
+        )
+        return result
+
+    directory = get_archive_dir(log, using)
+
+    while True:
+        with transaction.atomic(using=using):
+            # Oldest first: with time-ordered keys this is the start of the clustered index
+            rows = list(
+                old_rows.order_by('timestamp', 'pk')
+                .select_for_update()
+                .values()[:batch_size]
+            )
+            if not rows:
+                break
+
+            os.makedirs(directory, exist_ok=True)
+            by_month = {}
+            for row in rows:
+                by_month.setdefault(row['timestamp'].strftime('%Y-%m'), []).append(row)
+
+            for month, month_rows in by_month.items():
+                _append_rows(os.path.join(directory, f"{month}{ARCHIVE_SUFFIX}"), month_rows)
+                result['months'].add(month)
+
+            model.objects.using(using).filter(pk__in=[row['id'] for row in rows]).delete()
+
+        result['archived'] += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    result['months'] = sorted(result['months'])
+    logger.info(
+        f"Archived {result['archived']} {model._meta.verbose_name_plural} from {using} "
+        f"older than {before:%Y-%m-%d} into {directory}"
+    )
+    return result
+
+
+def _append_rows(path, rows):
+    """Append rows to a gzip JSONL file as a new gzip member and flush it to disk."""
+    with open(path, 'ab') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+            for row in rows:
+                archive.write(json.dumps(row, cls=DjangoJSONEncoder).encode('utf-8'))
+                archive.write(b'\n')
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+# =============================================================================
+# READING
+# =============================================================================
+
+def list_archives(log, using):
+    """
+    List the archive files of a log.
+
+    Returns:
+        list: [{'month': 'YYYY-MM', 'path': str, 'size': bytes}] oldest first
+    """
+    directory = get_archive_dir(log, using)
+    if not os.path.isdir(directory):
+        return []
+
+    archives = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(ARCHIVE_SUFFIX):
+            path = os.path.join(directory, name)
+            archives.append({
+                'month': name[:-len(ARCHIVE_SUFFIX)],
+                'path': path,
+                'size': os.path.getsize(path),
+            })
+    return archives
+
+
+def iter_archived_rows(log, using, start=None, end=None, **filters):
+    """
+    Stream archived rows, oldest month first, without loading whole files.
+
+    Only the monthly files overlapping [start, end) are opened.
+
+    Args:
+        log (str): 'audit' or 'financial'
+        using (str): School database alias
+        start (datetime): Earliest timestamp (inclusive)
+        end (datetime): Latest timestamp (exclusive)
+        **filters: field=value equality filters on the row values
+                   (compared as strings, e.g. object_id=str(pk), action='UPDATE')
+
+    Yields:
+        dict: Row values (timestamp parsed back to a datetime)
+    """
+    first_month = start.strftime('%Y-%m') if start else None
+    last_month = end.strftime('%Y-%m') if end else None
+    filters = {field: str(value) for field, value in filters.items()}
+
+    for archive in list_archives(log, using):
+        if (first_month and archive['month'] < first_month) or \
+                (last_month and archive['month'] > last_month):
+            continue
+
+        seen = set()
+        with gzip.open(archive['path'], 'rt', encoding='utf-8') as lines:
+            for line in lines:
+                row = json.loads(line)
+                if row['id'] in seen:
+                    continue
+                seen.add(row['id'])
+
+                if any(str(row.get(field)) != value for field, value in filters.items()):
+                    continue
+
+                row['timestamp'] = parse_datetime(row['timestamp'])
+                if (start and row['timestamp'] < start) or (end and row['timestamp'] >= end):
+                    continue
+
+                yield row
@@ -0,0 +1,251 @@
+# utils/audit_rollups.py
+
+"""
+Daily rollups of the audit logs for the audit dashboards.
+
+The dashboard endpoints (utils.htmx_views) used to group the raw AuditLog
+and FinancialAuditLog rows of the whole period on every load, so their cost
+grew with the size of the logs. Closed days are now compacted into
+AuditDailyRollup rows:
+
+    AUDIT:      day x content_type x action x user  -> count
+    FINANCIAL:  day x action x risk level           -> count, amount sums
+
+rollup_audit_activity() compacts every day after the last rolled-up day up
+to yesterday (school timezone) and is run nightly (manage.py
+rollup_audit_activity) and before log rows are archived. get_audit_activity()
+combines the rollups with a live aggregate of the days not rolled up yet
+(normally just today, a small range of the timestamp index), so the
+dashboards stay current and read O(days) rows.
+
+Example:
+    from utils.audit_rollups import get_audit_activity
+
+    by_model = get_audit_activity('AUDIT', days=30, group_by=['content_type'])
+    # [{'content_type': 'students.student', 'count': 412}, ...]
+"""
+
+import logging
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Rollup dimensions of each source (log fields)
+ROLLUP_DIMENSIONS = {
+    'AUDIT': ['content_type', 'action', 'user_id'],
+    'FINANCIAL': ['action', 'risk_level'],
+}
+
+# Days compacted per query when catching up
+ROLLUP_CHUNK_DAYS = 31
+
+
+def _get_log_model(source):
+    from utils.models import AuditLog, FinancialAuditLog
+
+    try:
+        return {'AUDIT': AuditLog, 'FINANCIAL': FinancialAuditLog}[source]
+    except KeyError:
+        raise ValueError(f"Unknown audit rollup source: {source}")
+
+
+def _day_start(day, tz):
+    """Aware datetime of midnight of a school day."""
+    return timezone.make_aware(datetime.combine(day, time.min), tz)
+
+
+# =============================================================================
+# COMPACTION
+# =============================================================================
+
+def rollup_audit_activity(using=None, until=None):
+    """
+    Compact the closed days of both audit logs into AuditDailyRollup rows.
+
+    Each source continues from the day after its AuditRollupState.rolled_up_to
+    (or from its oldest log entry), so the nightly run only reads one day.
+    Rows of a day are replaced as a whole, which makes re-runs harmless.
+
+    Args:
+        using (str): School database alias (default: current database)
+        until (date): Last day to compact (default: yesterday, school timezone)
+
+    Returns:
+        dict: {source: last rolled-up day or None}
+    """
+    from core.utils import get_school_timezone
+    from schoolara.managers import get_current_db
+    from utils.models import AuditRollupState
+
+    using = using or get_current_db()
+    tz = get_school_timezone()
+    if until is None:
+        until = timezone.now().astimezone(tz).date() - timedelta(days=1)
+
+    result = {}
+    for source in ROLLUP_DIMENSIONS:
+        state, _ = AuditRollupState.objects.using(using).get_or_create(source=source)
+
+        if state.rolled_up_to:
+            first_day = state.rolled_up_to + timedelta(days=1)
+        else:
+            oldest = _get_log_model(source).objects.using(using).order_by('timestamp').values_list(
+                'timestamp', flat=True
+            ).first()
+            first_day = oldest.astimezone(tz).date() if oldest else until + timedelta(days=1)
+
+        rows = 0
+        while first_day <= until:
+            last_day = min(first_day + timedelta(days=ROLLUP_CHUNK_DAYS - 1), until)
+            with transaction.atomic(using=using):
+                rows += _rollup_days(source, using, first_day, last_day, tz)
+                state.rolled_up_to = last_day
+                state.save(using=using)
+            first_day = last_day + timedelta(days=1)
+
+        result[source] = state.rolled_up_to
+        if rows:
+            logger.info(f"Rolled up {rows} {source} activity rows on {using} up to {state.rolled_up_to}")
+
+    return result
+
+
+def _rollup_days(source, using, first_day, last_day, tz):
+    """Replace the rollups of first_day..last_day with one grouped query."""
+    from utils.models import AuditDailyRollup
+
+    AuditDailyRollup.objects.using(using).filter(
+        source=source, day__gte=first_day, day__lte=last_day
+    ).delete()
+
+    dimensions = ROLLUP_DIMENSIONS[source]
+    logs = _get_log_model(source).objects.using(using).filter(
+        timestamp__gte=_day_start(first_day, tz),
+        timestamp__lt=_day_start(last_day + timedelta(days=1), tz),
+    ).annotate(day=TruncDate('timestamp', tzinfo=tz)).values('day', *dimensions)
+
+    aggregates = {'count': Count('pk')}
+    if source == 'AUDIT':
+        aggregates['last_user_name'] = Max('user_name')
+    else:
+        aggregates['amount_sum'] = Sum('amount_involved')
+        aggregates['amount_entries'] = Count('amount_involved')
+
+    rollups = []
+    for row in logs.annotate(**aggregates).order_by():
+        rollups.append(AuditDailyRollup(
+            day=row['day'],
+            source=source,
+            content_type=row.get('content_type') or '',
+            action=row['action'],
+            user_id=row.get('user_id') or '',
+            user_name=row.get('last_user_name') or '',
+            risk_level=row.get('risk_level') or '',
+            count=row['count'],
+            amount_total=row.get('amount_sum') or Decimal('0.00'),
+            amount_count=row.get('amount_entries') or 0,
+        ))
+
+    AuditDailyRollup.objects.using(using).bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+# =============================================================================
+# READING
+# =============================================================================
+
+def get_activity_start(days):
+    """
+    First datetime of a dashboard period of whole school days.
+
+    Args:
+        days (int): Days back from today
+
+    Returns:
+        datetime: Midnight (school timezone) of today minus days
+    """
+    from core.utils import get_school_timezone
+
+    tz = get_school_timezone()
+    return _day_start(timezone.now().astimezone(tz).date() - timedelta(days=days), tz)
+
+
+def get_audit_activity(source, days, group_by, amounts=False, **filters):
+    """
+    Activity counts of the last days grouped by rollup dimensions.
+
+    Rolled-up days come from AuditDailyRollup; later days (normally only
+    today) are aggregated from the log table and merged in.
+
+    Args:
+        source (str): 'AUDIT' or 'FINANCIAL'
+        days (int): Period in whole days back from today (school timezone)
+        group_by (list): One or more dimensions to group by (see
+                         ROLLUP_DIMENSIONS; 'user_name' is also available for AUDIT)
+        amounts (bool): Also return amount_total and amount_count (FINANCIAL)
+        **filters: Equality filters on the dimensions (e.g. action='DELETE')
+
+    Returns:
+        list: Dicts of the group_by values and count (plus amount_total and
+              amount_count), ordered by count descending
+    """
+    from core.utils import get_school_timezone
+    from utils.models import AuditDailyRollup, AuditRollupState
+
+    tz = get_school_timezone()
+    start_day = timezone.now().astimezone(tz).date() - timedelta(days=days)
+    rolled_up_to = AuditRollupState.objects.filter(source=source).values_list(
+        'rolled_up_to', flat=True
+    ).first()
+
+    groups = {}
+
+    def _merge(rows):
+        for row in rows:
+            key = tuple(row[field] or '' for field in group_by)
+            group = groups.setdefault(key, {
+                'count': 0, 'amount_total': Decimal('0.00'), 'amount_count': 0,
+            })
+            group['count'] += row['count'] or 0
+            if amounts:
+                group['amount_total'] += row['amount_total'] or Decimal('0.00')
+                group['amount_count'] += row['amount_count'] or 0
+
+    live_from = start_day
+    if rolled_up_to and rolled_up_to >= start_day:
+        aggregates = {'count': Sum('count')}
+        if amounts:
+            aggregates.update(amount_total=Sum('amount_total'), amount_count=Sum('amount_count'))
+        _merge(
+            AuditDailyRollup.objects.filter(
+                source=source, day__gte=start_day, day__lte=rolled_up_to, **filters
+            ).values(*group_by).annotate(**aggregates).order_by()
+        )
+        live_from = rolled_up_to + timedelta(days=1)
+
+    aggregates = {'count': Count('pk')}
+    if amounts:
+        aggregates.update(amount_total=Sum('amount_involved'), amount_count=Count('amount_involved'))
+    _merge(
+        _get_log_model(source).objects.filter(
+            timestamp__gte=_day_start(live_from, tz), **filters
+        ).values(*group_by).annotate(**aggregates).order_by()
+    )
+
+    results = []
+    for key, totals in groups.items():
+        row = {field: value or None for field, value in zip(group_by, key)}
+        row['count'] = totals['count']
+        if amounts:
+            row['amount_total'] = totals['amount_total']
+            row['amount_count'] = totals['amount_count']
+        results.append(row)
+
+    results.sort(key=lambda row: row['count'], reverse=True)
+    return results
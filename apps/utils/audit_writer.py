@@ -0,0 +1,314 @@
+# utils/audit_writer.py
+
+"""
+Buffered writer for AuditLog entries.
+
+BaseModel.save() and BaseModel.delete() used to insert one AuditLog row per
+call, doubling the write round-trips of every save-heavy workflow (invoicing,
+enrollment, payroll). Audit rows are now handed to this module, which groups
+them per school database and writes them with a single bulk_create.
+
+Buffering rules:
+- Inside a transaction: rows are collected per transaction/savepoint and
+  written from transaction.on_commit(). A rolled back block discards its rows,
+  exactly like the individual inserts used to be rolled back.
+- Outside a transaction, inside an audit_batch() block: rows are collected
+  and written when the block exits. AuditContextMiddleware opens one block per
+  request.
+- Anywhere else: rows are written immediately.
+
+Rows always go to the database passed by the caller (the school database that
+was active for the audited save), never to the thread's current database at
+flush time.
+
+Configuration (settings.AUDIT_LOG_WRITER, all keys optional):
+    MODE: 'sync' writes committed batches in the calling thread,
+          'thread' hands them to a background writer thread.
+    MAX_BUFFER: Rows held in one batch before it is written early.
+    QUEUE_SIZE: Pending batches accepted by the background thread. When the
+                queue is full the batch is written synchronously instead.
+"""
+
+import logging
+import queue
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WRITER_SETTINGS = {
+    'MODE': 'sync',
+    'MAX_BUFFER': 500,
+    'QUEUE_SIZE': 1000,
+}
+
+# Rows of the active audit_batch() block. Context-local, so concurrent
+# async requests sharing a thread keep separate batches.
+_request_batch = ContextVar('audit_request_batch', default=None)
+
+# Transaction batches follow the database connection, which Django keeps
+# per thread, so they stay thread-local.
+_thread_locals = threading.local()
+
+# Background writer (MODE = 'thread')
+_writer_queue = None
+_writer_thread = None
+_writer_lock = threading.Lock()
+
+
+def get_writer_settings():
+    """
+    Get the audit writer settings merged with defaults.
+
+    Returns:
+        dict: MODE, MAX_BUFFER and QUEUE_SIZE
+    """
+    config = dict(DEFAULT_WRITER_SETTINGS)
+    config.update(getattr(settings, 'AUDIT_LOG_WRITER', {}) or {})
+    return config
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+def enqueue_audit_log(audit_log, using):
+    """
+    Queue an unsaved AuditLog instance for writing to a database.
+
+    The caller is responsible for populating every field, including
+    ``timestamp`` (bulk_create does not call AuditLog.save()).
+
+    Args:
+        audit_log: Unsaved AuditLog instance
+        using: Database alias the entry belongs to
+    """
+    connection = transaction.get_connection(using)
+
+    if connection.in_atomic_block:
+        _get_transaction_batch(connection, using).add(audit_log)
+        return
+
+    request_batch = _request_batch.get()
+    if request_batch is not None:
+        rows = request_batch.setdefault(using, [])
+        rows.append(audit_log)
+        if len(rows) >= get_writer_settings()['MAX_BUFFER']:
+            request_batch[using] = []
+            _dispatch(using, rows)
+        return
+
+    _dispatch(using, [audit_log])
+
+
+@contextmanager
+def audit_batch():
+    """
+    Collect audit rows written outside a transaction and flush them on exit.
+
+    Nested blocks join the outermost block, which performs the flush.
+
+    Example:
+        with audit_batch():
+            for student in students:
+                student.save()  # One bulk insert of audit rows at the end
+    """
+    if _request_batch.get() is not None:
+        yield
+        return
+
+    pending = {}
+    token = _request_batch.set(pending)
+    try:
+        yield
+    finally:
+        _request_batch.reset(token)
+        _flush_pending(pending)
+
+
+@asynccontextmanager
+async def async_audit_batch():
+    """
+    audit_batch() for async code (e.g. async middleware).
+
+    Rows saved by the sync code the block awaits (views run through
+    sync_to_async see the same batch) are written in a worker thread on exit.
+
+    Example:
+        async with async_audit_batch():
+            response = await get_response(request)
+    """
+    from asgiref.sync import sync_to_async
+
+    if _request_batch.get() is not None:
+        yield
+        return
+
+    pending = {}
+    token = _request_batch.set(pending)
+    try:
+        yield
+    finally:
+        _request_batch.reset(token)
+        if any(pending.values()):
+            await sync_to_async(_flush_pending)(pending)
+
+
+def _flush_pending(pending):
+    """Write the rows collected by an audit batch block."""
+    for using, rows in pending.items():
+        if rows:
+            _dispatch(using, rows)
+
+
+def wait_for_audit_writes(timeout=None):
+    """
+    Block until the background writer has written every queued batch.
+
+    Only meaningful in 'thread' mode; returns immediately otherwise.
+    Management commands should call this before exiting.
+
+    Args:
+        timeout: Maximum seconds to wait (None waits indefinitely)
+
+    Returns:
+        bool: True if the queue was drained
+    """
+    if _writer_queue is None:
+        return True
+
+    if timeout is None:
+        _writer_queue.join()
+        return True
+
+    done = threading.Event()
+
+    def _join():
+        _writer_queue.join()
+        done.set()
+
+    threading.Thread(target=_join, daemon=True).start()
+    return done.wait(timeout)
+
+
+# =============================================================================
+# TRANSACTION BATCHES
+# =============================================================================
+
+class _TransactionBatch:
+    """
+    Audit rows collected inside one transaction or savepoint.
+
+    The only strong reference to a batch is the on_commit callback. When the
+    enclosing block is rolled back Django drops the callback, the batch is
+    garbage collected and its rows are never written.
+    """
+
+    __slots__ = ('using', 'rows', 'flushed', '__weakref__')
+
+    def __init__(self, using):
+        self.using = using
+        self.rows = []
+        self.flushed = False
+
+    def add(self, audit_log):
+        self.rows.append(audit_log)
+        if len(self.rows) >= get_writer_settings()['MAX_BUFFER']:
+            # Still inside the transaction - write now so a later
+            # rollback takes these rows with it.
+            rows, self.rows = self.rows, []
+            _write_rows(self.using, rows)
+
+    def on_commit(self):
+        self.flushed = True
+        rows, self.rows = self.rows, []
+        if rows:
+            _dispatch(self.using, rows)
+
+
+def _get_transaction_batch(connection, using):
+    """Get (or register) the batch for the connection's innermost block."""
+    pending = getattr(_thread_locals, 'transaction_batches', None)
+    if pending is None:
+        pending = weakref.WeakValueDictionary()
+        _thread_locals.transaction_batches = pending
+
+    key = (using, tuple(connection.savepoint_ids))
+    batch = pending.get(key)
+
+    if batch is None or batch.flushed:
+        batch = _TransactionBatch(using)
+        pending[key] = batch
+        transaction.on_commit(batch.on_commit, using=using)
+
+    return batch
+
+
+# =============================================================================
+# WRITING
+# =============================================================================
+
+def _dispatch(using, rows):
+    """Write committed rows now, or hand them to the background writer."""
+    if get_writer_settings()['MODE'] == 'thread':
+        try:
+            _get_writer_queue().put_nowait((using, rows))
+            return
+        except queue.Full:
+            logger.warning(
+                f"Audit writer queue full, writing {len(rows)} audit rows synchronously"
+            )
+
+    _write_rows(using, rows)
+
+
+def _write_rows(using, rows):
+    """Insert audit rows with one bulk_create. Never raises."""
+    from utils.models import AuditLog
+
+    try:
+        AuditLog.objects.using(using).bulk_create(
+            rows,
+            batch_size=get_writer_settings()['MAX_BUFFER']
+        )
+        logger.debug(f"Wrote {len(rows)} audit log entries to {using}")
+    except Exception as e:
+        # Don't fail the caller if audit logging fails
+        logger.error(f"Failed to write {len(rows)} audit log entries to {using}: {e}", exc_info=True)
+
+
+def _get_writer_queue():
+    """Start the background writer thread on first use."""
+    global _writer_queue, _writer_thread
+
+    with _writer_lock:
+        if _writer_thread is None or not _writer_thread.is_alive():
+            if _writer_queue is None:
+                _writer_queue = queue.Queue(maxsize=get_writer_settings()['QUEUE_SIZE'])
+            _writer_thread = threading.Thread(
+                target=_writer_loop,
+                name='audit-log-writer',
+                daemon=True
+            )
+            _writer_thread.start()
+
+    return _writer_queue
+
+
+def _writer_loop():
+    """Consume queued batches and write them."""
+    from django.db import connections
+
+    while True:
+        using, rows = _writer_queue.get()
+        try:
+            _write_rows(using, rows)
+        finally:
+            _writer_queue.task_done()
+            # Drop broken connections so the next batch reconnects
+            connections[using].close_if_unusable_or_obsolete()
@@ -0,0 +1,320 @@
+# utils/cache.py
+
+"""
+Tenant-namespaced cache layer.
+
+Every key is stored under the school database it belongs to and a named
+namespace, together with a generation number for each:
+
+    <db_alias>:<namespace>:<school generation>.<namespace generation>:<key>
+
+Invalidating a namespace (or a whole school) increments its generation, so
+every existing key becomes unreachable and simply expires. No key scans are
+needed, which matters because neither memcached nor Redis (in cluster mode)
+can list keys cheaply, and locmem cannot list them at all.
+
+Data that is not school specific (the middleware's routing lookups) lives
+under the 'default' database.
+
+The backend is whatever settings.CACHES['default'] configures. It must be
+shared between worker processes (file based, Redis or memcached) for
+invalidation to reach every worker.
+
+LocalTenantCache puts a process-local LRU in front of the tenant cache for
+values read on almost every request (settings singletons, school
+calendars), so most reads need no cache round trip at all.
+
+Example:
+    from utils.cache import tenant_cache
+
+    stats = tenant_cache.get_or_set(
+        'dashboard', build_stats, timeout=300, namespace='students'
+    )
+    tenant_cache.invalidate_namespace('students')
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Default namespace for keys that do not name one
+DEFAULT_NAMESPACE = 'default'
+
+
+class TenantCache:
+    """
+    Per-school, per-namespace view over a Django cache backend.
+
+    All methods take optional namespace and using arguments. using defaults
+    to the current school database (schoolara.managers.get_current_db()).
+    """
+
+    def __init__(self, backend='default'):
+        self.backend_alias = backend
+
+    @property
+    def backend(self):
+        return caches[self.backend_alias]
+
+    # -------------------------------------------------------------------------
+    # KEY CONSTRUCTION
+    # -------------------------------------------------------------------------
+
+    def make_key(self, key, namespace=DEFAULT_NAMESPACE, using=None):
+        """
+        Build the backend key for a tenant key.
+
+        Args:
+            key: Key within the namespace
+            namespace: Namespace name
+            using: Database alias (defaults to the current school database)
+
+        Returns:
+            str: Backend key including both generations
+        """
+        using = _resolve_alias(using)
+        school_gen, namespace_gen = self._get_generations(namespace, using)
+        return f"{using}:{namespace}:{school_gen}.{namespace_gen}:{key}"
+
+    def _get_generations(self, namespace, using):
+        """Read (initialising if needed) the school and namespace generations."""
+        school_key = _school_generation_key(using)
+        namespace_key = _namespace_generation_key(namespace, using)
+
+        found = self.backend.get_many([school_key, namespace_key])
+
+        generations = []
+        for gen_key in (school_key, namespace_key):
+            generation = found.get(gen_key)
+            if generation is None:
+                self.backend.add(gen_key, _new_generation(), None)
+                generation = self.backend.get(gen_key)
+            generations.append(generation)
+
+        return generations
+
+    # -------------------------------------------------------------------------
+    # CACHE OPERATIONS
+    # -------------------------------------------------------------------------
+
+    def get(self, key, default=None, namespace=DEFAULT_NAMESPACE, using=None):
+        """Get a value, or default if it is missing."""
+        return self.backend.get(self.make_key(key, namespace, using), default)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, namespace=DEFAULT_NAMESPACE, using=None):
+        """Store a value (timeout in seconds, None for no expiry)."""
+        self.backend.set(self.make_key(key, namespace, using), value, timeout)
+
+    def delete(self, key, namespace=DEFAULT_NAMESPACE, using=None):
+        """Delete a single key."""
+        self.backend.delete(self.make_key(key, namespace, using))
+
+    def delete_many(self, keys, namespace=DEFAULT_NAMESPACE, using=None):
+        """Delete several keys of one namespace."""
+        if not keys:
+            return
+        prefix = self.make_key('', namespace, using)
+        self.backend.delete_many([f"{prefix}{key}" for key in keys])
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT,
+                   namespace=DEFAULT_NAMESPACE, using=None):
+        """
+        Get a value, computing and storing it on a miss.
+
+        Args:
+            key: Key within the namespace
+            default: Value or callable producing it
+            timeout: Seconds to keep the value
+            namespace: Namespace name
+            using: Database alias
+
+        Returns:
+            The cached or computed value
+        """
+        backend_key = self.make_key(key, namespace, using)
+        value = self.backend.get(backend_key)
+        if value is None:
+            value = default() if callable(default) else default
+            if value is not None:
+                self.backend.set(backend_key, value, timeout)
+        return value
+
+    # -------------------------------------------------------------------------
+    # INVALIDATION
+    # -------------------------------------------------------------------------
+
+    def invalidate_namespace(self, namespace, using=None):
+        """
+        Invalidate every key of a namespace for one school.
+
+        Args:
+            namespace: Namespace name
+            using: Database alias (defaults to the current school database)
+        """
+        using = _resolve_alias(using)
+        _bump(self.backend, _namespace_generation_key(namespace, using))
+        logger.debug(f"Invalidated cache namespace '{namespace}' for {using}")
+
+    def invalidate_school(self, using=None):
+        """
+        Invalidate every key of every namespace for one school.
+
+        Args:
+            using: Database alias (defaults to the current school database)
+        """
+        using = _resolve_alias(using)
+        _bump(self.backend, _school_generation_key(using))
+        logger.info(f"Invalidated all cached data for {using}")
+
+
+class LocalTenantCache:
+    """
+    Process-local LRU in front of the shared tenant cache.
+
+    A local entry is trusted for LOCAL_TTL seconds without any lookup.
+    After that the shared key is rebuilt; it embeds the namespace
+    generation, so an unchanged key means the local value is still
+    current. Otherwise the value comes from the shared cache, or from the
+    loader on a miss (kept there SHARED_TTL seconds).
+
+    invalidate() reaches every process through the namespace generation;
+    other processes may serve the previous value for up to LOCAL_TTL
+    seconds, the invalidating process sees the change at once.
+
+    Args:
+        get_config: Callable returning a dict with LOCAL_TTL, SHARED_TTL
+                    and MAX_ENTRIES (read on each call, so settings
+                    overrides apply)
+
+    Example:
+        _years = LocalTenantCache(get_calendar_settings)
+
+        calendar = _years.get_or_load(f"year:{year}", load_year, 'calendar')
+        _years.invalidate('calendar')
+    """
+
+    def __init__(self, get_config):
+        self.get_config = get_config
+        # {(db_alias, namespace, key): (value, shared_key, expires_at)}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader, namespace=DEFAULT_NAMESPACE, using=None):
+        """
+        Get a value, loading it on a miss at both levels.
+
+        Args:
+            key: Key within the namespace
+            loader: Callable returning the value
+            namespace: Namespace name
+            using: Database alias (defaults to the current school database)
+
+        Returns:
+            The cached or loaded value (shared with other threads; copy it
+            before changing it)
+        """
+        using = _resolve_alias(using)
+        local_key = (using, namespace, key)
+        config = self.get_config()
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(local_key)
+            if entry is not None:
+                self._entries.move_to_end(local_key)
+
+        if entry is not None and entry[2] > now:
+            return entry[0]
+
+        shared_key = tenant_cache.make_key(key, namespace, using)
+
+        if entry is not None and entry[1] == shared_key:
+            self._store(local_key, entry[0], shared_key, now + config['LOCAL_TTL'], config)
+            return entry[0]
+
+        value = tenant_cache.backend.get(shared_key)
+        if value is None:
+            value = loader()
+            tenant_cache.backend.set(shared_key, value, config['SHARED_TTL'])
+            logger.debug(f"Loaded {namespace}:{key} for {using} into the cache")
+
+        self._store(local_key, value, shared_key, now + config['LOCAL_TTL'], config)
+        return value
+
+    def invalidate(self, namespace=DEFAULT_NAMESPACE, using=None):
+        """
+        Invalidate a namespace in every process.
+
+        Bumps the namespace now and again when the surrounding transaction
+        commits, so a process reloading in between cannot keep the old data.
+
+        Args:
+            namespace: Namespace name
+            using: Database alias (defaults to the current school database)
+        """
+        using = _resolve_alias(using)
+
+        def _invalidate():
+            tenant_cache.invalidate_namespace(namespace, using=using)
+            with self._lock:
+                for local_key in [k for k in self._entries if k[:2] == (using, namespace)]:
+                    del self._entries[local_key]
+
+        _invalidate()
+        transaction.on_commit(_invalidate, using=using)
+
+    def _store(self, local_key, value, shared_key, expires_at, config):
+        with self._lock:
+            self._entries[local_key] = (value, shared_key, expires_at)
+            self._entries.move_to_end(local_key)
+            while len(self._entries) > config['MAX_ENTRIES']:
+                self._entries.popitem(last=False)
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def _resolve_alias(using):
+    """Default to the current school database."""
+    if using:
+        return using
+    from schoolara.managers import get_current_db
+    return get_current_db() or 'default'
+
+
+def _school_generation_key(using):
+    return f"gen:{using}"
+
+
+def _namespace_generation_key(namespace, using):
+    return f"gen:{using}:{namespace}"
+
+
+def _new_generation():
+    """
+    Starting generation for a missing counter.
+
+    Time based, so a counter that was evicted never restarts at a number
+    whose keys may still be stored.
+    """
+    return int(time.time() * 1000)
+
+
+def _bump(backend, generation_key):
+    """Increment a generation counter, recreating it if it was evicted."""
+    try:
+        backend.incr(generation_key)
+    except ValueError:
+        backend.set(generation_key, _new_generation(), None)
+
+
+# Shared instance over CACHES['default']
+tenant_cache = TenantCache()
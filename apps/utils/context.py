@@ -1,26 +1,27 @@
 # utils/context.py
 
 """
-Thread-local request context for audit logging.
+Request context for audit logging.
 
-This module provides thread-local storage for request information
-that needs to be accessible throughout the request lifecycle,
-particularly for audit logging purposes.
+This module provides context-local storage (contextvars) for request
+information that needs to be accessible throughout the request lifecycle,
+particularly for audit logging purposes. Each request, async task or
+thread sees its own context, also when async requests share a thread.
 """
 
-from threading import local
+from contextvars import ContextVar
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Thread-local storage
-_thread_locals = local()
+# Context-local storage
+_request_context = ContextVar('request_context', default=None)
 
 
 def set_request_context(user=None, ip_address=None, user_agent=None, 
                        session_key=None, request_path=None, request=None):
     """
-    Set the current request context for this thread.
+    Set the current request context for this context.
     
     This should be called by middleware at the start of each request.
     
@@ -40,33 +41,33 @@ def set_request_context(user=None, ip_address=None, user_agent=None,
         session_key = getattr(request.session, 'session_key', '') if hasattr(request, 'session') else ''
         request_path = getattr(request, 'path', '')
     
-    # Store in thread-local
-    _thread_locals.request_context = {
+    # Store in the context
+    _request_context.set({
         'user': user if user and user.is_authenticated else None,
         'ip_address': ip_address,
         'user_agent': user_agent or '',
         'session_key': session_key or '',
         'request_path': request_path or '',
-    }
+    })
     
     logger.debug(f"Set request context: user={user}, ip={ip_address}")
 
 
 def get_request_context():
     """
-    Get the current request context for this thread.
+    Get the current request context for this context.
     
     Returns:
         dict: Request context containing user, ip_address, user_agent, etc.
               Returns None if no context is set.
     """
-    return getattr(_thread_locals, 'request_context', None)
+    return _request_context.get()
 
 
 def clear_request_context():
-    """Clear the request context for this thread."""
-    if hasattr(_thread_locals, 'request_context'):
-        delattr(_thread_locals, 'request_context')
+    """Clear the request context for this context."""
+    if _request_context.get() is not None:
+        _request_context.set(None)
         logger.debug("Cleared request context")
 
 
@@ -118,12 +119,12 @@ class RequestContext:
     
     def __enter__(self):
         self.previous_context = get_request_context()
-        _thread_locals.request_context = self.context
+        _request_context.set(self.context)
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.previous_context:
-            _thread_locals.request_context = self.previous_context
+            _request_context.set(self.previous_context)
         else:
             clear_request_context()
 
@@ -0,0 +1,225 @@
+# utils/deferred_totals.py
+
+"""
+Deferred recalculation of parent document totals.
+
+Line item signals (FeeInvoiceItem, UniformSaleItem) keep their parent's
+totals up to date by applying each item's delta with F() expressions. When
+many items are written in a row, that is still one UPDATE per item. Inside a
+DeferredTotals block the item signals only record which parents changed, and
+each parent's calculate_totals() runs once when the block exits.
+
+ItemTotals holds the delta logic those item signals share: it remembers an
+item's persisted amounts in pre_save and applies the difference to the
+parent's adjust_totals() in post_save/post_delete.
+
+Example:
+    with DeferredTotals():
+        for item_data in items_data:
+            FeeInvoiceItem.objects.create(invoice=invoice, **item_data)
+    # invoice.calculate_totals() has run exactly once here
+"""
+
+from contextvars import ContextVar
+from decimal import Decimal
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Parents of the active DeferredTotals block (context-local, see schoolara.managers)
+_pending = ContextVar('deferred_totals_pending', default=None)
+
+
+def defer_totals(model, pk, instance=None):
+    """
+    Record a parent document for recalculation if a DeferredTotals block is active.
+
+    Args:
+        model: Parent model class (must define calculate_totals())
+        pk: Parent primary key
+        instance: Parent instance already in memory (optional). It is the
+                  object that gets recalculated, so callers holding it see
+                  the new totals.
+
+    Returns:
+        bool: True if recalculation was deferred, False if the caller
+              must update the totals itself
+    """
+    pending = _pending.get()
+    if pending is None:
+        return False
+
+    key = (model, pk)
+    if instance is not None or key not in pending:
+        pending[key] = instance
+    return True
+
+
+class DeferredTotals:
+    """
+    Context manager that batches parent total recalculation.
+
+    Nested blocks join the outermost block, which performs the
+    recalculation. Nothing is recalculated when the block exits with an
+    exception (the surrounding transaction is being rolled back).
+    """
+
+    def __init__(self):
+        self.is_outermost = False
+        self.token = None
+
+    def __enter__(self):
+        if _pending.get() is None:
+            self.token = _pending.set({})
+            self.is_outermost = True
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if not self.is_outermost:
+            return False
+
+        pending = _pending.get()
+        _pending.reset(self.token)
+
+        if exc_type is not None:
+            return False
+
+        for (model, pk), instance in pending.items():
+            if instance is None:
+                instance = model.objects.filter(pk=pk).first()
+                if instance is None:
+                    continue
+            instance.calculate_totals()
+            logger.debug(f"Recalculated deferred totals for {model.__name__} {pk}")
+
+        return False
+
+
+# Marker for "persisted totals unknown" (instance has no load-time snapshot)
+_UNKNOWN_TOTALS = object()
+
+
+class ItemTotals:
+    """
+    Keep a parent document's totals in step with its line items.
+
+    The item's signals call pre_save(), post_save() and post_delete(); only
+    the item's change is applied to the parent, through the parent model's
+    adjust_totals(pk, *deltas) (F() expressions, no item reload), or
+    deferred to the enclosing DeferredTotals block.
+
+    Args:
+        parent_field: Foreign key from the item to its parent (e.g. 'invoice')
+        total_fields: Item fields summed into the parent totals, in the
+                      order adjust_totals() takes their deltas
+        refresh_fields: Parent fields adjust_totals() changes; reloaded on
+                        a parent instance the item holds in memory
+
+    Example:
+        invoice_item_totals = ItemTotals(
+            'invoice',
+            ('amount', 'tax_amount', 'final_amount'),
+            ['subtotal_amount', 'tax_amount', 'total_amount', 'balance']
+        )
+
+        @receiver(post_save, sender=FeeInvoiceItem)
+        def fee_invoice_item_post_save(sender, instance, created, **kwargs):
+            invoice_item_totals.post_save(instance, created)
+    """
+
+    def __init__(self, parent_field, total_fields, refresh_fields):
+        self.parent_field = parent_field
+        self.total_fields = tuple(total_fields)
+        self.refresh_fields = list(refresh_fields)
+
+    def pre_save(self, item):
+        """Remember the persisted totals so post_save() can apply only the difference."""
+        if item._state.adding:
+            item._previous_totals = None
+        else:
+            item._previous_totals = self._get_persisted_totals(item)
+
+    def post_save(self, item, created):
+        """Apply the item's change to its parent's totals."""
+        previous = None if created else getattr(item, '_previous_totals', _UNKNOWN_TOTALS)
+
+        if previous is _UNKNOWN_TOTALS:
+            # No snapshot to diff against - fall back to a full recalculation
+            getattr(item, self.parent_field).calculate_totals()
+            return
+
+        parent_id = self._get_parent_id(item)
+
+        if previous is not None and previous[0] != parent_id:
+            # Item moved to another parent - remove it from the old one
+            self._apply_delta(item, previous[0], [-value for value in previous[1:]])
+            previous = None
+
+        if previous is None:
+            previous = (parent_id,) + (Decimal('0.00'),) * len(self.total_fields)
+
+        self._apply_delta(
+            item,
+            parent_id,
+            [
+                getattr(item, field_name) - value
+                for field_name, value in zip(self.total_fields, previous[1:])
+            ]
+        )
+
+    def post_delete(self, item):
+        """Remove the item's persisted amounts from its parent's totals."""
+        previous = self._get_persisted_totals(item)
+        if previous is _UNKNOWN_TOTALS:
+            previous = (self._get_parent_id(item),) + tuple(
+                getattr(item, field_name) for field_name in self.total_fields
+            )
+
+        self._apply_delta(item, previous[0], [-value for value in previous[1:]])
+
+    def _get_parent_id(self, item):
+        return getattr(item, item._meta.get_field(self.parent_field).attname)
+
+    def _get_persisted_totals(self, item):
+        """
+        Get an item's contribution to its parent's totals as last saved.
+
+        Returns:
+            tuple: (parent_id, *total_fields), or _UNKNOWN_TOTALS when the
+                   item has no load-time snapshot
+        """
+        field_names = (item._meta.get_field(self.parent_field).attname,) + self.total_fields
+        values = tuple(
+            item.get_loaded_value(field_name, _UNKNOWN_TOTALS)
+            for field_name in field_names
+        )
+        if _UNKNOWN_TOTALS in values:
+            return _UNKNOWN_TOTALS
+        return values
+
+    def _apply_delta(self, item, parent_id, deltas):
+        """
+        Apply an item delta to a parent, or defer it to the enclosing DeferredTotals.
+
+        The item's cached parent (usually the caller's instance) is
+        refreshed so a later parent.save() doesn't write stale totals back.
+        """
+        parent_model = item._meta.get_field(self.parent_field).related_model
+
+        parent = None
+        descriptor = getattr(type(item), self.parent_field)
+        if descriptor.is_cached(item) and self._get_parent_id(item) == parent_id:
+            parent = getattr(item, self.parent_field)
+
+        if defer_totals(parent_model, parent_id, parent):
+            return
+
+        if not any(deltas):
+            return
+
+        parent_model.adjust_totals(parent_id, *deltas)
+
+        if parent is not None:
+            parent.refresh_from_db(fields=self.refresh_fields)
+
+        logger.debug(f"Applied item delta to {parent_model.__name__} {parent_id}")
@@ -0,0 +1,305 @@
+# utils/exports.py
+
+"""
+Streaming export helpers (CSV, Excel, PDF).
+
+Exports used to load the whole queryset as model instances and build the
+complete workbook, PDF story or CSV string in memory before responding,
+so a school-wide export could spike worker memory and time out.
+
+Here rows come from queryset.values_list(...).iterator(chunk_size=...),
+so only one chunk of plain tuples is alive at a time, and:
+- CSV is written row by row through a StreamingHttpResponse. The response
+  body is consumed after SchoolDatabaseMiddleware has restored the database
+  context, so streamed rows are bound to the school database of the request
+  that created them (bind_database).
+- Excel uses an openpyxl write-only workbook (rows are flushed to a temp
+  file as they are appended) saved to a temporary file that is streamed
+  back with FileResponse.
+- PDF (reportlab cannot lay out a document incrementally) is split into
+  tables of PDF_TABLE_ROWS rows, which keeps table layout linear, and is
+  rendered to a temporary file instead of a BytesIO.
+
+Configuration (settings.EXPORTS, all keys optional):
+    CHUNK_SIZE: Rows fetched per database round trip.
+    PDF_TABLE_ROWS: Rows per PDF table.
+
+Example:
+    from utils.exports import iter_queryset_rows, excel_response
+
+    rows = iter_queryset_rows(
+        Student.objects.order_by('admission_number'),
+        ['admission_number', 'first_name', 'last_name'],
+    )
+    return excel_response(rows, 'students.xlsx', ['Admission Number', 'First Name', 'Last Name'])
+"""
+
+import csv
+import logging
+import tempfile
+
+from django.conf import settings
+from django.http import StreamingHttpResponse, FileResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXPORT_SETTINGS = {
+    'CHUNK_SIZE': 2000,
+    'PDF_TABLE_ROWS': 500,
+}
+
+EXCEL_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Header style shared by Excel and PDF exports
+HEADER_COLOR = '4472C4'
+
+
+def get_export_settings():
+    """
+    Get the export configuration merged with defaults.
+
+    Returns:
+        dict: CHUNK_SIZE and PDF_TABLE_ROWS
+    """
+    config = dict(DEFAULT_EXPORT_SETTINGS)
+    config.update(getattr(settings, 'EXPORTS', {}) or {})
+    return config
+
+
+# =============================================================================
+# ROW SOURCES
+# =============================================================================
+
+def iter_queryset_rows(queryset, fields, row=None, chunk_size=None):
+    """
+    Iterate a queryset as value tuples, one database chunk at a time.
+
+    Args:
+        queryset: Source queryset (ordering, filters, annotations)
+        fields: Field names/lookups passed to values_list()
+        row: Optional callable turning a values tuple into an output row
+        chunk_size: Rows per fetch (defaults to CHUNK_SIZE)
+
+    Yields:
+        tuple or row(values)
+    """
+    chunk_size = chunk_size or get_export_settings()['CHUNK_SIZE']
+    for values in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+        yield row(values) if row else values
+
+
+def bind_database(rows, db=None):
+    """
+    Iterate rows inside the database context current when this is called.
+
+    Generators and lazy querysets run when they are consumed. For a
+    StreamingHttpResponse that is after the request's database context has
+    been reset, so their queries would be routed to the router's fallback
+    school. The alias is captured here, eagerly, and the iteration runs in
+    DatabaseContext(db).
+
+    Args:
+        rows: Iterable of rows (generators are not started until iterated)
+        db: Database alias (default: the current one)
+
+    Returns:
+        generator: The rows
+    """
+    from schoolara.managers import DatabaseContext, get_current_db
+
+    db = db or get_current_db()
+    if not db:
+        return iter(rows)
+
+    def _iterate():
+        with DatabaseContext(db):
+            yield from rows
+
+    return _iterate()
+
+
+def choice_labels(model, field_name):
+    """
+    Map stored choice values of a field to their display labels.
+
+    The values_list() equivalent of get_<field>_display().
+
+    Args:
+        model: Model class
+        field_name: Field with choices
+
+    Returns:
+        dict: {value: label}
+    """
+    return {value: str(label) for value, label in model._meta.get_field(field_name).flatchoices}
+
+
+def format_date(value, fmt='%Y-%m-%d'):
+    """Format a date for export, '' when missing."""
+    return value.strftime(fmt) if value else ''
+
+
+# =============================================================================
+# CSV
+# =============================================================================
+
+class _Echo:
+    """File-like object that returns what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, headers=None):
+    """
+    Encode rows as CSV text, one line at a time.
+
+    Args:
+        rows: Iterable of row sequences
+        headers: Optional header row
+
+    Yields:
+        str: CSV-formatted line
+    """
+    writer = csv.writer(_Echo())
+    if headers:
+        yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_csv_response(rows, filename, headers=None):
+    """
+    Stream rows to the client as a CSV download.
+
+    The rows are consumed in the current database context (bind_database).
+
+    Args:
+        rows: Iterable (ideally a generator) of row sequences
+        filename: Download filename
+        headers: Optional header row
+
+    Returns:
+        StreamingHttpResponse
+    """
+    response = StreamingHttpResponse(bind_database(iter_csv(rows, headers)), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+# =============================================================================
+# EXCEL
+# =============================================================================
+
+def excel_response(rows, filename, headers, title='Sheet1'):
+    """
+    Write rows to a write-only openpyxl workbook and return it as a download.
+
+    Args:
+        rows: Iterable of row sequences
+        filename: Download filename
+        headers: Header row (bold white on blue)
+        title: Worksheet title
+
+    Returns:
+        FileResponse streaming the saved workbook from a temporary file
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=title)
+
+    header_font = Font(bold=True, color='FFFFFF')
+    header_fill = PatternFill(start_color=HEADER_COLOR, end_color=HEADER_COLOR, fill_type='solid')
+
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    for row in rows:
+        ws.append(row)
+
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+
+    return FileResponse(output, as_attachment=True, filename=filename, content_type=EXCEL_CONTENT_TYPE)
+
+
+# =============================================================================
+# PDF
+# =============================================================================
+
+def pdf_response(rows, filename, headers, title):
+    """
+    Render rows as a landscape A4 table document and return it as a download.
+
+    The table is split every PDF_TABLE_ROWS rows (the header repeats on
+    every page), so layout time grows linearly with the row count.
+
+    Args:
+        rows: Iterable of row sequences (values are converted with str())
+        filename: Download filename
+        headers: Header row
+        title: Document title
+
+    Returns:
+        FileResponse streaming the PDF from a temporary file
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+    table_rows = get_export_settings()['PDF_TABLE_ROWS']
+
+    output = tempfile.TemporaryFile()
+    doc = SimpleDocTemplate(output, pagesize=landscape(A4))
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1a1a1a'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    )
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(f'#{HEADER_COLOR}')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+    elements = [Paragraph(title, title_style), Spacer(1, 20)]
+
+    def _table(data):
+        table = Table([list(headers)] + data, repeatRows=1)
+        table.setStyle(table_style)
+        return table
+
+    chunk = []
+    for row in rows:
+        chunk.append(['' if value is None else str(value) for value in row])
+        if len(chunk) >= table_rows:
+            elements.append(_table(chunk))
+            chunk = []
+    if chunk or len(elements) == 2:
+        elements.append(_table(chunk))
+
+    doc.build(elements)
+    output.seek(0)
+
+    return FileResponse(output, as_attachment=True, filename=filename, content_type='application/pdf')
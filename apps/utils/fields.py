@@ -0,0 +1,161 @@
+# utils/fields.py
+
+"""
+Custom model fields.
+
+CompactUUIDField stores UUIDs as BINARY(16) on MySQL instead of the
+CHAR(32) hex string Django uses for UUIDField there, halving the size of
+the primary key and of every index and foreign key that carries it.
+Combined with time-ordered values (utils.ids.uuid7) new rows append to the
+end of the clustered index instead of splitting random pages.
+
+On other backends (SQLite for local development, PostgreSQL with its
+native uuid type) the column is the same as UUIDField's.
+
+Existing CHAR(32) columns are converted with the ConvertToCompactUUID
+migration operation, never with a plain AlterField (MySQL would truncate
+the hex strings instead of decoding them).
+
+Example:
+    class AccountTransaction(TimeOrderedBaseModel):  # id is a CompactUUIDField
+        ...
+"""
+
+import uuid
+
+from django.db import migrations, models
+
+
+class CompactUUIDField(models.UUIDField):
+    """
+    UUIDField stored as 16 raw bytes on MySQL.
+
+    Values are uuid.UUID objects in Python exactly like UUIDField, so
+    lookups, forms and serialization (str(pk)) are unchanged.
+    """
+
+    description = "Universally unique identifier (16-byte binary on MySQL)"
+
+    def get_internal_type(self):
+        # Own internal type so MySQL's UUIDField converter (which expects
+        # hex strings) is not applied to the binary values
+        return 'CompactUUIDField'
+
+    def db_type(self, connection):
+        if connection.vendor == 'mysql':
+            return 'binary(16)'
+        return connection.data_types['UUIDField']
+
+    def rel_db_type(self, connection):
+        # Foreign keys to this field use the same column type
+        return self.db_type(connection)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if connection.vendor != 'mysql':
+            return super().get_db_prep_value(value, connection, prepared)
+
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = self.to_python(value)
+        return value.bytes
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return uuid.UUID(bytes=bytes(value))
+        return uuid.UUID(value)
+
+
+# =============================================================================
+# MIGRATION OPERATION
+# =============================================================================
+
+class ConvertToCompactUUID(migrations.AlterField):
+    """
+    AlterField that converts an existing UUID column to CompactUUIDField.
+
+    On MySQL the CHAR(32) hex values of the column, and of every foreign key
+    column referencing it, are decoded into BINARY(16) in place (with
+    foreign key checks disabled for the duration). Reversing encodes them
+    back. Other backends keep the same column type, so only the migration
+    state changes.
+
+    Replace the AlterField that makemigrations generates when a model
+    switches to TimeOrderedBaseModel with this operation:
+
+        from utils.fields import CompactUUIDField, ConvertToCompactUUID
+
+        operations = [
+            ConvertToCompactUUID(
+                model_name='accounttransaction',
+                name='id',
+                field=CompactUUIDField(default=utils.ids.uuid7, editable=False,
+                                       primary_key=True, serialize=False),
+            ),
+        ]
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._convert(app_label, schema_editor, to_state, to_binary=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._convert(app_label, schema_editor, from_state, to_binary=False)
+
+    def describe(self):
+        return f"Convert {self.model_name}.{self.name} to a compact binary UUID"
+
+    @property
+    def migration_name_fragment(self):
+        return f"{self.model_name_lower}_{self.name_lower}_compact_uuid"
+
+    def _convert(self, app_label, schema_editor, state, to_binary):
+        if schema_editor.connection.vendor != 'mysql':
+            return
+
+        model = state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+
+        field = model._meta.get_field(self.name)
+        columns = [(model._meta.db_table, field.column, field.null)]
+
+        # Foreign keys (including many-to-many tables) pointing at the field
+        for relation in model._meta.related_objects:
+            if relation.many_to_many:
+                through = relation.through._meta
+                for through_field in through.fields:
+                    if through_field.is_relation and through_field.related_model is model:
+                        columns.append((through.db_table, through_field.column, through_field.null))
+            elif relation.field.concrete and relation.field.target_field == field:
+                related_field = relation.field
+                columns.append((related_field.model._meta.db_table, related_field.column, related_field.null))
+
+        quote = schema_editor.quote_name
+        schema_editor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        try:
+            for table, column, null in columns:
+                nullability = 'NULL' if null else 'NOT NULL'
+                # Via VARBINARY so the bytes of the hex strings are kept as they are
+                schema_editor.execute(
+                    f"ALTER TABLE {quote(table)} MODIFY {quote(column)} varbinary(32) {nullability}"
+                )
+                if to_binary:
+                    schema_editor.execute(
+                        f"UPDATE {quote(table)} SET {quote(column)} = UNHEX({quote(column)}) "
+                        f"WHERE {quote(column)} IS NOT NULL"
+                    )
+                    schema_editor.execute(
+                        f"ALTER TABLE {quote(table)} MODIFY {quote(column)} binary(16) {nullability}"
+                    )
+                else:
+                    schema_editor.execute(
+                        f"UPDATE {quote(table)} SET {quote(column)} = LOWER(HEX({quote(column)})) "
+                        f"WHERE {quote(column)} IS NOT NULL"
+                    )
+                    schema_editor.execute(
+                        f"ALTER TABLE {quote(table)} MODIFY {quote(column)} char(32) {nullability}"
+                    )
+        finally:
+            schema_editor.execute("SET FOREIGN_KEY_CHECKS = 1")
@@ -10,7 +10,9 @@ from decimal import Decimal
 import logging
 
 from .models import AuditLog, FinancialAuditLog
-from utils.utils import parse_filters, paginate_queryset
+from utils.utils import parse_filters, paginate_queryset_by_cursor, get_search_stats
+from utils.async_views import async_htmx_view
+from utils.audit_rollups import get_audit_activity, get_activity_start
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +21,7 @@ logger = logging.getLogger(__name__)
 # AUDIT LOG SEARCH
 # =============================================================================
 
+@async_htmx_view
 def audit_log_search(request):
     """HTMX-compatible audit log search with pagination and stats"""
     
@@ -77,20 +80,20 @@ def audit_log_search(request):
         logs = logs.filter(timestamp__lte=end_datetime)
     
     # Paginate
-    logs_page, paginator = paginate_queryset(request, logs, per_page=20)
-    
-    # Calculate stats
-    total = logs.count()
+    logs_page, paginator = paginate_queryset_by_cursor(
+        request, logs, per_page=20, ordering=('-timestamp', '-id'), approximate_count=True
+    )
     
-    stats = {
-        'total': total,
-        'creates': logs.filter(action='CREATE').count(),
-        'updates': logs.filter(action='UPDATE').count(),
-        'deletes': logs.filter(action='DELETE').count(),
-        'unique_users': logs.values('user_id').distinct().count(),
-        'unique_models': logs.values('content_type').distinct().count(),
-        'unique_ips': logs.values('ip_address').distinct().count(),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(logs, paginator, counts={
+        'creates': Q(action='CREATE'),
+        'updates': Q(action='UPDATE'),
+        'deletes': Q(action='DELETE'),
+    }, distinct={
+        'unique_users': 'user_id',
+        'unique_models': 'content_type',
+        'unique_ips': 'ip_address',
+    })
     
     return render(request, 'utils/audit_logs/_log_results.html', {
         'logs_page': logs_page,
@@ -102,6 +105,7 @@ def audit_log_search(request):
 # FINANCIAL AUDIT LOG SEARCH
 # =============================================================================
 
+@async_htmx_view
 def financial_audit_log_search(request):
     """HTMX-compatible financial audit log search with pagination and stats"""
     
@@ -127,9 +131,8 @@ def financial_audit_log_search(request):
     batch_id = filters['batch_id']
     
     # Build queryset
-    logs = FinancialAuditLog.objects.select_related(
-        'content_type'
-    ).order_by('-timestamp')
+    # content_type lives in the default database, so it cannot be joined here
+    logs = FinancialAuditLog.objects.order_by('-timestamp')
     
     # Apply text search
     if query:
@@ -187,23 +190,24 @@ def financial_audit_log_search(request):
             pass
     
     # Paginate
-    logs_page, paginator = paginate_queryset(request, logs, per_page=20)
-    
-    # Calculate stats
-    total = logs.count()
+    logs_page, paginator = paginate_queryset_by_cursor(
+        request, logs, per_page=20, ordering=('-timestamp', '-id'), approximate_count=True
+    )
     
-    stats = {
-        'total': total,
-        'low_risk': logs.filter(risk_level='LOW').count(),
-        'medium_risk': logs.filter(risk_level='MEDIUM').count(),
-        'high_risk': logs.filter(risk_level='HIGH').count(),
-        'critical_risk': logs.filter(risk_level='CRITICAL').count(),
-        'automated': logs.filter(is_automated=True).count(),
-        'manual': logs.filter(is_automated=False).count(),
-        'unique_users': logs.values('user_id').distinct().count(),
-        'unique_students': logs.values('student_id').distinct().count(),
-        'total_amount': logs.aggregate(Sum('amount_involved'))['amount_involved__sum'] or Decimal('0'),
-    }
+    # Calculate stats (one aggregate query, total from the paginator)
+    stats = get_search_stats(logs, paginator, counts={
+        'low_risk': Q(risk_level='LOW'),
+        'medium_risk': Q(risk_level='MEDIUM'),
+        'high_risk': Q(risk_level='HIGH'),
+        'critical_risk': Q(risk_level='CRITICAL'),
+        'automated': Q(is_automated=True),
+        'manual': Q(is_automated=False),
+    }, distinct={
+        'unique_users': 'user_id',
+        'unique_students': 'student_id',
+    }, sums={
+        'total_amount': 'amount_involved',
+    })
     
     return render(request, 'utils/financial_audit_logs/_log_results.html', {
         'logs_page': logs_page,
@@ -228,21 +232,14 @@ def audit_activity_by_model(request):
     except:
         days_back = 30
     
-    cutoff_datetime = timezone.now() - timedelta(days=days_back)
-    
-    logs = AuditLog.objects.filter(timestamp__gte=cutoff_datetime)
+    activity_filters = {'action': action} if action else {}
     
-    if action:
-        logs = logs.filter(action=action)
-    
-    # Get distribution by model
-    distribution = logs.values('content_type').annotate(
-        count=Count('id')
-    ).order_by('-count')
+    # Get distribution by model (daily rollups + today's log rows)
+    distribution = get_audit_activity('AUDIT', days_back, ['content_type'], **activity_filters)
     
     data = {
-        'distribution': list(distribution),
-        'total': logs.count(),
+        'distribution': distribution,
+        'total': sum(row['count'] for row in distribution),
         'period_days': days_back,
     }
     
@@ -266,21 +263,14 @@ def audit_activity_by_user(request):
     except:
         days_back = 30
     
-    cutoff_datetime = timezone.now() - timedelta(days=days_back)
-    
-    logs = AuditLog.objects.filter(timestamp__gte=cutoff_datetime)
+    activity_filters = {'action': action} if action else {}
     
-    if action:
-        logs = logs.filter(action=action)
-    
-    # Get distribution by user
-    distribution = logs.values('user_id', 'user_name').annotate(
-        count=Count('id')
-    ).order_by('-count')[:20]  # Top 20 users
+    # Get distribution by user (daily rollups + today's log rows)
+    distribution = get_audit_activity('AUDIT', days_back, ['user_id', 'user_name'], **activity_filters)
     
     data = {
-        'distribution': list(distribution),
-        'total': logs.count(),
+        'distribution': distribution[:20],  # Top 20 users
+        'total': sum(row['count'] for row in distribution),
         'period_days': days_back,
     }
     
@@ -304,23 +294,24 @@ def financial_activity_by_action(request):
     except:
         days_back = 30
     
-    cutoff_datetime = timezone.now() - timedelta(days=days_back)
-    
-    logs = FinancialAuditLog.objects.filter(timestamp__gte=cutoff_datetime)
-    
-    if risk_level:
-        logs = logs.filter(risk_level=risk_level)
-    
-    # Get distribution by action with amounts
-    distribution = logs.values('action').annotate(
-        count=Count('id'),
-        total_amount=Sum('amount_involved'),
-        avg_amount=Avg('amount_involved')
-    ).order_by('-count')
+    activity_filters = {'risk_level': risk_level} if risk_level else {}
+    
+    # Get distribution by action with amounts (daily rollups + today's log rows)
+    distribution = [
+        {
+            'action': row['action'],
+            'count': row['count'],
+            'total_amount': row['amount_total'] if row['amount_count'] else None,
+            'avg_amount': row['amount_total'] / row['amount_count'] if row['amount_count'] else None,
+        }
+        for row in get_audit_activity(
+            'FINANCIAL', days_back, ['action'], amounts=True, **activity_filters
+        )
+    ]
     
     data = {
-        'distribution': list(distribution),
-        'total': logs.count(),
+        'distribution': distribution,
+        'total': sum(row['count'] for row in distribution),
         'period_days': days_back,
     }
     
@@ -343,20 +334,17 @@ def risk_level_trends(request):
     except:
         days_back = 30
     
-    cutoff_datetime = timezone.now() - timedelta(days=days_back)
-    
-    logs = FinancialAuditLog.objects.filter(timestamp__gte=cutoff_datetime)
-    
-    # Get trends by risk level
-    trends = logs.values('risk_level').annotate(
-        count=Count('id')
-    ).order_by('risk_level')
+    # Get trends by risk level (daily rollups + today's log rows)
+    trends = sorted(
+        get_audit_activity('FINANCIAL', days_back, ['risk_level']),
+        key=lambda row: row['risk_level'] or ''
+    )
     
     data = {
-        'trends': list(trends),
-        'period_start': cutoff_datetime.isoformat(),
+        'trends': trends,
+        'period_start': get_activity_start(days_back).isoformat(),
         'period_end': timezone.now().isoformat(),
-        'total': logs.count()
+        'total': sum(row['count'] for row in trends)
     }
     
     return JsonResponse(data)
@@ -366,6 +354,7 @@ def risk_level_trends(request):
 # QUICK STATS ENDPOINTS
 # =============================================================================
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def audit_log_quick_stats(request):
     """Get quick statistics for audit logs"""
@@ -395,6 +384,7 @@ def audit_log_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def financial_audit_quick_stats(request):
     """Get quick statistics for financial audit logs"""
@@ -429,6 +419,7 @@ def financial_audit_quick_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def action_distribution_stats(request):
     """Get audit action distribution statistics"""
@@ -442,21 +433,24 @@ def action_distribution_stats(request):
     except:
         days_back = 7
     
-    cutoff_datetime = timezone.now() - timedelta(days=days_back)
-    
-    logs = AuditLog.objects.filter(timestamp__gte=cutoff_datetime)
+    # Daily rollups + today's log rows
+    counts = {
+        row['action']: row['count']
+        for row in get_audit_activity('AUDIT', days_back, ['action'])
+    }
     
     stats = {
-        'total': logs.count(),
-        'creates': logs.filter(action='CREATE').count(),
-        'updates': logs.filter(action='UPDATE').count(),
-        'deletes': logs.filter(action='DELETE').count(),
+        'total': sum(counts.values()),
+        'creates': counts.get('CREATE', 0),
+        'updates': counts.get('UPDATE', 0),
+        'deletes': counts.get('DELETE', 0),
         'period_days': days_back,
     }
     
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def user_activity_stats(request):
     """Get user activity statistics"""
@@ -475,35 +469,29 @@ def user_activity_stats(request):
     except:
         days_back = 30
     
-    cutoff_datetime = timezone.now() - timedelta(days=days_back)
+    # Get action and model breakdowns (daily rollups + today's log rows)
+    action_breakdown = get_audit_activity('AUDIT', days_back, ['action'], user_id=user_id)
+    model_breakdown = get_audit_activity('AUDIT', days_back, ['content_type'], user_id=user_id)
     
-    logs = AuditLog.objects.filter(
+    # Latest entry: one row from the (user_id, timestamp) index
+    last_action = AuditLog.objects.filter(
         user_id=user_id,
-        timestamp__gte=cutoff_datetime
-    )
-    
-    # Get action breakdown
-    action_breakdown = logs.values('action').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
-    # Get model breakdown
-    model_breakdown = logs.values('content_type').annotate(
-        count=Count('id')
-    ).order_by('-count')[:10]
+        timestamp__gte=get_activity_start(days_back)
+    ).order_by('-timestamp').values_list('timestamp', flat=True).first()
     
     stats = {
-        'total_actions': logs.count(),
-        'action_breakdown': list(action_breakdown),
-        'model_breakdown': list(model_breakdown),
-        'unique_models': logs.values('content_type').distinct().count(),
+        'total_actions': sum(row['count'] for row in action_breakdown),
+        'action_breakdown': action_breakdown,
+        'model_breakdown': model_breakdown[:10],
+        'unique_models': len(model_breakdown),
         'period_days': days_back,
-        'last_action': logs.order_by('-timestamp').first().timestamp.isoformat() if logs.exists() else None,
+        'last_action': last_action.isoformat() if last_action else None,
     }
     
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def financial_risk_stats(request):
     """Get financial audit risk statistics"""
@@ -517,22 +505,25 @@ def financial_risk_stats(request):
     except:
         days_back = 30
     
-    cutoff_datetime = timezone.now() - timedelta(days=days_back)
-    
-    logs = FinancialAuditLog.objects.filter(timestamp__gte=cutoff_datetime)
+    # Daily rollups + today's log rows
+    counts = {
+        row['risk_level']: row['count']
+        for row in get_audit_activity('FINANCIAL', days_back, ['risk_level'])
+    }
     
     stats = {
-        'total': logs.count(),
-        'low_risk': logs.filter(risk_level='LOW').count(),
-        'medium_risk': logs.filter(risk_level='MEDIUM').count(),
-        'high_risk': logs.filter(risk_level='HIGH').count(),
-        'critical_risk': logs.filter(risk_level='CRITICAL').count(),
+        'total': sum(counts.values()),
+        'low_risk': counts.get('LOW', 0),
+        'medium_risk': counts.get('MEDIUM', 0),
+        'high_risk': counts.get('HIGH', 0),
+        'critical_risk': counts.get('CRITICAL', 0),
         'period_days': days_back,
     }
     
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def financial_amount_stats(request):
     """Get financial amount statistics"""
@@ -547,33 +538,24 @@ def financial_amount_stats(request):
     except:
         days_back = 30
     
-    cutoff_datetime = timezone.now() - timedelta(days=days_back)
+    activity_filters = {'action': action} if action else {}
     
-    logs = FinancialAuditLog.objects.filter(
-        timestamp__gte=cutoff_datetime,
-        amount_involved__isnull=False
-    )
-    
-    if action:
-        logs = logs.filter(action=action)
-    
-    # Calculate aggregates
-    aggregates = logs.aggregate(
-        total_amount=Sum('amount_involved'),
-        avg_amount=Avg('amount_involved'),
-        count=Count('id')
-    )
+    # Calculate aggregates (daily rollups + today's log rows)
+    by_action = get_audit_activity('FINANCIAL', days_back, ['action'], amounts=True, **activity_filters)
+    total_amount = sum((row['amount_total'] for row in by_action), Decimal('0'))
+    transaction_count = sum(row['amount_count'] for row in by_action)
     
     stats = {
-        'total_amount': float(aggregates['total_amount'] or 0),
-        'average_amount': float(aggregates['avg_amount'] or 0),
-        'transaction_count': aggregates['count'],
+        'total_amount': float(total_amount),
+        'average_amount': float(total_amount / transaction_count) if transaction_count else 0.0,
+        'transaction_count': transaction_count,
         'period_days': days_back,
     }
     
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def student_financial_history_stats(request):
     """Get financial history statistics for a student"""
@@ -609,6 +591,7 @@ def student_financial_history_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def security_monitoring_stats(request):
     """Get security monitoring statistics"""
@@ -651,6 +634,7 @@ def security_monitoring_stats(request):
     return JsonResponse(stats)
 
 
+@async_htmx_view
 @require_http_methods(["GET"])
 def model_activity_stats(request):
     """Get activity statistics for a specific model"""
@@ -0,0 +1,105 @@
+# utils/ids.py
+
+"""
+Time-ordered identifiers.
+
+Random UUID4 primary keys insert at random positions of the InnoDB
+clustered index, so append-heavy tables (audit logs) split pages all over
+the index and keep the whole of it hot in the buffer pool. UUIDv7 (RFC
+9562) starts with a 48-bit millisecond Unix timestamp, so new rows land at
+the end of the index, and old rows sit together at the start, where the
+archival job deletes them in contiguous ranges.
+
+The values are ordinary UUIDs, so they fit the existing UUIDField columns
+and can be mixed with older UUID4 values (which simply do not sort by time).
+
+Example:
+    from utils.ids import uuid7
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+"""
+
+import os
+import threading
+import time
+import uuid
+
+# 12-bit sequence (rand_a) that keeps IDs generated in the same millisecond ordered
+_SEQUENCE_BITS = 12
+_SEQUENCE_MAX = (1 << _SEQUENCE_BITS) - 1
+
+_lock = threading.Lock()
+_last_ms = 0
+_sequence = 0
+
+
+def uuid7():
+    """
+    Generate a UUID version 7.
+
+    Layout: 48-bit Unix timestamp in ms | version 7 | 12-bit sequence |
+    variant | 62 random bits. IDs generated by this process are strictly
+    increasing, even within one millisecond.
+
+    Returns:
+        uuid.UUID
+    """
+    global _last_ms, _sequence
+
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            # Start low in the range to leave room for IDs in the same ms
+            _sequence = int.from_bytes(os.urandom(2), 'big') & (_SEQUENCE_MAX >> 1)
+        else:
+            _sequence += 1
+            if _sequence > _SEQUENCE_MAX:
+                # Sequence exhausted (or clock went back): borrow the next ms
+                _last_ms += 1
+                _sequence = 0
+            ms = _last_ms
+        sequence = _sequence
+
+    return _build(ms, sequence, int.from_bytes(os.urandom(8), 'big'))
+
+
+def uuid7_bound(dt):
+    """
+    Smallest UUIDv7 of a point in time, for primary key range filters.
+
+    Rows created before dt (with UUIDv7 keys) have pk < uuid7_bound(dt).
+
+    Args:
+        dt (datetime): Aware datetime
+
+    Returns:
+        uuid.UUID
+    """
+    return _build(int(dt.timestamp() * 1000), 0, 0)
+
+
+def uuid7_time(value):
+    """
+    Creation time encoded in a UUIDv7, or None for other UUID versions.
+
+    Args:
+        value (uuid.UUID or str)
+
+    Returns:
+        float: Unix timestamp in seconds, or None
+    """
+    if not isinstance(value, uuid.UUID):
+        value = uuid.UUID(str(value))
+    if value.version != 7:
+        return None
+    return (value.int >> 80) / 1000
+
+
+def _build(ms, sequence, random_bits):
+    value = (ms & ((1 << 48) - 1)) << 80
+    value |= 0x7 << 76
+    value |= (sequence & _SEQUENCE_MAX) << 64
+    value |= 0b10 << 62
+    value |= random_bits & ((1 << 62) - 1)
+    return uuid.UUID(int=value)
@@ -0,0 +1,517 @@
+# utils/jobs.py
+
+"""
+Database-backed background jobs for long-running school operations.
+
+Bulk enrollment, class promotion, payroll runs and similar operations used
+to run inside the HTTP request, wrapped in one transaction.atomic, holding
+the request thread for minutes and row locks for the whole run. Here the
+view only validates the request and queues a BackgroundJob (one
+BackgroundJobItem per student/payroll/invoice) in the school database; the
+worker (manage.py run_background_jobs) then:
+
+- restores the school database (DatabaseContext) and the audit user of
+  the job (set_request_context), so audit trails look like the request;
+- processes pending items CHUNK_SIZE at a time, one transaction per chunk
+  and a savepoint per item, so a failing item only rolls back itself and
+  locks are held for one chunk only;
+- updates the job's progress counters after every chunk, which the page
+  polls through core's job progress HTMX endpoint;
+- re-queues failed items up to MAX_ATTEMPTS times, RETRY_DELAY seconds
+  apart. Failed items can also be retried by hand (retry_failed_items).
+
+Job types are declared in JOB_HANDLERS (job type -> dotted path of a
+JobHandler subclass, imported lazily so utils does not import the apps).
+
+Configuration (settings.BACKGROUND_JOBS, all keys optional):
+    CHUNK_SIZE: Items processed per transaction.
+    MAX_ATTEMPTS: Times an item is tried before it stays failed.
+    RETRY_DELAY: Seconds before failed items are retried.
+    STALE_AFTER: Seconds without progress after which a running job is
+                 considered abandoned (worker killed) and re-queued.
+    POLL_INTERVAL: Seconds the worker sleeps when no job is due.
+
+Example:
+    from utils.jobs import enqueue_job
+
+    job = enqueue_job(
+        'academics.bulk_enroll_students',
+        params={'student_ids': ids, 'class_id': str(cls.pk), 'session_id': str(session.pk)},
+        user=request.user,
+        description=f"Enroll {len(ids)} students in {cls}",
+    )
+"""
+
+import logging
+import socket
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_SETTINGS = {
+    'CHUNK_SIZE': 25,
+    'MAX_ATTEMPTS': 3,
+    'RETRY_DELAY': 60,
+    'STALE_AFTER': 600,
+    'POLL_INTERVAL': 5,
+}
+
+# Registered job types: {job type: dotted path of the JobHandler}
+JOB_HANDLERS = {
+    'academics.bulk_enroll_students': 'academics.services.BulkEnrollStudentsJob',
+    'academics.bulk_promote_class': 'academics.services.BulkPromoteClassJob',
+    'students.promote_students_to_next_level': 'students.services.PromoteStudentsJob',
+    'hr.bulk_process_payroll': 'hr.services.BulkProcessPayrollJob',
+    'fees.mark_overdue_invoices': 'fees.services.MarkOverdueInvoicesJob',
+}
+
+# Failed items listed by get_job_progress()
+PROGRESS_ERROR_LIMIT = 10
+
+
+def get_job_settings():
+    """
+    Get the background job configuration merged with defaults.
+
+    Returns:
+        dict: CHUNK_SIZE, MAX_ATTEMPTS, RETRY_DELAY, STALE_AFTER, POLL_INTERVAL
+    """
+    config = dict(DEFAULT_JOB_SETTINGS)
+    config.update(getattr(settings, 'BACKGROUND_JOBS', {}) or {})
+    return config
+
+
+# =============================================================================
+# JOB HANDLERS
+# =============================================================================
+
+class JobHandler:
+    """
+    Base class of a background job type.
+
+    Subclasses implement prepare() (runs in the request: validate and list
+    the items) and process_item() (runs in the worker, once per item,
+    inside a savepoint). Parameters are stored as JSON, so pass primary
+    keys as strings rather than model instances.
+    """
+
+    def prepare(self, params):
+        """
+        Validate the parameters and list the items to process.
+
+        Raise ValueError to refuse the job; the message is shown to the user.
+
+        Args:
+            params (dict): Job parameters
+
+        Returns:
+            iterable: (key, label) pairs
+        """
+        raise NotImplementedError
+
+    def setup(self, job):
+        """
+        Called once per run in the worker, before the first chunk.
+
+        Resolve what every item needs (e.g. the target class of a bulk
+        enrollment) here and keep it on the handler, instead of fetching
+        it again in each process_item() call.
+
+        Args:
+            job (BackgroundJob): The running job
+        """
+
+    def process_item(self, key, params, job):
+        """
+        Process one item. Raise an exception to mark it as failed.
+
+        Args:
+            key (str): Item key from prepare()
+            params (dict): Job parameters
+            job (BackgroundJob): The running job
+
+        Returns:
+            str: Optional result message
+        """
+        raise NotImplementedError
+
+    def finish_chunk(self, items, params, job):
+        """
+        Called after each chunk, inside the chunk's transaction.
+
+        Use it for work that is cheaper once per chunk than once per item
+        (e.g. one bulk insert for everything the chunk's items created).
+        Raising rolls back the whole chunk.
+
+        Args:
+            items (list): The chunk's BackgroundJobItem rows; status and
+                message may still be changed
+            params (dict): Job parameters
+            job (BackgroundJob): The running job
+        """
+
+    def finalize(self, job):
+        """Called once all items are done (including retries)."""
+
+
+def get_handler(job_type):
+    """
+    Instantiate the handler of a registered job type.
+
+    Raises:
+        ValueError: If the job type is not registered
+    """
+    try:
+        return import_string(JOB_HANDLERS[job_type])()
+    except KeyError:
+        raise ValueError(f"Unknown job type: {job_type}")
+
+
+# =============================================================================
+# QUEUEING
+# =============================================================================
+
+def enqueue_job(job_type, params=None, user=None, description=''):
+    """
+    Validate and queue a background job in the current school database.
+
+    Args:
+        job_type (str): Registered job type (see JOB_HANDLERS)
+        params (dict): JSON-serializable job parameters
+        user: User who queued the job (restored as audit user in the worker)
+        description (str): Human readable description
+
+    Returns:
+        BackgroundJob: The queued job
+
+    Raises:
+        ValueError: If the handler refuses the job (e.g. class capacity)
+    """
+    from schoolara.managers import get_current_db
+    from .models import BackgroundJob, BackgroundJobItem
+
+    params = params or {}
+    handler = get_handler(job_type)
+    items = list(handler.prepare(params))
+
+    using = get_current_db() or 'default'
+    with transaction.atomic(using=using):
+        job = BackgroundJob.objects.using(using).create(
+            job_type=job_type,
+            description=description[:255],
+            params=params,
+            total_items=len(items),
+            created_by_id=str(user.pk) if user is not None and getattr(user, 'pk', None) else None,
+        )
+        BackgroundJobItem.objects.using(using).bulk_create([
+            BackgroundJobItem(job=job, sequence=sequence, key=str(key), label=str(label)[:255])
+            for sequence, (key, label) in enumerate(items)
+        ], batch_size=500)
+
+    logger.info(f"Queued job {job.pk} ({job_type}) with {len(items)} items on {using}")
+    return job
+
+
+def retry_failed_items(job):
+    """
+    Queue the failed items of a finished job again.
+
+    Args:
+        job (BackgroundJob): Finished job
+
+    Returns:
+        int: Number of items re-queued
+    """
+    from .models import BackgroundJob, BackgroundJobItem
+
+    using = job._state.db
+    if not job.is_finished:
+        raise ValueError("Only finished jobs can be retried")
+
+    with transaction.atomic(using=using):
+        count = BackgroundJobItem.objects.using(using).filter(
+            job=job, status='FAILED'
+        ).update(status='PENDING')
+        if count:
+            BackgroundJob.objects.using(using).filter(pk=job.pk).update(
+                status='PENDING', run_after=timezone.now(), finished_at=None,
+                error='', locked_by=''
+            )
+
+    job.refresh_from_db(using=using)
+    _refresh_counters(job)
+    logger.info(f"Re-queued {count} failed items of job {job.pk}")
+    return count
+
+
+def cancel_job(job):
+    """
+    Cancel a pending or running job. A running job stops after its current chunk.
+
+    Returns:
+        bool: True if the job was cancelled
+    """
+    from .models import BackgroundJob
+
+    cancelled = BackgroundJob.objects.using(job._state.db).filter(
+        pk=job.pk, status__in=['PENDING', 'RUNNING']
+    ).update(status='CANCELLED', finished_at=timezone.now())
+    job.refresh_from_db()
+    return bool(cancelled)
+
+
+def get_job_progress(job):
+    """
+    Summarize a job for progress polling.
+
+    Returns:
+        dict: status, counters, percent and the first failed items
+    """
+    errors = []
+    if job.failed_items:
+        errors = list(
+            job.items.using(job._state.db).filter(status='FAILED')
+            .order_by('sequence')
+            .values('label', 'key', 'message')[:PROGRESS_ERROR_LIMIT]
+        )
+
+    return {
+        'id': str(job.pk),
+        'job_type': job.job_type,
+        'description': job.description,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'is_finished': job.is_finished,
+        'total': job.total_items,
+        'processed': job.processed_items,
+        'succeeded': job.succeeded_items,
+        'failed': job.failed_items,
+        'percent': job.progress_percent,
+        'error': job.error,
+        'errors': errors,
+    }
+
+
+# =============================================================================
+# WORKER
+# =============================================================================
+
+def default_worker_name():
+    """Identify this worker process in BackgroundJob.locked_by."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def release_stale_jobs(using):
+    """
+    Re-queue running jobs whose worker stopped reporting progress.
+
+    The chunk the worker was processing was rolled back with its
+    transaction, so its items are still pending.
+
+    Returns:
+        int: Number of jobs re-queued
+    """
+    from .models import BackgroundJob
+
+    cutoff = timezone.now() - timedelta(seconds=get_job_settings()['STALE_AFTER'])
+    count = BackgroundJob.objects.using(using).filter(
+        status='RUNNING', heartbeat_at__lt=cutoff
+    ).update(status='PENDING', locked_by='')
+    if count:
+        logger.warning(f"Re-queued {count} stale background jobs on {using}")
+    return count
+
+
+def claim_next_job(using, worker_name=None):
+    """
+    Claim the next due job of a school database.
+
+    Claiming is a conditional UPDATE (status PENDING -> RUNNING), so two
+    workers never run the same job.
+
+    Returns:
+        BackgroundJob or None
+    """
+    from .models import BackgroundJob
+
+    now = timezone.now()
+    candidates = list(
+        BackgroundJob.objects.using(using)
+        .filter(status='PENDING', run_after__lte=now)
+        .order_by('run_after', 'created_at')
+        .values_list('pk', flat=True)[:10]
+    )
+
+    for pk in candidates:
+        claimed = BackgroundJob.objects.using(using).filter(pk=pk, status='PENDING').update(
+            status='RUNNING',
+            locked_by=(worker_name or default_worker_name())[:100],
+            heartbeat_at=now,
+        )
+        if claimed:
+            return BackgroundJob.objects.using(using).get(pk=pk)
+
+    return None
+
+
+def run_job(job):
+    """
+    Process the pending items of a claimed job, one chunk per transaction.
+
+    Args:
+        job (BackgroundJob): Job in RUNNING state (see claim_next_job)
+
+    Returns:
+        BackgroundJob: The job with its final (or re-queued) status
+    """
+    from schoolara.managers import DatabaseContext
+    from .context import set_request_context, clear_request_context
+    from .models import BackgroundJob
+
+    using = job._state.db
+    config = get_job_settings()
+
+    with DatabaseContext(using):
+        set_request_context(user=_get_job_user(job), request_path=f"job:{job.job_type}")
+        try:
+            handler = get_handler(job.job_type)
+
+            BackgroundJob.objects.using(using).filter(pk=job.pk).update(
+                attempts=job.attempts + 1,
+                started_at=job.started_at or timezone.now(),
+            )
+            job.refresh_from_db(using=using)
+            handler.setup(job)
+
+            while _process_chunk(job, handler, config['CHUNK_SIZE']):
+                if _is_cancelled(job):
+                    logger.info(f"Job {job.pk} cancelled")
+                    return job
+
+            _finish_pass(job, handler, config)
+
+        except Exception as e:
+            logger.error(f"Background job {job.pk} ({job.job_type}) failed: {e}", exc_info=True)
+            BackgroundJob.objects.using(using).filter(pk=job.pk).update(
+                status='FAILED', error=str(e), finished_at=timezone.now(), locked_by=''
+            )
+            job.refresh_from_db(using=using)
+
+        finally:
+            clear_request_context()
+
+    return job
+
+
+def _process_chunk(job, handler, chunk_size):
+    """Process up to chunk_size pending items in one transaction. False when none left."""
+    from .models import BackgroundJob, BackgroundJobItem
+
+    using = job._state.db
+    items = list(
+        BackgroundJobItem.objects.using(using)
+        .filter(job=job, status='PENDING')
+        .order_by('sequence')[:chunk_size]
+    )
+    if not items:
+        return False
+
+    with transaction.atomic(using=using):
+        for item in items:
+            item.attempts += 1
+            item.processed_at = timezone.now()
+            try:
+                with transaction.atomic(using=using):
+                    item.message = str(handler.process_item(item.key, job.params, job) or '')
+                item.status = 'SUCCEEDED'
+            except Exception as e:
+                logger.warning(f"Job {job.pk} item {item.label or item.key} failed: {e}")
+                item.status = 'FAILED'
+                item.message = str(e)
+
+        handler.finish_chunk(items, job.params, job)
+
+        BackgroundJobItem.objects.using(using).bulk_update(
+            items, ['status', 'attempts', 'message', 'processed_at']
+        )
+        BackgroundJob.objects.using(using).filter(pk=job.pk).update(heartbeat_at=timezone.now())
+        _refresh_counters(job)
+
+    return True
+
+
+def _finish_pass(job, handler, config):
+    """Re-queue retryable failures, or record the final status."""
+    from .models import BackgroundJob, BackgroundJobItem
+
+    using = job._state.db
+    retryable = BackgroundJobItem.objects.using(using).filter(
+        job=job, status='FAILED', attempts__lt=config['MAX_ATTEMPTS']
+    ).update(status='PENDING')
+
+    if retryable:
+        BackgroundJob.objects.using(using).filter(pk=job.pk, status='RUNNING').update(
+            status='PENDING',
+            locked_by='',
+            run_after=timezone.now() + timedelta(seconds=config['RETRY_DELAY']),
+        )
+        _refresh_counters(job)
+        logger.info(f"Job {job.pk}: {retryable} failed items will be retried")
+    else:
+        _refresh_counters(job)
+        status = 'COMPLETED_WITH_ERRORS' if job.failed_items else 'COMPLETED'
+        BackgroundJob.objects.using(using).filter(pk=job.pk, status='RUNNING').update(
+            status=status, finished_at=timezone.now(), locked_by=''
+        )
+        job.refresh_from_db(using=using)
+        handler.finalize(job)
+        logger.info(
+            f"Job {job.pk} ({job.job_type}) finished: {job.succeeded_items} succeeded, "
+            f"{job.failed_items} failed out of {job.total_items}"
+        )
+
+    job.refresh_from_db(using=using)
+
+
+def _refresh_counters(job):
+    """Recompute the progress counters of a job from its items (one query)."""
+    from .models import BackgroundJob
+
+    using = job._state.db
+    counts = job.items.using(using).aggregate(
+        succeeded=Count('pk', filter=Q(status='SUCCEEDED')),
+        failed=Count('pk', filter=Q(status='FAILED')),
+    )
+    job.succeeded_items = counts['succeeded']
+    job.failed_items = counts['failed']
+    job.processed_items = counts['succeeded'] + counts['failed']
+    BackgroundJob.objects.using(using).filter(pk=job.pk).update(
+        succeeded_items=job.succeeded_items,
+        failed_items=job.failed_items,
+        processed_items=job.processed_items,
+    )
+
+
+def _is_cancelled(job):
+    from .models import BackgroundJob
+
+    return BackgroundJob.objects.using(job._state.db).filter(
+        pk=job.pk, status='CANCELLED'
+    ).exists()
+
+
+def _get_job_user(job):
+    """The user who queued the job (users live in the default database)."""
+    if not job.created_by_id:
+        return None
+
+    from django.contrib.auth import get_user_model
+
+    return get_user_model().objects.using('default').filter(pk=job.created_by_id).first()
@@ -1,7 +1,9 @@
 # utils/middleware.py
 
 import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from utils.context import set_request_context, clear_request_context, get_request_context
+from utils.audit_writer import audit_batch, async_audit_batch
 
 logger = logging.getLogger(__name__)
 
@@ -10,15 +12,57 @@ class AuditContextMiddleware:
     """
     Middleware to capture request context for audit logging.
     Now also captures school timezone to prevent recursion.
+    
+    Audit entries created outside a transaction during the request are
+    buffered and written in one bulk insert when the response is ready.
+    
+    Sync and async capable: under ASGI with async views the context is set
+    on the request's own task (utils.context uses contextvars).
     """
     
+    sync_capable = True
+    async_capable = True
+    
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
     
     def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        
+        self.set_context(request, request.user)
+        
+        try:
+            with audit_batch():
+                response = self.get_response(request)
+        finally:
+            # Always clear context after request
+            clear_request_context()
+        
+        return response
+    
+    async def __acall__(self, request):
+        """Async variant of __call__ (the user is loaded without blocking)."""
+        user = await request.auser() if hasattr(request, 'auser') else request.user
+        self.set_context(request, user)
+        
+        try:
+            async with async_audit_batch():
+                response = await self.get_response(request)
+        finally:
+            # Always clear context after request
+            clear_request_context()
+        
+        return response
+    
+    def set_context(self, request, user):
+        """Set the audit context of the request."""
         # Set context with individual parameters (not a dict!)
         set_request_context(
-            user=request.user if request.user.is_authenticated else None,
+            user=user if user.is_authenticated else None,
             ip_address=self._get_client_ip(request),
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
             session_key=request.session.session_key if hasattr(request, 'session') else '',
@@ -29,14 +73,6 @@ class AuditContextMiddleware:
         context = get_request_context()
         if context and hasattr(request, 'school_timezone'):
             context['school_timezone'] = request.school_timezone
-        
-        try:
-            response = self.get_response(request)
-        finally:
-            # Always clear context after request
-            clear_request_context()
-        
-        return response
     
     def process_exception(self, request, exception):
         """Clean up context on exception"""
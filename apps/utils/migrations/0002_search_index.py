@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utils', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(max_length=100, unique=True, verbose_name='Entity')),
+                ('is_ready', models.BooleanField(default=False, verbose_name='Is Ready')),
+                ('document_count', models.PositiveIntegerField(default=0, verbose_name='Document Count')),
+                ('built_at', models.DateTimeField(blank=True, null=True, verbose_name='Built At')),
+            ],
+            options={
+                'verbose_name': 'Search Index State',
+                'verbose_name_plural': 'Search Index States',
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(help_text='Model label, e.g. students.student', max_length=100, verbose_name='Entity')),
+                ('object_id', models.UUIDField(verbose_name='Object ID')),
+                ('content', models.TextField(blank=True, help_text='Normalized searchable text', verbose_name='Content')),
+                ('indexed_at', models.DateTimeField(auto_now=True, verbose_name='Indexed At')),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+                'unique_together': {('entity', 'object_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(max_length=100, verbose_name='Entity')),
+                ('object_id', models.UUIDField(verbose_name='Object ID')),
+                ('token', models.CharField(max_length=64, verbose_name='Token')),
+                ('weight', models.PositiveSmallIntegerField(default=1, help_text='Rank contribution of a match on this token', verbose_name='Weight')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='utils.searchdocument')),
+            ],
+            options={
+                'verbose_name': 'Search Token',
+                'verbose_name_plural': 'Search Tokens',
+                'indexes': [models.Index(fields=['entity', 'token'], name='utils_searc_entity_76bf42_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:50
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utils', '0002_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('job_type', models.CharField(db_index=True, help_text='Registered handler, e.g. academics.bulk_enroll_students', max_length=100, verbose_name='Job Type')),
+                ('description', models.CharField(blank=True, max_length=255, verbose_name='Description')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='Parameters')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('COMPLETED_WITH_ERRORS', 'Completed with Errors'), ('FAILED', 'Failed'), ('CANCELLED', 'Cancelled')], default='PENDING', max_length=25, verbose_name='Status')),
+                ('total_items', models.PositiveIntegerField(default=0, verbose_name='Total Items')),
+                ('processed_items', models.PositiveIntegerField(default=0, verbose_name='Processed Items')),
+                ('succeeded_items', models.PositiveIntegerField(default=0, verbose_name='Succeeded Items')),
+                ('failed_items', models.PositiveIntegerField(default=0, verbose_name='Failed Items')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, help_text='Not picked up before this time (retry back-off)', verbose_name='Run After')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='Locked By')),
+                ('heartbeat_at', models.DateTimeField(blank=True, help_text='Last progress update of the running worker', null=True, verbose_name='Heartbeat At')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_by_id', models.CharField(blank=True, max_length=50, null=True, verbose_name='Created By ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+            ],
+            options={
+                'verbose_name': 'Background Job',
+                'verbose_name_plural': 'Background Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='utils_backg_status_c70aaa_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BackgroundJobItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField(verbose_name='Sequence')),
+                ('key', models.CharField(help_text='Primary key of the object to process', max_length=100, verbose_name='Key')),
+                ('label', models.CharField(blank=True, max_length=255, verbose_name='Label')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SUCCEEDED', 'Succeeded'), ('FAILED', 'Failed')], default='PENDING', max_length=10, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('message', models.TextField(blank=True, help_text='Result or error message', verbose_name='Message')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Processed At')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='utils.backgroundjob')),
+            ],
+            options={
+                'verbose_name': 'Background Job Item',
+                'verbose_name_plural': 'Background Job Items',
+                'ordering': ['job', 'sequence'],
+                'indexes': [models.Index(fields=['job', 'status', 'sequence'], name='utils_backg_job_id_ba37f8_idx')],
+            },
+        ),
+    ]
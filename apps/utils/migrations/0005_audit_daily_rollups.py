@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:58
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utils', '0004_audit_log_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('AUDIT', 'Audit Log'), ('FINANCIAL', 'Financial Audit Log')], max_length=10, unique=True, verbose_name='Source')),
+                ('rolled_up_to', models.DateField(blank=True, null=True, verbose_name='Rolled Up To')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+            ],
+            options={
+                'verbose_name': 'Audit Rollup State',
+                'verbose_name_plural': 'Audit Rollup States',
+            },
+        ),
+        migrations.CreateModel(
+            name='AuditDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text="Day in the school's timezone", verbose_name='Day')),
+                ('source', models.CharField(choices=[('AUDIT', 'Audit Log'), ('FINANCIAL', 'Financial Audit Log')], max_length=10, verbose_name='Source')),
+                ('content_type', models.CharField(blank=True, default='', max_length=100, verbose_name='Model Type')),
+                ('action', models.CharField(max_length=30, verbose_name='Action')),
+                ('user_id', models.CharField(blank=True, default='', max_length=100, verbose_name='User ID')),
+                ('user_name', models.CharField(blank=True, default='', max_length=200, verbose_name='User Name')),
+                ('risk_level', models.CharField(blank=True, default='', max_length=10, verbose_name='Risk Level')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Count')),
+                ('amount_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18, verbose_name='Amount Total')),
+                ('amount_count', models.PositiveIntegerField(default=0, help_text='Entries with an amount (for averages)', verbose_name='Amount Count')),
+            ],
+            options={
+                'verbose_name': 'Audit Daily Rollup',
+                'verbose_name_plural': 'Audit Daily Rollups',
+                'indexes': [models.Index(fields=['source', 'user_id', 'day'], name='utils_audit_source_783a04_idx')],
+                'constraints': [models.UniqueConstraint(fields=('source', 'day', 'content_type', 'action', 'user_id', 'risk_level'), name='unique_audit_daily_rollup')],
+            },
+        ),
+    ]
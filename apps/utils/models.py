@@ -16,8 +16,13 @@ Updated to use school timezone for all timestamp operations.
 """
 
 from django.db import models
+from django.db.models import DEFERRED
+from django.utils import timezone
 from schoolara.managers import get_current_db, SchoolManager
+from utils.fields import CompactUUIDField
+from utils.ids import uuid7
 from datetime import date
+import copy
 import uuid
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
@@ -26,6 +31,19 @@ from decimal import Decimal, InvalidOperation
 
 logger = logging.getLogger(__name__)
 
+# Fields that are maintained automatically and never reported as changes
+AUDIT_EXCLUDED_FIELDS = frozenset([
+    'id', 'created_at', 'updated_at', 'created_by_id',
+    'updated_by_id', 'created_from_ip', 'updated_from_ip',
+])
+
+
+def _snapshot_value(value):
+    """Copy mutable values (JSON fields) so in-place edits show up as changes."""
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
+
 
 # =============================================================================
 # BASE MODEL - SCHOOL-SPECIFIC DATA
@@ -193,34 +211,13 @@ class BaseModel(models.Model):
         # =========================================================================
         # STEP 3: TRACK CHANGES FOR EXISTING OBJECTS
         # =========================================================================
+        # Compares against the values snapshotted when the instance was
+        # loaded (see from_db), so no extra SELECT is needed.
         changes = {}
+        update_fields = kwargs.get('update_fields')
         if not is_new and self.pk:
             try:
-                # Get old instance from database with proper routing
-                current_db = get_current_db()
-                if current_db:
-                    old_instance = self.__class__.objects.using(current_db).get(pk=self.pk)
-                else:
-                    old_instance = self.__class__.objects.get(pk=self.pk)
-                
-                # Compare fields to detect changes
-                for field in self._meta.fields:
-                    field_name = field.name
-                    
-                    # Skip auto-generated fields and audit fields
-                    if field_name in ['id', 'created_at', 'updated_at', 'created_by_id', 
-                                     'updated_by_id', 'created_from_ip', 'updated_from_ip']:
-                        continue
-                    
-                    old_value = getattr(old_instance, field_name)
-                    new_value = getattr(self, field_name)
-                    
-                    # Record change if values differ
-                    if old_value != new_value:
-                        changes[field_name] = {
-                            'old': str(old_value) if old_value is not None else None,
-                            'new': str(new_value) if new_value is not None else None
-                        }
+                changes = self.get_field_changes(update_fields=update_fields)
             except self.__class__.DoesNotExist:
                 logger.debug(f"Old instance not found for {self.__class__.__name__} {self.pk}")
                 pass  # Object doesn't exist yet, treat as new
@@ -242,6 +239,9 @@ class BaseModel(models.Model):
         # =========================================================================
         result = super().save(*args, **kwargs)
         
+        # Saved values become the baseline for the next change comparison
+        self._snapshot_loaded_values(update_fields)
+        
         # =========================================================================
         # STEP 6: CREATE AUDIT LOG ENTRY
         # =========================================================================
@@ -255,6 +255,195 @@ class BaseModel(models.Model):
         
         return result
     
+    @classmethod
+    def bulk_create_audited(cls, objs, batch_size=None):
+        """
+        Bulk insert new instances with the same bookkeeping as save().
+
+        bulk_create() bypasses save() and signals, so this fills in the
+        school-timezone timestamps and user/IP tracking fields, routes the
+        insert to the current school database and queues one CREATE audit
+        entry per object. Model signals are NOT sent - callers must apply
+        any signal side effects themselves.
+
+        Args:
+            objs: List of unsaved instances
+            batch_size: Optional bulk_create batch size
+
+        Returns:
+            list: The created instances
+
+        Example:
+            items = [FeeInvoiceItem(invoice=invoice, ...) for ...]
+            FeeInvoiceItem.bulk_create_audited(items)
+        """
+        from utils.context import get_request_context
+        from core.utils import get_school_current_time
+
+        objs = list(objs)
+        if not objs:
+            return objs
+
+        now = get_school_current_time()
+        context = get_request_context() or {}
+        user = context.get('user')
+        user_id = str(user.id) if user else None
+        ip_address = context.get('ip_address')
+
+        for obj in objs:
+            obj.created_at = obj.created_at or now
+            obj.updated_at = obj.updated_at or now
+            obj.created_by_id = obj.created_by_id or user_id
+            obj.updated_by_id = user_id or obj.updated_by_id
+            obj.created_from_ip = obj.created_from_ip or ip_address
+            obj.updated_from_ip = ip_address or obj.updated_from_ip
+
+        current_db = get_current_db()
+        manager = cls.objects.db_manager(current_db) if current_db else cls.objects
+        manager.bulk_create(objs, batch_size=batch_size)
+
+        for obj in objs:
+            obj._snapshot_loaded_values()
+            if current_db and current_db != 'default':
+                obj._create_audit_log(action='CREATE', changes={})
+
+        return objs
+
+    @classmethod
+    def bulk_update_audited(cls, objs, fields, batch_size=None):
+        """
+        Bulk update instances with the same bookkeeping as save().
+
+        Changes are diffed against each object's load-time snapshot, so only
+        objects whose listed fields actually changed get an UPDATE audit
+        entry. updated_at and the updater tracking fields are always written.
+        Model signals are NOT sent.
+
+        Args:
+            objs: List of saved instances
+            fields: Names of the fields to update
+            batch_size: Optional bulk_update batch size
+
+        Returns:
+            int: Number of rows updated
+
+        Example:
+            for account in accounts:
+                account.current_balance -= charge
+            StudentAccount.bulk_update_audited(accounts, ['current_balance'])
+        """
+        from utils.context import get_request_context
+        from core.utils import get_school_current_time
+
+        objs = list(objs)
+        if not objs:
+            return 0
+
+        now = get_school_current_time()
+        context = get_request_context() or {}
+        user = context.get('user')
+        user_id = str(user.id) if user else None
+        ip_address = context.get('ip_address')
+
+        changes_by_obj = []
+        for obj in objs:
+            changes_by_obj.append(obj.get_field_changes(update_fields=fields))
+            obj.updated_at = now
+            obj.updated_by_id = user_id or obj.updated_by_id
+            obj.updated_from_ip = ip_address or obj.updated_from_ip
+
+        update_fields = list(dict.fromkeys(
+            list(fields) + ['updated_at', 'updated_by_id', 'updated_from_ip']
+        ))
+
+        current_db = get_current_db()
+        manager = cls.objects.db_manager(current_db) if current_db else cls.objects
+        updated = manager.bulk_update(objs, update_fields, batch_size=batch_size)
+
+        for obj, changes in zip(objs, changes_by_obj):
+            obj._snapshot_loaded_values(update_fields)
+            if changes and current_db and current_db != 'default':
+                obj._create_audit_log(action='UPDATE', changes=changes)
+
+        return updated
+
+    @classmethod
+    def update_audited(cls, queryset, change_reason='', **values):
+        """
+        Set-based UPDATE of a queryset with one audit entry per row.
+
+        The matching rows are read once (locked with SELECT ... FOR UPDATE)
+        to record their old values, then changed with a single UPDATE over
+        the same filter instead of one save() per row. The audit entries
+        are bulk-inserted when the transaction commits. Model signals are
+        NOT sent, and values must be plain values, not expressions.
+
+        Load only what the audit entries need (the updated fields and
+        whatever __str__ uses) with only()/select_related().
+
+        Args:
+            queryset: Rows to update
+            change_reason: Reason recorded on the audit entries
+            **values: field=value pairs to set
+
+        Returns:
+            int: Number of rows updated
+
+        Example:
+            FeeInvoice.update_audited(
+                FeeInvoice.objects.filter(status='PENDING', due_date__lt=today)
+                .select_related('student').only('invoice_number', 'status', 'student__first_name', ...),
+                status='OVERDUE'
+            )
+        """
+        from django.db import connections, transaction
+        from schoolara.managers import DatabaseContext
+        from utils.context import get_request_context
+        from core.utils import get_school_current_time
+
+        using = queryset.db
+        context = get_request_context() or {}
+        user = context.get('user')
+
+        # Same tracking fields as save()
+        tracking = {'updated_at': get_school_current_time()}
+        if user:
+            tracking['updated_by_id'] = str(user.id)
+        if context.get('ip_address'):
+            tracking['updated_from_ip'] = context['ip_address']
+        if change_reason:
+            tracking['change_reason'] = change_reason
+
+        with transaction.atomic(using=using):
+            # Don't lock the select_related rows (e.g. the invoice's student)
+            lock = {}
+            if queryset.query.select_related and connections[using].features.has_select_for_update_of:
+                lock['of'] = ('self',)
+            objs = list(queryset.select_for_update(**lock))
+            if not objs:
+                return 0
+
+            updated = queryset.order_by().update(**values, **tracking)
+
+            if using != 'default':
+                with DatabaseContext(using):
+                    for obj in objs:
+                        changes = {}
+                        for name, new_value in values.items():
+                            old_value = obj.__dict__.get(cls._meta.get_field(name).attname, DEFERRED)
+                            if old_value is not DEFERRED and old_value != new_value:
+                                changes[name] = {
+                                    'old': str(old_value) if old_value is not None else None,
+                                    'new': str(new_value) if new_value is not None else None
+                                }
+                            setattr(obj, name, new_value)
+                        if changes:
+                            obj.change_reason = change_reason
+                            obj._create_audit_log(action='UPDATE', changes=changes)
+
+        logger.info(f"Updated {updated} {cls._meta.verbose_name_plural} on {using}: {values}")
+        return updated
+
     def delete(self, *args, **kwargs):
         """
         Override delete to automatically route to correct database and log deletion.
@@ -280,7 +469,128 @@ class BaseModel(models.Model):
         if current_db and 'using' not in kwargs:
             kwargs['using'] = current_db
         
-        return super().refresh_from_db(*args, **kwargs)
+        result = super().refresh_from_db(*args, **kwargs)
+        self._snapshot_loaded_values(kwargs.get('fields'))
+        return result
+    
+    # -------------------------------------------------------------------------
+    # CHANGE TRACKING
+    # -------------------------------------------------------------------------
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Snapshot field values as loaded from the database.
+        
+        The snapshot is a tuple aligned with _meta.concrete_fields (deferred
+        fields hold DEFERRED) and is what save() diffs against for the
+        audit log.
+        """
+        instance = super().from_db(db, field_names, values)
+        
+        if len(values) == len(cls._meta.concrete_fields):
+            instance._loaded_values = tuple(_snapshot_value(value) for value in values)
+        else:
+            instance._snapshot_loaded_values()
+        
+        return instance
+    
+    def _snapshot_loaded_values(self, fields=None):
+        """
+        Record current field values as the persisted state.
+        
+        Args:
+            fields: Optional iterable of field names/attnames to refresh.
+                    Only those positions are updated when a snapshot exists.
+        """
+        concrete_fields = self._meta.concrete_fields
+        loaded = getattr(self, '_loaded_values', None)
+        
+        if fields is None or loaded is None:
+            self._loaded_values = tuple(
+                _snapshot_value(self.__dict__.get(field.attname, DEFERRED))
+                for field in concrete_fields
+            )
+            return
+        
+        fields = set(fields)
+        values = list(loaded)
+        for index, field in enumerate(concrete_fields):
+            if field.name in fields or field.attname in fields:
+                values[index] = _snapshot_value(self.__dict__.get(field.attname, DEFERRED))
+        self._loaded_values = tuple(values)
+
+    def get_loaded_value(self, field_name, default=None):
+        """
+        Get a field's value as last loaded from or saved to the database.
+
+        Args:
+            field_name: Field name or attname (e.g. 'invoice' or 'invoice_id')
+            default: Returned when there is no snapshot or the field was deferred
+
+        Returns:
+            The persisted value, or default
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return default
+
+        for index, field in enumerate(self._meta.concrete_fields):
+            if field.name == field_name or field.attname == field_name:
+                value = loaded[index]
+                return default if value is DEFERRED else value
+
+        return default
+
+    def get_field_changes(self, update_fields=None):
+        """
+        Get field changes since this instance was loaded or last saved.
+        
+        Audit fields (timestamps, user and IP tracking) are ignored. Foreign
+        keys are compared (and reported) by their raw ID value.
+        
+        Args:
+            update_fields: Optional iterable restricting the comparison to
+                           these fields (as passed to save())
+        
+        Returns:
+            dict: {'field_name': {'old': 'value', 'new': 'value'}}
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            # Instance wasn't loaded through the ORM - fall back to the database
+            current_db = get_current_db()
+            manager = self.__class__.objects
+            queryset = manager.using(current_db) if current_db else manager.all()
+            loaded = queryset.get(pk=self.pk)._loaded_values
+        
+        if update_fields is not None:
+            update_fields = set(update_fields)
+        
+        changes = {}
+        for index, field in enumerate(self._meta.concrete_fields):
+            if field.name in AUDIT_EXCLUDED_FIELDS:
+                continue
+            
+            if update_fields is not None and \
+                    field.name not in update_fields and field.attname not in update_fields:
+                continue
+            
+            old_value = loaded[index]
+            new_value = self.__dict__.get(field.attname, DEFERRED)
+            
+            # Nothing to compare for fields that were never loaded
+            if old_value is DEFERRED or new_value is DEFERRED:
+                continue
+            
+            # Record change if values differ
+            if old_value != new_value:
+                changes[field.name] = {
+                    'old': str(old_value) if old_value is not None else None,
+                    'new': str(new_value) if new_value is not None else None
+                }
+        
+        return changes
     
     # -------------------------------------------------------------------------
     # AUDIT TRAIL HELPER METHODS
@@ -396,6 +706,10 @@ class BaseModel(models.Model):
         Create an audit log entry for this change.
         Audit log timestamp will automatically use school timezone.
         
+        The entry is handed to the buffered audit writer, which writes it
+        together with the rest of the transaction's (or request's) audit
+        entries in one bulk insert. See utils.audit_writer.
+        
         Args:
             action: 'CREATE', 'UPDATE', or 'DELETE'
             changes: Dict of field changes
@@ -404,6 +718,8 @@ class BaseModel(models.Model):
             # Import here to avoid circular imports
             from utils.models import AuditLog
             from utils.context import get_request_context
+            from utils.audit_writer import enqueue_audit_log
+            from core.utils import get_school_current_time
             
             # Get request context (user, IP, etc.)
             context = get_request_context()
@@ -423,8 +739,9 @@ class BaseModel(models.Model):
                 user_name = getattr(user, 'get_full_name', lambda: str(user))()
             
             # Create audit log entry
-            # Note: AuditLog.save() will set timestamp in school timezone
+            # Note: Timestamp is set here because bulk inserts bypass AuditLog.save()
             audit_log = AuditLog(
+                timestamp=get_school_current_time(),
                 content_type=f"{self._meta.app_label}.{self._meta.model_name}",
                 object_id=str(self.pk),
                 object_repr=str(self)[:200],
@@ -440,13 +757,13 @@ class BaseModel(models.Model):
                 request_path=context.get('request_path', '') if context else '',
             )
             
-            # Save to the same database as the model
+            # Queue for the same database as the model
             if current_db:
-                audit_log.save(using=current_db)
+                enqueue_audit_log(audit_log, using=current_db)
             else:
                 audit_log.save()
             
-            logger.debug(f"Created audit log for {action} on {self._meta.label} {self.pk}")
+            logger.debug(f"Queued audit log for {action} on {self._meta.label} {self.pk}")
             
         except Exception as e:
             # Don't fail the save/delete if audit logging fails
@@ -497,6 +814,30 @@ class BaseModel(models.Model):
         self.change_reason = reason
 
 
+class TimeOrderedBaseModel(BaseModel):
+    """
+    BaseModel with a time-ordered, compact primary key.
+
+    Opt-in for append-heavy tables (ledger and journal transactions): the
+    id is a UUIDv7 (utils.ids), so new rows land at the end of the
+    clustered index, stored as BINARY(16) on MySQL (utils.fields), which
+    halves the key in the primary key and every secondary index.
+
+    Everything else (audit trail, routing, str(pk) in AuditLog.object_id)
+    is unchanged. Existing tables are converted with the
+    ConvertToCompactUUID migration operation, see utils.fields.
+
+    Usage:
+        class AccountTransaction(TimeOrderedBaseModel):
+            ...
+    """
+
+    id = CompactUUIDField(primary_key=True, default=uuid7, editable=False)
+
+    class Meta:
+        abstract = True
+
+
 # =============================================================================
 # DEFAULT DATABASE MODEL - SYSTEM-WIDE DATA
 # =============================================================================
@@ -588,8 +929,8 @@ class AuditLog(models.Model):
         ('DELETE', 'Deleted'),
     )
     
-    # What was changed
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # What was changed (time-ordered IDs: inserts append to the index, see utils.ids)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     content_type = models.CharField("Model Type", max_length=100, db_index=True)
     object_id = models.CharField("Object ID", max_length=100, db_index=True)
     object_repr = models.CharField("Object Representation", max_length=200)
@@ -1061,7 +1402,7 @@ class FinancialAuditLog(models.Model):
                 # Get from FinancialSettings
                 try:
                     from core.models import FinancialSettings
-                    settings = FinancialSettings.get_instance()
+                    settings = FinancialSettings.get_cached_instance()
                     if settings and settings.school_currency:
                         log_data['currency'] = settings.school_currency[:3].upper()
                     else:
@@ -1332,4 +1673,291 @@ class FinancialAuditLog(models.Model):
         return cls.objects.filter(
             timestamp__gte=start_dt,
             timestamp__lte=end_dt
-        ).order_by('-timestamp')
\ No newline at end of file
+        ).order_by('-timestamp')
+
+# =============================================================================
+# AUDIT ACTIVITY ROLLUPS
+# =============================================================================
+
+class AuditDailyRollup(models.Model):
+    """
+    Pre-aggregated audit activity of one school day.
+
+    One row per day x content_type x action x user for AuditLog, and per
+    day x action x risk level for FinancialAuditLog (with amount sums), so
+    the audit dashboards read O(days) rows instead of scanning the logs.
+    Rebuilt for closed days by utils.audit_rollups.rollup_audit_activity
+    (manage.py rollup_audit_activity); the current day is read live from
+    the log tables. Rollups outlive the log rows moved to the archive.
+
+    Like the audit log, each school database has its own rollups.
+    """
+
+    SOURCE_AUDIT = 'AUDIT'
+    SOURCE_FINANCIAL = 'FINANCIAL'
+    SOURCE_CHOICES = [
+        (SOURCE_AUDIT, 'Audit Log'),
+        (SOURCE_FINANCIAL, 'Financial Audit Log'),
+    ]
+
+    day = models.DateField("Day", help_text="Day in the school's timezone")
+    source = models.CharField("Source", max_length=10, choices=SOURCE_CHOICES)
+    content_type = models.CharField("Model Type", max_length=100, blank=True, default='')
+    action = models.CharField("Action", max_length=30)
+    user_id = models.CharField("User ID", max_length=100, blank=True, default='')
+    user_name = models.CharField("User Name", max_length=200, blank=True, default='')
+    risk_level = models.CharField("Risk Level", max_length=10, blank=True, default='')
+    count = models.PositiveIntegerField("Count", default=0)
+    amount_total = models.DecimalField(
+        "Amount Total", max_digits=18, decimal_places=2, default=Decimal('0.00')
+    )
+    amount_count = models.PositiveIntegerField(
+        "Amount Count", default=0,
+        help_text="Entries with an amount (for averages)"
+    )
+
+    objects = SchoolManager()
+
+    class Meta:
+        verbose_name = "Audit Daily Rollup"
+        verbose_name_plural = "Audit Daily Rollups"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'day', 'content_type', 'action', 'user_id', 'risk_level'],
+                name='unique_audit_daily_rollup'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['source', 'user_id', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.source} {self.content_type or self.risk_level} {self.action}: {self.count}"
+
+
+class AuditRollupState(models.Model):
+    """
+    Last day rolled up for each audit source.
+
+    Days after rolled_up_to are read from the log tables directly.
+    """
+
+    source = models.CharField("Source", max_length=10, unique=True, choices=AuditDailyRollup.SOURCE_CHOICES)
+    rolled_up_to = models.DateField("Rolled Up To", null=True, blank=True)
+    updated_at = models.DateTimeField("Updated At", auto_now=True)
+
+    objects = SchoolManager()
+
+    class Meta:
+        verbose_name = "Audit Rollup State"
+        verbose_name_plural = "Audit Rollup States"
+
+    def __str__(self):
+        return f"{self.source} rolled up to {self.rolled_up_to}"
+
+
+# =============================================================================
+# SEARCH INDEX
+# =============================================================================
+
+class SearchDocument(models.Model):
+    """
+    Denormalized search document for one indexed object.
+
+    Holds the normalized text of every searchable field of the object, so a
+    save that does not change any of them can skip rewriting the tokens.
+    Maintained by utils.search from post_save/post_delete signals.
+
+    Like the audit log, each school database has its own index.
+    """
+
+    entity = models.CharField("Entity", max_length=100, help_text="Model label, e.g. students.student")
+    object_id = models.UUIDField("Object ID")
+    content = models.TextField("Content", blank=True, help_text="Normalized searchable text")
+    indexed_at = models.DateTimeField("Indexed At", auto_now=True)
+
+    objects = SchoolManager()
+
+    class Meta:
+        unique_together = [['entity', 'object_id']]
+        verbose_name = "Search Document"
+        verbose_name_plural = "Search Documents"
+
+    def __str__(self):
+        return f"{self.entity} {self.object_id}"
+
+
+class SearchToken(models.Model):
+    """
+    One normalized token of a search document.
+
+    entity and object_id are copied from the document so that a prefix
+    search is a single range scan over the (entity, token) index, grouped
+    by object_id, without joining the documents.
+    """
+
+    document = models.ForeignKey(
+        SearchDocument,
+        on_delete=models.CASCADE,
+        related_name='tokens'
+    )
+    entity = models.CharField("Entity", max_length=100)
+    object_id = models.UUIDField("Object ID")
+    token = models.CharField("Token", max_length=64)
+    weight = models.PositiveSmallIntegerField(
+        "Weight",
+        default=1,
+        help_text="Rank contribution of a match on this token"
+    )
+
+    objects = SchoolManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['entity', 'token']),
+        ]
+        verbose_name = "Search Token"
+        verbose_name_plural = "Search Tokens"
+
+    def __str__(self):
+        return f"{self.entity} {self.token}"
+
+
+class SearchIndexState(models.Model):
+    """
+    Build state of the search index of one entity.
+
+    Searches fall back to the views' database filters until the index has
+    been built once (manage.py rebuild_search_index).
+    """
+
+    entity = models.CharField("Entity", max_length=100, unique=True)
+    is_ready = models.BooleanField("Is Ready", default=False)
+    document_count = models.PositiveIntegerField("Document Count", default=0)
+    built_at = models.DateTimeField("Built At", null=True, blank=True)
+
+    objects = SchoolManager()
+
+    class Meta:
+        verbose_name = "Search Index State"
+        verbose_name_plural = "Search Index States"
+
+    def __str__(self):
+        return f"{self.entity} ({'ready' if self.is_ready else 'not built'})"
+
+
+# =============================================================================
+# BACKGROUND JOBS
+# =============================================================================
+
+class BackgroundJob(models.Model):
+    """
+    A long-running operation (bulk enrollment, payroll run...) queued for
+    the background worker (manage.py run_background_jobs).
+
+    The job is split into BackgroundJobItem rows when it is queued; the
+    worker processes them in chunks, committing after each chunk, and
+    keeps the counters below up to date so the page that queued the job
+    can poll its progress.
+
+    Like the audit log, each school database has its own queue.
+    """
+
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('COMPLETED_WITH_ERRORS', 'Completed with Errors'),
+        ('FAILED', 'Failed'),
+        ('CANCELLED', 'Cancelled'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    job_type = models.CharField("Job Type", max_length=100, db_index=True,
+                                help_text="Registered handler, e.g. academics.bulk_enroll_students")
+    description = models.CharField("Description", max_length=255, blank=True)
+    params = models.JSONField("Parameters", default=dict, blank=True)
+    status = models.CharField("Status", max_length=25, choices=STATUS_CHOICES, default='PENDING')
+
+    # Progress
+    total_items = models.PositiveIntegerField("Total Items", default=0)
+    processed_items = models.PositiveIntegerField("Processed Items", default=0)
+    succeeded_items = models.PositiveIntegerField("Succeeded Items", default=0)
+    failed_items = models.PositiveIntegerField("Failed Items", default=0)
+
+    # Scheduling
+    run_after = models.DateTimeField("Run After", default=timezone.now,
+                                     help_text="Not picked up before this time (retry back-off)")
+    attempts = models.PositiveSmallIntegerField("Attempts", default=0)
+    locked_by = models.CharField("Locked By", max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField("Heartbeat At", null=True, blank=True,
+                                        help_text="Last progress update of the running worker")
+    error = models.TextField("Error", blank=True)
+
+    # Audit - CharField to avoid cross-database FK constraints
+    created_by_id = models.CharField("Created By ID", max_length=50, null=True, blank=True)
+    created_at = models.DateTimeField("Created At", auto_now_add=True)
+    started_at = models.DateTimeField("Started At", null=True, blank=True)
+    finished_at = models.DateTimeField("Finished At", null=True, blank=True)
+
+    objects = SchoolManager()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+        verbose_name = "Background Job"
+        verbose_name_plural = "Background Jobs"
+
+    def __str__(self):
+        return f"{self.description or self.job_type} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('COMPLETED', 'COMPLETED_WITH_ERRORS', 'FAILED', 'CANCELLED')
+
+    @property
+    def progress_percent(self):
+        if not self.total_items:
+            return 100 if self.is_finished else 0
+        return int(self.processed_items * 100 / self.total_items)
+
+
+class BackgroundJobItem(models.Model):
+    """
+    One unit of work of a BackgroundJob (usually one student, payroll or
+    invoice). Failed items keep their error and are retried on their own.
+    """
+
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SUCCEEDED', 'Succeeded'),
+        ('FAILED', 'Failed'),
+    ]
+
+    job = models.ForeignKey(
+        BackgroundJob,
+        on_delete=models.CASCADE,
+        related_name='items'
+    )
+    sequence = models.PositiveIntegerField("Sequence")
+    key = models.CharField("Key", max_length=100, help_text="Primary key of the object to process")
+    label = models.CharField("Label", max_length=255, blank=True)
+    status = models.CharField("Status", max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField("Attempts", default=0)
+    message = models.TextField("Message", blank=True, help_text="Result or error message")
+    processed_at = models.DateTimeField("Processed At", null=True, blank=True)
+
+    objects = SchoolManager()
+
+    class Meta:
+        ordering = ['job', 'sequence']
+        indexes = [
+            models.Index(fields=['job', 'status', 'sequence']),
+        ]
+        verbose_name = "Background Job Item"
+        verbose_name_plural = "Background Job Items"
+
+    def __str__(self):
+        return f"{self.label or self.key} ({self.status})"
@@ -0,0 +1,342 @@
+# utils/school_runner.py
+
+"""
+Run a task on every school database, several schools at a time.
+
+Maintenance commands loop over the school databases one after another, so
+a nightly run takes the sum of all schools. for_each_school() runs a task
+per school in a pool of worker processes instead (bounded by WORKERS), so
+the run takes roughly as long as the slowest school:
+
+- Each task runs inside DatabaseContext(school) in its worker process.
+- Results, durations and failures are collected per school; a failing
+  school does not stop the others.
+- Progress is saved to a state file after every school (RunState). After an
+  interrupted or partly failed run, the same run can be resumed and skips
+  the schools that already succeeded. A run without failures removes its
+  state file, so the next run starts from scratch.
+
+Workers are started with the 'spawn' method: each one sets Django up in a
+fresh interpreter instead of inheriting the parent's open database and
+cache connections. Tasks must therefore be module-level functions.
+
+The manage.py for_each_school command runs any management command this
+way.
+
+Configuration (settings.SCHOOL_RUNNER, all keys optional):
+    WORKERS: Schools processed in parallel (1 runs in this process).
+    STATE_DIR: Directory of the resume state files.
+
+Example:
+    from utils.school_runner import for_each_school, select_schools
+
+    def count_students():
+        from students.models import Student
+        return Student.objects.count()
+
+    schools, unknown = select_schools(exclude=['atepi_pajok'])
+    for result in for_each_school(count_students, schools, workers=4):
+        print(result['school'], result['status'], result['result'])
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import StringIO
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RUNNER_SETTINGS = {
+    'WORKERS': 4,
+    'STATE_DIR': os.path.join(settings.BASE_DIR, 'runner_state'),
+}
+
+STATUS_OK = 'ok'
+STATUS_FAILED = 'failed'
+
+
+def get_runner_settings():
+    """
+    Get the school runner configuration merged with defaults.
+
+    Returns:
+        dict: WORKERS and STATE_DIR
+    """
+    config = dict(DEFAULT_RUNNER_SETTINGS)
+    config.update(getattr(settings, 'SCHOOL_RUNNER', {}) or {})
+    return config
+
+
+# =============================================================================
+# SCHOOL SELECTION
+# =============================================================================
+
+def select_schools(only=None, exclude=None):
+    """
+    List the school databases to process.
+
+    Args:
+        only (list): Process only these aliases (default: every school)
+        exclude (list): Aliases to leave out
+
+    Returns:
+        tuple: (schools, unknown) - aliases to process in order, and aliases
+               of only/exclude that are not school databases
+    """
+    from schoolara.tenants import ensure_tenant_database, get_school_databases
+
+    unknown = []
+    if only:
+        schools = []
+        for alias in only:
+            if ensure_tenant_database(alias):
+                if alias not in schools:
+                    schools.append(alias)
+            else:
+                unknown.append(alias)
+    else:
+        schools = get_school_databases()
+
+    for alias in exclude or []:
+        if alias in schools:
+            schools.remove(alias)
+        elif not ensure_tenant_database(alias):
+            unknown.append(alias)
+
+    return schools, unknown
+
+
+# =============================================================================
+# RESUME STATE
+# =============================================================================
+
+class RunState:
+    """
+    Progress of a run, saved as JSON after every school.
+
+    A run is identified by its key (e.g. the command and its arguments), so
+    a resumed run finds the state of the previous identical run.
+    """
+
+    def __init__(self, key, state_dir=None):
+        state_dir = state_dir or get_runner_settings()['STATE_DIR']
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+        name = ''.join(c if c.isalnum() or c in '-_' else '_' for c in key.split(' ')[0])
+        self.key = key
+        self.path = os.path.join(state_dir, f"{name}-{digest}.json")
+        self.schools = {}
+
+    def load(self):
+        """Read the state of the previous run (nothing if there is none)."""
+        try:
+            with open(self.path, encoding='utf-8') as state_file:
+                data = json.load(state_file)
+        except FileNotFoundError:
+            return self
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable run state {self.path}: {e}")
+            return self
+
+        if data.get('key') == self.key:
+            self.schools = data.get('schools', {})
+        return self
+
+    def completed(self):
+        """Schools that succeeded in the saved run."""
+        return {school for school, entry in self.schools.items() if entry['status'] == STATUS_OK}
+
+    def record(self, result):
+        """Save the outcome of one school."""
+        self.schools[result['school']] = {
+            'status': result['status'],
+            'duration': result['duration'],
+            'error': result['error'],
+            'finished_at': timezone.now().isoformat(),
+        }
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as state_file:
+            json.dump({'key': self.key, 'schools': self.schools}, state_file, indent=2)
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self.schools = {}
+
+
+# =============================================================================
+# RUNNER
+# =============================================================================
+
+def for_each_school(func, schools, *args, workers=None, state=None, on_result=None, **kwargs):
+    """
+    Run func(*args, **kwargs) on each school database, in parallel.
+
+    Args:
+        func: Module-level function (it is pickled to the worker processes)
+        schools (list): Database aliases (see select_schools())
+        workers (int): Worker processes (default: WORKERS, 1 runs here)
+        state (RunState): Skip the schools it lists as completed and record
+                          the outcome of every school in it
+        on_result: Called with each result as soon as its school finishes
+        *args, **kwargs: Arguments of func (must be picklable)
+
+    Returns:
+        list: One result per school, in the order of schools:
+              {'school', 'status' ('ok' or 'failed'), 'duration' (seconds),
+               'result' (func's return value), 'error' (message or None)}
+    """
+    if workers is None:
+        workers = get_runner_settings()['WORKERS']
+
+    if state is not None:
+        completed = state.completed()
+        schools = [school for school in schools if school not in completed]
+
+    results = {}
+
+    def _finish(result):
+        results[result['school']] = result
+        if state is not None:
+            state.record(result)
+        if on_result is not None:
+            on_result(result)
+
+    if workers <= 1 or len(schools) <= 1:
+        for school in schools:
+            _finish(run_in_school(school, func, *args, **kwargs))
+    else:
+        _run_in_pool(func, schools, args, kwargs, min(workers, len(schools)), _finish)
+
+    return [results[school] for school in schools if school in results]
+
+
+def run_in_school(school, func, *args, **kwargs):
+    """
+    Run func inside DatabaseContext(school) and report the outcome.
+
+    Never raises: exceptions are reported as a failed result.
+
+    Returns:
+        dict: Result (see for_each_school())
+    """
+    from django.db import connections
+    from schoolara.managers import DatabaseContext
+
+    started = time.monotonic()
+    result = {'school': school, 'status': STATUS_OK, 'result': None, 'error': None}
+
+    try:
+        with DatabaseContext(school):
+            result['result'] = func(*args, **kwargs)
+    except Exception as e:
+        # Commands reporting errors on stderr have logged them already
+        logger.error(
+            f"Error running {getattr(func, '__name__', func)} on {school}: {e}",
+            exc_info=not isinstance(e, CommandFailed),
+        )
+        result['status'] = STATUS_FAILED
+        result['error'] = str(e) or e.__class__.__name__
+        result['traceback'] = traceback.format_exc()
+    finally:
+        # Do not keep a connection per school open in long-lived workers
+        if school in connections.settings:
+            connections[school].close()
+
+    result['duration'] = round(time.monotonic() - started, 3)
+    return result
+
+
+def _run_in_pool(func, schools, args, kwargs, workers, finish):
+    """Run the schools in worker processes, calling finish() as they complete."""
+    context = multiprocessing.get_context('spawn')
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+        futures = {
+            pool.submit(run_in_school, school, func, *args, **kwargs): school
+            for school in schools
+        }
+        for future in as_completed(futures):
+            school = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker died (e.g. killed) or the result could not be pickled
+                logger.error(f"Worker failed on {school}: {e}")
+                result = {
+                    'school': school, 'status': STATUS_FAILED, 'result': None,
+                    'error': f"Worker failed: {e}", 'duration': 0,
+                }
+            finish(result)
+
+
+def _init_worker():
+    """Set Django up in a new worker process."""
+    import django
+    django.setup()
+
+
+# =============================================================================
+# MANAGEMENT COMMANDS
+# =============================================================================
+
+def call_command_in_school(command_name, command_args=(), verbosity=1):
+    """
+    Run a management command for the current school database.
+
+    The command gets the school as --only (commands looping over schools)
+    or --database (e.g. migrate) when it has such an option. Its output is
+    captured; anything written to stderr marks the school as failed, as the
+    school commands report their per-school errors there.
+
+    Args:
+        command_name (str): Management command
+        command_args (list): Command line arguments of the command
+        verbosity (int): Verbosity passed to the command
+
+    Returns:
+        dict: {'output': stdout, 'errors': stderr}
+    """
+    from django.core.management import call_command, get_commands, load_command_class
+    from schoolara.managers import get_current_db
+
+    command = load_command_class(get_commands()[command_name], command_name)
+    parser = command.create_parser('manage.py', command_name)
+    options = {action.dest for action in parser._actions}
+
+    school_options = {'verbosity': verbosity, 'no_color': True}
+    if 'only' in options:
+        school_options['only'] = get_current_db()
+    elif 'database' in options:
+        school_options['database'] = get_current_db()
+
+    stdout, stderr = StringIO(), StringIO()
+    call_command(command, *command_args, stdout=stdout, stderr=stderr, **school_options)
+
+    output = {'output': stdout.getvalue(), 'errors': stderr.getvalue()}
+    if output['errors'].strip():
+        raise CommandFailed(output)
+    return output
+
+
+class CommandFailed(Exception):
+    """A command reported errors for the school on stderr."""
+
+    def __init__(self, output):
+        self.output = output
+        lines = [line for line in output['errors'].splitlines() if line.strip()]
+        super().__init__(lines[-1] if lines else 'Command reported errors')
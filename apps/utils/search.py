@@ -0,0 +1,607 @@
+# utils/search.py
+
+"""
+Per-school full-text search index for the HTMX search views.
+
+The search views used to OR eight or so __icontains predicates together,
+which cannot use an index, on top of annotated joins grouped by the whole
+row. Here every indexed object gets a SearchDocument whose normalized
+tokens (words, identifiers with and without separators, phone numbers in
+local form) are stored as SearchToken rows. A search is then a prefix
+range scan on the (entity, token) index returning ranked IDs, which the
+views hydrate with their usual select_related/annotate queryset.
+
+Indexed entities are declared in SEARCH_INDEXES below. Fields are given
+with a weight; dotted paths follow foreign keys. 'dependencies' lists
+models whose changes must re-index this entity, with the lookup from this
+entity to them.
+
+The index is kept up to date by post_save/post_delete signals (connected
+in UtilsConfig.ready()). Bulk queryset updates bypass signals; run
+manage.py rebuild_search_index after those, and once per school to build
+the index initially. Until it has been built, search_queryset() applies
+the view's fallback filter instead.
+
+Configuration (settings.SEARCH_INDEX, all keys optional):
+    MAX_RESULTS: Maximum IDs returned by one search.
+    MAX_TOKENS: Maximum tokens stored per document.
+    MAX_TERMS: Maximum query terms used (the rest are ignored).
+    BATCH_SIZE: Objects per batch when rebuilding.
+"""
+
+import logging
+import re
+import unicodedata
+from functools import reduce
+from operator import or_
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, When, Value, F, Max, Q, IntegerField
+from django.db.models.signals import post_save, post_delete
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_SETTINGS = {
+    'MAX_RESULTS': 1000,
+    'MAX_TOKENS': 200,
+    'MAX_TERMS': 6,
+    'BATCH_SIZE': 500,
+}
+
+# Indexed entities: {model label: {'fields': {path: weight}, ...}}
+SEARCH_INDEXES = {
+    'students.student': {
+        'fields': {
+            'admission_number': 10,
+            'national_student_number': 8,
+            'birth_certificate_number': 8,
+            'first_name': 5,
+            'middle_name': 4,
+            'last_name': 5,
+            'personal_email': 3,
+            'phone_number': 3,
+        },
+        'phone_fields': ['phone_number'],
+    },
+    'students.guardian': {
+        'fields': {
+            'national_id': 8,
+            'first_name': 5,
+            'middle_name': 4,
+            'last_name': 5,
+            'email': 3,
+            'primary_phone': 3,
+            'secondary_phone': 2,
+            'employer': 1,
+        },
+        'phone_fields': ['primary_phone', 'secondary_phone'],
+    },
+    'hr.staff': {
+        'fields': {
+            'staff_id': 10,
+            'national_id': 8,
+            'first_name': 5,
+            'middle_name': 4,
+            'last_name': 5,
+            'personal_email': 3,
+            'phone_number': 3,
+        },
+        'phone_fields': ['phone_number'],
+    },
+    'discipline.disciplinaryrecord': {
+        'fields': {
+            'incident_number': 10,
+            'student.first_name': 4,
+            'student.last_name': 4,
+            'incident_description': 1,
+        },
+        'dependencies': {'students.student': 'student'},
+    },
+}
+
+# Longest token stored (matches SearchToken.token)
+MAX_TOKEN_LENGTH = 64
+
+# Digits kept for the local form of a phone number (Uganda: 9 after the 0/+256)
+PHONE_LOCAL_DIGITS = 9
+
+_SPLIT_RE = re.compile(r'[^0-9a-z]+')
+
+
+def get_search_settings():
+    """
+    Get the search index configuration merged with defaults.
+
+    Returns:
+        dict: MAX_RESULTS, MAX_TOKENS, MAX_TERMS and BATCH_SIZE
+    """
+    config = dict(DEFAULT_SEARCH_SETTINGS)
+    config.update(getattr(settings, 'SEARCH_INDEX', {}) or {})
+    return config
+
+
+# =============================================================================
+# TOKENIZING
+# =============================================================================
+
+def normalize(text):
+    """
+    Lowercase text and strip accents.
+
+    Args:
+        text: Any value (converted with str())
+
+    Returns:
+        str: Normalized text
+    """
+    if text is None:
+        return ''
+    text = unicodedata.normalize('NFKD', str(text))
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower().strip()
+
+
+def tokenize(text, phone=False):
+    """
+    Split a field value into index tokens.
+
+    Words are split on anything that is not a letter or digit. Values with
+    separators (admission numbers, emails, phone numbers) are also indexed
+    in compact form, so both "adm/2024" and "adm2024" match them. Phone
+    numbers additionally get their local form (0XXXXXXXXX).
+
+    Args:
+        text: Field value
+        phone: Whether the value is a phone number
+
+    Returns:
+        list: Tokens in order, without duplicates
+
+    Example:
+        >>> tokenize('ADM/2024/001')
+        ['adm', '2024', '001', 'adm2024001']
+    """
+    text = normalize(text)
+    if not text:
+        return []
+
+    words = [word for word in _SPLIT_RE.split(text) if word]
+    tokens = list(words)
+
+    compact = ''.join(words)
+    if len(words) > 1:
+        tokens.append(compact)
+
+    if phone and compact.isdigit() and len(compact) >= PHONE_LOCAL_DIGITS:
+        local = compact[-PHONE_LOCAL_DIGITS:]
+        tokens.extend([local, f"0{local}"])
+
+    return list(dict.fromkeys(token[:MAX_TOKEN_LENGTH] for token in tokens))
+
+
+def _query_terms(query):
+    """Split a search query into the terms that must all match."""
+    terms = [term for term in _SPLIT_RE.split(normalize(query)) if term]
+    return list(dict.fromkeys(terms))[:get_search_settings()['MAX_TERMS']]
+
+
+# =============================================================================
+# DOCUMENT BUILDING
+# =============================================================================
+
+def get_index_config(model):
+    """
+    Get the SEARCH_INDEXES entry of a model.
+
+    Returns:
+        dict or None: Index configuration, None if the model is not indexed
+    """
+    return SEARCH_INDEXES.get(model._meta.label_lower)
+
+
+def _resolve_path(instance, path):
+    """Follow a dotted attribute path, returning None on a missing link."""
+    value = instance
+    for attr in path.split('.'):
+        value = getattr(value, attr, None)
+        if value is None:
+            return None
+    return value
+
+
+def build_document(instance, config=None):
+    """
+    Build the normalized content and weighted tokens of an object.
+
+    Args:
+        instance: Indexed model instance
+        config: Index configuration (defaults to the model's entry)
+
+    Returns:
+        tuple: (content, {token: weight}) with the highest weight per token
+    """
+    config = config or get_index_config(type(instance))
+    phone_fields = set(config.get('phone_fields', []))
+
+    parts = []
+    weights = {}
+    for path, weight in config['fields'].items():
+        value = _resolve_path(instance, path)
+        if value in (None, ''):
+            continue
+        parts.append(normalize(value))
+        for token in tokenize(value, phone=path in phone_fields):
+            if weights.get(token, 0) < weight:
+                weights[token] = weight
+
+    max_tokens = get_search_settings()['MAX_TOKENS']
+    if len(weights) > max_tokens:
+        # Keep the most important tokens of very long texts
+        kept = sorted(weights.items(), key=lambda item: -item[1])[:max_tokens]
+        weights = dict(kept)
+
+    return ' | '.join(parts), weights
+
+
+def _related_paths(config):
+    """select_related() paths needed to build documents of an entity."""
+    return sorted({
+        path.rsplit('.', 1)[0].replace('.', '__')
+        for path in config['fields'] if '.' in path
+    })
+
+
+# =============================================================================
+# INDEX MAINTENANCE
+# =============================================================================
+
+def index_object(instance, using=None):
+    """
+    Create or update the search document of one object.
+
+    Nothing is written when the searchable content has not changed.
+
+    Args:
+        instance: Indexed model instance
+        using: Database alias (defaults to the instance's database)
+
+    Returns:
+        bool: True if the document was written
+    """
+    from utils.models import SearchDocument, SearchToken
+
+    config = get_index_config(type(instance))
+    if config is None:
+        return False
+
+    using = using or instance._state.db
+    entity = type(instance)._meta.label_lower
+    content, weights = build_document(instance, config)
+
+    with transaction.atomic(using=using):
+        document = SearchDocument.objects.using(using).filter(
+            entity=entity, object_id=instance.pk
+        ).first()
+
+        if document is not None and document.content == content:
+            return False
+
+        if document is None:
+            document = SearchDocument.objects.using(using).create(
+                entity=entity, object_id=instance.pk, content=content
+            )
+        else:
+            document.content = content
+            document.save(using=using, update_fields=['content', 'indexed_at'])
+            SearchToken.objects.using(using).filter(document=document).delete()
+
+        SearchToken.objects.using(using).bulk_create([
+            SearchToken(
+                document=document,
+                entity=entity,
+                object_id=instance.pk,
+                token=token,
+                weight=weight,
+            )
+            for token, weight in weights.items()
+        ])
+
+    _reindex_dependents(instance, using)
+    return True
+
+
+def remove_object(instance, using=None):
+    """
+    Delete the search document of one object (its tokens cascade).
+
+    Args:
+        instance: Indexed model instance
+        using: Database alias (defaults to the instance's database)
+    """
+    from utils.models import SearchDocument
+
+    using = using or instance._state.db
+    SearchDocument.objects.using(using).filter(
+        entity=type(instance)._meta.label_lower,
+        object_id=instance.pk
+    ).delete()
+
+
+def _reindex_dependents(instance, using):
+    """Re-index entities whose documents include fields of this object."""
+    label = type(instance)._meta.label_lower
+
+    for entity, config in SEARCH_INDEXES.items():
+        lookup = config.get('dependencies', {}).get(label)
+        if not lookup:
+            continue
+
+        model = apps.get_model(entity)
+        dependents = model.objects.using(using).select_related(
+            *_related_paths(config)
+        ).filter(**{lookup: instance})
+
+        for dependent in dependents:
+            index_object(dependent, using=using)
+
+
+def rebuild_index(entity, using):
+    """
+    Rebuild the search index of one entity in one school database.
+
+    Args:
+        entity: Model label (a SEARCH_INDEXES key)
+        using: Database alias
+
+    Returns:
+        int: Number of documents indexed
+    """
+    from django.utils import timezone
+    from utils.models import SearchDocument, SearchIndexState
+    from utils.cache import tenant_cache
+
+    config = SEARCH_INDEXES[entity]
+    model = apps.get_model(entity)
+    batch_size = get_search_settings()['BATCH_SIZE']
+
+    queryset = model.objects.using(using).select_related(
+        *_related_paths(config)
+    ).order_by('pk')
+
+    count = 0
+    with transaction.atomic(using=using):
+        SearchDocument.objects.using(using).filter(entity=entity).delete()
+
+        batch = []
+        for instance in queryset.iterator(chunk_size=batch_size):
+            batch.append((instance.pk, *build_document(instance, config)))
+            if len(batch) >= batch_size:
+                count += _write_batch(entity, batch, using)
+                batch = []
+        if batch:
+            count += _write_batch(entity, batch, using)
+
+        SearchIndexState.objects.using(using).update_or_create(
+            entity=entity,
+            defaults={
+                'is_ready': True,
+                'document_count': count,
+                'built_at': timezone.now(),
+            }
+        )
+
+    tenant_cache.invalidate_namespace('search', using=using)
+    logger.info(f"Rebuilt search index for {entity} on {using}: {count} documents")
+    return count
+
+
+def _write_batch(entity, batch, using):
+    """Insert documents and tokens for a batch of (pk, content, weights)."""
+    from utils.models import SearchDocument, SearchToken
+
+    documents = SearchDocument.objects.using(using).bulk_create([
+        SearchDocument(entity=entity, object_id=pk, content=content)
+        for pk, content, _ in batch
+    ])
+
+    # bulk_create does not return auto PKs on MySQL, so read them back
+    document_ids = dict(
+        SearchDocument.objects.using(using).filter(
+            entity=entity, object_id__in=[pk for pk, _, _ in batch]
+        ).values_list('object_id', 'id')
+    )
+
+    SearchToken.objects.using(using).bulk_create([
+        SearchToken(
+            document_id=document_ids[pk],
+            entity=entity,
+            object_id=pk,
+            token=token,
+            weight=weight,
+        )
+        for pk, _, weights in batch
+        for token, weight in weights.items()
+    ], batch_size=1000)
+
+    return len(documents)
+
+
+# =============================================================================
+# SEARCHING
+# =============================================================================
+
+def is_index_ready(model, using=None):
+    """
+    Check whether the search index of a model has been built.
+
+    Cached in the 'search' tenant cache namespace (invalidated by
+    rebuild_index()).
+
+    Args:
+        model: Indexed model class
+        using: Database alias (defaults to the current school database)
+
+    Returns:
+        bool: True if searches can use the index
+    """
+    from utils.models import SearchIndexState
+    from utils.cache import tenant_cache
+    from schoolara.managers import get_current_db
+
+    using = using or get_current_db() or 'default'
+    entity = model._meta.label_lower
+
+    def _load():
+        return SearchIndexState.objects.using(using).filter(
+            entity=entity, is_ready=True
+        ).exists()
+
+    return tenant_cache.get_or_set(f"ready.{entity}", _load, timeout=300, namespace='search', using=using)
+
+
+def search_ids(model, query, limit=None, using=None):
+    """
+    Ranked prefix search over the index of a model.
+
+    Every query term must prefix-match a token of the document. Each term
+    scores the weight of the best token it matches, doubled for an exact
+    match; documents are ordered by the total.
+
+    Args:
+        model: Indexed model class
+        query: Search text as typed by the user
+        limit: Maximum IDs (defaults to MAX_RESULTS)
+        using: Database alias (defaults to the current school database)
+
+    Returns:
+        list: Object IDs, best match first (empty if nothing matches)
+
+    Example:
+        ids = search_ids(Student, 'nak 077')
+    """
+    from schoolara.managers import get_current_db
+
+    terms = _query_terms(query)
+    if not terms:
+        return []
+
+    using = using or get_current_db() or 'default'
+    limit = limit or get_search_settings()['MAX_RESULTS']
+
+    return list(_ranked_matches(model, terms, using).values_list('object_id', flat=True)[:limit])
+
+
+def _ranked_matches(model, terms, using):
+    """
+    Grouped token query matching every term, ordered by score.
+
+    Only documents containing the longest (most selective) term are
+    grouped, so short terms such as "a" or a common prefix do not make the
+    database aggregate the tokens of the whole entity.
+    """
+    from utils.models import SearchToken
+
+    entity = model._meta.label_lower
+    tokens = SearchToken.objects.using(using).filter(entity=entity)
+
+    term_scores = {
+        f"term_{index}": Max(Case(
+            When(token=term, then=F('weight') * 2),
+            When(token__istartswith=term, then=F('weight')),
+            default=Value(None),
+            output_field=IntegerField(),
+        ))
+        for index, term in enumerate(terms)
+    }
+
+    matches = tokens.filter(reduce(or_, (Q(token__istartswith=term) for term in terms)))
+
+    if len(terms) > 1:
+        selective = max(reversed(terms), key=len)
+        matches = matches.filter(
+            object_id__in=tokens.filter(token__istartswith=selective).values('object_id')
+        )
+
+    return matches.values('object_id').annotate(**term_scores).filter(
+        **{f"{name}__isnull": False for name in term_scores}
+    ).annotate(
+        score=reduce(lambda left, right: left + right, (F(name) for name in term_scores))
+    ).order_by('-score', 'object_id')
+
+
+def search_queryset(queryset, query, fallback=None):
+    """
+    Restrict a search view's queryset to the index matches for a query.
+
+    The queryset keeps its select_related/annotations. Up to MAX_RESULTS
+    matches it is ordered by rank; a broader query (e.g. a single letter)
+    is filtered through a subquery and keeps the view's own ordering, so
+    totals are never truncated. When the index of the model has not been
+    built yet the fallback Q (the view's previous __icontains filter) is
+    applied instead.
+
+    Args:
+        queryset: The view's queryset
+        query: Search text
+        fallback: Q used while the index is not available
+
+    Returns:
+        QuerySet: Filtered (and ranked) queryset
+
+    Example:
+        students = search_queryset(students, query, fallback=Q(first_name__icontains=query))
+    """
+    model = queryset.model
+    using = queryset.db
+
+    if not is_index_ready(model, using=using):
+        return queryset.filter(fallback) if fallback is not None else queryset
+
+    terms = _query_terms(query)
+    if not terms:
+        return queryset
+
+    matches = _ranked_matches(model, terms, using)
+    limit = get_search_settings()['MAX_RESULTS']
+    ids = list(matches.values_list('object_id', flat=True)[:limit + 1])
+
+    if not ids:
+        return queryset.none()
+
+    if len(ids) > limit:
+        return queryset.filter(pk__in=matches.order_by().values('object_id'))
+
+    rank = Case(
+        *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ids).order_by(rank)
+
+
+# =============================================================================
+# SIGNALS
+# =============================================================================
+
+def _index_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        index_object(instance)
+    except Exception as e:
+        logger.error(f"Error indexing {sender._meta.label_lower} {instance.pk}: {e}")
+
+
+def _remove_on_delete(sender, instance, **kwargs):
+    try:
+        remove_object(instance)
+    except Exception as e:
+        logger.error(f"Error removing {sender._meta.label_lower} {instance.pk} from search index: {e}")
+
+
+def connect_signals():
+    """Connect index maintenance to every model in SEARCH_INDEXES."""
+    for entity in SEARCH_INDEXES:
+        model = apps.get_model(entity)
+        post_save.connect(_index_on_save, sender=model, dispatch_uid=f"search_index_save_{entity}")
+        post_delete.connect(_remove_on_delete, sender=model, dispatch_uid=f"search_index_delete_{entity}")
@@ -0,0 +1,107 @@
+# utils/settings_cache.py
+
+"""
+Tenant-aware cache for singleton settings models.
+
+SchoolConfiguration and FinancialSettings are read on almost every write
+(timestamps, document numbers, payment and invoice signals). Each read used
+to be a get_or_create() round trip, or a cache stored on the worker thread
+that never expired and was shared by every school the thread served.
+
+Entries are keyed by model and school database and kept at two levels
+(utils.cache.LocalTenantCache):
+- A process-local LRU, trusted for LOCAL_TTL seconds without any lookup.
+- The shared tenant cache (utils.cache), holding the instance in a
+  per-school namespace for the model.
+
+save() on a settings model invalidates that namespace (immediately and
+again when the transaction commits), so every process reloads on its next
+check. Other processes may serve the previous values for up to LOCAL_TTL
+seconds; the saving process sees the change at once.
+
+Configuration (settings.SETTINGS_CACHE, all keys optional):
+    LOCAL_TTL: Seconds a local entry is used before re-checking the shared key.
+    SHARED_TTL: Seconds an instance is kept in the shared cache.
+    MAX_ENTRIES: Local LRU size (models x schools).
+"""
+
+import copy
+import logging
+
+from django.conf import settings
+
+from utils.cache import LocalTenantCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SETTINGS = {
+    'LOCAL_TTL': 30,
+    'SHARED_TTL': 3600,
+    'MAX_ENTRIES': 256,
+}
+
+
+def get_cache_settings():
+    """
+    Get the settings cache configuration merged with defaults.
+
+    Returns:
+        dict: LOCAL_TTL, SHARED_TTL and MAX_ENTRIES
+    """
+    config = dict(DEFAULT_CACHE_SETTINGS)
+    config.update(getattr(settings, 'SETTINGS_CACHE', {}) or {})
+    return config
+
+
+_instances = LocalTenantCache(get_cache_settings)
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+def get_cached_settings(model, loader, using=None):
+    """
+    Get a settings singleton for the current school, loading it on a miss.
+
+    Callers receive their own copy, so changing attributes on it never
+    affects other threads. Use the model's get_instance() when the object
+    is going to be edited and saved.
+
+    Args:
+        model: Settings model class (used for the cache key)
+        loader: Callable returning the instance (e.g. model.get_instance)
+        using: Database alias (defaults to the current school database)
+
+    Returns:
+        Model instance
+
+    Example:
+        settings = get_cached_settings(FinancialSettings, FinancialSettings.get_instance)
+    """
+    return copy.copy(_instances.get_or_load('instance', loader, _namespace(model), using))
+
+
+def invalidate_settings(model, using=None):
+    """
+    Invalidate a cached settings singleton in every process.
+
+    Bumps the model's cache namespace now and again when the surrounding
+    transaction commits, so a process reloading in between cannot keep the
+    old row.
+
+    Args:
+        model: Settings model class
+        using: Database alias (defaults to the current school database)
+    """
+    _instances.invalidate(_namespace(model), using)
+    logger.debug(f"Invalidated cached {model._meta.label_lower}")
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def _namespace(model):
+    return f"settings.{model._meta.label_lower}"
+
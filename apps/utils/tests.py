@@ -1,3 +1,165 @@
-from django.test import TestCase
+import uuid
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from schoolara.managers import DatabaseContext, get_current_db
+
+from . import audit_archive
+from .cache import LocalTenantCache
+from .deferred_totals import DeferredTotals, ItemTotals
+from .exports import bind_database, stream_csv_response
+
+
+class StreamedExportDatabaseTests(SimpleTestCase):
+
+    def rows(self):
+        yield [get_current_db()]
+
+    def test_csv_response_is_streamed_from_the_request_database(self):
+        with DatabaseContext('atepi_palabek'):
+            response = stream_csv_response(self.rows(), 'export.csv', headers=['db'])
+
+        self.assertIsNone(get_current_db())
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(body.split(), ['db', 'atepi_palabek'])
+        self.assertIsNone(get_current_db())
+
+    def test_bind_database_without_context_leaves_rows_unchanged(self):
+        self.assertEqual(list(bind_database(self.rows())), [[None]])
+
+
+class ItemTotalsTests(SimpleTestCase):
+
+    def setUp(self):
+        from fees.models import FeeInvoice, FeeInvoiceItem
+
+        self.FeeInvoice = FeeInvoice
+        self.totals = ItemTotals(
+            'invoice',
+            ('amount', 'tax_amount', 'final_amount'),
+            ['subtotal_amount', 'tax_amount', 'total_amount', 'balance']
+        )
+        self.item = FeeInvoiceItem(
+            invoice_id=uuid.uuid4(),
+            amount=Decimal('100.00'),
+            tax_amount=Decimal('18.00'),
+            final_amount=Decimal('118.00'),
+        )
+
+    def save(self, created):
+        self.totals.pre_save(self.item)
+        self.totals.post_save(self.item, created)
+        self.item._state.adding = False
+        self.item._snapshot_loaded_values()
+
+    def test_new_item_adds_its_amounts(self):
+        with mock.patch.object(self.FeeInvoice, 'adjust_totals') as adjust_totals:
+            self.save(created=True)
+
+        adjust_totals.assert_called_once_with(
+            self.item.invoice_id, Decimal('100.00'), Decimal('18.00'), Decimal('118.00')
+        )
+
+    def test_updated_item_applies_only_the_difference(self):
+        with mock.patch.object(self.FeeInvoice, 'adjust_totals') as adjust_totals:
+            self.save(created=True)
+            self.item.amount = Decimal('150.00')
+            self.item.final_amount = Decimal('168.00')
+            self.save(created=False)
+
+        adjust_totals.assert_called_with(
+            self.item.invoice_id, Decimal('50.00'), Decimal('0.00'), Decimal('50.00')
+        )
+
+    def test_moved_item_leaves_old_parent(self):
+        old_invoice_id = self.item.invoice_id
+        with mock.patch.object(self.FeeInvoice, 'adjust_totals') as adjust_totals:
+            self.save(created=True)
+            self.item.invoice_id = uuid.uuid4()
+            self.save(created=False)
+
+        self.assertEqual(adjust_totals.call_args_list[1:], [
+            mock.call(old_invoice_id, Decimal('-100.00'), Decimal('-18.00'), Decimal('-118.00')),
+            mock.call(self.item.invoice_id, Decimal('100.00'), Decimal('18.00'), Decimal('118.00')),
+        ])
+
+    def test_deferred_block_records_parent_instead(self):
+        with mock.patch.object(self.FeeInvoice, 'adjust_totals') as adjust_totals:
+            with mock.patch.object(self.FeeInvoice.objects, 'filter') as parents:
+                with DeferredTotals():
+                    self.save(created=True)
+                    self.totals.post_delete(self.item)
+
+        self.assertFalse(adjust_totals.called)
+        parents.assert_called_once_with(pk=self.item.invoice_id)
+
+
+class ArchiveDryRunTests(SimpleTestCase):
+
+    @mock.patch('utils.audit_rollups.get_activity_start')
+    @mock.patch('utils.audit_rollups.rollup_audit_activity')
+    @mock.patch.object(audit_archive, 'get_log_model')
+    def test_dry_run_writes_no_rollups(self, get_log_model, rollup_audit_activity, get_activity_start):
+        get_activity_start.return_value = timezone.now()
+        old_rows = get_log_model.return_value.objects.using.return_value.filter.return_value
+        old_rows.count.return_value = 3
+        old_rows.dates.return_value = []
+
+        result = audit_archive.archive_audit_logs('audit', 'atepi_palabek', dry_run=True)
+
+        self.assertEqual(result['archived'], 3)
+        self.assertFalse(rollup_audit_activity.called)
+        self.assertFalse(old_rows.delete.called)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class LocalTenantCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.config = {'LOCAL_TTL': 30, 'SHARED_TTL': 60, 'MAX_ENTRIES': 2}
+        self.cache = LocalTenantCache(lambda: self.config)
+        self.loads = []
+        caches['default'].clear()
+
+    def get(self, key, using='atepi_palabek'):
+        def loader():
+            self.loads.append((using, key))
+            return f"{using}:{key}"
+        return self.cache.get_or_load(key, loader, 'test', using)
+
+    def test_loads_once_per_school(self):
+        self.assertEqual(self.get('year'), 'atepi_palabek:year')
+        self.assertEqual(self.get('year'), 'atepi_palabek:year')
+        self.assertEqual(self.get('year', using='other_school'), 'other_school:year')
+
+        self.assertEqual(self.loads, [('atepi_palabek', 'year'), ('other_school', 'year')])
+
+    def test_invalidate_reloads_only_that_school(self):
+        self.get('year')
+        self.get('year', using='other_school')
+
+        with mock.patch('utils.cache.transaction.on_commit') as on_commit:
+            self.cache.invalidate('test', 'atepi_palabek')
+        on_commit.assert_called_once()
+        self.get('year')
+        self.get('year', using='other_school')
+
+        self.assertEqual(self.loads.count(('atepi_palabek', 'year')), 2)
+        self.assertEqual(self.loads.count(('other_school', 'year')), 1)
+
+    def test_expired_local_entry_is_reused_while_shared_key_is_unchanged(self):
+        self.config['LOCAL_TTL'] = 0
+        self.get('year')
+        self.get('year')
+
+        self.assertEqual(len(self.loads), 1)
+
+    def test_local_entries_are_bounded(self):
+        for key in ('a', 'b', 'c'):
+            self.get(key)
+
+        self.assertEqual(len(self.cache._entries), 2)
@@ -1,6 +1,7 @@
 # utils/utils.py
 
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.db.models import Count, Sum
 
 # =============================================================================
 # CORE UTILITY HELPER FUNCTIONS
@@ -27,4 +28,352 @@ def parse_filters(request, filter_keys):
     for key in filter_keys:
         value = request.GET.get(key, '').strip()
         filters[key] = value if value else None
-    return filters
\ No newline at end of file
+    return filters
+
+
+# =============================================================================
+# SEARCH STATS
+# =============================================================================
+
+STATS_ALIAS_PREFIX = 'stat_'
+
+
+def get_search_stats(queryset, paginator=None, counts=None, distinct=None,
+                     sums=None, aggregates=None):
+    """
+    Compute the stats panel of a search view in a single aggregate query.
+
+    Replaces one queryset.filter(...).count() per stat with conditional
+    aggregates (COUNT(...) FILTER (WHERE ...), or CASE WHEN on databases
+    without FILTER) over the already filtered queryset. The total comes
+    from the paginator, which has already counted the queryset.
+
+    Args:
+        queryset: The filtered search queryset
+        paginator: Paginator over the same queryset (its count is reused)
+        counts: {name: Q} - rows matching the condition
+        distinct: {name: field or (field, Q)} - distinct values of a field,
+                  optionally only among rows matching Q
+        sums: {name: field or (field, Q)} - sum of a field
+        aggregates: {name: aggregate expression} - anything else (Avg...)
+
+    Sums and aggregates over no rows are returned as 0, like the
+    "aggregate(...)[...] or 0" idiom they replace.
+
+    Returns:
+        dict: {'total': int, name: value, ...}
+
+    Example:
+        stats = get_search_stats(students, paginator, counts={
+            'active': Q(enrollment_status='ACTIVE'),
+            'male': Q(gender='M'),
+        }, sums={'balance': 'current_balance'})
+    """
+    expressions = {}
+
+    for name, condition in (counts or {}).items():
+        expressions[name] = Count('pk', filter=condition)
+
+    for name, spec in (distinct or {}).items():
+        field, condition = spec if isinstance(spec, tuple) else (spec, None)
+        expressions[name] = Count(field, filter=condition, distinct=True)
+
+    for name, spec in (sums or {}).items():
+        field, condition = spec if isinstance(spec, tuple) else (spec, None)
+        expressions[name] = Sum(field, filter=condition)
+
+    expressions.update(aggregates or {})
+
+    if paginator is None:
+        expressions['total'] = Count('pk')
+
+    # Aliased so a stat may share its name with a model field (e.g. total_amount)
+    results = {}
+    if expressions:
+        aliased = queryset.order_by().aggregate(**{
+            f"{STATS_ALIAS_PREFIX}{name}": expression
+            for name, expression in expressions.items()
+        })
+        results = {name: aliased[f"{STATS_ALIAS_PREFIX}{name}"] for name in expressions}
+
+    for name in list(sums or {}) + list(aggregates or {}):
+        if results[name] is None:
+            results[name] = 0
+
+    stats = {'total': paginator.count if paginator is not None else results.pop('total')}
+    stats.update(results)
+    return stats
+
+
+# =============================================================================
+# CURSOR PAGINATION
+# =============================================================================
+
+# Rows counted at most when an approximate count is requested
+APPROXIMATE_COUNT_LIMIT = 10000
+
+CURSOR_SIGNING_SALT = 'utils.cursor_pagination'
+
+
+class CursorPage:
+    """
+    One page of a CursorPaginator.
+
+    Iterates like a Django Page. Instead of page numbers it exposes opaque
+    next_cursor/previous_cursor tokens for the 'cursor' query parameter.
+    """
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self.object_list)} items>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset paginator for large, append-mostly tables (audit logs, ledgers).
+
+    Instead of OFFSET/LIMIT, each page is fetched with a WHERE condition on
+    the ordering columns of the last row seen, e.g.
+
+        timestamp < t OR (timestamp = t AND id < i)
+
+    so page 50,000 costs the same index range scan as page 1. The ordering
+    must be on plain (possibly related) fields; the primary key is appended
+    as a tie-breaker when missing.
+
+    The count is only computed when used. With approximate_count it reads
+    the table statistics (MySQL, unfiltered querysets) or counts at most
+    APPROXIMATE_COUNT_LIMIT rows; count_is_exact tells which.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None, approximate_count=False,
+                 count_limit=APPROXIMATE_COUNT_LIMIT):
+        ordering = list(ordering or queryset.query.order_by or ['-pk'])
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            ordering.append('-pk' if ordering[0].startswith('-') else 'pk')
+
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = ordering
+        self.approximate_count = approximate_count
+        self.count_limit = count_limit
+        self.count_is_exact = True
+        self._count = None
+
+    # -------------------------------------------------------------------------
+    # COUNTING
+    # -------------------------------------------------------------------------
+
+    @property
+    def count(self):
+        """Total rows (capped or estimated when approximate_count is set)."""
+        if self._count is None:
+            if self.approximate_count:
+                self._count, self.count_is_exact = self._approximate()
+            else:
+                self._count = self.queryset.count()
+        return self._count
+
+    @property
+    def num_pages(self):
+        return max(1, -(-self.count // self.per_page))
+
+    def _approximate(self):
+        """Estimate the count without scanning more than count_limit rows."""
+        from django.db import connections
+
+        queryset = self.queryset
+        connection = connections[queryset.db]
+
+        if connection.vendor == 'mysql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                    [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] is not None and row[0] > self.count_limit:
+                return int(row[0]), False
+
+        count = queryset.order_by()[:self.count_limit + 1].count()
+        if count > self.count_limit:
+            return self.count_limit, False
+        return count, True
+
+    # -------------------------------------------------------------------------
+    # PAGES
+    # -------------------------------------------------------------------------
+
+    def page(self, cursor=None):
+        """
+        Get the page after (or before) a cursor.
+
+        Args:
+            cursor: Token from CursorPage.next_cursor/previous_cursor, or
+                None for the first page. Invalid tokens give the first page.
+
+        Returns:
+            CursorPage
+        """
+        position, backwards = self._decode(cursor)
+
+        ordering = self.ordering
+        if backwards:
+            ordering = [_reverse_ordering(field) for field in ordering]
+
+        queryset = self.queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(_keyset_condition(ordering, position))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or backwards:
+                next_cursor = self._encode(rows[-1], backwards=False)
+            if (has_more and backwards) or (position is not None and not backwards):
+                previous_cursor = self._encode(rows[0], backwards=True)
+
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+    def _encode(self, obj, backwards):
+        from django.core import signing
+
+        values = [
+            _serialize_cursor_value(_resolve_ordering_value(obj, field.lstrip('-')))
+            for field in self.ordering
+        ]
+        return signing.dumps({'v': values, 'b': backwards}, salt=CURSOR_SIGNING_SALT, compress=True)
+
+    def _decode(self, cursor):
+        """Return (position, backwards), or (None, False) for the first page."""
+        from django.core import signing
+
+        if not cursor:
+            return None, False
+
+        try:
+            payload = signing.loads(cursor, salt=CURSOR_SIGNING_SALT)
+            values = payload['v']
+            if len(values) != len(self.ordering):
+                return None, False
+            position = [
+                _ordering_field(self.queryset.model, field.lstrip('-')).to_python(value)
+                if value is not None else None
+                for field, value in zip(self.ordering, values)
+            ]
+            return position, bool(payload.get('b'))
+        except Exception:
+            return None, False
+
+
+def paginate_queryset_by_cursor(request, queryset, per_page=20, ordering=None,
+                                approximate_count=False):
+    """
+    Keyset-paginate a queryset from the request's 'cursor' parameter.
+
+    Drop-in for paginate_queryset() on very large tables ordered by a
+    timestamp: returns (page, paginator) where page iterates like a Django
+    Page and paginator.count can be passed to get_search_stats().
+
+    Args:
+        request: HTTP request object
+        queryset: Django queryset to paginate
+        per_page: Items per page (default: 20)
+        ordering: Ordering fields (default: the queryset's ordering)
+        approximate_count: Cap/estimate paginator.count instead of COUNT(*)
+
+    Returns:
+        tuple: (CursorPage, CursorPaginator)
+
+    Example:
+        logs_page, paginator = paginate_queryset_by_cursor(
+            request, logs, ordering=('-timestamp', '-id'), approximate_count=True
+        )
+    """
+    paginator = CursorPaginator(
+        queryset, per_page, ordering=ordering, approximate_count=approximate_count
+    )
+    return paginator.page(request.GET.get('cursor')), paginator
+
+
+def _reverse_ordering(field):
+    return field[1:] if field.startswith('-') else f"-{field}"
+
+
+def _ordering_field(model, path):
+    """Resolve an ordering path ('pk', 'journal_entry__entry_date') to its field."""
+    field = None
+    for name in path.split('__'):
+        field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        if field.is_relation:
+            model = field.related_model
+    return field
+
+
+def _resolve_ordering_value(obj, path):
+    value = obj
+    for name in path.split('__'):
+        value = getattr(value, name)
+    return value
+
+
+def _serialize_cursor_value(value):
+    from datetime import date, datetime
+    from decimal import Decimal
+    import uuid
+
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def _keyset_condition(ordering, position):
+    """
+    Rows strictly after position in the given ordering.
+
+    (a, b, c) > (x, y, z) expands to
+    a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z),
+    with < for descending fields.
+    """
+    from django.db.models import Q
+
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, position):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    return condition
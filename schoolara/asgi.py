@@ -3,6 +3,11 @@ ASGI config for schoolara project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The tenant, audit and timezone context is kept in contextvars, so
+concurrent requests on one event loop do not share a school database. Set
+SCHOOLARA_ASYNC_HTMX_VIEWS=1 to serve the HTMX search and stats endpoints
+as async views (see utils/async_views.py).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -0,0 +1,16 @@
+# db/mysql/base.py
+
+"""
+MySQL backend with per-school connection budgets, idle-only health checks
+and pool metrics (see schoolara.db.pool).
+
+Use ENGINE 'schoolara.db.mysql' in DATABASES.
+"""
+
+from django.db.backends.mysql import base
+
+from schoolara.db.pool import PooledConnectionMixin
+
+
+class DatabaseWrapper(PooledConnectionMixin, base.DatabaseWrapper):
+    pass
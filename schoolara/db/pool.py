@@ -0,0 +1,315 @@
+# db/pool.py
+
+"""
+Persistent connections with per-school budgets and pool metrics.
+
+Django keeps one connection per thread and database alias. With
+CONN_MAX_AGE = 0 (the old configuration) every request opened a new MySQL
+connection to its school database, a noticeable share of the latency of
+small HTMX requests. Connections are now persistent (CONN_MAX_AGE) and
+PooledConnectionMixin, used by the schoolara.db.mysql backend, adds:
+
+- Health checks on checkout after idle: a reused connection is pinged at
+  its first use in a request only when it has been idle for more than
+  HEALTH_CHECK_IDLE seconds (Django pings on every request with
+  CONN_HEALTH_CHECKS). A failed ping reconnects transparently.
+- Connection budgets: at most MAX_CONNECTIONS connections to one school
+  database are checked out at a time in a process. A connection is checked
+  out from its first query in a request until the request finishes
+  (close_old_connections) or the connection is closed; idle persistent
+  connections of threads between requests hold no slot. A thread needing
+  a slot waits up to TIMEOUT seconds.
+- Metrics per database alias: connects, checkouts (reuses of a persistent
+  connection), health checks, reconnects, waits, wait time, timeouts,
+  currently open and currently checked out connections (get_pool_metrics()).
+
+Routing is unchanged: SchoolRouter still picks the alias, the backend only
+manages the connections behind it.
+
+Configuration (settings.DATABASE_POOL, all keys optional):
+    MAX_CONNECTIONS: Checked out connections per school database
+                     (None: unlimited).
+    DATABASE_LIMITS: Per-alias budgets overriding MAX_CONNECTIONS
+                     ('default' is unlimited unless listed here).
+    TIMEOUT: Seconds to wait for a connection within the budget.
+    HEALTH_CHECK_IDLE: Idle seconds after which a connection is pinged.
+
+Example:
+    DATABASES = {
+        'atepi_palabek': {
+            'ENGINE': 'schoolara.db.mysql',
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            ...
+        },
+    }
+
+    from schoolara.db.pool import get_pool_metrics
+    get_pool_metrics('atepi_palabek')
+    # {'connects': 12, 'checkouts': 4810, 'reconnects': 1, 'in_use': 2, ...}
+"""
+
+import logging
+import threading
+import time
+import weakref
+from collections import Counter
+
+from django.conf import settings
+from django.db.utils import OperationalError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SETTINGS = {
+    'MAX_CONNECTIONS': 10,
+    'DATABASE_LIMITS': {},
+    'TIMEOUT': 10,
+    'HEALTH_CHECK_IDLE': 30,
+}
+
+METRIC_NAMES = (
+    'connects', 'checkouts', 'health_checks', 'reconnects',
+    'waits', 'wait_time', 'timeouts', 'open', 'in_use',
+)
+
+# {alias: ConnectionBudget}
+_budgets = {}
+# {alias: Counter of METRIC_NAMES}
+_metrics = {}
+_pool_lock = threading.Lock()
+
+
+def get_pool_settings():
+    """
+    Get the connection pool configuration merged with defaults.
+
+    Returns:
+        dict: MAX_CONNECTIONS, DATABASE_LIMITS, TIMEOUT and HEALTH_CHECK_IDLE
+    """
+    config = dict(DEFAULT_POOL_SETTINGS)
+    config.update(getattr(settings, 'DATABASE_POOL', {}) or {})
+    return config
+
+
+# =============================================================================
+# BUDGETS
+# =============================================================================
+
+class ConnectionBudget:
+    """
+    Checked out connections of one database alias in this process.
+
+    acquire() blocks while the budget is used up; release() frees a slot.
+    opened() / closed() count the open connections (metrics only).
+    """
+
+    def __init__(self, alias, limit):
+        self.alias = alias
+        self.limit = limit
+        self.in_use = 0
+        self.open = 0
+        self.waiting = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, timeout):
+        """
+        Take a slot, waiting up to timeout seconds.
+
+        Returns:
+            float or None: Seconds waited (0 without waiting), or None on timeout
+        """
+        with self.condition:
+            if self.limit is None or self.in_use < self.limit:
+                self.in_use += 1
+                return 0
+
+            started = time.monotonic()
+            self.waiting += 1
+            try:
+                available = self.condition.wait_for(lambda: self.in_use < self.limit, timeout)
+            finally:
+                self.waiting -= 1
+
+            if not available:
+                return None
+            self.in_use += 1
+            return time.monotonic() - started
+
+    def release(self):
+        with self.condition:
+            self.in_use = max(self.in_use - 1, 0)
+            self.condition.notify()
+
+    def opened(self):
+        with self.condition:
+            self.open += 1
+
+    def closed(self):
+        with self.condition:
+            self.open = max(self.open - 1, 0)
+
+
+def get_budget(alias):
+    """
+    Get the connection budget of a database alias.
+
+    Args:
+        alias (str): Database alias
+
+    Returns:
+        ConnectionBudget
+    """
+    budget = _budgets.get(alias)
+    if budget is None:
+        config = get_pool_settings()
+        limits = config['DATABASE_LIMITS'] or {}
+        if alias in limits:
+            limit = limits[alias]
+        else:
+            limit = None if alias == 'default' else config['MAX_CONNECTIONS']
+
+        with _pool_lock:
+            budget = _budgets.setdefault(alias, ConnectionBudget(alias, limit))
+    return budget
+
+
+# =============================================================================
+# METRICS
+# =============================================================================
+
+def record(alias, metric, value=1):
+    """Add to a pool metric of an alias."""
+    with _pool_lock:
+        _metrics.setdefault(alias, Counter())[metric] += value
+
+
+def get_pool_metrics(alias=None):
+    """
+    Get the pool metrics of this process.
+
+    Args:
+        alias (str): One database alias (default: all)
+
+    Returns:
+        dict: {metric: value} for one alias, or {alias: {metric: value}}
+    """
+    with _pool_lock:
+        snapshot = {
+            name: {metric: counter.get(metric, 0) for metric in METRIC_NAMES}
+            for name, counter in _metrics.items()
+        }
+
+    for name, values in snapshot.items():
+        budget = _budgets.get(name)
+        values['open'] = budget.open if budget else 0
+        values['in_use'] = budget.in_use if budget else 0
+        values['wait_time'] = round(values['wait_time'], 3)
+
+    if alias is not None:
+        return snapshot.get(alias, dict.fromkeys(METRIC_NAMES, 0))
+    return snapshot
+
+
+# =============================================================================
+# DATABASE WRAPPER MIXIN
+# =============================================================================
+
+class PooledConnectionMixin:
+    """
+    DatabaseWrapper mixin adding budgets, idle-only health checks and metrics.
+
+    Combine with a backend's DatabaseWrapper:
+
+        class DatabaseWrapper(PooledConnectionMixin, mysql.DatabaseWrapper):
+            pass
+    """
+
+    _budget_slot = None
+    _open_slot = None
+    _last_used = 0
+
+    def get_new_connection(self, conn_params):
+        budget = get_budget(self.alias)
+
+        self._checkout()
+        try:
+            connection = super().get_new_connection(conn_params)
+        except Exception:
+            self._checkin()
+            raise
+
+        # Counted until _close(), or until the wrapper is garbage collected
+        budget.opened()
+        self._open_slot = weakref.finalize(self, budget.closed)
+        record(self.alias, 'connects')
+        self._last_used = time.monotonic()
+        return connection
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._checkin()
+            if self._open_slot is not None:
+                self._open_slot()
+                self._open_slot = None
+
+    def _cursor(self, name=None):
+        # A persistent connection reused in a new request is checked out again
+        if self.connection is not None:
+            self._checkout()
+        cursor = super()._cursor(name)
+        self._last_used = time.monotonic()
+        return cursor
+
+    def close_if_unusable_or_obsolete(self):
+        """Close obsolete connections and check in the others (end of a request)."""
+        super().close_if_unusable_or_obsolete()
+        if not self.in_atomic_block:
+            self._checkin()
+
+    def _checkout(self):
+        """Take a budget slot for this connection, waiting up to TIMEOUT."""
+        if self._budget_slot is not None:
+            return
+
+        budget = get_budget(self.alias)
+        timeout = get_pool_settings()['TIMEOUT']
+
+        waited = budget.acquire(timeout)
+        if waited is None:
+            record(self.alias, 'timeouts')
+            raise OperationalError(
+                f"No connection to '{self.alias}' available within {timeout}s "
+                f"(budget of {budget.limit} connections in use)"
+            )
+        if waited:
+            record(self.alias, 'waits')
+            record(self.alias, 'wait_time', waited)
+            logger.debug(f"Waited {waited:.3f}s for a connection to {self.alias}")
+
+        # Released by _checkin(), or when the wrapper is garbage collected
+        # (e.g. its thread ended) while checked out
+        self._budget_slot = weakref.finalize(self, budget.release)
+
+    def _checkin(self):
+        if self._budget_slot is not None:
+            self._budget_slot()
+            self._budget_slot = None
+
+    def close_if_health_check_failed(self):
+        """Ping a reused connection at its first use in a request, if it was idle."""
+        if self.connection is None or self.health_check_done:
+            return
+
+        record(self.alias, 'checkouts')
+        idle = time.monotonic() - self._last_used
+        if not self.health_check_enabled or idle < get_pool_settings()['HEALTH_CHECK_IDLE']:
+            self.health_check_done = True
+            return
+
+        record(self.alias, 'health_checks')
+        super().close_if_health_check_failed()
+        if self.connection is None:
+            record(self.alias, 'reconnects')
+            logger.info(f"Reconnecting to {self.alias} after a failed health check")
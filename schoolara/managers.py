@@ -1,38 +1,48 @@
 # managers.py
 
 from django.db import models, connections, router
-from django.conf import settings
-from threading import local
+from contextvars import ContextVar
 import logging
 
+from .tenants import ensure_tenant_database, get_school_databases, touch_tenant_connection
+
 logger = logging.getLogger(__name__)
 
-_thread_locals = local()
+# Current school database of the running request or task. A ContextVar
+# rather than a thread-local: async requests served concurrently on one
+# event-loop thread each keep their own, and asgiref carries it into the
+# threads that run sync code for them.
+_current_db = ContextVar('current_db', default=None)
 
 
 def get_current_db():
-    """Get the current database name for this thread"""
-    return getattr(_thread_locals, 'current_db', None)
+    """Get the current database name for this context"""
+    return _current_db.get()
 
 
 def set_current_db(db):
-    """Set the current database name for this thread"""
+    """
+    Set the current database name for this context (request, task or thread).
+    
+    School databases missing from settings are registered from the School
+    table on first use (see schoolara.tenants).
+    """
     if not db:
         return False
     
-    if db not in settings.DATABASES:
+    if not ensure_tenant_database(db):
         logger.warning(f"Database '{db}' not found in settings")
         return False
     
-    _thread_locals.current_db = db
+    _current_db.set(db)
+    touch_tenant_connection(db)
     logger.debug(f"Set current_db to: {db}")
     return True
 
 
 def clear_current_db():
     """Clear the current database setting"""
-    if hasattr(_thread_locals, 'current_db'):
-        delattr(_thread_locals, 'current_db')
+    _current_db.set(None)
 
 
 class DatabaseContext:
@@ -138,12 +148,8 @@ def execute_on_all_school_databases(func, *args, **kwargs):
         # Returns: {'school_abc': 150, 'school_xyz': 200}
     """
     results = {}
-    school_dbs = [
-        db for db in settings.DATABASES.keys()
-        if db.startswith('school_')
-    ]
     
-    for db in school_dbs:
+    for db in get_school_databases():
         try:
             with DatabaseContext(db):
                 results[db] = func(*args, **kwargs)
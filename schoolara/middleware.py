@@ -13,19 +13,26 @@ This middleware:
 Key Features:
 - Database routing based on user's school assignment
 - Direct SQL queries for timezone to avoid model layer recursion
+- Per-session tenant record (school database, timezone, role, school and
+  theme display fields) shared with the context processors and the
+  permission backend, so an authenticated page view makes no extra queries
+  against 'default'
 - Comprehensive caching to minimize database queries
 - Safe fallbacks for all error conditions
 - Superuser override capabilities for administration
 """
 
 import logging
-from django.core.cache import cache
+import uuid
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.apps import apps
 from django.contrib import messages
 from django.conf import settings
 from django.db import connections
 
 from .managers import get_current_db, set_current_db, clear_current_db
+from .tenants import ensure_tenant_database, release_tenant_connections
+from utils.cache import tenant_cache
 
 logger = logging.getLogger(__name__)
 
@@ -52,9 +59,23 @@ class SchoolDatabaseMiddleware:
     
     # Cache timeout (1 hour)
     CACHE_TIMEOUT = 3600
+    
+    # Routing lookups are not school specific: one namespace on 'default'
+    ROUTING_CACHE = {'namespace': 'routing', 'using': 'default'}
+    
+    # Session key of the tenant resolution record
+    TENANT_RECORD_SESSION_KEY = '_tenant_record'
+
+    # Sync and async capable: the database context is a ContextVar, so
+    # concurrent async requests on one event-loop thread keep their own
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
         self.load_school_databases()
 
     # ==========================================================================
@@ -88,15 +109,53 @@ class SchoolDatabaseMiddleware:
         4. Process request
         5. Restore original database state
         """
+        if self.async_mode:
+            return self.__acall__(request)
+
+        original_db = self.enter_request(request)
+
+        # Process the request
+        response = self.get_response(request)
+
+        self.exit_request(request, original_db)
+        return response
+
+    async def __acall__(self, request):
+        """
+        Async variant of __call__.
+        
+        Resolution needs the session and the database, so it runs in a
+        worker thread; the database context it sets is carried back to this
+        request's task by asgiref.
+        """
+        original_db = await sync_to_async(self.enter_request)(request)
+
+        response = await self.get_response(request)
+
+        await sync_to_async(self.exit_request)(request, original_db)
+        return response
+
+    def enter_request(self, request):
+        """
+        Set the database context and timezone of a request (steps 1-3).
+        
+        Returns:
+            str or None: The database context before the request
+        """
         # Save original database state
         original_db = get_current_db()
         request.original_db = original_db
 
         try:
+            # Resolve the user's school once per session (see get_tenant_record)
+            record = self.get_tenant_record(request) if request.user.is_authenticated else None
+
             # Determine which database to use
             target_db = self.determine_database(request)
 
-            if target_db and self.ensure_database_available(target_db):
+            # Connections are opened lazily by the first query, so only the
+            # alias is validated here (no connection round trip per request)
+            if target_db and self.is_valid_database(target_db):
                 # Set database context if different from original
                 if target_db != original_db:
                     set_current_db(target_db)
@@ -107,7 +166,10 @@ class SchoolDatabaseMiddleware:
                 # ⭐ CRITICAL: Set timezone in request context
                 # This prevents recursion in BaseModel.save() by making
                 # timezone available without querying SchoolConfiguration model
-                request.school_timezone = self.get_school_timezone_for_db(target_db)
+                if record and record['db_alias'] == target_db:
+                    request.school_timezone = record['timezone']
+                else:
+                    request.school_timezone = self.get_school_timezone_for_db(target_db)
                 logger.debug(f"Set timezone to: {request.school_timezone}")
             else:
                 # Fallback to default database
@@ -123,16 +185,18 @@ class SchoolDatabaseMiddleware:
             request.current_db = 'default'
             request.school_timezone = 'Africa/Kampala'
 
-        # Process the request
-        response = self.get_response(request)
+        return original_db
 
+    def exit_request(self, request, original_db):
+        """Restore the database context after a request (step 5)."""
         # Restore original database context
         if original_db:
             set_current_db(original_db)
         else:
             clear_current_db()
 
-        return response
+        # Close this worker thread's idle and least recently used tenant connections
+        release_tenant_connections()
 
     # ==========================================================================
     # DATABASE DETERMINATION LOGIC
@@ -188,8 +252,8 @@ class SchoolDatabaseMiddleware:
         Returns:
             str: Database name for user's school
         """
-        # Get user's school database
-        user_db = self.get_user_school_database(request.user)
+        # Get user's school database from the session's tenant record
+        user_db = self.get_tenant_record(request)['db_alias']
 
         # Superusers can override their school's database
         if request.user.is_superuser:
@@ -199,70 +263,190 @@ class SchoolDatabaseMiddleware:
         return self.handle_regular_user_access(request, user_db)
 
     # ==========================================================================
-    # USER → SCHOOL → DATABASE RESOLUTION
+    # TENANT RESOLUTION RECORD
     # ==========================================================================
 
-    def get_user_school_database(self, user):
+    def get_tenant_record(self, request):
         """
-        Get database name for user's school.
+        Get the tenant resolution record of the request's user.
+        
+        The record holds everything the middleware, the context processors
+        and PermissionBackend need about the user's school: database alias,
+        timezone, role and school/theme display fields. It is built with a
+        single query (profile + school) and kept in the session, together
+        with a stamp stored in the routing cache. While the stamp matches,
+        requests reuse the record without touching 'default'.
+        
+        Invalidation: clear_user_cache() replaces the user's stamp,
+        clear_database_cache() replaces every stamp. Stamps also expire after
+        CACHE_TIMEOUT.
+        
+        The record is also set as request.tenant_record and
+        request.user.tenant_record.
+        
+        Args:
+            request: HTTP request with an authenticated user
+            
+        Returns:
+            dict: Tenant record (see build_tenant_record)
+        """
+        record = getattr(request, 'tenant_record', None)
+        if record is not None:
+            return record
+        
+        user = request.user
+        stamp = self.get_tenant_record_stamp(user.pk)
+        session = getattr(request, 'session', None)
+        
+        record = session.get(self.TENANT_RECORD_SESSION_KEY) if session is not None else None
+        if not record or record.get('stamp') != stamp or record.get('user_id') != str(user.pk):
+            record = self.build_tenant_record(user, stamp)
+            if session is not None:
+                session[self.TENANT_RECORD_SESSION_KEY] = record
+        
+        request.tenant_record = record
+        user.tenant_record = record
+        return record
+
+    def build_tenant_record(self, user, stamp=None):
+        """
+        Resolve a user's school with one query against 'default'.
         
         This method:
-        1. Checks user has a profile with school assigned
+        1. Loads the user's profile with its school
         2. Verifies school has active subscription
         3. Validates database exists in settings
-        4. Returns database alias or None
+        4. Adds timezone, role and display fields
         
         CRITICAL: School model is ALWAYS queried from 'default' database!
         
         Args:
             user: Django User object
+            stamp: Version stamp to record (see get_tenant_record_stamp)
             
         Returns:
-            str or None: Database alias or None if not found
-        """
+            dict: JSON-serializable record; db_alias is None when the user
+                  has no usable school
+        """
+        record = {
+            'stamp': stamp,
+            'user_id': str(user.pk),
+            'has_profile': False,
+            'db_alias': None,
+            'timezone': 'Africa/Kampala',
+            'role': None,
+            'photo_url': None,
+            'school_id': None,
+            'school_name': None,
+            'school_display_name': None,
+            'theme': {},
+        }
+        
         try:
-            # Check if user has profile
-            if not hasattr(user, 'profile'):
+            UserProfile = apps.get_model('accounts', 'UserProfile')
+            profile = UserProfile.objects.using('default').select_related('school').filter(
+                user_id=user.pk
+            ).first()
+            
+            if profile is None:
                 logger.warning(f"User {user.username} has no profile")
-                return None
-
-            profile = user.profile
+                return record
+            
+            record.update({
+                'has_profile': True,
+                'role': profile.role,
+                'photo_url': profile.photo.url if profile.photo else None,
+                'theme': {
+                    'fixed_header': profile.fixed_header,
+                    'fixed_sidebar': profile.fixed_sidebar,
+                    'fixed_footer': profile.fixed_footer,
+                    'header_class': profile.header_class,
+                    'sidebar_class': profile.sidebar_class,
+                    'page_tabs_style': profile.page_tabs_style,
+                    'theme_color': profile.theme_color,
+                },
+            })
+            
             school = profile.school
-
             if not school:
                 logger.warning(f"User {user.username} has no school assigned")
-                return None
-
-            # Check cache first
-            cache_key = f"user_school_db_{user.id}"
-            cached_db = cache.get(cache_key)
-            if cached_db:
-                return cached_db
-
+                return record
+            
+            record.update({
+                'school_id': str(school.pk),
+                'school_name': str(school),
+                'school_display_name': school.display_name,
+            })
+            
             # Verify school has active subscription
             if not school.is_active_subscription:
                 logger.warning(f"Inactive subscription for school: {school.full_name}")
-                return None
-
-            # Get database alias from school
+                return record
+            
+            # Verify database exists (registered on first use, see schoolara.tenants)
             db_alias = school.database_alias
-
-            # Verify database exists in settings
-            if db_alias not in settings.DATABASES:
+            if not ensure_tenant_database(db_alias):
                 logger.error(
                     f"Database alias '{db_alias}' not found in settings for school: {school.full_name}"
                 )
-                return None
+                return record
+            
+            record['db_alias'] = db_alias
+            record['timezone'] = self.get_school_timezone_for_db(db_alias)
+            logger.debug(f"Resolved tenant record for user {user.username}: {db_alias}")
+            
+        except Exception as e:
+            logger.exception(f"Error resolving tenant record for user {user.username}: {e}")
+        
+        return record
 
-            # Cache the result
-            cache.set(cache_key, db_alias, self.CACHE_TIMEOUT)
+    def get_tenant_record_stamp(self, user_id):
+        """
+        Current version stamp of a user's tenant record (one cache lookup).
+        
+        Args:
+            user_id: User ID
             
-            logger.debug(f"Resolved database for user {user.username}: {db_alias}")
-            return db_alias
+        Returns:
+            str: Stamp; a new one is issued when the previous was cleared
+                 or expired (CACHE_TIMEOUT), so records are rebuilt at least
+                 that often even if an invalidation was missed
+        """
+        cache_key = f"tenant_stamp_{user_id}"
+        stamp = tenant_cache.get(cache_key, **self.ROUTING_CACHE)
+        if stamp is None:
+            stamp = uuid.uuid4().hex
+            tenant_cache.set(cache_key, stamp, self.CACHE_TIMEOUT, **self.ROUTING_CACHE)
+        return stamp
 
-        except Exception as e:
-            logger.exception(f"Error resolving database for user {user.username}: {e}")
-            return None
+    # ==========================================================================
+    # USER → SCHOOL → DATABASE RESOLUTION
+    # ==========================================================================
+
+    def get_user_school_database(self, user):
+        """
+        Get database name for user's school.
+        
+        Requests use the session's tenant record instead; this is for
+        callers holding only a user.
+        
+        Args:
+            user: Django User object
+            
+        Returns:
+            str or None: Database alias or None if not found
+        """
+        # Check cache first
+        cache_key = f"user_school_db_{user.id}"
+        cached_db = tenant_cache.get(cache_key, **self.ROUTING_CACHE)
+        if cached_db:
+            return cached_db
+        
+        db_alias = self.build_tenant_record(user)['db_alias']
+        if db_alias:
+            # Cache the result
+            tenant_cache.set(cache_key, db_alias, self.CACHE_TIMEOUT, **self.ROUTING_CACHE)
+        return db_alias
 
     # ==========================================================================
     # TIMEZONE RESOLUTION (PREVENTS RECURSION)
@@ -293,7 +477,7 @@ class SchoolDatabaseMiddleware:
         
         # Check cache first
         cache_key = f"school_tz_{db_name}"
-        cached_tz = cache.get(cache_key)
+        cached_tz = tenant_cache.get(cache_key, **self.ROUTING_CACHE)
         if cached_tz:
             return cached_tz
         
@@ -309,7 +493,7 @@ class SchoolDatabaseMiddleware:
                 if row and row[0]:
                     tz_str = row[0]
                     # Cache for 1 hour
-                    cache.set(cache_key, tz_str, self.CACHE_TIMEOUT)
+                    tenant_cache.set(cache_key, tz_str, self.CACHE_TIMEOUT, **self.ROUTING_CACHE)
                     logger.debug(f"Retrieved timezone for {db_name}: {tz_str}")
                     return tz_str
                 else:
@@ -338,7 +522,7 @@ class SchoolDatabaseMiddleware:
             str or None: Database alias
         """
         cache_key = f"school_db_{school_id}"
-        cached = cache.get(cache_key)
+        cached = tenant_cache.get(cache_key, **self.ROUTING_CACHE)
         if cached:
             return cached
 
@@ -353,8 +537,8 @@ class SchoolDatabaseMiddleware:
 
             if school:
                 db_alias = school.database_alias
-                if db_alias in settings.DATABASES:
-                    cache.set(cache_key, db_alias, self.CACHE_TIMEOUT)
+                if ensure_tenant_database(db_alias):
+                    tenant_cache.set(cache_key, db_alias, self.CACHE_TIMEOUT, **self.ROUTING_CACHE)
                     return db_alias
 
         except Exception as e:
@@ -379,7 +563,7 @@ class SchoolDatabaseMiddleware:
 
         domain = email.split('@')[1].lower()
         cache_key = f"domain_db_{domain}"
-        cached = cache.get(cache_key)
+        cached = tenant_cache.get(cache_key, **self.ROUTING_CACHE)
         if cached:
             return cached
 
@@ -394,8 +578,8 @@ class SchoolDatabaseMiddleware:
 
             if school:
                 db_alias = school.database_alias
-                if db_alias in settings.DATABASES:
-                    cache.set(cache_key, db_alias, self.CACHE_TIMEOUT)
+                if ensure_tenant_database(db_alias):
+                    tenant_cache.set(cache_key, db_alias, self.CACHE_TIMEOUT, **self.ROUTING_CACHE)
                     return db_alias
 
         except Exception as e:
@@ -505,13 +689,16 @@ class SchoolDatabaseMiddleware:
         """
         Check if database name is valid.
         
+        School databases not registered yet are looked up in the School
+        table (see schoolara.tenants).
+        
         Args:
             db_name: Database name to check
             
         Returns:
             bool: True if valid
         """
-        return db_name in settings.DATABASES
+        return ensure_tenant_database(db_name)
 
     def ensure_database_available(self, db_name):
         """
@@ -533,7 +720,8 @@ class SchoolDatabaseMiddleware:
 
     def get_available_school_databases(self):
         """
-        Get list of available school databases from settings.
+        Get list of school databases registered so far (settings and
+        schools already used; others are registered on first use).
         
         Returns:
             list: List of database names (excluding 'default' and 'test_*')
@@ -565,10 +753,7 @@ class SchoolDatabaseMiddleware:
             from schoolara.middleware import SchoolDatabaseMiddleware
             SchoolDatabaseMiddleware.clear_database_cache()
         """
-        cache.delete_many([
-            key for key in cache.keys() 
-            if key.startswith(('user_school_db_', 'school_db_', 'domain_db_', 'school_tz_'))
-        ])
+        tenant_cache.invalidate_namespace(**SchoolDatabaseMiddleware.ROUTING_CACHE)
         logger.info("Cleared database routing cache")
 
     @staticmethod
@@ -576,7 +761,9 @@ class SchoolDatabaseMiddleware:
         """
         Clear cache for specific user.
         
-        Call this when user's school assignment changes.
+        Call this when user's school assignment changes. Also retires the
+        user's tenant record stamp, so every session of the user rebuilds
+        its record on the next request.
         
         Args:
             user_id: User ID
@@ -585,8 +772,10 @@ class SchoolDatabaseMiddleware:
             from schoolara.middleware import SchoolDatabaseMiddleware
             SchoolDatabaseMiddleware.clear_user_cache(user.id)
         """
-        cache_key = f"user_school_db_{user_id}"
-        cache.delete(cache_key)
+        tenant_cache.delete_many(
+            [f"user_school_db_{user_id}", f"tenant_stamp_{user_id}"],
+            **SchoolDatabaseMiddleware.ROUTING_CACHE
+        )
         logger.debug(f"Cleared database cache for user {user_id}")
 
     @staticmethod
@@ -594,7 +783,11 @@ class SchoolDatabaseMiddleware:
         """
         Clear timezone cache for specific database.
         
-        Call this when SchoolConfiguration timezone changes.
+        Call this when SchoolConfiguration timezone changes. Only that
+        school's timezone entry is dropped; the tenant stamps of every user
+        are left alone, so sessions keep their tenant record (and its
+        timezone) until the stamp is renewed (CACHE_TIMEOUT). New records
+        get the new timezone at once.
         
         Args:
             db_name: Database name
@@ -604,7 +797,7 @@ class SchoolDatabaseMiddleware:
             SchoolDatabaseMiddleware.clear_timezone_cache('atepi_palabek')
         """
         cache_key = f"school_tz_{db_name}"
-        cache.delete(cache_key)
+        tenant_cache.delete(cache_key, **SchoolDatabaseMiddleware.ROUTING_CACHE)
         logger.debug(f"Cleared timezone cache for {db_name}")
 
 
@@ -660,6 +853,28 @@ def get_request_database(request):
     return getattr(request, 'current_db', 'default')
 
 
+def get_tenant_record(request):
+    """
+    Get the tenant resolution record set by SchoolDatabaseMiddleware.
+    
+    Usage:
+        from schoolara.middleware import get_tenant_record
+        
+        def my_view(request):
+            record = get_tenant_record(request)
+            if record:
+                logger.info(f"{record['role']} at {record['school_name']}")
+    
+    Args:
+        request: HTTP request
+        
+    Returns:
+        dict or None: Tenant record, or None for anonymous users or when
+                      the middleware did not run
+    """
+    return getattr(request, 'tenant_record', None)
+
+
 def get_request_timezone(request):
     """
     Get the timezone being used for current request.
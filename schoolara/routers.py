@@ -4,6 +4,8 @@ import sys
 from django.conf import settings
 from django.db import connections
 
+from .tenants import is_school_database
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,20 +48,16 @@ class SchoolRouter:
 
     def __init__(self):
         self._error_logged = False
-        self._school_dbs = set()
-        self._update_school_dbs()
-
-    def _update_school_dbs(self):
-        """Cache all school databases from settings"""
-        try:
-            self._school_dbs = {
-                db_name for db_name in settings.DATABASES.keys()
-                if db_name != 'default'
-            }
-            logger.debug(f"School databases: {self._school_dbs}")
-        except Exception as e:
-            logger.error(f"Error updating school databases: {e}")
-            self._school_dbs = set()
+
+    @property
+    def _school_dbs(self):
+        """
+        School databases registered so far.
+        
+        Read on every call rather than snapshotted at startup: schools are
+        registered at runtime by schoolara.tenants.
+        """
+        return {db_name for db_name in settings.DATABASES.keys() if db_name != 'default'}
 
     def _should_use_default_db(self, model):
         label = f"{model._meta.app_label}.{model._meta.model_name}".lower()
@@ -78,8 +76,9 @@ class SchoolRouter:
             if db in connections and db != 'default':
                 return db
             # fallback to first school DB
-            if self._school_dbs:
-                return list(self._school_dbs)[0]
+            school_dbs = self._school_dbs
+            if school_dbs:
+                return sorted(school_dbs)[0]
             # No valid DB set, block read
             return None
         return 'default'
@@ -119,7 +118,7 @@ class SchoolRouter:
             if db == 'default':
                 return False
             # only allow migration to valid school DBs
-            return db in self._school_dbs
+            return is_school_database(db)
 
         # unknown apps migrate to default
         return db == 'default'
@@ -138,14 +138,93 @@ LOGGING = {
 }
 
 # Cache configuration (required for middleware)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-        'TIMEOUT': 3600,  # 1 hour
+# Must be shared by all worker processes: keys are namespaced per school and
+# invalidated with generation counters (see utils/cache.py).
+# Set SCHOOLARA_REDIS_URL (e.g. redis://127.0.0.1:6379/1) to use Redis;
+# otherwise a file based cache under SCHOOLARA_CACHE_DIR is used.
+if os.environ.get('SCHOOLARA_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['SCHOOLARA_REDIS_URL'],
+            'TIMEOUT': 3600,  # 1 hour
+            'KEY_PREFIX': 'schoolara',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('SCHOOLARA_CACHE_DIR', os.path.join(BASE_DIR, 'cache')),
+            'TIMEOUT': 3600,  # 1 hour
+            'OPTIONS': {
+                'MAX_ENTRIES': 20000,
+            },
+        }
     }
+
+# Settings singletons cache (see utils/settings_cache.py)
+SETTINGS_CACHE = {
+    'LOCAL_TTL': 30,      # Seconds a worker trusts its local copy
+    'SHARED_TTL': 3600,   # Seconds an instance stays in the shared cache
+    'MAX_ENTRIES': 256,   # Local LRU size (models x schools)
+}
+
+# Full-text search index (see utils/search.py)
+SEARCH_INDEX = {
+    'MAX_RESULTS': 1000,  # IDs returned by one search
+    'MAX_TOKENS': 200,    # Tokens stored per document
+    'MAX_TERMS': 6,       # Query terms used
+    'BATCH_SIZE': 500,    # Objects per batch when rebuilding
+}
+
+# Streaming exports (see utils/exports.py)
+EXPORTS = {
+    'CHUNK_SIZE': 2000,      # Rows fetched per database round trip
+    'PDF_TABLE_ROWS': 500,   # Rows per PDF table (header repeats per page)
+}
+
+# Background job queue (see utils/jobs.py, run with manage.py run_background_jobs)
+BACKGROUND_JOBS = {
+    'CHUNK_SIZE': 25,       # Items processed per transaction
+    'MAX_ATTEMPTS': 3,      # Tries per item before it stays failed
+    'RETRY_DELAY': 60,      # Seconds before failed items are retried
+    'STALE_AFTER': 600,     # Seconds without progress before a running job is re-queued
+    'POLL_INTERVAL': 5,     # Seconds the worker sleeps when no job is due
+}
+
+# Buffered audit log writer (see utils/audit_writer.py)
+AUDIT_LOG_WRITER = {
+    'MODE': 'sync',       # 'sync' or 'thread' (background writer thread)
+    'MAX_BUFFER': 500,    # Audit rows per batch before an early flush
+    'QUEUE_SIZE': 1000,   # Batches queued for the background writer
 }
 
+# Audit log archival (see utils/audit_archive.py, manage.py audit_archive)
+AUDIT_ARCHIVE = {
+    'ROOT': os.environ.get('SCHOOLARA_AUDIT_ARCHIVE_DIR', os.path.join(BASE_DIR, 'audit_archive')),
+    'RETENTION_DAYS': 180,             # AuditLog rows kept in the database
+    'FINANCIAL_RETENTION_DAYS': 730,   # FinancialAuditLog rows kept in the database
+    'BATCH_SIZE': 5000,                # Rows archived and deleted per transaction
+}
+
+# Cross-school command runner (see utils/school_runner.py, manage.py for_each_school)
+SCHOOL_RUNNER = {
+    'WORKERS': 4,   # Schools processed in parallel (worker processes)
+    'STATE_DIR': os.environ.get('SCHOOLARA_RUNNER_STATE_DIR', os.path.join(BASE_DIR, 'runner_state')),
+}
+
+# Working-day calendar (see academics/school_calendar.py)
+SCHOOL_CALENDAR = {
+    'LOCAL_TTL': 30,      # Seconds a worker trusts its local copy of a year
+    'SHARED_TTL': 86400,  # Seconds a year stays in the shared cache
+    'MAX_ENTRIES': 128,   # Local LRU size (years x schools)
+}
+
+# Serve the HTMX search and stats endpoints as async views (see
+# utils/async_views.py). Enable when running under ASGI (schoolara.asgi).
+ASYNC_HTMX_VIEWS = os.environ.get('SCHOOLARA_ASYNC_HTMX_VIEWS', '').lower() in ('1', 'true', 'yes')
+
 ROOT_URLCONF = 'schoolara.urls'
 
 TEMPLATES = [
@@ -180,34 +259,40 @@ WSGI_APPLICATION = 'schoolara.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'schoolara.db.mysql',
         'NAME': 'schools_core_db',
         'USER': 'root',
         'PASSWORD': '',
         'HOST': 'localhost',
         'PORT': '3306',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
         'OPTIONS': {
             'charset': 'utf8mb4',
         },
     },
     'atepi_palabek': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'schoolara.db.mysql',
         'NAME': 'atepi_palabek_db',
         'USER': 'root',
         'PASSWORD': '',
         'HOST': 'localhost',
         'PORT': '3306',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
         'OPTIONS': {
             'charset': 'utf8mb4',
         },
     },
     'atepi_pajok': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'schoolara.db.mysql',
         'NAME': 'atepi_pajok_db',
         'USER': 'root',
         'PASSWORD': '',
         'HOST': 'localhost',
         'PORT': '3306',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
         'OPTIONS': {
             'charset': 'utf8mb4',
         },
@@ -216,6 +301,25 @@ DATABASES = {
 
 DATABASE_ROUTERS = ['schoolara.routers.SchoolRouter']
 
+# School databases beyond the ones above are registered at runtime from the
+# School table (see schoolara/tenants.py)
+TENANT_REGISTRY = {
+    'DATABASE': None,              # Shared connection settings (None: 'default' without NAME)
+    'NAME_FORMAT': '{alias}_db',   # Database name of schools without database_name
+    'MAX_OPEN_CONNECTIONS': 20,    # Tenant connections kept open per worker thread
+    'IDLE_TIMEOUT': 300,           # Seconds before an unused tenant connection is closed
+    'CHECK_INTERVAL': 30,          # Seconds a worker trusts its registered connection settings
+    'MISS_TTL': 60,                # Seconds an unknown alias is remembered as unknown
+}
+
+# Persistent connections with per-school budgets (see schoolara/db/pool.py)
+DATABASE_POOL = {
+    'MAX_CONNECTIONS': 10,         # Connections in use per school database per worker process
+    'DATABASE_LIMITS': {},         # Per-alias overrides, e.g. {'default': 30}
+    'TIMEOUT': 10,                 # Seconds to wait for a connection within the budget
+    'HEALTH_CHECK_IDLE': 30,       # Idle seconds after which a reused connection is pinged
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,407 @@
+# tenants.py
+
+"""
+Registry of school (tenant) databases.
+
+School databases used to be listed in settings.DATABASES, so onboarding a
+school meant editing settings and restarting every worker, and the router
+and middleware only knew the databases present at startup. The registry is
+driven by the accounts.School table instead:
+
+- A school's connection is registered (added to settings.DATABASES, which
+  is the dict django.db.connections reads) the first time its alias is
+  used, built from settings.TENANT_REGISTRY['DATABASE'] plus the school's
+  own database_name / database_host / database_port. A school created at
+  runtime is usable by every worker without a restart.
+- Aliases already in settings.DATABASES keep working unchanged (static
+  tenants).
+- Connections are per thread in Django. Each thread keeps at most
+  MAX_OPEN_CONNECTIONS tenant connections and closes the least recently
+  used ones, and those idle for IDLE_TIMEOUT seconds. Open connections and
+  connection objects therefore follow the schools a worker actually serves,
+  not every school in the system. The number of connections per school
+  and process in use at once is bounded by the connection budgets of
+  schoolara.db.pool.
+
+Saving a School bumps the shared 'tenants' namespace (accounts.signals);
+processes re-read the connection parameters of their registered schools at
+most CHECK_INTERVAL seconds later.
+
+Configuration (settings.TENANT_REGISTRY, all keys optional):
+    DATABASE: Connection settings shared by tenant databases (default: those
+              of 'default' without NAME). Credentials belong here, not in the
+              School table.
+    NAME_FORMAT: Database name of a school without database_name.
+    MAX_OPEN_CONNECTIONS: Tenant connections kept open per thread.
+    IDLE_TIMEOUT: Seconds before an unused tenant connection is closed.
+    CHECK_INTERVAL: Seconds a process trusts its registrations.
+    MISS_TTL: Seconds an unknown alias is remembered as unknown.
+
+Example:
+    from schoolara.tenants import ensure_tenant_database, get_school_databases
+
+    if ensure_tenant_database(school.database_alias):
+        with DatabaseContext(school.database_alias):
+            ...
+
+    for db in get_school_databases():
+        ...
+"""
+
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT_SETTINGS = {
+    'DATABASE': None,
+    'NAME_FORMAT': '{alias}_db',
+    'MAX_OPEN_CONNECTIONS': 20,
+    'IDLE_TIMEOUT': 300,
+    'CHECK_INTERVAL': 30,
+    'MISS_TTL': 60,
+}
+
+CACHE_NAMESPACE = 'tenants'
+
+# Aliases registered from the School table: {alias: School connection fields}
+_registered = {}
+# Aliases not found in the School table: {alias: expires_at}
+_misses = {}
+# (shared registry key, next check time) of this process
+_checked = {'key': None, 'next_check': 0}
+_registry_lock = threading.RLock()
+
+# Tenant connections used by this thread: {alias: last used (monotonic)}
+_thread_state = threading.local()
+
+
+def get_tenant_settings():
+    """
+    Get the tenant registry configuration merged with defaults.
+
+    Returns:
+        dict: DATABASE, NAME_FORMAT, MAX_OPEN_CONNECTIONS, IDLE_TIMEOUT,
+              CHECK_INTERVAL and MISS_TTL
+    """
+    config = dict(DEFAULT_TENANT_SETTINGS)
+    config.update(getattr(settings, 'TENANT_REGISTRY', {}) or {})
+    return config
+
+
+# =============================================================================
+# REGISTRATION
+# =============================================================================
+
+def is_school_database(alias):
+    """
+    Check if an alias is a registered school database (no query).
+
+    Args:
+        alias (str): Database alias
+
+    Returns:
+        bool: True if registered and not 'default'
+    """
+    return bool(alias) and alias != 'default' and alias in settings.DATABASES
+
+
+def ensure_tenant_database(alias):
+    """
+    Make sure a school database is registered, registering it if needed.
+
+    Registered aliases cost no query. An unknown alias is looked up in the
+    School table once (and remembered as unknown for MISS_TTL seconds).
+
+    Args:
+        alias (str): Database alias
+
+    Returns:
+        bool: True if the alias can be used with connections[alias]
+    """
+    if not alias:
+        return False
+
+    _check_registry()
+
+    if alias in settings.DATABASES:
+        return True
+
+    now = time.monotonic()
+    with _registry_lock:
+        if _misses.get(alias, 0) > now:
+            return False
+
+    fields = _load_school_fields(aliases=[alias]).get(alias)
+    if fields is None:
+        with _registry_lock:
+            _misses[alias] = now + get_tenant_settings()['MISS_TTL']
+        return False
+
+    register_tenant_database(alias, **fields)
+    return True
+
+
+def register_tenant_database(alias, database_name='', database_host='', database_port=''):
+    """
+    Register (or update) the connection settings of a school database.
+
+    Args:
+        alias (str): Database alias (School.database_alias)
+        database_name (str): Database name (default: NAME_FORMAT)
+        database_host (str): Host (default: the DATABASE template's)
+        database_port (str): Port (default: the DATABASE template's)
+
+    Returns:
+        dict: The connection settings
+    """
+    if alias == 'default':
+        raise ValueError("The 'default' database is not a tenant database")
+
+    fields = {
+        'database_name': database_name or '',
+        'database_host': database_host or '',
+        'database_port': str(database_port or ''),
+    }
+    config = _build_database_settings(alias, **fields)
+
+    # Fill in Django's defaults (ATOMIC_REQUESTS, TEST, ...) before publishing
+    connections.configure_settings({'default': settings.DATABASES['default'], alias: config})
+
+    with _registry_lock:
+        current = settings.DATABASES.get(alias)
+        if current is not None and _registered.get(alias, fields) == fields:
+            # Unchanged, or a static alias (settings win over the School table)
+            return current
+
+        if current is None:
+            # Copy-on-write, so threads iterating the aliases are not disturbed
+            databases = dict(settings.DATABASES)
+            databases[alias] = config
+            settings.DATABASES = databases
+            connections.settings = databases
+        else:
+            # Updated in place: connection objects of other threads keep a
+            # reference to this dict and reconnect with the new parameters
+            current.update(config)
+            config = current
+            _forget_connection(alias)
+
+        _registered[alias] = fields
+        _misses.pop(alias, None)
+
+    logger.info(f"Registered school database: {alias} ({config.get('NAME')})")
+    return config
+
+
+def get_school_databases():
+    """
+    List the school databases, registering all of them.
+
+    Used by management commands that run on every school. Static aliases
+    (in settings.DATABASES but not in the School table) are included.
+
+    Returns:
+        list: Database aliases, sorted
+    """
+    _check_registry()
+
+    for alias, fields in _load_school_fields().items():
+        register_tenant_database(alias, **fields)
+
+    return sorted(
+        alias for alias in settings.DATABASES
+        if alias != 'default' and not alias.startswith('test_')
+    )
+
+
+def invalidate_tenant_registry():
+    """
+    Make every process re-read the connection settings of its schools.
+
+    Called when a School is saved or deleted (accounts.signals).
+    """
+    from utils.cache import tenant_cache
+
+    tenant_cache.invalidate_namespace(CACHE_NAMESPACE, using='default')
+    with _registry_lock:
+        _misses.clear()
+        _checked['next_check'] = 0
+    logger.debug("Invalidated tenant registry")
+
+
+# =============================================================================
+# CONNECTION LRU
+# =============================================================================
+
+def touch_tenant_connection(alias):
+    """
+    Record that this thread is using a school database, then close the
+    thread's surplus and idle tenant connections.
+
+    Called whenever the current database is switched (set_current_db).
+
+    Args:
+        alias (str): Database alias
+    """
+    if not is_school_database(alias):
+        return
+
+    used = _get_used_connections()
+    used[alias] = time.monotonic()
+    used.move_to_end(alias)
+    release_tenant_connections(keep=alias)
+
+
+def release_tenant_connections(keep=None, idle_timeout=None, max_open=None):
+    """
+    Close this thread's least recently used and idle tenant connections.
+
+    Connections inside a transaction (atomic block) are never closed.
+    Closed connection objects are dropped, so their memory is released too;
+    the next use of the alias opens a new connection.
+
+    Args:
+        keep (str): Alias never closed (the one being switched to)
+        idle_timeout (int): Override of IDLE_TIMEOUT (0 closes all)
+        max_open (int): Override of MAX_OPEN_CONNECTIONS
+
+    Returns:
+        int: Number of connections closed
+    """
+    config = get_tenant_settings()
+    idle_timeout = config['IDLE_TIMEOUT'] if idle_timeout is None else idle_timeout
+    max_open = config['MAX_OPEN_CONNECTIONS'] if max_open is None else max_open
+
+    used = _get_used_connections()
+    open_connections = {
+        connection.alias: connection
+        for connection in connections.all(initialized_only=True)
+        if is_school_database(connection.alias)
+    }
+
+    # Forget aliases whose connection object no longer exists (keep is
+    # counted even before its connection is opened)
+    for alias in [alias for alias in used if alias not in open_connections and alias != keep]:
+        del used[alias]
+    for alias in open_connections:
+        if alias not in used:
+            used[alias] = time.monotonic()
+
+    now = time.monotonic()
+    surplus = len(used) - max_open
+    closed = 0
+
+    # Oldest first
+    for alias, last_used in list(used.items()):
+        if alias == keep or open_connections[alias].in_atomic_block:
+            continue
+        if surplus <= 0 and now - last_used < idle_timeout:
+            continue
+
+        _forget_connection(alias)
+        del used[alias]
+        surplus -= 1
+        closed += 1
+
+    if closed:
+        logger.debug(f"Closed {closed} tenant connections, {len(used)} open")
+    return closed
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def _build_database_settings(alias, database_name='', database_host='', database_port=''):
+    """Connection settings of a school database from the template."""
+    config = get_tenant_settings()
+
+    template = config['DATABASE']
+    if template is None:
+        template = {
+            key: value for key, value in settings.DATABASES['default'].items()
+            if key not in ('NAME', 'TEST')
+        }
+
+    database = copy.deepcopy(template)
+    database['NAME'] = database_name or config['NAME_FORMAT'].format(alias=alias)
+    if database_host:
+        database['HOST'] = database_host
+    if database_port:
+        database['PORT'] = database_port
+    return database
+
+
+def _load_school_fields(aliases=None):
+    """Connection fields of schools from the School table (one query)."""
+    from django.apps import apps
+
+    School = apps.get_model('accounts', 'School')
+    schools = School.objects.using('default').exclude(database_alias='default')
+    if aliases is not None:
+        schools = schools.filter(database_alias__in=aliases)
+
+    try:
+        rows = list(schools.values_list('database_alias', 'database_name', 'database_host', 'database_port'))
+    except Exception as e:
+        logger.error(f"Could not load school databases: {e}")
+        return {}
+
+    return {
+        alias: {'database_name': name, 'database_host': host, 'database_port': port}
+        for alias, name, host, port in rows
+        if alias
+    }
+
+
+def _check_registry():
+    """
+    Re-read the connection fields of registered schools when the shared
+    registry key changed (at most every CHECK_INTERVAL seconds).
+    """
+    now = time.monotonic()
+    if _checked['next_check'] > now:
+        return
+
+    from utils.cache import tenant_cache
+
+    # The key embeds the namespace generation, so it changes on invalidation
+    shared_key = tenant_cache.make_key('registry', CACHE_NAMESPACE, 'default')
+
+    with _registry_lock:
+        changed = _checked['key'] is not None and _checked['key'] != shared_key
+        _checked['key'] = shared_key
+        _checked['next_check'] = now + get_tenant_settings()['CHECK_INTERVAL']
+        registered = list(_registered)
+
+    if changed and registered:
+        current = _load_school_fields(aliases=registered)
+        for alias, fields in current.items():
+            register_tenant_database(alias, **fields)
+        logger.debug(f"Rechecked {len(registered)} registered school databases")
+
+
+def _get_used_connections():
+    used = getattr(_thread_state, 'used', None)
+    if used is None:
+        used = _thread_state.used = OrderedDict()
+    return used
+
+
+def _forget_connection(alias):
+    """Close this thread's connection to alias and drop the connection object."""
+    for connection in connections.all(initialized_only=True):
+        if connection.alias == alias:
+            try:
+                connection.close()
+            except Exception as e:
+                logger.warning(f"Error closing connection to {alias}: {e}")
+            del connections[alias]
+            break